@@ -472,6 +472,16 @@ def create_app(config_class: Union[str, type] = "config.Config") -> Flask:
     app.register_blueprint(expenses_bp, url_prefix="/expenses")
     app.register_blueprint(help_bp, url_prefix="/help")
 
+    from app.services.maintenance import register_maintenance_commands
+    from app.services.mail_outbox import register_mail_outbox_commands
+    from app.services.workflow_notifications import (
+        register_workflow_notification_commands,
+    )
+
+    register_maintenance_commands(app)
+    register_mail_outbox_commands(app)
+    register_workflow_notification_commands(app)
+
 
     @app.route("/", methods=["GET"])
     def index() -> str:
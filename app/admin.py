@@ -27,6 +27,7 @@ from flask import (
 )
 from flask_login import current_user
 from flask_wtf import FlaskForm
+from sqlalchemy.orm import defer, lazyload, selectinload
 from flask_wtf.file import FileAllowed, FileField, FileRequired
 from wtforms import (
     BooleanField,
@@ -43,42 +44,72 @@ from .scripts.import_air_rates import save_unique
 from .models import (
     AppSetting,
     CostZone,
+    ExpenseLine,
+    ExpenseReferenceVersion,
     ExpenseReport,
+    OutboundEmail,
     User,
     db,
 )
 from . import csrf
 from .policies import employee_required, super_admin_required
-from app.services.expense_workflow import apply_line_item_review_actions
+from app.services.expense_workflow import (
+    ReportConflictError,
+    ReportSummary,
+    apply_bulk_review_action,
+    apply_line_item_review_actions,
+    commit_report_review,
+    ensure_report_version,
+    parse_line_review_form,
+    summarize_reports,
+)
+from app.services.jobs import latest_job
+from app.services.mail_outbox import (
+    MAIL_OUTBOX_JOB,
+    OUTBOX_STATUSES,
+    outbox_status_counts,
+    requeue_outbound_email,
+    start_outbox_worker,
+)
+from app.services.receipts import find_duplicate_receipts
+from app.services.reference_data import (
+    ExpenseReferenceDataError,
+    publish_reference_workbook,
+)
 from app.services.rate_sets import (
     DEFAULT_RATE_SET,
     get_available_rate_sets,
     normalize_rate_set,
 )
 from app.services.settings import get_settings_cache, reload_overrides, set_setting
+from app.services.workflow_notifications import (
+    notify_workflow_recipients,
+    record_report_returned,
+)
 
 admin_bp = Blueprint("admin", __name__, template_folder="templates")
 
 
-def _pending_review_reports() -> List[ExpenseReport]:
+def _pending_review_reports() -> List[ReportSummary]:
     """Return expense reports that are awaiting supervisor review.
 
     Inputs:
         None.
 
     Outputs:
-        A list of :class:`app.models.ExpenseReport` records ordered by oldest
-        submission first so the admin dashboard can surface priority reviews.
+        A list of :class:`app.services.expense_workflow.ReportSummary` rows
+        ordered by oldest submission first so the admin dashboard can surface
+        priority reviews alongside each report's total.
 
     External dependencies:
-        * Queries :class:`app.models.ExpenseReport` via SQLAlchemy to filter on
-          ``status="Pending Review"``.
+        * Calls :func:`app.services.expense_workflow.summarize_reports` to
+          filter on ``status="Pending Review"`` and aggregate line totals.
     """
 
-    return (
-        ExpenseReport.query.filter_by(status="Pending Review")
-        .order_by(ExpenseReport.created_at.asc())
-        .all()
+    return summarize_reports(
+        ExpenseReport.status == "Pending Review",
+        order_by=(ExpenseReport.created_at.asc(), ExpenseReport.id.asc()),
+        eager=(ExpenseReport.employee,),
     )
 
 
@@ -200,6 +231,15 @@ class CSVUploadForm(FlaskForm):
     )
 
 
+class ReferenceWorkbookForm(FlaskForm):
+    """Form for uploading a replacement expense reference workbook."""
+
+    file = FileField(
+        "Reference workbook",
+        validators=[FileRequired(), FileAllowed(["xlsx"], "Excel .xlsx files only!")],
+    )
+
+
 def _parse_rate_set(
     raw_value: Any,
     *,
@@ -469,39 +509,115 @@ def review_report(report_id: int) -> Union[str, Response]:
 
     External dependencies:
         * Calls :func:`app.services.expense_workflow.apply_line_item_review_actions`
+          for per-line decisions, or
+          :func:`app.services.expense_workflow.apply_bulk_review_action` when a
+          ``bulk_action`` button is used,
           to update line statuses and report status.
         * Uses :class:`app.models.ExpenseReport` to load persisted report data.
-        * Writes updates through :data:`app.models.db.session`.
+        * Commits via :func:`app.services.expense_workflow.commit_report_review`,
+          which rejects the review if the report changed since it was loaded.
+        * Calls
+          :func:`app.services.workflow_notifications.record_report_returned`
+          before the commit and
+          :func:`app.services.workflow_notifications.notify_workflow_recipients`
+          after it.
     """
 
-    report = ExpenseReport.query.get_or_404(report_id)
+    bulk_action = (request.form.get("bulk_action") or "").strip()
+    report_query = ExpenseReport.query.filter(ExpenseReport.id == report_id)
+    if bulk_action:
+        # Bulk decisions are applied in SQL; skip the mapper's joined load of
+        # every line.
+        report_query = report_query.options(lazyload(ExpenseReport.lines))
+    else:
+        # Only load lines to render them or to apply per-line decisions.
+        report_query = report_query.options(
+            selectinload(ExpenseReport.lines).joinedload(ExpenseLine.receipt_blob)
+        )
+    report = report_query.first_or_404()
     if report.status != "Pending Review":
         flash("That report is not awaiting review.", "info")
         return redirect(url_for("admin.dashboard"))
 
     if request.method == "POST":
-        decisions = {
-            line.id: (
-                request.form.get(f"line_{line.id}_action") or "",
-                request.form.get(f"line_{line.id}_comment") or "",
-            )
-            for line in report.lines
-        }
-
         try:
-            message, category = apply_line_item_review_actions(
-                report, decisions=decisions
-            )
-        except ValueError as exc:
+            ensure_report_version(report, request.form.get("report_version", type=int))
+            if bulk_action:
+                message, category = apply_bulk_review_action(
+                    report,
+                    action=bulk_action,
+                    line_ids=request.form.getlist("selected_line", type=int),
+                    comment=request.form.get("bulk_comment") or "",
+                )
+            else:
+                message, category = apply_line_item_review_actions(
+                    report, decisions=parse_line_review_form(request.form)
+                )
+        except (ReportConflictError, ValueError) as exc:
             flash(str(exc), "warning")
             return redirect(url_for("admin.review_report", report_id=report_id))
 
-        db.session.add(report)
-        db.session.commit()
+        notification = record_report_returned(report)
+        try:
+            commit_report_review(report)
+        except ReportConflictError as exc:
+            flash(str(exc), "warning")
+            return redirect(url_for("admin.review_report", report_id=report_id))
+        notify_workflow_recipients(notification)
         flash(message, category)
         return redirect(url_for("admin.dashboard"))
 
-    return render_template("expenses/review_report.html", report=report)
+    return render_template(
+        "expenses/review_report.html",
+        report=report,
+        duplicate_receipts=find_duplicate_receipts(report.id),
+    )
+
+
+@admin_bp.route("/reference-workbook", methods=["GET", "POST"])
+@super_admin_required
+def reference_workbook() -> Union[str, Response]:
+    """Upload and review the expense reference workbook versions.
+
+    Inputs:
+        ``POST`` requests carry an ``.xlsx`` file in ``request.files``.
+
+    Outputs:
+        The upload page listing recent versions, or a redirect after a
+        successful upload. Invalid workbooks re-render the form with HTTP 400.
+
+    External dependencies:
+        * Calls :func:`app.services.reference_data.publish_reference_workbook`
+          to validate and store the GL accounts and expense types. Every
+          worker switches to the new version on its next version check.
+    """
+
+    form = ReferenceWorkbookForm()
+    if form.validate_on_submit():
+        try:
+            version = publish_reference_workbook(form.file.data, user=current_user)
+        except ExpenseReferenceDataError as exc:
+            form.file.errors.append(str(exc))
+        else:
+            flash(
+                f"Reference workbook version {version.id} published with "
+                f"{version.gl_account_count} GL account(s) and "
+                f"{version.expense_type_count} expense type(s).",
+                "success",
+            )
+            return redirect(url_for("admin.reference_workbook"))
+
+    versions = (
+        ExpenseReferenceVersion.query.options(defer(ExpenseReferenceVersion.payload))
+        .order_by(ExpenseReferenceVersion.id.desc())
+        .limit(10)
+        .all()
+    )
+    status = 400 if request.method == "POST" else 200
+    return (
+        render_template("admin_reference_workbook.html", form=form, versions=versions),
+        status,
+    )
 
 
 @admin_bp.route("/settings")
@@ -607,6 +723,69 @@ def delete_setting(setting_id: int) -> Response:
     return redirect(url_for("admin.list_settings"))
 
 
+@admin_bp.route("/mail-outbox")
+@super_admin_required
+def mail_outbox() -> str:
+    """Show delivery status for queued outbound email.
+
+    Inputs:
+        Optional ``status`` query parameter limiting the listed rows.
+
+    Returns:
+        str: Rendered ``admin_mail_outbox.html`` with per-status counts, the
+        most recent 100 matching :class:`app.models.OutboundEmail` rows and
+        the latest outbox worker job.
+
+    External dependencies:
+        * :func:`app.services.mail_outbox.outbox_status_counts`.
+        * :func:`app.services.jobs.latest_job`.
+    """
+
+    status = request.args.get("status") or None
+    if status not in OUTBOX_STATUSES:
+        status = None
+    query = OutboundEmail.query.options(defer(OutboundEmail.body))
+    if status:
+        query = query.filter(OutboundEmail.status == status)
+    emails = query.order_by(OutboundEmail.id.desc()).limit(100).all()
+    return render_template(
+        "admin_mail_outbox.html",
+        counts=outbox_status_counts(),
+        emails=emails,
+        selected_status=status,
+        statuses=OUTBOX_STATUSES,
+        job=latest_job(MAIL_OUTBOX_JOB),
+    )
+
+
+@admin_bp.route("/mail-outbox/drain", methods=["POST"])
+@super_admin_required
+def drain_mail_outbox() -> Response:
+    """Start the outbox worker so queued email is sent now."""
+
+    start_outbox_worker()
+    flash("Mail outbox worker started.", "success")
+    return redirect(url_for("admin.mail_outbox"))
+
+
+@admin_bp.route("/mail-outbox/<int:email_id>/retry", methods=["POST"])
+@super_admin_required
+def retry_outbound_email(email_id: int) -> Response:
+    """Requeue a failed outbound email and start the outbox worker."""
+
+    email = db.session.get(OutboundEmail, email_id)
+    if email is None:
+        abort(404)
+    try:
+        requeue_outbound_email(email)
+    except ValueError as exc:
+        flash(str(exc), "warning")
+    else:
+        start_outbox_worker()
+        flash(f"Requeued email to {email.recipient}.", "success")
+    return redirect(url_for("admin.mail_outbox", status=request.args.get("status")))
+
+
 @admin_bp.route("/toggle/<int:user_id>", methods=["POST"])
 @super_admin_required
 def toggle_active(user_id: int) -> Response:
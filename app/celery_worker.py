@@ -0,0 +1,11 @@
+"""Celery worker entrypoint for background jobs.
+
+Start a worker with ``celery -A app.celery_worker worker`` when
+``BACKGROUND_JOB_EXECUTOR`` is set to ``"celery"``.
+"""
+
+from app import create_app
+from app.services.jobs import get_celery
+
+flask_app = create_app()
+celery = get_celery(flask_app)
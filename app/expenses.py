@@ -2,38 +2,92 @@
 
 from __future__ import annotations
 
-from datetime import date, datetime
+import hashlib
+import mimetypes
+from datetime import datetime
 from decimal import Decimal, InvalidOperation
-from io import BytesIO
-from typing import List
+from typing import List, Optional, Tuple
 
 from flask import (
     Blueprint,
     Response,
+    abort,
+    current_app,
     flash,
     jsonify,
     redirect,
     render_template,
     request,
     send_file,
+    stream_with_context,
     url_for,
 )
 from flask_login import current_user, login_required
+from sqlalchemy import insert, or_, select
+from sqlalchemy.orm import lazyload, selectinload
 
-from .models import ExpenseLine, ExpenseReport, User, db
+from .models import BackgroundJob, ExpenseLine, ExpenseReport, User, db
 from .policies import employee_required, super_admin_required, supervisor_required
+from app.services.expense_export import (
+    iter_monthly_reports_zip,
+    report_export_filename,
+    report_workbook_bytes,
+)
+from app.services.expense_import import (
+    DEFAULT_MAX_IMPORT_LINES,
+    MAX_LINE_AMOUNT,
+    ExpenseImportError,
+    import_expense_workbook,
+    quantize_line_amount,
+)
 from app.services.expense_workflow import (
+    DEFAULT_DASHBOARD_PAGE_SIZE,
     ExpenseReferenceDataError,
+    ReportConflictError,
+    apply_bulk_review_action,
     apply_line_item_review_actions,
-    dispatch_csv_via_sftp,
-    format_pending_reports_csv,
+    commit_report_review,
+    ensure_report_version,
+    iter_pending_upload_csv,
     load_expense_types,
     load_gl_accounts,
-    upload_receipt_to_cloud_storage,
+    paginate_supervisor_queue,
+    parse_line_review_form,
+    reference_data_version,
+    summarize_reports,
+)
+from app.services.gl_search import (
+    DEFAULT_SEARCH_LIMIT,
+    MAX_SEARCH_LIMIT,
+    get_gl_account_index,
+)
+from app.services.http_cache import (
+    conditional_json_response,
+    conditional_response,
+    precomputed_json,
+)
+from app.services.jobs import enqueue_job, latest_job, serialize_job
+from app.services.netsuite_dispatch import NETSUITE_DISPATCH_JOB
+from app.services.receipt_derivatives import enqueue_receipt_derivatives
+from app.services.receipts import (
+    LocalReceiptBackend,
+    PendingReceipt,
+    ReceiptUploadError,
+    find_duplicate_receipts,
+    get_receipt_backend,
+    receipt_report_ids,
+    upload_report_receipts,
+)
+from app.services.workflow_notifications import (
+    notify_workflow_recipients,
+    record_report_returned,
+    record_report_submitted,
 )
 
 expenses_bp = Blueprint("expenses", __name__, template_folder="templates")
 
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
 
 def _gl_account_code_set() -> set[str]:
     """Return the set of valid GL account codes from the workbook source.
@@ -50,6 +104,163 @@ def _gl_account_code_set() -> set[str]:
     return {option.account for option in load_gl_accounts() if option.account}
 
 
+def _supervisor_choices() -> List[User]:
+    """Return approved supervisors the current user may submit reports to."""
+
+    return (
+        User.query.filter(
+            User.id != current_user.id,
+            User.role == "supervisor",
+            User.employee_approved.is_(True),
+        )
+        .order_by(User.first_name.asc(), User.last_name.asc())
+        .all()
+    )
+
+
+def _parse_report_header(form) -> Optional[dict]:
+    """Validate the report-level fields shared by the entry and import forms.
+
+    Inputs:
+        form: Submitted ``request.form`` with ``supervisor_id``,
+            ``report_month``, ``notes`` and ``submit_action``.
+
+    Outputs:
+        Keyword arguments for :class:`app.models.ExpenseReport`, or ``None``
+        after flashing a warning when a field is invalid.
+
+    External dependencies:
+        * Queries :class:`app.models.User` for the selected supervisor.
+    """
+
+    supervisor_id_raw = (form.get("supervisor_id") or "").strip()
+    report_month_raw = (form.get("report_month") or "").strip()
+    notes = (form.get("notes") or "").strip()
+    submit_action = (form.get("submit_action") or "save_draft").strip()
+
+    try:
+        supervisor_id = int(supervisor_id_raw)
+    except ValueError:
+        flash("Select a valid supervisor.", "warning")
+        return None
+
+    supervisor = User.query.filter(
+        User.id == supervisor_id,
+        User.role == "supervisor",
+        User.employee_approved.is_(True),
+    ).first()
+    if not supervisor:
+        flash("Selected supervisor was not found.", "warning")
+        return None
+
+    try:
+        report_month = (
+            datetime.strptime(report_month_raw, "%Y-%m").date().replace(day=1)
+        )
+    except ValueError:
+        flash("Choose a valid report month.", "warning")
+        return None
+
+    return {
+        "supervisor_id": supervisor_id,
+        "report_month": report_month,
+        "notes": notes,
+        "status": "Pending Review" if submit_action == "submit_review" else "Draft",
+    }
+
+
+MAX_FLASHED_LINE_ERRORS = 10
+
+
+def _parse_expense_lines(
+    form, valid_gl_accounts: set[str]
+) -> Tuple[List[dict], List[str]]:
+    """Validate every submitted expense line in a single pass.
+
+    Inputs:
+        form: Submitted ``request.form`` holding the parallel ``line_date``,
+            ``expense_type``, ``gl_account``, ``vendor``, ``description`` and
+            ``amount`` lists.
+        valid_gl_accounts: Approved GL account codes.
+
+    Outputs:
+        ``(rows, errors)`` where ``rows`` are column mappings ready for a bulk
+        :class:`app.models.ExpenseLine` insert, each tagged with its form
+        ``line_index``, and ``errors`` lists every problem found. Lines
+        without a date are skipped.
+
+    External dependencies:
+        None.
+    """
+
+    dates = form.getlist("line_date")
+    types = form.getlist("expense_type")
+    gls = form.getlist("gl_account")
+    vendors = form.getlist("vendor")
+    descriptions = form.getlist("description")
+    amounts = form.getlist("amount")
+
+    def _value(values: List[str], index: int) -> str:
+        return (values[index] if index < len(values) else "").strip()
+
+    rows: List[dict] = []
+    errors: List[str] = []
+    for index, line_date_raw in enumerate(dates):
+        if not line_date_raw.strip():
+            continue
+        line_errors: List[str] = []
+        try:
+            line_date = datetime.strptime(line_date_raw.strip(), "%Y-%m-%d").date()
+        except ValueError:
+            line_errors.append(f"Line {index + 1}: invalid date.")
+
+        try:
+            amount = Decimal(_value(amounts, index))
+        except InvalidOperation:
+            amount = None
+        if amount is None or not amount.is_finite():
+            line_errors.append(f"Line {index + 1}: amount must be numeric.")
+        else:
+            amount = quantize_line_amount(amount)
+            if amount is None:
+                line_errors.append(
+                    f"Line {index + 1}: amount must be less than "
+                    f"{MAX_LINE_AMOUNT:,.0f}."
+                )
+
+        gl_account = _value(gls, index)
+        if gl_account not in valid_gl_accounts:
+            line_errors.append(
+                f"Line {index + 1}: select a GL account from the approved list."
+            )
+
+        if line_errors:
+            errors.extend(line_errors)
+            continue
+        rows.append(
+            {
+                "line_index": index,
+                "date": line_date,
+                "expense_type": _value(types, index),
+                "gl_account": gl_account,
+                "vendor": _value(vendors, index),
+                "description": _value(descriptions, index),
+                "amount": amount,
+            }
+        )
+    return rows, errors
+
+
+def _flash_line_errors(errors: List[str]) -> None:
+    """Flash each line error, summarising any beyond the display cap."""
+
+    for message in errors[:MAX_FLASHED_LINE_ERRORS]:
+        flash(message, "warning")
+    hidden = len(errors) - MAX_FLASHED_LINE_ERRORS
+    if hidden > 0:
+        flash(f"{hidden} more line error(s) were not shown.", "warning")
+
+
 @expenses_bp.get("/gl-accounts")
 @login_required
 @employee_required(approved_only=True)
@@ -59,22 +270,74 @@ def gl_accounts_options() -> Response:
     Returns:
         JSON payload containing ``account`` and ``label`` values for each GL
         account defined by :func:`app.services.expense_workflow.load_gl_accounts`.
+        The body is serialized once per reference data version and carries a
+        strong ``ETag``, so repeat requests with ``If-None-Match`` receive
+        ``304 Not Modified``.
+
+    External dependencies:
+        * Calls :func:`app.services.expense_workflow.reference_data_version`
+          and :func:`app.services.expense_workflow.load_gl_accounts`.
+        * Uses :func:`app.services.http_cache.precomputed_json` to cache the
+          serialized body.
+    """
+
+    def _build_payload() -> dict:
+        return {
+            "accounts": [
+                {"account": option.account, "label": option.label}
+                for option in load_gl_accounts()
+                if option.account
+            ]
+        }
+
+    try:
+        payload = precomputed_json(
+            "gl-accounts", reference_data_version(), _build_payload
+        )
+    except ExpenseReferenceDataError as exc:
+        return jsonify({"error": str(exc)}), 503
+
+    return conditional_json_response(payload)
+
+
+@expenses_bp.get("/gl-accounts/search")
+@login_required
+@employee_required(approved_only=True)
+def gl_accounts_search() -> Response:
+    """Return the GL accounts that best match a typeahead query.
+
+    Inputs:
+        ``q`` query parameter with the text typed so far, and an optional
+        ``limit`` (default 20, at most 50).
+
+    Outputs:
+        JSON payload with the ranked ``accounts`` matches. Responses carry an
+        ``ETag`` derived from the reference data version and the query, so
+        repeated lookups are answered with ``304 Not Modified``.
 
     External dependencies:
-        * Calls :func:`app.services.expense_workflow.load_gl_accounts`.
-        * Uses :func:`flask.jsonify` to serialize response data.
+        * Calls :func:`app.services.expense_workflow.load_gl_accounts` and
+          searches it through :func:`app.services.gl_search.get_gl_account_index`.
     """
 
+    query = (request.args.get("q") or "").strip()[:100]
+    limit = request.args.get("limit", DEFAULT_SEARCH_LIMIT, type=int)
+    limit = max(1, min(limit or DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT))
+
     try:
-        options = [
-            {"account": option.account, "label": option.label}
-            for option in load_gl_accounts()
-            if option.account
-        ]
+        index = get_gl_account_index(load_gl_accounts())
     except ExpenseReferenceDataError as exc:
         return jsonify({"error": str(exc)}), 503
 
-    return jsonify({"accounts": options})
+    matches = [
+        {"account": option.account, "label": option.label}
+        for option in index.search(query, limit=limit)
+    ]
+    response = jsonify({"query": query, "accounts": matches})
+    etag_source = f"{index.version}:{limit}:{query}"
+    return conditional_response(
+        response, hashlib.sha1(etag_source.encode()).hexdigest()
+    )
 
 
 @expenses_bp.route("/new", methods=["GET", "POST"])
@@ -97,20 +360,16 @@ def new_expense() -> str | Response:
         * Calls :func:`app.services.expense_workflow.load_gl_accounts` and
           :func:`app.services.expense_workflow.load_expense_types` for form
           choices.
-        * Calls :func:`app.services.expense_workflow.upload_receipt_to_cloud_storage`
-          for receipt uploads.
-        * Writes report and line rows through :mod:`app.models.db`.
+        * Calls :func:`app.services.receipts.upload_report_receipts` to upload
+          the report's receipts concurrently once every line has validated,
+          and warns the user when no receipt backend is configured.
+        * Writes the report row and bulk-inserts its lines in one statement
+          through :mod:`app.models.db`.
+        * Notifies the supervisor of submitted reports through
+          :mod:`app.services.workflow_notifications`.
     """
 
-    supervisors = (
-        User.query.filter(
-            User.id != current_user.id,
-            User.role == "supervisor",
-            User.employee_approved.is_(True),
-        )
-        .order_by(User.first_name.asc(), User.last_name.asc())
-        .all()
-    )
+    supervisors = _supervisor_choices()
     try:
         expense_types = load_expense_types()
         valid_gl_accounts = _gl_account_code_set()
@@ -123,108 +382,71 @@ def new_expense() -> str | Response:
         return render_template("500.html", error_message=str(exc)), 503
 
     if request.method == "POST":
-        supervisor_id_raw = (request.form.get("supervisor_id") or "").strip()
-        report_month_raw = (request.form.get("report_month") or "").strip()
-        notes = (request.form.get("notes") or "").strip()
-        submit_action = (request.form.get("submit_action") or "save_draft").strip()
-
-        try:
-            supervisor_id = int(supervisor_id_raw)
-        except ValueError:
-            flash("Select a valid supervisor.", "warning")
+        header = _parse_report_header(request.form)
+        if header is None:
             return redirect(url_for("expenses.new_expense"))
 
-        supervisor = User.query.filter(
-            User.id == supervisor_id,
-            User.role == "supervisor",
-            User.employee_approved.is_(True),
-        ).first()
-        if not supervisor:
-            flash("Selected supervisor was not found.", "warning")
+        if not request.form.getlist("line_date"):
+            flash("Add at least one expense line.", "warning")
             return redirect(url_for("expenses.new_expense"))
 
-        try:
-            report_month = (
-                datetime.strptime(report_month_raw, "%Y-%m").date().replace(day=1)
-            )
-        except ValueError:
-            flash("Choose a valid report month.", "warning")
+        # Validate every line before touching the database or receipt
+        # storage, so a bad line leaves no partial report or orphaned upload.
+        line_rows, line_errors = _parse_expense_lines(request.form, valid_gl_accounts)
+        if line_errors:
+            _flash_line_errors(line_errors)
             return redirect(url_for("expenses.new_expense"))
-
-        dates = request.form.getlist("line_date")
-        types = request.form.getlist("expense_type")
-        gls = request.form.getlist("gl_account")
-        vendors = request.form.getlist("vendor")
-        descriptions = request.form.getlist("description")
-        amounts = request.form.getlist("amount")
-
-        if not dates:
+        if not line_rows:
             flash("Add at least one expense line.", "warning")
             return redirect(url_for("expenses.new_expense"))
 
-        report_status = (
-            "Pending Review" if submit_action == "submit_review" else "Draft"
-        )
         report = ExpenseReport(
             employee_id=current_user.id,
-            supervisor_id=supervisor_id,
-            report_month=report_month,
-            notes=notes,
-            status=report_status,
+            **header,
+            line_count=len(line_rows),
+            total_amount=sum((row["amount"] for row in line_rows), Decimal("0")),
+            approved_amount=Decimal("0"),
         )
         db.session.add(report)
         db.session.flush()
 
-        for index, line_date_raw in enumerate(dates):
-            if not line_date_raw.strip():
-                continue
-            try:
-                line_date = datetime.strptime(line_date_raw.strip(), "%Y-%m-%d").date()
-            except ValueError:
-                db.session.rollback()
-                flash(f"Line {index + 1}: invalid date.", "warning")
-                return redirect(url_for("expenses.new_expense"))
-
-            try:
-                amount = Decimal(
-                    (amounts[index] if index < len(amounts) else "0").strip()
+        pending_receipts: List[PendingReceipt] = []
+        for row in line_rows:
+            receipt_file = request.files.get(f"receipt_{row['line_index']}")
+            if receipt_file and receipt_file.filename:
+                pending_receipts.append(
+                    PendingReceipt(
+                        line_index=row["line_index"], file_storage=receipt_file
+                    )
                 )
-            except (InvalidOperation, AttributeError):
-                db.session.rollback()
-                flash(f"Line {index + 1}: amount must be numeric.", "warning")
-                return redirect(url_for("expenses.new_expense"))
-
-            receipt_file = request.files.get(f"receipt_{index}")
-            receipt_url = upload_receipt_to_cloud_storage(
-                receipt_file,
-                report_id=report.id,
-                line_index=index,
-            )
 
-            gl_account = (gls[index] if index < len(gls) else "").strip()
-            if gl_account not in valid_gl_accounts:
-                db.session.rollback()
-                flash(
-                    f"Line {index + 1}: select a GL account from the approved list.",
-                    "warning",
-                )
-                return redirect(url_for("expenses.new_expense"))
-
-            line = ExpenseLine(
-                expense_report_id=report.id,
-                date=line_date,
-                expense_type=(types[index] if index < len(types) else "").strip(),
-                gl_account=gl_account,
-                vendor=(vendors[index] if index < len(vendors) else "").strip(),
-                description=(
-                    descriptions[index] if index < len(descriptions) else ""
-                ).strip(),
-                amount=amount,
-                receipt_url=receipt_url,
+        try:
+            stored_receipts = upload_report_receipts(
+                pending_receipts, report_id=report.id
             )
-            db.session.add(line)
+        except ReceiptUploadError as exc:
+            db.session.rollback()
+            current_app.logger.warning("Receipt upload failed: %s", exc)
+            flash("Receipts could not be uploaded. Please try again.", "danger")
+            return redirect(url_for("expenses.new_expense"))
 
+        if pending_receipts and not stored_receipts:
+            flash(
+                "Receipts were not saved because receipt storage is not "
+                "configured. Contact an administrator.",
+                "warning",
+            )
+        for row in line_rows:
+            stored = stored_receipts.get(row.pop("line_index"))
+            row["expense_report_id"] = report.id
+            row["receipt_url"] = stored.url if stored else None
+            row["receipt_digest"] = stored.digest if stored else None
+        db.session.execute(insert(ExpenseLine), line_rows)
+        notification = record_report_submitted(report)
         db.session.commit()
+        notify_workflow_recipients(notification)
+        if any(stored.is_new for stored in stored_receipts.values()):
+            enqueue_receipt_derivatives(user=current_user)
         flash("Expense report saved.", "success")
         return redirect(url_for("expenses.my_reports"))
 
@@ -236,34 +458,216 @@ def new_expense() -> str | Response:
     )
 
 
+@expenses_bp.route("/import", methods=["GET", "POST"])
+@login_required
+@employee_required(approved_only=True)
+def import_expense_report() -> str | Response:
+    """Create an expense report from an uploaded expense workbook.
+
+    Inputs:
+        * ``GET`` request renders the upload form.
+        * ``POST`` request reads the report fields from ``request.form`` and
+          the ``.xlsx`` workbook from ``request.files["workbook"]``.
+
+    Outputs:
+        * Rendered HTML for the upload form on ``GET`` or when the workbook is
+          rejected (HTTP 400, listing each row error).
+        * Redirect to the current user's report list after import.
+
+    External dependencies:
+        * Calls :func:`app.services.expense_import.import_expense_workbook` to
+          stream and bulk-insert the lines in the report's transaction.
+        * Calls :func:`app.services.expense_workflow.load_gl_accounts` and
+          :func:`app.services.expense_workflow.load_expense_types`.
+        * Notifies the supervisor of submitted reports through
+          :mod:`app.services.workflow_notifications`.
+    """
+
+    supervisors = _supervisor_choices()
+    try:
+        expense_types = load_expense_types()
+        valid_gl_accounts = _gl_account_code_set()
+    except ExpenseReferenceDataError as exc:
+        flash(
+            "Expense reference data is temporarily unavailable. "
+            "Please contact support and try again shortly.",
+            "danger",
+        )
+        return render_template("500.html", error_message=str(exc)), 503
+
+    max_lines = int(
+        current_app.config.get("EXPENSE_IMPORT_MAX_LINES", DEFAULT_MAX_IMPORT_LINES)
+    )
+
+    def _render(errors: List[str], status: int = 200):
+        return (
+            render_template(
+                "expenses/import_expenses.html",
+                supervisors=supervisors,
+                errors=errors,
+                max_lines=max_lines,
+            ),
+            status,
+        )
+
+    if request.method == "GET":
+        return _render([])
+
+    header = _parse_report_header(request.form)
+    if header is None:
+        return redirect(url_for("expenses.import_expense_report"))
+
+    workbook = request.files.get("workbook")
+    if not workbook or not workbook.filename:
+        flash("Choose an expense workbook to import.", "warning")
+        return redirect(url_for("expenses.import_expense_report"))
+
+    report = ExpenseReport(employee_id=current_user.id, **header)
+    db.session.add(report)
+    db.session.flush()
+    try:
+        result = import_expense_workbook(
+            workbook.stream,
+            report,
+            valid_gl_accounts=valid_gl_accounts,
+            expense_types=expense_types,
+            max_lines=max_lines,
+        )
+    except ExpenseImportError as exc:
+        db.session.rollback()
+        return _render([str(exc)], 400)
+    if result.errors:
+        db.session.rollback()
+        return _render(result.errors, 400)
+
+    report.line_count = result.line_count
+    report.total_amount = result.total_amount
+    report.approved_amount = Decimal("0")
+    notification = record_report_submitted(report)
+    db.session.commit()
+    notify_workflow_recipients(notification)
+    flash(
+        f"Imported {result.line_count} expense line(s) from {workbook.filename}.",
+        "success",
+    )
+    return redirect(url_for("expenses.my_reports"))
+
+
+@expenses_bp.get("/receipts/<path:key>")
+@login_required
+def receipt_file(key: str) -> Response:
+    """Serve a receipt stored by a backend that the app hosts itself.
+
+    Inputs:
+        key: Receipt object key such as ``expense-receipts/<report>/<file>``.
+
+    Outputs:
+        The stored file for the report's employee, supervisor, or a super
+        administrator; otherwise a 404 response. Cloud Storage receipts are
+        served by GCS directly and always 404 here.
+
+    External dependencies:
+        * Calls :func:`app.services.receipts.get_receipt_backend`.
+        * Uses :func:`flask.send_file` to stream the receipt.
+    """
+
+    backend = get_receipt_backend()
+    if backend is None or not backend.served_by_app:
+        abort(404)
+
+    report_ids = receipt_report_ids(key)
+    if not report_ids:
+        abort(404)
+    if getattr(current_user, "role", None) != "super_admin":
+        visible = ExpenseReport.query.filter(
+            ExpenseReport.id.in_(report_ids),
+            or_(
+                ExpenseReport.employee_id == current_user.id,
+                ExpenseReport.supervisor_id == current_user.id,
+            ),
+        ).first()
+        if visible is None:
+            abort(404)
+
+    if isinstance(backend, LocalReceiptBackend):
+        try:
+            path = backend.path_for(key)
+        except ValueError:
+            abort(404)
+        if not path.is_file():
+            abort(404)
+        return send_file(path)
+
+    try:
+        stream = backend.open_reader(key)
+    except FileNotFoundError:
+        abort(404)
+    return send_file(
+        stream,
+        mimetype=mimetypes.guess_type(key)[0] or "application/octet-stream",
+        download_name=key.rsplit("/", 1)[-1],
+    )
+
+
 @expenses_bp.route("/mine")
 @login_required
 @employee_required(approved_only=True)
 def my_reports() -> str:
-    """List reports submitted by the currently authenticated employee."""
+    """List reports submitted by the currently authenticated employee.
 
-    reports = (
-        ExpenseReport.query.filter_by(employee_id=current_user.id)
-        .order_by(ExpenseReport.created_at.desc())
-        .all()
+    Totals and line counts come from
+    :func:`app.services.expense_workflow.summarize_reports`, so the page does
+    not load individual expense lines.
+    """
+
+    rows = summarize_reports(
+        ExpenseReport.employee_id == current_user.id,
+        order_by=(ExpenseReport.created_at.desc(), ExpenseReport.id.desc()),
+        eager=(ExpenseReport.supervisor,),
     )
-    return render_template("expenses/my_reports.html", reports=reports)
+    return render_template("expenses/my_reports.html", rows=rows)
 
 
 @expenses_bp.route("/supervisor")
 @login_required
 @supervisor_required(approved_only=True)
-def supervisor_dashboard() -> str:
-    """Show only reports awaiting review by the logged-in supervisor."""
+def supervisor_dashboard() -> str | Response:
+    """Show one page of reports awaiting review by the logged-in supervisor.
 
-    reports = (
-        ExpenseReport.query.filter_by(
-            supervisor_id=current_user.id, status="Pending Review"
-        )
-        .order_by(ExpenseReport.created_at.asc())
-        .all()
+    Inputs:
+        * Optional ``after`` query parameter holding the keyset cursor returned
+          by the previous page.
+
+    Outputs:
+        Rendered HTML listing report headers with SQL-aggregated line counts
+        and totals, plus a link to the next page when more reports remain.
+
+    External dependencies:
+        * Calls :func:`app.services.expense_workflow.paginate_supervisor_queue`.
+        * Reads ``EXPENSE_DASHBOARD_PAGE_SIZE`` from :attr:`flask.Flask.config`.
+    """
+
+    after = (request.args.get("after") or "").strip() or None
+    page_size = current_app.config.get(
+        "EXPENSE_DASHBOARD_PAGE_SIZE", DEFAULT_DASHBOARD_PAGE_SIZE
+    )
+    try:
+        page = paginate_supervisor_queue(current_user.id, after=after, limit=page_size)
+    except ValueError:
+        flash("That page link is no longer valid.", "warning")
+        return redirect(url_for("expenses.supervisor_dashboard"))
+
+    dispatch_job = None
+    if getattr(current_user, "role", None) == "super_admin":
+        dispatch_job = latest_job(NETSUITE_DISPATCH_JOB)
+
+    return render_template(
+        "expenses/supervisor_dashboard.html",
+        rows=page.rows,
+        next_cursor=page.next_cursor,
+        is_first_page=after is None,
+        dispatch_job=dispatch_job,
     )
-    return render_template("expenses/supervisor_dashboard.html", reports=reports)
 
 
 @expenses_bp.route("/supervisor/report/<int:report_id>", methods=["GET", "POST"])
@@ -281,83 +685,198 @@ def review_report(report_id: int) -> str | Response:
 
     External dependencies:
         * Calls :func:`app.services.expense_workflow.apply_line_item_review_actions`
+          for per-line decisions, or
+          :func:`app.services.expense_workflow.apply_bulk_review_action` when a
+          ``bulk_action`` button is used,
           to update line statuses and report state based on the submitted review.
+        * Commits via :func:`app.services.expense_workflow.commit_report_review`,
+          which rejects the review if the report changed since it was loaded.
+        * Calls
+          :func:`app.services.workflow_notifications.record_report_returned`
+          before the commit and
+          :func:`app.services.workflow_notifications.notify_workflow_recipients`
+          after it.
         * Uses :data:`flask_login.current_user` to enforce supervisor access.
     """
 
-    report = ExpenseReport.query.get_or_404(report_id)
+    bulk_action = (request.form.get("bulk_action") or "").strip()
+    report_query = ExpenseReport.query.filter(ExpenseReport.id == report_id)
+    if bulk_action:
+        # Bulk decisions are applied in SQL; skip the mapper's joined load of
+        # every line.
+        report_query = report_query.options(lazyload(ExpenseReport.lines))
+    else:
+        # Only load lines to render them or to apply per-line decisions.
+        report_query = report_query.options(
+            selectinload(ExpenseReport.lines).joinedload(ExpenseLine.receipt_blob)
+        )
+    report = report_query.first_or_404()
     if report.supervisor_id != current_user.id:
         flash("You are not assigned to this report.", "danger")
         return redirect(url_for("expenses.supervisor_dashboard"))
+    if report.status != "Pending Review":
+        flash("That report is not awaiting review.", "info")
+        return redirect(url_for("expenses.supervisor_dashboard"))
 
     if request.method == "POST":
-        decisions = {
-            line.id: (
-                request.form.get(f"line_{line.id}_action") or "",
-                request.form.get(f"line_{line.id}_comment") or "",
-            )
-            for line in report.lines
-        }
-
         try:
-            message, category = apply_line_item_review_actions(
-                report, decisions=decisions
-            )
-        except ValueError as exc:
+            ensure_report_version(report, request.form.get("report_version", type=int))
+            if bulk_action:
+                message, category = apply_bulk_review_action(
+                    report,
+                    action=bulk_action,
+                    line_ids=request.form.getlist("selected_line", type=int),
+                    comment=request.form.get("bulk_comment") or "",
+                )
+            else:
+                message, category = apply_line_item_review_actions(
+                    report, decisions=parse_line_review_form(request.form)
+                )
+        except (ReportConflictError, ValueError) as exc:
             flash(str(exc), "warning")
             return redirect(url_for("expenses.review_report", report_id=report_id))
 
+        notification = record_report_returned(report)
+        try:
+            commit_report_review(report)
+        except ReportConflictError as exc:
+            flash(str(exc), "warning")
+            return redirect(url_for("expenses.review_report", report_id=report_id))
+        notify_workflow_recipients(notification)
         flash(message, category)
-
-        db.session.add(report)
-        db.session.commit()
         return redirect(url_for("expenses.supervisor_dashboard"))
 
-    return render_template("expenses/review_report.html", report=report)
+    return render_template(
+        "expenses/review_report.html",
+        report=report,
+        duplicate_receipts=find_duplicate_receipts(report.id),
+    )
 
 
 @expenses_bp.route("/export/pending-upload.csv")
 @login_required
 @super_admin_required
 def export_pending_upload_csv() -> Response:
-    """Export all reports in ``Pending Upload`` status into one CSV file."""
+    """Stream all reports in ``Pending Upload`` status as one CSV download.
 
-    reports = (
-        ExpenseReport.query.filter_by(status="Pending Upload")
-        .order_by(ExpenseReport.id.asc())
-        .all()
-    )
-    payload = format_pending_reports_csv(reports)
-    return send_file(
-        BytesIO(payload.encode("utf-8")),
+    Rows are produced by
+    :func:`app.services.expense_workflow.iter_pending_upload_csv` and sent as a
+    chunked response, so worker memory does not grow with the backlog.
+    """
+
+    response = Response(
+        stream_with_context(iter_pending_upload_csv()),
         mimetype="text/csv",
-        as_attachment=True,
-        download_name="netsuite-expense-upload.csv",
     )
+    response.headers["Content-Disposition"] = (
+        "attachment; filename=netsuite-expense-upload.csv"
+    )
+    return response
 
 
-@expenses_bp.route("/dispatch", methods=["POST"])
+@expenses_bp.get("/report/<int:report_id>/export.xlsx")
+@login_required
+def export_report_workbook(report_id: int) -> Response:
+    """Download one report in the ``expense_report_template.xlsx`` layout.
+
+    Inputs:
+        report_id: Identifier of the :class:`app.models.ExpenseReport`.
+
+    Outputs:
+        The ``.xlsx`` workbook as an attachment. Only the report's employee,
+        its supervisor, and super admins may download it; others get ``404``.
+
+    External dependencies:
+        * Calls :func:`app.services.expense_export.report_workbook_bytes`.
+    """
+
+    report = db.first_or_404(
+        select(ExpenseReport)
+        .options(lazyload(ExpenseReport.lines))
+        .where(ExpenseReport.id == report_id)
+    )
+    if getattr(current_user, "role", None) != "super_admin" and current_user.id not in (
+        report.employee_id,
+        report.supervisor_id,
+    ):
+        abort(404)
+
+    response = Response(report_workbook_bytes(report), mimetype=XLSX_MIMETYPE)
+    response.headers["Content-Disposition"] = (
+        f"attachment; filename={report_export_filename(report)}"
+    )
+    return response
+
+
+@expenses_bp.get("/export/monthly.zip")
 @login_required
 @super_admin_required
-def dispatch_pending_uploads() -> Response:
-    """Send ``Pending Upload`` reports via SFTP and mark them as completed."""
+def export_monthly_reports_zip() -> Response:
+    """Stream every submitted report for one month as a zip of workbooks.
 
-    reports = ExpenseReport.query.filter_by(status="Pending Upload").all()
-    if not reports:
-        flash("No reports are waiting for upload.", "info")
-        return redirect(url_for("expenses.supervisor_dashboard"))
+    Inputs:
+        ``month`` query parameter formatted ``YYYY-MM``.
 
-    payload = format_pending_reports_csv(reports)
-    filename = f"netsuite-expenses-{date.today().isoformat()}.csv"
-    dispatch_csv_via_sftp(payload, filename=filename)
+    Outputs:
+        A chunked zip download built by
+        :func:`app.services.expense_export.iter_monthly_reports_zip`, one
+        workbook per report, so worker memory does not grow with the number
+        of reports.
+    """
 
-    for report in reports:
-        report.status = "Completed"
-        db.session.add(report)
-    db.session.commit()
+    month_raw = (request.args.get("month") or "").strip()
+    try:
+        report_month = datetime.strptime(month_raw, "%Y-%m").date()
+    except ValueError:
+        flash("Choose a valid month to export.", "warning")
+        return redirect(url_for("expenses.supervisor_dashboard"))
 
-    flash(
-        f"Dispatched {len(reports)} reports to NetSuite and marked completed.",
-        "success",
+    response = Response(
+        stream_with_context(iter_monthly_reports_zip(report_month)),
+        mimetype="application/zip",
     )
+    response.headers["Content-Disposition"] = (
+        f"attachment; filename=expense-reports-{report_month:%Y-%m}.zip"
+    )
+    return response
+
+
+@expenses_bp.route("/dispatch", methods=["POST"])
+@login_required
+@super_admin_required
+def dispatch_pending_uploads() -> Response:
+    """Queue a background job that sends ``Pending Upload`` reports via SFTP.
+
+    The request returns immediately; progress is available from
+    :func:`job_status`.
+
+    External dependencies:
+        * Calls :func:`app.services.jobs.enqueue_job` with the
+          :data:`app.services.netsuite_dispatch.NETSUITE_DISPATCH_JOB` handler.
+    """
+
+    job = enqueue_job(NETSUITE_DISPATCH_JOB, user=current_user)
+    if job.status in ("Queued", "Running"):
+        flash(f"NetSuite dispatch job {job.id} is {job.status.lower()}.", "info")
+    elif job.status == "Failed":
+        flash(f"NetSuite dispatch failed: {job.message}", "danger")
+    else:
+        flash(job.message or "NetSuite dispatch finished.", "success")
     return redirect(url_for("expenses.supervisor_dashboard"))
+
+
+@expenses_bp.get("/jobs/<string:job_id>")
+@login_required
+@super_admin_required
+def job_status(job_id: str) -> Response:
+    """Return JSON status and progress for a background job.
+
+    External dependencies:
+        * Loads :class:`app.models.BackgroundJob` and serializes it with
+          :func:`app.services.jobs.serialize_job`.
+    """
+
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(serialize_job(job))
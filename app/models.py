@@ -21,11 +21,19 @@ from werkzeug.security import generate_password_hash, check_password_hash
 USERS_TABLE = "users"
 EMAIL_REQUESTS_TABLE = "email_quote_requests"
 EMAIL_DISPATCH_LOG_TABLE = "email_dispatch_log"
+EMAIL_RATE_COUNTERS_TABLE = "email_rate_counters"
+EMAIL_DISPATCH_DAILY_ROLLUPS_TABLE = "email_dispatch_daily_rollups"
+OUTBOUND_EMAILS_TABLE = "outbound_emails"
+WORKFLOW_NOTIFICATIONS_TABLE = "workflow_notifications"
 PASSWORD_RESET_TOKENS_TABLE = "password_reset_tokens"
 APP_SETTINGS_TABLE = "app_settings"
 COST_ZONES_TABLE = "cost_zones"
 EXPENSE_REPORTS_TABLE = "expense_reports"
 EXPENSE_LINES_TABLE = "expense_lines"
+NETSUITE_DISPATCH_BATCHES_TABLE = "netsuite_dispatch_batches"
+BACKGROUND_JOBS_TABLE = "background_jobs"
+RECEIPT_BLOBS_TABLE = "receipt_blobs"
+EXPENSE_REFERENCE_VERSIONS_TABLE = "expense_reference_versions"
 
 RATE_SET_DEFAULT = "default"
 
@@ -161,6 +169,22 @@ class EmailDispatchLog(db.Model):
 
     __tablename__ = EMAIL_DISPATCH_LOG_TABLE
 
+    __table_args__ = (
+        db.Index(
+            "ix_email_dispatch_log_feature_user_created",
+            "feature",
+            "user_id",
+            "created_at",
+        ),
+        db.Index(
+            "ix_email_dispatch_log_feature_recipient_created",
+            "feature",
+            "recipient",
+            "created_at",
+        ),
+        db.Index("ix_email_dispatch_log_created_at", "created_at"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey(f"{USERS_TABLE}.id"))
     feature = db.Column(db.String(50), nullable=False)
@@ -170,6 +194,186 @@ class EmailDispatchLog(db.Model):
     user = db.relationship("User")
 
 
+class EmailRateCounter(db.Model):
+    """Per-minute send counter backing outbound mail rate limits.
+
+    :func:`services.mail.log_email_dispatch` increments one row per scope for
+    the minute a message is sent, and
+    :func:`services.mail.enforce_mail_rate_limit` sums the buckets inside each
+    sliding window in a single query instead of counting
+    :class:`EmailDispatchLog` rows.
+
+    Attributes:
+        scope: ``"user"``, ``"recipient"``, or ``"feature"``.
+        feature: Normalized feature label the send was made for.
+        subject: User id or recipient address for the scope; empty for the
+            feature-wide counter.
+        bucket_start: UTC minute the counted sends fall in.
+        count: Number of sends recorded in the bucket.
+    """
+
+    __tablename__ = EMAIL_RATE_COUNTERS_TABLE
+
+    __table_args__ = (
+        UniqueConstraint(
+            "scope",
+            "feature",
+            "subject",
+            "bucket_start",
+            name="uq_email_rate_counters_bucket",
+        ),
+        db.Index("ix_email_rate_counters_bucket_start", "bucket_start"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(20), nullable=False)
+    feature = db.Column(db.String(50), nullable=False)
+    subject = db.Column(db.String(255), nullable=False, default="")
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class EmailDispatchDailyRollup(db.Model):
+    """Daily per-feature totals kept after :class:`EmailDispatchLog` is pruned.
+
+    :func:`app.services.maintenance.run_data_retention` writes one row per
+    day and feature before deleting that day's log rows, so auditors keep
+    send volumes without the table growing forever.
+
+    Attributes:
+        day: UTC calendar day of the sends.
+        feature: Normalized feature label.
+        sent_count: Number of emails sent.
+        recipient_count: Number of distinct recipient addresses.
+        user_count: Number of distinct sending users.
+    """
+
+    __tablename__ = EMAIL_DISPATCH_DAILY_ROLLUPS_TABLE
+
+    __table_args__ = (
+        UniqueConstraint(
+            "day", "feature", name="uq_email_dispatch_daily_rollups_day_feature"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    feature = db.Column(db.String(50), nullable=False)
+    sent_count = db.Column(db.Integer, nullable=False, default=0)
+    recipient_count = db.Column(db.Integer, nullable=False, default=0)
+    user_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class OutboundEmail(db.Model):
+    """Persistent outbox entry for a message awaiting SMTP delivery.
+
+    :func:`app.services.mail_outbox.queue_email` enforces rate limits and
+    inserts a ``"Queued"`` row so request handlers never wait on SMTP.
+    :func:`app.services.mail_outbox.drain_outbox` claims rows in batches and
+    sends each batch over one pooled connection.
+
+    Attributes:
+        feature: Normalized feature label used for rate limits and logging.
+        recipient: Target email address.
+        subject: Message subject line.
+        body: Plain-text message body.
+        status: ``"Queued"`` until sent, ``"Sending"`` while a worker holds
+            the claim, ``"Sent"`` once delivered, or ``"Failed"`` after a
+            permanent error or the final retry.
+        attempts: Number of delivery attempts made.
+        last_error: Last delivery failure message, if any.
+        next_attempt_at: Earliest UTC time the row may be claimed again.
+        claim_token: Identifier of the worker batch holding the claim.
+        claimed_at: When a worker last claimed the row. Claims older than the
+            configured timeout are treated as abandoned.
+        sent_at: UTC timestamp of successful delivery.
+    """
+
+    __tablename__ = OUTBOUND_EMAILS_TABLE
+
+    __table_args__ = (
+        db.Index("ix_outbound_emails_status_next_attempt", "status", "next_attempt_at"),
+        db.Index("ix_outbound_emails_claim_token", "claim_token"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey(f"{USERS_TABLE}.id"))
+    feature = db.Column(db.String(50), nullable=False)
+    recipient = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status: Mapped[str] = db.Column(
+        Enum(
+            "Queued",
+            "Sending",
+            "Sent",
+            "Failed",
+            name="outbound_email_status",
+        ),
+        nullable=False,
+        default="Queued",
+    )
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claim_token = db.Column(db.String(36))
+    claimed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime)
+
+    user = db.relationship("User")
+
+
+class WorkflowNotification(db.Model):
+    """Pending or delivered expense workflow notification for one recipient.
+
+    Rows are added in the same transaction as the workflow change they
+    describe, so a rolled-back review never notifies anyone.
+    :func:`app.services.workflow_notifications.send_workflow_notifications`
+    turns pending rows into :class:`OutboundEmail` messages, one per event or
+    one digest per recipient.
+
+    Attributes:
+        recipient_id: :class:`User` who should be told about the event.
+        report_id: :class:`ExpenseReport` the event concerns.
+        event: ``"report_submitted"`` or ``"report_returned"``.
+        summary: One-line description, including a link when available.
+        claim_token: Identifier of the sender run holding the claim.
+        claimed_at: When a sender run last claimed the row.
+        sent_at: When the row was handed to the outbox.
+        outbound_email_id: :class:`OutboundEmail` that carried the event.
+    """
+
+    __tablename__ = WORKFLOW_NOTIFICATIONS_TABLE
+
+    __table_args__ = (
+        db.Index(
+            "ix_workflow_notifications_pending",
+            "sent_at",
+            "recipient_id",
+            "created_at",
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient_id = db.Column(
+        db.Integer, db.ForeignKey(f"{USERS_TABLE}.id"), nullable=False
+    )
+    report_id = db.Column(db.Integer, db.ForeignKey(f"{EXPENSE_REPORTS_TABLE}.id"))
+    event = db.Column(db.String(50), nullable=False)
+    summary = db.Column(db.Text, nullable=False)
+    claim_token = db.Column(db.String(36))
+    claimed_at = db.Column(db.DateTime)
+    sent_at = db.Column(db.DateTime)
+    outbound_email_id = db.Column(
+        db.Integer, db.ForeignKey(f"{OUTBOUND_EMAILS_TABLE}.id")
+    )
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    recipient = db.relationship("User")
+
+
 class AppSetting(db.Model):
     """Database-persisted configuration override.
 
@@ -206,6 +410,8 @@ class PasswordResetToken(db.Model):
 
     __tablename__ = PASSWORD_RESET_TOKENS_TABLE
 
+    __table_args__ = (db.Index("ix_password_reset_tokens_created_at", "created_at"),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey(f"{USERS_TABLE}.id"), nullable=False)
     token = db.Column(
@@ -240,10 +446,33 @@ class ExpenseReport(db.Model):
     Each report groups one or more :class:`ExpenseLine` entries. Supervisors
     review reports as part of a state machine before finance uploads the
     records to NetSuite.
+
+    Attributes:
+        status: Workflow state. ``"Uploading"`` marks a report claimed by a
+            NetSuite dispatcher whose batch file is being sent.
+        netsuite_batch_id: :class:`NetSuiteDispatchBatch` that carries the
+            report to NetSuite once it is queued for upload.
+        line_count: Cached number of attached lines.
+        total_amount: Cached sum of every line amount.
+        approved_amount: Cached sum of approved line amounts.
+        version_id: Optimistic-lock counter. SQLAlchemy adds it to the
+            ``WHERE`` clause of every ORM update and increments it, so a
+            review committed from a stale copy raises
+            :class:`sqlalchemy.orm.exc.StaleDataError` instead of overwriting
+            another reviewer's decision.
+
+    The cached totals are maintained by
+    :func:`app.services.expense_workflow.refresh_report_totals` whenever lines
+    are written or reviewed, so list and export screens can sort and filter by
+    amount without scanning ``expense_lines``.
     """
 
     __tablename__ = EXPENSE_REPORTS_TABLE
 
+    __table_args__ = (
+        db.Index("ix_expense_reports_status_total_amount", "status", "total_amount"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(
         db.Integer, db.ForeignKey(f"{USERS_TABLE}.id"), nullable=False
@@ -258,6 +487,7 @@ class ExpenseReport(db.Model):
             "Draft",
             "Pending Review",
             "Pending Upload",
+            "Uploading",
             "Completed",
             name="expense_report_status",
         ),
@@ -265,6 +495,16 @@ class ExpenseReport(db.Model):
         default="Draft",
     )
     rejection_comment = db.Column(db.Text)
+    netsuite_batch_id = db.Column(
+        db.Integer,
+        db.ForeignKey(f"{NETSUITE_DISPATCH_BATCHES_TABLE}.id"),
+        nullable=True,
+        index=True,
+    )
+    line_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    approved_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    version_id = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(
         db.DateTime,
@@ -273,6 +513,8 @@ class ExpenseReport(db.Model):
         nullable=False,
     )
 
+    __mapper_args__ = {"version_id_col": version_id}
+
     employee = db.relationship("User", foreign_keys=[employee_id])
     supervisor = db.relationship("User", foreign_keys=[supervisor_id])
     lines = db.relationship(
@@ -307,6 +549,11 @@ class ExpenseLine(db.Model):
     amount = db.Column(db.Numeric(10, 2), nullable=False)
     description = db.Column(db.String(255))
     receipt_url = db.Column(db.String(1024))
+    receipt_digest = db.Column(
+        db.String(64),
+        db.ForeignKey(f"{RECEIPT_BLOBS_TABLE}.digest"),
+        index=True,
+    )
     review_status: Mapped[str] = db.Column(
         Enum(
             "Pending",
@@ -319,3 +566,193 @@ class ExpenseLine(db.Model):
     )
     review_comment = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    receipt_blob = db.relationship("ReceiptBlob")
+
+
+class ReceiptBlob(db.Model):
+    """Stored receipt file addressed by the SHA-256 digest of its content.
+
+    :func:`app.services.receipts.upload_report_receipts` hashes each upload
+    and only stores files whose digest is not yet recorded here, so a
+    receipt attached to several lines or resubmitted on a new report is
+    kept once. Lines reference their file through
+    :attr:`ExpenseLine.receipt_digest`.
+
+    Attributes:
+        digest: Lower-case SHA-256 hex digest of the file content.
+        storage_key: Object key within the receipt storage backend.
+        url: URL copied to :attr:`ExpenseLine.receipt_url`.
+        content_type: MIME type supplied with the first upload.
+        byte_size: File size in bytes.
+        thumbnail_url: Small JPEG rendition shown on review pages.
+        preview_url: Screen-sized JPEG rendition opened from the thumbnail.
+        derivative_status: ``"Pending"`` until
+            :mod:`app.services.receipt_derivatives` has run, then ``"Ready"``,
+            ``"Skipped"`` for files that are not images, or ``"Failed"``.
+    """
+
+    __tablename__ = RECEIPT_BLOBS_TABLE
+
+    digest = db.Column(db.String(64), primary_key=True)
+    storage_key = db.Column(db.String(512), nullable=False)
+    url = db.Column(db.String(1024), nullable=False)
+    content_type = db.Column(db.String(255))
+    byte_size = db.Column(db.BigInteger, nullable=False, default=0)
+    thumbnail_url = db.Column(db.String(1024))
+    preview_url = db.Column(db.String(1024))
+    derivative_status: Mapped[str] = db.Column(
+        Enum(
+            "Pending",
+            "Ready",
+            "Skipped",
+            "Failed",
+            name="receipt_derivative_status",
+        ),
+        nullable=False,
+        default="Pending",
+        index=True,
+    )
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class NetSuiteDispatchBatch(db.Model):
+    """Manifest entry for one CSV file dispatched to NetSuite over SFTP.
+
+    :func:`app.services.netsuite_dispatch.dispatch_pending_reports` splits the
+    ``Pending Upload`` backlog into size-bounded batches and records one row
+    per file before sending it. Reports reference their batch through
+    :attr:`ExpenseReport.netsuite_batch_id`, so a failed or interrupted
+    dispatch can resume the unsent batches without resending completed ones.
+
+    Attributes:
+        filename: Remote file name written to the NetSuite SFTP directory.
+        status: ``"Pending"`` until sent, ``"Uploading"`` while a dispatcher
+            holds the claim, ``"Sent"`` after the file is written and its
+            reports are completed, or ``"Failed"``.
+        report_count: Number of reports in the batch.
+        line_count: Number of CSV data rows written.
+        byte_size: Size of the transmitted file in bytes.
+        checksum: SHA-256 hex digest of the transmitted file.
+        attempts: Number of send attempts made for the batch.
+        error: Last failure message, if any.
+        claimed_at: When a dispatcher last claimed the batch. Claims older
+            than the configured timeout are treated as abandoned.
+    """
+
+    __tablename__ = NETSUITE_DISPATCH_BATCHES_TABLE
+
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), unique=True, nullable=False)
+    status: Mapped[str] = db.Column(
+        Enum(
+            "Pending",
+            "Uploading",
+            "Sent",
+            "Failed",
+            name="netsuite_dispatch_status",
+        ),
+        nullable=False,
+        default="Pending",
+        index=True,
+    )
+    report_count = db.Column(db.Integer, nullable=False, default=0)
+    line_count = db.Column(db.Integer, nullable=False, default=0)
+    byte_size = db.Column(db.Integer, nullable=False, default=0)
+    checksum = db.Column(db.String(64))
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    claimed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime)
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
+
+    reports = db.relationship(
+        "ExpenseReport",
+        backref=db.backref("netsuite_batch", lazy="select"),
+        lazy="select",
+        foreign_keys=[ExpenseReport.netsuite_batch_id],
+    )
+
+
+class BackgroundJob(db.Model):
+    """Work item executed outside the request path by :mod:`app.services.jobs`.
+
+    Attributes:
+        id: Random UUID string exposed to the status endpoint.
+        kind: Registered handler name, for example ``"netsuite_dispatch"``.
+        status: ``"Queued"``, ``"Running"``, ``"Succeeded"``, or ``"Failed"``.
+        progress_current: Units of work finished so far.
+        progress_total: Units of work expected, when known.
+        message: Result summary or failure message.
+        created_by_id: Optional :class:`User` who enqueued the job.
+        heartbeat_at: Last time the running handler reported progress. Jobs
+            silent for longer than ``BACKGROUND_JOB_STALE_MINUTES`` are
+            treated as abandoned.
+    """
+
+    __tablename__ = BACKGROUND_JOBS_TABLE
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = db.Column(db.String(64), nullable=False, index=True)
+    status: Mapped[str] = db.Column(
+        Enum(
+            "Queued",
+            "Running",
+            "Succeeded",
+            "Failed",
+            name="background_job_status",
+        ),
+        nullable=False,
+        default="Queued",
+        index=True,
+    )
+    progress_current = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.Text)
+    created_by_id = db.Column(db.Integer, db.ForeignKey(f"{USERS_TABLE}.id"))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    created_by = db.relationship("User")
+
+
+class ExpenseReferenceVersion(db.Model):
+    """Reference workbook uploaded by an administrator.
+
+    :func:`app.services.reference_data.publish_reference_workbook` validates
+    the workbook and stores its compiled GL accounts and expense types as
+    JSON. The row with the highest ``id`` is the active version; workers
+    compare that id against their cached copy to pick up new uploads without
+    a restart. Without any rows the bundled ``expense_report_template.xlsx``
+    is used.
+
+    Attributes:
+        digest: SHA-256 hex digest of the uploaded workbook.
+        filename: Original name of the uploaded file.
+        payload: Compiled snapshot JSON from
+            :meth:`app.services.reference_data.ReferenceSnapshot.to_json`.
+        gl_account_count: Number of GL account options in the upload.
+        expense_type_count: Number of expense types in the upload.
+        uploaded_by_id: :class:`User` who published the version.
+    """
+
+    __tablename__ = EXPENSE_REFERENCE_VERSIONS_TABLE
+
+    id = db.Column(db.Integer, primary_key=True)
+    digest = db.Column(db.String(64), nullable=False)
+    filename = db.Column(db.String(255))
+    payload = db.Column(db.Text, nullable=False)
+    gl_account_count = db.Column(db.Integer, nullable=False, default=0)
+    expense_type_count = db.Column(db.Integer, nullable=False, default=0)
+    uploaded_by_id = db.Column(db.Integer, db.ForeignKey(f"{USERS_TABLE}.id"))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    uploaded_by = db.relationship("User")
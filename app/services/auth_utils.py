@@ -17,6 +17,7 @@ from limits.limits import RateLimitItem
 
 EMPLOYEE_EMAIL_DOMAIN = "@freightservices.net"
 DEFAULT_RESET_TOKEN_RATE_LIMIT = "1 per 15 minutes"
+RESET_TOKEN_LIFETIME = timedelta(hours=1)
 
 
 def hash_reset_token(token: str) -> str:
@@ -320,6 +321,21 @@ def _resolve_reset_token_limit() -> RateLimitItem:
         return parse_rate_limit(DEFAULT_RESET_TOKEN_RATE_LIMIT)
 
 
+def reset_token_retention_window() -> timedelta:
+    """Return how long reset tokens must be kept after they are created.
+
+    Tokens are needed until they expire and, for the database fallback in
+    :func:`_limiter_allows_reset_token`, for the whole configured
+    ``AUTH_RESET_TOKEN_RATE_LIMIT`` window; whichever is longer wins.
+
+    Returns:
+        timedelta: Age after which a token row can be deleted.
+    """
+
+    window = timedelta(seconds=_resolve_reset_token_limit().get_expiry())
+    return max(window, RESET_TOKEN_LIFETIME)
+
+
 def _limiter_allows_reset_token(user_id: int, limit: RateLimitItem) -> bool:
     """Return ``True`` when a password reset token may be issued.
 
@@ -395,7 +411,7 @@ def create_reset_token(email: str) -> Tuple[Optional[str], Optional[str]]:
     if not _limiter_allows_reset_token(user.id, limit):
         return None, "Reset already requested recently. Please wait."
     token = secrets.token_urlsafe(32)
-    expires_at = datetime.utcnow() + timedelta(hours=1)
+    expires_at = datetime.utcnow() + RESET_TOKEN_LIFETIME
     reset_token = PasswordResetToken(
         user_id=user.id, token=hash_reset_token(token), expires_at=expires_at
     )
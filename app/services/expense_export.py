@@ -0,0 +1,332 @@
+"""Export expense reports in the ``expense_report_template.xlsx`` layout.
+
+Finance reconciles reports against the spreadsheet employees used before the
+web form existed. :func:`write_report_workbook` reproduces the ``Blank
+Expense Report`` sheet of that template (header block, the
+Date/Type/Account/... line table starting on row 18, the ``Due to Employee``
+total and the ``Accounting Use Only`` GL summary) with openpyxl's write-only
+workbook, so rows are streamed to disk rather than held as cell objects.
+
+:func:`iter_monthly_reports_zip` packages every submitted report for a month
+into one zip. The zip is written to a non-seekable sink and yielded report
+by report, so only one report's workbook is in memory at a time no matter
+how many reports the month contains.
+"""
+
+from __future__ import annotations
+
+import io
+import re
+import zipfile
+from datetime import date
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from sqlalchemy import func, select
+from sqlalchemy.orm import lazyload
+
+from app.models import ExpenseLine, ExpenseReport, User, db
+
+EXPORT_SHEET_TITLE = "Blank Expense Report"
+TEMPLATE_HEADER_ROW = 16
+TEMPLATE_FIRST_LINE_ROW = 18
+TEMPLATE_COLUMNS = (
+    "Date",
+    "Type",
+    "Account",
+    "Description/HWB",
+    "Company/Names (Meals & Entertainment)",
+    "Amount",
+    "Reimburse",
+    "Receipt",
+)
+_COLUMN_WIDTHS = (
+    ("A", 12),
+    ("B", 28),
+    ("C", 10),
+    ("D", 44),
+    ("E", 36),
+    ("F", 12),
+    ("G", 10),
+    ("H", 48),
+)
+EXPORT_LINE_CHUNK_ROWS = 500
+# Reports still being drafted are not part of finance's monthly package.
+MONTHLY_EXPORT_STATUSES = (
+    "Pending Review",
+    "Pending Upload",
+    "Uploading",
+    "Completed",
+)
+
+_FILENAME_UNSAFE = re.compile(r"[^0-9A-Za-z._-]+")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable buffer drained between zip entries."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def report_export_filename(report: ExpenseReport) -> str:
+    """Return the download name for ``report``'s workbook."""
+
+    owner = ""
+    if report.employee is not None:
+        owner = (report.employee.email or "").split("@", 1)[0]
+    owner = _FILENAME_UNSAFE.sub("-", owner).strip("-")
+    parts = [
+        "expense-report",
+        str(report.id),
+        report.report_month.strftime("%Y-%m"),
+    ]
+    if owner:
+        parts.append(owner)
+    return "-".join(parts) + ".xlsx"
+
+
+def _employee_name(user: Optional[User]) -> str:
+    if user is None:
+        return ""
+    full_name = " ".join(
+        part for part in (user.first_name, user.last_name) if part
+    ).strip()
+    return full_name or user.email
+
+
+def _account_value(account: str) -> object:
+    """Return ``account`` as a number when numeric, matching the template."""
+
+    return int(account) if account.isdigit() else account
+
+
+def _line_rows(report_id: int) -> Iterator[Tuple]:
+    statement = (
+        select(
+            ExpenseLine.date,
+            ExpenseLine.expense_type,
+            ExpenseLine.gl_account,
+            ExpenseLine.description,
+            ExpenseLine.vendor,
+            ExpenseLine.amount,
+            ExpenseLine.review_status,
+            ExpenseLine.receipt_url,
+        )
+        .where(ExpenseLine.expense_report_id == report_id)
+        .order_by(ExpenseLine.date.asc(), ExpenseLine.id.asc())
+        .execution_options(yield_per=EXPORT_LINE_CHUNK_ROWS)
+    )
+    return iter(db.session.execute(statement))
+
+
+def _gl_totals(report_id: int) -> List[Tuple[str, object]]:
+    statement = (
+        select(ExpenseLine.gl_account, func.sum(ExpenseLine.amount))
+        .where(ExpenseLine.expense_report_id == report_id)
+        .group_by(ExpenseLine.gl_account)
+        .order_by(ExpenseLine.gl_account.asc())
+    )
+    return list(db.session.execute(statement))
+
+
+def write_report_workbook(report: ExpenseReport, target: BinaryIO) -> None:
+    """Write ``report`` to ``target`` in the expense template layout.
+
+    Inputs:
+        report: The :class:`app.models.ExpenseReport` to export.
+        target: Binary stream receiving the ``.xlsx`` file.
+
+    Outputs:
+        None. Lines are fetched as plain column tuples with ``yield_per`` and
+        appended to a write-only worksheet. Rejected lines are marked ``N`` in
+        the ``Reimburse`` column and left out of ``Due to Employee``.
+        Employee-entered text is written as string cells so values such as
+        ``=HYPERLINK(...)`` are never evaluated as formulas.
+
+    External dependencies:
+        * Uses :class:`openpyxl.Workbook` in write-only mode.
+        * Reads lines through :data:`app.models.db.session`.
+    """
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(EXPORT_SHEET_TITLE)
+    for column, width in _COLUMN_WIDTHS:
+        sheet.column_dimensions[column].width = width
+
+    bold = Font(bold=True)
+
+    def _cell(value: object, *, font: Optional[Font] = None, number_format=None):
+        cell = WriteOnlyCell(sheet, value=value)
+        if font is not None:
+            cell.font = font
+        if number_format is not None:
+            cell.number_format = number_format
+        return cell
+
+    def _text(value: Optional[str]):
+        # Employee-entered text must never be stored as a live formula.
+        cell = WriteOnlyCell(sheet, value=value or "")
+        cell.data_type = "s"
+        return cell
+
+    header_rows = {
+        6: [_cell("Expense report", font=Font(bold=True, size=14))],
+        9: [
+            "Name",
+            None,
+            _text(_employee_name(report.employee)),
+            None,
+            "Report #",
+            report.id,
+        ],
+        10: ["Department", None, None],
+        11: ["Report Month", None, report.report_month.strftime("%Y-%m")],
+        12: ["Status", None, report.status],
+        13: ["Purpose of Trip (if travel related)", None, _text(report.notes)],
+        TEMPLATE_HEADER_ROW: [_cell(title, font=bold) for title in TEMPLATE_COLUMNS],
+    }
+    for row_number in range(1, TEMPLATE_FIRST_LINE_ROW):
+        sheet.append(header_rows.get(row_number, []))
+
+    last_row = TEMPLATE_FIRST_LINE_ROW - 1
+    for (
+        line_date,
+        expense_type,
+        gl_account,
+        description,
+        vendor,
+        amount,
+        review_status,
+        receipt_url,
+    ) in _line_rows(report.id):
+        sheet.append(
+            [
+                _cell(line_date, number_format="mm/dd/yyyy"),
+                _text(expense_type),
+                _account_value(gl_account),
+                _text(description),
+                _text(vendor),
+                _cell(amount, number_format="#,##0.00"),
+                "N" if review_status == "Rejected" else "Y",
+                _text(receipt_url),
+            ]
+        )
+        last_row += 1
+
+    first_row = TEMPLATE_FIRST_LINE_ROW
+    total_formula = (
+        f'=SUMIF(G{first_row}:G{last_row},"Y",F{first_row}:F{last_row})'
+        if last_row >= first_row
+        else 0
+    )
+    sheet.append([])
+    sheet.append([])
+    sheet.append(
+        [
+            None,
+            None,
+            None,
+            None,
+            _cell("Due to Employee", font=bold),
+            _cell(total_formula, number_format="#,##0.00"),
+        ]
+    )
+    sheet.append(["Approved:"])
+    sheet.append([])
+    sheet.append([None, None, None, None, _cell("Accounting Use Only", font=bold)])
+    for gl_account, total in _gl_totals(report.id):
+        sheet.append(
+            [
+                None,
+                None,
+                None,
+                None,
+                _account_value(gl_account),
+                _cell(total, number_format="#,##0.00"),
+            ]
+        )
+
+    workbook.save(target)
+
+
+def report_workbook_bytes(report: ExpenseReport) -> bytes:
+    """Return ``report`` rendered by :func:`write_report_workbook`."""
+
+    buffer = io.BytesIO()
+    write_report_workbook(report, buffer)
+    return buffer.getvalue()
+
+
+def iter_monthly_reports_zip(
+    report_month: date,
+    *,
+    statuses: Tuple[str, ...] = MONTHLY_EXPORT_STATUSES,
+) -> Iterator[bytes]:
+    """Yield a zip of every report for ``report_month`` as it is built.
+
+    Inputs:
+        report_month: Any date in the month to export.
+        statuses: Report statuses included in the package.
+
+    Outputs:
+        An iterator of zip fragments. One fragment is yielded per report,
+        after its workbook entry is written, followed by the central
+        directory. Reports are loaded one at a time by identifier, so memory
+        stays bounded by the largest single report.
+
+    External dependencies:
+        * Calls :func:`write_report_workbook` for each report.
+        * Queries :class:`app.models.ExpenseReport` through
+          :data:`app.models.db.session`.
+    """
+
+    month_start = report_month.replace(day=1)
+    report_ids = db.session.scalars(
+        select(ExpenseReport.id)
+        .where(
+            ExpenseReport.report_month == month_start,
+            ExpenseReport.status.in_(statuses),
+        )
+        .order_by(ExpenseReport.id.asc())
+    ).all()
+
+    sink = _ChunkSink()
+    with zipfile.ZipFile(
+        sink, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=1
+    ) as archive:
+        for report_id in report_ids:
+            # Lines are streamed by ``_line_rows``; skip the mapper's joined
+            # load so only one report's header is in memory at a time.
+            report = db.session.scalars(
+                select(ExpenseReport)
+                .options(lazyload(ExpenseReport.lines))
+                .where(ExpenseReport.id == report_id)
+            ).first()
+            if report is None:
+                continue
+            name = f"{month_start:%Y-%m}/{report_export_filename(report)}"
+            with archive.open(name, mode="w", force_zip64=True) as entry:
+                write_report_workbook(report, entry)
+            # Release the report so the identity map does not grow with the
+            # number of exported reports.
+            db.session.expunge(report)
+            yield sink.drain()
+    tail = sink.drain()
+    if tail:
+        yield tail
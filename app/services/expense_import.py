@@ -0,0 +1,349 @@
+"""Bulk import of expense lines from the employee expense workbook.
+
+Employees keep their monthly expenses in the ``Blank Expense Report`` sheet
+of ``expense_report_template.xlsx``. :func:`import_expense_workbook` streams
+that sheet with openpyxl's read-only mode, validates each row against the
+active GL account and expense type lists, and bulk-inserts the lines in
+batches inside the caller's transaction. Only one batch of rows is held in
+memory at a time, so workbooks with thousands of rows import in bounded
+memory.
+
+The template's ``Receipt`` column is free text (often a shared-drive link).
+It is kept as a note on the line description rather than as a stored
+receipt, because receipts are only accepted as uploads validated and stored
+by :mod:`app.services.receipts`.
+"""
+
+from __future__ import annotations
+
+import os
+import zipfile
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import ParseError
+
+import openpyxl
+from sqlalchemy import insert
+
+from app.models import ExpenseLine, ExpenseReport, db
+
+EXPENSE_IMPORT_SHEET = "Blank Expense Report"
+MAX_IMPORT_WORKBOOK_BYTES = 20 * 1024 * 1024
+DEFAULT_MAX_IMPORT_LINES = 5000
+IMPORT_BATCH_SIZE = 500
+MAX_IMPORT_ERRORS = 50
+HEADER_SCAN_ROWS = 40
+
+# Template header text for each column the importer reads.
+_COLUMN_HEADERS = {
+    "date": "date",
+    "expense_type": "type",
+    "gl_account": "account",
+    "description": "description",
+    "vendor": "company",
+    "amount": "amount",
+    "receipt": "receipt",
+}
+_REQUIRED_COLUMNS = ("date", "expense_type", "amount")
+_CENTS = Decimal("0.01")
+# ``expense_lines.amount`` is ``Numeric(10, 2)``.
+MAX_LINE_AMOUNT = Decimal("1e8")
+# ``expense_reports.total_amount`` is ``Numeric(12, 2)``.
+MAX_REPORT_TOTAL = Decimal("1e10")
+
+
+class ExpenseImportError(ValueError):
+    """Raised when an uploaded workbook cannot be read as an expense report."""
+
+
+@dataclass
+class ExpenseImportResult:
+    """Outcome of :func:`import_expense_workbook`.
+
+    Attributes:
+        line_count: Number of lines inserted.
+        total_amount: Sum of the inserted line amounts.
+        errors: Row-level problems; when non-empty the caller must roll back.
+    """
+
+    line_count: int = 0
+    total_amount: Decimal = Decimal("0")
+    errors: List[str] = field(default_factory=list)
+
+
+def _header_key(value: object) -> str:
+    return str(value or "").strip().lower()
+
+
+def _locate_columns(rows: Iterator[tuple]) -> Tuple[int, Dict[str, int]]:
+    """Return the header row number and column positions of the line table."""
+
+    for row_number, row in enumerate(rows, start=1):
+        if row_number > HEADER_SCAN_ROWS:
+            break
+        headers = [_header_key(value) for value in row]
+        if "date" not in headers or "amount" not in headers:
+            continue
+        columns: Dict[str, int] = {}
+        for name, prefix in _COLUMN_HEADERS.items():
+            for position, header in enumerate(headers):
+                if header.startswith(prefix):
+                    columns[name] = position
+                    break
+        if all(name in columns for name in _REQUIRED_COLUMNS):
+            return row_number, columns
+    raise ExpenseImportError(
+        "Could not find the expense line header (Date, Type, Account, ..., "
+        f"Amount) in the {EXPENSE_IMPORT_SHEET} sheet."
+    )
+
+
+def _cell_text(value: object) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value if value is not None else "").strip()
+
+
+def _account_text(value: object) -> str:
+    """Return a literal account code, ignoring formulas and Excel errors."""
+
+    text = _cell_text(value)
+    if text.startswith(("=", "#")):
+        return ""
+    return text
+
+
+def _parse_date(value: object) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = _cell_text(value)
+    for pattern in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y"):
+        try:
+            return datetime.strptime(text, pattern).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_amount(value: object) -> Optional[Decimal]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return None
+    text = _cell_text(value).replace(",", "").replace("$", "")
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        return None
+    if not amount.is_finite():
+        return None
+    return amount
+
+
+def quantize_line_amount(amount: Decimal) -> Optional[Decimal]:
+    """Return ``amount`` rounded to cents, or ``None`` if it is out of range.
+
+    Amounts that would not fit ``expense_lines.amount`` are rejected here so
+    they surface as validation errors rather than failing the insert.
+    """
+
+    try:
+        amount = amount.quantize(_CENTS, rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        return None
+    if abs(amount) >= MAX_LINE_AMOUNT:
+        return None
+    return amount
+
+
+def _type_accounts(workbook) -> Dict[str, str]:
+    """Return the workbook's own ``Data List`` type-to-account lookup.
+
+    The template fills the ``Account`` column with a ``VLOOKUP`` into this
+    sheet; workbooks saved without recalculation have no cached result, so
+    the importer performs the same lookup.
+    """
+
+    if "Data List" not in workbook.sheetnames:
+        return {}
+    lookup: Dict[str, str] = {}
+    for row in workbook["Data List"].iter_rows(min_row=2, values_only=True):
+        if len(row) < 2:
+            continue
+        expense_type = _cell_text(row[0])
+        account = _account_text(row[1])
+        if expense_type and account:
+            lookup.setdefault(expense_type, account)
+    return lookup
+
+
+def _measure(stream: BinaryIO) -> int:
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+
+def import_expense_workbook(
+    stream: BinaryIO,
+    report: ExpenseReport,
+    *,
+    valid_gl_accounts: set[str],
+    expense_types: Tuple[str, ...],
+    max_lines: int = DEFAULT_MAX_IMPORT_LINES,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> ExpenseImportResult:
+    """Stream expense lines from an uploaded workbook into ``report``.
+
+    Inputs:
+        stream: Seekable binary stream holding the uploaded ``.xlsx`` file.
+        report: Flushed :class:`app.models.ExpenseReport` receiving the lines.
+        valid_gl_accounts: Approved GL account codes.
+        expense_types: Approved expense types.
+        max_lines: Largest number of lines accepted from one workbook.
+        batch_size: Rows buffered before each bulk ``INSERT``.
+
+    Outputs:
+        :class:`ExpenseImportResult`. Rows with a date or type are treated as
+        expense lines; other rows (blank lines, totals, signatures) are
+        ignored. Once any row fails validation no further rows are inserted,
+        but scanning continues so every error (up to
+        :data:`MAX_IMPORT_ERRORS`) is reported. The caller commits on success
+        and rolls back when ``errors`` is non-empty.
+
+    External dependencies:
+        * Calls :func:`openpyxl.load_workbook` in read-only mode.
+        * Executes bulk inserts of :class:`app.models.ExpenseLine` through
+          :data:`app.models.db.session`.
+        * Raises :class:`ExpenseImportError` when the file is too large, is
+          not a workbook, or lacks the expense line table.
+    """
+
+    if _measure(stream) > MAX_IMPORT_WORKBOOK_BYTES:
+        raise ExpenseImportError("Expense workbook is larger than 20 MB.")
+    try:
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    except (
+        openpyxl.utils.exceptions.InvalidFileException,
+        OSError,
+        KeyError,
+        ParseError,
+        zipfile.BadZipFile,
+    ) as exc:
+        raise ExpenseImportError(
+            "Uploaded file is not a valid .xlsx workbook."
+        ) from exc
+
+    result = ExpenseImportResult()
+    allowed_types = set(expense_types)
+    batch: List[dict] = []
+
+    def _flush() -> None:
+        if batch:
+            db.session.execute(insert(ExpenseLine), batch)
+        batch.clear()
+
+    try:
+        if EXPENSE_IMPORT_SHEET in workbook.sheetnames:
+            sheet = workbook[EXPENSE_IMPORT_SHEET]
+        else:
+            sheet = workbook.worksheets[0]
+        type_accounts = _type_accounts(workbook)
+        rows = sheet.iter_rows(values_only=True)
+        header_row, columns = _locate_columns(rows)
+
+        def _column(row: tuple, name: str) -> object:
+            position = columns.get(name)
+            if position is None or position >= len(row):
+                return None
+            return row[position]
+
+        for row_number, row in enumerate(rows, start=header_row + 1):
+            raw_date = _column(row, "date")
+            expense_type = _cell_text(_column(row, "expense_type"))
+            line_date = _parse_date(raw_date)
+            if line_date is None and not expense_type:
+                continue
+
+            if result.line_count + len(batch) >= max_lines:
+                result.errors.append(
+                    f"Workbook has more than {max_lines} expense lines."
+                )
+                break
+
+            row_errors: List[str] = []
+            if line_date is None:
+                row_errors.append(f"Row {row_number}: invalid date.")
+            if expense_type not in allowed_types:
+                row_errors.append(
+                    f"Row {row_number}: expense type '{expense_type}' is not "
+                    "on the approved list."
+                )
+            gl_account = _account_text(_column(row, "gl_account")) or (
+                type_accounts.get(expense_type, "")
+            )
+            if gl_account not in valid_gl_accounts:
+                row_errors.append(
+                    f"Row {row_number}: select a GL account from the approved list."
+                )
+            amount = _parse_amount(_column(row, "amount"))
+            if amount is None:
+                row_errors.append(f"Row {row_number}: amount must be numeric.")
+            else:
+                amount = quantize_line_amount(amount)
+                if amount is None:
+                    row_errors.append(
+                        f"Row {row_number}: amount must be less than "
+                        f"{MAX_LINE_AMOUNT:,.0f}."
+                    )
+                elif abs(result.total_amount + amount) >= MAX_REPORT_TOTAL:
+                    row_errors.append(
+                        f"Row {row_number}: report total must be less than "
+                        f"{MAX_REPORT_TOTAL:,.0f}."
+                    )
+
+            if row_errors:
+                batch.clear()
+                result.errors.extend(row_errors)
+                if len(result.errors) >= MAX_IMPORT_ERRORS:
+                    break
+                continue
+            if result.errors:
+                # Keep validating for the error report but stop writing.
+                continue
+
+            description = _cell_text(_column(row, "description"))
+            receipt = _cell_text(_column(row, "receipt"))
+            if receipt:
+                description = (
+                    f"{description} (Receipt: {receipt})"
+                    if description
+                    else f"Receipt: {receipt}"
+                )
+            batch.append(
+                {
+                    "expense_report_id": report.id,
+                    "date": line_date,
+                    "expense_type": expense_type[:120],
+                    "gl_account": gl_account,
+                    "vendor": _cell_text(_column(row, "vendor"))[:255],
+                    "description": description[:255],
+                    "amount": amount,
+                }
+            )
+            result.total_amount += amount
+            if len(batch) >= batch_size:
+                result.line_count += len(batch)
+                _flush()
+        result.line_count += len(batch)
+        _flush()
+    finally:
+        workbook.close()
+
+    if not result.errors and result.line_count == 0:
+        result.errors.append("The workbook does not contain any expense lines.")
+    return result
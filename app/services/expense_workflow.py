@@ -5,174 +5,298 @@ from __future__ import annotations
 import csv
 import io
 import os
-import uuid
+from contextlib import contextmanager
 from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
 from functools import lru_cache
 from pathlib import Path
-from typing import List, Mapping, Sequence, Tuple
+from typing import Iterator, List, Mapping, Optional, Sequence, Tuple
 
-import openpyxl
 import paramiko
 from flask import current_app
-from werkzeug.datastructures import FileStorage
-from werkzeug.utils import secure_filename
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.orm import Query, aliased, lazyload, selectinload
+from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy.orm.exc import StaleDataError
 
-from app.models import ExpenseReport
+from app.models import ExpenseLine, ExpenseReport, User, db
+from app.services.reference_data import (
+    ExpenseReferenceDataError,
+    GLAccountOption,
+    load_current_reference_snapshot,
+    missing_sheet_error,
+)
 
+DEFAULT_DASHBOARD_PAGE_SIZE = 50
+MAX_DASHBOARD_PAGE_SIZE = 200
 
-class ExpenseReferenceDataError(RuntimeError):
-    """Raised when the runtime expense reference workbook cannot be consumed.
 
-    Inputs:
-        message: Operator-facing guidance that explains why workbook access
-            failed and how to remediate the runtime deployment.
+@lru_cache(maxsize=1)
+def _workbook_path() -> Path:
+    """Return the canonical workbook path used to mirror spreadsheet workflows."""
 
-    Outputs:
-        A domain-specific exception consumed by route handlers to avoid
-        unhandled 500 errors for workbook-related failures.
+    return Path(current_app.root_path).parent / "expense_report_template.xlsx"
 
-    External dependencies:
-        None.
+
+def load_gl_accounts() -> Tuple[GLAccountOption, ...]:
+    """Return GL account options from the workbook ``GL Accounts`` sheet.
+
+    Values come from the active snapshot returned by
+    :func:`app.services.reference_data.load_current_reference_snapshot`: the
+    newest administrator upload, otherwise the bundled workbook, which is
+    only parsed again after it changes.
     """
 
+    snapshot = load_current_reference_snapshot(_workbook_path())
+    if snapshot.gl_accounts is None:
+        raise missing_sheet_error(_workbook_path())
+    return snapshot.gl_accounts
+
+
+def load_expense_types() -> Tuple[str, ...]:
+    """Return standardized expense types from the workbook ``Data List`` sheet."""
+
+    snapshot = load_current_reference_snapshot(_workbook_path())
+    if snapshot.expense_types is None:
+        raise missing_sheet_error(_workbook_path())
+    return snapshot.expense_types
+
+
+def reference_data_version() -> str:
+    """Return the digest identifying the active reference data snapshot."""
+
+    return load_current_reference_snapshot(_workbook_path()).digest
+
 
 @dataclass(frozen=True)
-class GLAccountOption:
-    """Searchable GL account option sourced from the reference workbook."""
+class ReportSummary:
+    """Report header paired with line aggregates computed in SQL.
+
+    Attributes:
+        report: The :class:`app.models.ExpenseReport` header. Its ``lines``
+            relationship is not loaded.
+        line_count: Number of lines attached to the report.
+        total_amount: Sum of every line amount.
+        approved_total: Sum of line amounts with ``review_status="Approved"``.
+        rejected_count: Number of lines with ``review_status="Rejected"``.
+    """
 
-    account: str
-    label: str
+    report: ExpenseReport
+    line_count: int
+    total_amount: Decimal
+    approved_total: Decimal
+    rejected_count: int
 
 
-@lru_cache(maxsize=1)
-def _workbook_path() -> Path:
-    """Return the canonical workbook path used to mirror spreadsheet workflows."""
+@dataclass(frozen=True)
+class ReportPage:
+    """One keyset page of report summaries plus the cursor for the next page."""
 
-    return Path(current_app.root_path).parent / "expense_report_template.xlsx"
+    rows: Tuple[ReportSummary, ...]
+    next_cursor: Optional[str]
 
 
-def _load_reference_workbook(*, required_sheet: str) -> openpyxl.Workbook:
-    """Load the shared workbook and return it when the required sheet exists.
+def _report_summary_query(*eager_relationships) -> Query:
+    """Return a grouped query yielding reports with their line aggregates.
 
     Inputs:
-        required_sheet: Worksheet name that must be available for the caller,
-            such as ``GL Accounts`` or ``Data List``.
+        eager_relationships: :class:`app.models.ExpenseReport` user
+            relationships (``employee``/``supervisor``) to select-in load for
+            the list being rendered.
 
     Outputs:
-        An open :class:`openpyxl.workbook.workbook.Workbook` object in
-        read-only mode. Callers must close it after reading values.
+        A :class:`sqlalchemy.orm.Query` over ``(ExpenseReport, line_count,
+        total_amount, approved_total, rejected_count)`` grouped by report id.
+        Callers add filters, ordering, and limits.
 
     External dependencies:
-        * Calls :func:`app.services.expense_workflow._workbook_path` to resolve
-          the expected runtime path.
-        * Calls :func:`openpyxl.load_workbook` to read spreadsheet data.
+        * Uses :data:`app.models.db.session` to build the query.
     """
 
-    workbook_path = _workbook_path()
-    expected_sheets = ("GL Accounts", "Data List")
-
-    try:
-        workbook = openpyxl.load_workbook(
-            workbook_path,
-            read_only=True,
-            data_only=True,
+    approved_amount = case(
+        (ExpenseLine.review_status == "Approved", ExpenseLine.amount), else_=0
+    )
+    rejected_flag = case((ExpenseLine.review_status == "Rejected", 1), else_=0)
+    return (
+        db.session.query(
+            ExpenseReport,
+            func.count(ExpenseLine.id),
+            func.coalesce(func.sum(ExpenseLine.amount), 0),
+            func.coalesce(func.sum(approved_amount), 0),
+            func.coalesce(func.sum(rejected_flag), 0),
+        )
+        .outerjoin(ExpenseLine, ExpenseLine.expense_report_id == ExpenseReport.id)
+        .options(
+            lazyload(ExpenseReport.lines),
+            *(selectinload(relationship) for relationship in eager_relationships),
         )
-    except (
-        FileNotFoundError,
-        openpyxl.utils.exceptions.InvalidFileException,
-        OSError,
-    ) as exc:
-        raise ExpenseReferenceDataError(
-            "Expense reference workbook could not be loaded. "
-            f"Expected file: '{workbook_path}'. "
-            f"Required sheets: {', '.join(expected_sheets)}. "
-            "Ensure the workbook exists and is a valid .xlsx file on the "
-            "application host."
-        ) from exc
+        .group_by(ExpenseReport.id)
+    )
 
-    try:
-        workbook[required_sheet]
-    except KeyError as exc:
-        workbook.close()
-        raise ExpenseReferenceDataError(
-            "Expense reference workbook is missing required sheet data. "
-            f"Expected file: '{workbook_path}'. "
-            f"Required sheets: {', '.join(expected_sheets)}. "
-            "Verify the deployed workbook matches the template structure."
-        ) from exc
 
-    return workbook
+def _to_report_summary(result: Tuple) -> ReportSummary:
+    """Convert one :func:`_report_summary_query` result row into a summary."""
 
+    report, line_count, total_amount, approved_total, rejected_count = result
+    return ReportSummary(
+        report=report,
+        line_count=int(line_count or 0),
+        total_amount=Decimal(total_amount or 0).quantize(Decimal("0.01")),
+        approved_total=Decimal(approved_total or 0).quantize(Decimal("0.01")),
+        rejected_count=int(rejected_count or 0),
+    )
 
-@lru_cache(maxsize=1)
-def load_gl_accounts() -> Tuple[GLAccountOption, ...]:
-    """Read GL account values from the workbook ``GL Accounts`` sheet."""
-
-    workbook = _load_reference_workbook(required_sheet="GL Accounts")
-    sheet = workbook["GL Accounts"]
-    values: List[GLAccountOption] = []
-    for row in sheet.iter_rows(min_row=2, values_only=True):
-        account = str(row[0] or "").strip()
-        label = str(row[1] or "").strip()
-        if not account:
-            continue
-        display = f"{account} - {label}" if label else account
-        values.append(GLAccountOption(account=account, label=display))
-    workbook.close()
-    return tuple(values)
 
+def summarize_reports(
+    *criteria,
+    order_by: Sequence = (),
+    eager: Sequence = (),
+) -> List[ReportSummary]:
+    """Return report summaries matching ``criteria`` from one grouped query.
 
-@lru_cache(maxsize=1)
-def load_expense_types() -> Tuple[str, ...]:
-    """Read standardized expense types from the workbook ``Data List`` sheet."""
+    Inputs:
+        criteria: SQLAlchemy filter expressions applied to
+            :class:`app.models.ExpenseReport`.
+        order_by: Ordering expressions for the result list.
+        eager: Report user relationships to select-in load, for example
+            ``(ExpenseReport.employee,)``.
 
-    workbook = _load_reference_workbook(required_sheet="Data List")
-    sheet = workbook["Data List"]
-    values: List[str] = []
-    for row in sheet.iter_rows(min_row=2, values_only=True):
-        candidate = str(row[0] or "").strip()
-        if candidate:
-            values.append(candidate)
-    workbook.close()
-    return tuple(values)
+    Outputs:
+        A list of :class:`ReportSummary` entries. Line rows are never
+        materialized; totals come from SQL ``SUM``/``COUNT`` aggregates.
 
+    External dependencies:
+        * Queries :class:`app.models.ExpenseReport` and
+          :class:`app.models.ExpenseLine` via :func:`_report_summary_query`.
+    """
 
-def upload_receipt_to_cloud_storage(
-    file_storage: FileStorage,
-    *,
-    report_id: int,
-    line_index: int,
-) -> str:
-    """Upload a receipt image to GCS and return its URL.
+    query = _report_summary_query(*eager).filter(*criteria)
+    if order_by:
+        query = query.order_by(*order_by)
+    return [_to_report_summary(result) for result in query.all()]
 
-    This function calls ``google.cloud.storage.Client`` when the
-    ``EXPENSE_RECEIPT_BUCKET`` configuration is present.
+
+def encode_report_cursor(created_at: datetime, report_id: int) -> str:
+    """Return an opaque keyset cursor for the ``(created_at, id)`` position.
+
+    Inputs:
+        created_at: Submission timestamp of the last report on a page.
+        report_id: Primary key of the last report on a page.
+
+    Outputs:
+        A URL-safe string accepted by :func:`decode_report_cursor`.
+
+    External dependencies:
+        None.
     """
 
-    if not file_storage or not file_storage.filename:
-        return ""
+    return f"{created_at.isoformat()}_{report_id}"
+
+
+def decode_report_cursor(raw_cursor: str) -> Tuple[datetime, int]:
+    """Parse a cursor produced by :func:`encode_report_cursor`.
+
+    Inputs:
+        raw_cursor: Cursor string supplied by the client.
+
+    Outputs:
+        A ``(created_at, report_id)`` tuple identifying the keyset position.
+
+    External dependencies:
+        None. Raises :class:`ValueError` for malformed cursors.
+    """
 
-    bucket_name = (current_app.config.get("EXPENSE_RECEIPT_BUCKET") or "").strip()
-    if not bucket_name:
-        return ""
+    created_raw, _, id_raw = (raw_cursor or "").strip().rpartition("_")
+    if not created_raw or not id_raw:
+        raise ValueError("Malformed report cursor.")
+    return datetime.fromisoformat(created_raw), int(id_raw)
 
-    from google.cloud import storage  # Imported lazily to keep startup fast.
 
-    safe_name = secure_filename(file_storage.filename)
-    extension = Path(safe_name).suffix.lower()
-    unique_name = (
-        f"expense-receipts/{report_id}/{line_index}-{uuid.uuid4().hex}{extension}"
+def paginate_supervisor_queue(
+    supervisor_id: int,
+    *,
+    after: Optional[str] = None,
+    limit: int = DEFAULT_DASHBOARD_PAGE_SIZE,
+) -> ReportPage:
+    """Return one page of ``Pending Review`` reports assigned to a supervisor.
+
+    Reports are ordered oldest first on ``(created_at, id)`` and paged with a
+    keyset predicate, so deep pages cost the same as the first one. Lines are
+    not loaded; their count and total are aggregated in the same query.
+
+    Inputs:
+        supervisor_id: Identifier of the reviewing :class:`app.models.User`.
+        after: Optional cursor from a previous :class:`ReportPage`.
+        limit: Maximum number of reports to return, clamped to
+            :data:`MAX_DASHBOARD_PAGE_SIZE`.
+
+    Outputs:
+        A :class:`ReportPage` whose ``next_cursor`` is ``None`` on the last
+        page.
+
+    External dependencies:
+        * Queries :class:`app.models.ExpenseReport` and
+          :class:`app.models.ExpenseLine` through :data:`app.models.db.session`.
+        * Raises :class:`ValueError` when ``after`` is malformed.
+    """
+
+    page_size = max(1, min(int(limit), MAX_DASHBOARD_PAGE_SIZE))
+    query = _report_summary_query(ExpenseReport.employee).filter(
+        ExpenseReport.supervisor_id == supervisor_id,
+        ExpenseReport.status == "Pending Review",
     )
+    if after:
+        after_created_at, after_id = decode_report_cursor(after)
+        query = query.filter(
+            or_(
+                ExpenseReport.created_at > after_created_at,
+                and_(
+                    ExpenseReport.created_at == after_created_at,
+                    ExpenseReport.id > after_id,
+                ),
+            )
+        )
 
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(unique_name)
-    blob.upload_from_file(
-        file_storage.stream,
-        content_type=file_storage.content_type or "application/octet-stream",
+    results = (
+        query.order_by(ExpenseReport.created_at.asc(), ExpenseReport.id.asc())
+        .limit(page_size + 1)
+        .all()
     )
-    blob.make_public()
-    return blob.public_url
+
+    rows = tuple(_to_report_summary(result) for result in results[:page_size])
+    next_cursor = None
+    if len(results) > page_size and rows:
+        last = rows[-1].report
+        next_cursor = encode_report_cursor(last.created_at, last.id)
+    return ReportPage(rows=rows, next_cursor=next_cursor)
+
+
+def refresh_report_totals(report: ExpenseReport) -> None:
+    """Recompute the cached line totals stored on ``report``.
+
+    Inputs:
+        report: The :class:`app.models.ExpenseReport` whose ``lines`` are
+            already loaded in memory.
+
+    Outputs:
+        None. Updates ``line_count``, ``total_amount``, and ``approved_amount``
+        in-place. The caller must commit the database session.
+
+    External dependencies:
+        None.
+    """
+
+    total = Decimal("0")
+    approved = Decimal("0")
+    for line in report.lines:
+        amount = Decimal(line.amount or 0)
+        total += amount
+        if line.review_status == "Approved":
+            approved += amount
+    report.line_count = len(report.lines)
+    report.total_amount = total
+    report.approved_amount = approved
 
 
 def apply_line_item_review_actions(
@@ -192,8 +316,9 @@ def apply_line_item_review_actions(
         caller should present to the user interface.
 
     External dependencies:
-        Mutates ``report`` and its ``lines`` in-place. The caller must commit
-        the database session after invoking this helper.
+        Mutates ``report`` and its ``lines`` in-place, including the cached
+        totals via :func:`refresh_report_totals`. The caller must commit the
+        database session after invoking this helper.
     """
 
     if not report.lines:
@@ -227,6 +352,10 @@ def apply_line_item_review_actions(
 
         raise ValueError("Select a valid review action for every expense line.")
 
+    refresh_report_totals(report)
+
+    # A re-reviewed report is planned into a fresh NetSuite batch.
+    report.netsuite_batch_id = None
     if any_rejected:
         report.status = "Draft"
         report.rejection_comment = "Line-level feedback provided."
@@ -237,25 +366,235 @@ def apply_line_item_review_actions(
     return "All expense lines approved. Report queued for NetSuite upload.", "success"
 
 
+class ReportConflictError(RuntimeError):
+    """Raised when a report changed after the reviewer loaded it.
+
+    The review was not applied; reloading the report and submitting again is
+    always safe.
+    """
+
+
+REPORT_CONFLICT_MESSAGE = (
+    "This report was changed by another reviewer while you were working on it. "
+    "Review the latest version and submit again."
+)
+
+
+def ensure_report_version(
+    report: ExpenseReport, expected_version: Optional[int]
+) -> None:
+    """Reject a review submitted against an older copy of ``report``.
+
+    Inputs:
+        report: The freshly loaded :class:`app.models.ExpenseReport`.
+        expected_version: ``version_id`` rendered into the review form, or
+            ``None`` when the form did not include one.
+
+    Outputs:
+        None. Raises :class:`ReportConflictError` when the versions differ.
+
+    External dependencies:
+        None.
+    """
+
+    if expected_version is not None and expected_version != report.version_id:
+        raise ReportConflictError(REPORT_CONFLICT_MESSAGE)
+
+
+def commit_report_review(report: ExpenseReport) -> None:
+    """Commit a review, failing cleanly if another reviewer committed first.
+
+    Inputs:
+        report: The reviewed :class:`app.models.ExpenseReport`.
+
+    Outputs:
+        None. The report row is always rewritten so its ``version_id`` moves
+        forward even when only lines changed. On a version mismatch the
+        session is rolled back and :class:`ReportConflictError` is raised.
+
+    External dependencies:
+        * Commits through :data:`app.models.db.session`.
+    """
+
+    flag_modified(report, "status")
+    try:
+        db.session.commit()
+    except StaleDataError as exc:
+        db.session.rollback()
+        raise ReportConflictError(REPORT_CONFLICT_MESSAGE) from exc
+
+
+BULK_REVIEW_ACTIONS = ("approve_all", "approve_except", "reject_all")
+
+
+def parse_line_review_form(form: Mapping[str, str]) -> dict[int, Tuple[str, str]]:
+    """Collect per-line review fields from a submitted review form.
+
+    Inputs:
+        form: Submitted form holding ``line_<id>_action`` and
+            ``line_<id>_comment`` fields.
+
+    Outputs:
+        Mapping of line identifier to ``(action, comment)``, built in one pass
+        over the submitted fields rather than two lookups per line.
+
+    External dependencies:
+        None.
+    """
+
+    decisions: dict[int, Tuple[str, str]] = {}
+    for key, value in form.items():
+        prefix, _sep, rest = key.partition("_")
+        line_id_raw, _sep, field_name = rest.partition("_")
+        if prefix != "line" or not line_id_raw.isdigit():
+            continue
+        action, comment = decisions.get(int(line_id_raw), ("", ""))
+        if field_name == "action":
+            action = value or ""
+        elif field_name == "comment":
+            comment = value or ""
+        else:
+            continue
+        decisions[int(line_id_raw)] = (action, comment)
+    return decisions
+
+
+def apply_bulk_review_action(
+    report: ExpenseReport,
+    *,
+    action: str,
+    line_ids: Sequence[int] = (),
+    comment: str = "",
+) -> Tuple[str, str]:
+    """Review every line of ``report`` with set-based ``UPDATE`` statements.
+
+    Inputs:
+        report: The :class:`app.models.ExpenseReport` being reviewed. Its
+            ``lines`` do not need to be loaded.
+        action: One of :data:`BULK_REVIEW_ACTIONS`: ``approve_all`` approves
+            every line, ``approve_except`` rejects ``line_ids`` and approves
+            the rest, and ``reject_all`` rejects every line.
+        line_ids: Lines excluded from approval for ``approve_except``.
+        comment: Shared reviewer comment stored on each rejected line.
+
+    Outputs:
+        A two-item tuple with the flash message and category, matching
+        :func:`apply_line_item_review_actions`. Raises :class:`ValueError`
+        for an unknown action, a missing comment, or line identifiers that do
+        not belong to ``report``.
+
+    External dependencies:
+        * Issues at most two ``UPDATE ... WHERE id IN (...)`` statements and
+          one aggregate ``SELECT`` through :data:`app.models.db.session`.
+          Loaded line objects are expired; the caller commits.
+    """
+
+    normalized_action = (action or "").strip().lower()
+    if normalized_action not in BULK_REVIEW_ACTIONS:
+        raise ValueError("Select a valid bulk review action.")
+    trimmed_comment = (comment or "").strip()
+    rejected_ids = sorted({int(line_id) for line_id in line_ids})
+    lines_of_report = ExpenseLine.expense_report_id == report.id
+
+    if normalized_action == "approve_except":
+        if not rejected_ids:
+            raise ValueError("Select the expense lines to exclude from approval.")
+        owned = db.session.scalar(
+            select(func.count(ExpenseLine.id)).where(
+                lines_of_report, ExpenseLine.id.in_(rejected_ids)
+            )
+        )
+        if owned != len(rejected_ids):
+            raise ValueError("Selected expense lines do not belong to this report.")
+    if normalized_action != "approve_all" and not trimmed_comment:
+        raise ValueError("Provide a rejection comment for the rejected lines.")
+
+    approved_values = {"review_status": "Approved", "review_comment": None}
+    rejected_values = {"review_status": "Rejected", "review_comment": trimmed_comment}
+    all_lines = update(ExpenseLine).where(lines_of_report)
+    if normalized_action == "approve_all":
+        statements = [all_lines.values(approved_values)]
+    elif normalized_action == "reject_all":
+        statements = [all_lines.values(rejected_values)]
+    else:
+        statements = [
+            update(ExpenseLine)
+            .where(lines_of_report, ExpenseLine.id.in_(rejected_ids))
+            .values(rejected_values),
+            update(ExpenseLine)
+            .where(lines_of_report, ExpenseLine.id.not_in(rejected_ids))
+            .values(approved_values),
+        ]
+    for statement in statements:
+        db.session.execute(statement.execution_options(synchronize_session=False))
+
+    line_count, total, approved, rejected = db.session.execute(
+        select(
+            func.count(ExpenseLine.id),
+            func.coalesce(func.sum(ExpenseLine.amount), 0),
+            func.coalesce(
+                func.sum(
+                    case(
+                        (ExpenseLine.review_status == "Approved", ExpenseLine.amount),
+                        else_=0,
+                    )
+                ),
+                0,
+            ),
+            func.coalesce(
+                func.sum(case((ExpenseLine.review_status == "Rejected", 1), else_=0)),
+                0,
+            ),
+        ).where(lines_of_report)
+    ).one()
+    if not line_count:
+        raise ValueError("This report has no expense lines to review.")
+
+    # Line objects already in the session still hold their old status.
+    for line in list(report.__dict__.get("lines", ())):
+        db.session.expire(line)
+    report.line_count = line_count
+    report.total_amount = Decimal(total)
+    report.approved_amount = Decimal(approved)
+
+    # A re-reviewed report is planned into a fresh NetSuite batch.
+    report.netsuite_batch_id = None
+    if rejected:
+        report.status = "Draft"
+        report.rejection_comment = "Line-level feedback provided."
+        return "Report returned to draft with line-level feedback.", "info"
+
+    report.status = "Pending Upload"
+    report.rejection_comment = None
+    return "All expense lines approved. Report queued for NetSuite upload.", "success"
+
+
+NETSUITE_CSV_HEADER = (
+    "report_id",
+    "employee_email",
+    "supervisor_email",
+    "expense_date",
+    "expense_type",
+    "gl_account",
+    "vendor",
+    "description",
+    "amount",
+    "receipt_url",
+)
+DEFAULT_CSV_STREAM_CHUNK_ROWS = 500
+
+
 def format_pending_reports_csv(reports: Sequence[ExpenseReport]) -> str:
-    """Serialize ``Pending Upload`` reports into a single NetSuite-ready CSV."""
+    """Serialize ``Pending Upload`` reports into a single NetSuite-ready CSV.
+
+    Dispatch and download use :func:`iter_pending_upload_csv`; this
+    whole-file version is kept only as the reference output for
+    ``tests/test_pending_upload_csv_stream.py``.
+    """
 
     output = io.StringIO()
     writer = csv.writer(output)
-    writer.writerow(
-        [
-            "report_id",
-            "employee_email",
-            "supervisor_email",
-            "expense_date",
-            "expense_type",
-            "gl_account",
-            "vendor",
-            "description",
-            "amount",
-            "receipt_url",
-        ]
-    )
+    writer.writerow(NETSUITE_CSV_HEADER)
 
     for report in reports:
         for line in report.lines:
@@ -279,13 +618,127 @@ def format_pending_reports_csv(reports: Sequence[ExpenseReport]) -> str:
     return output.getvalue()
 
 
-def dispatch_csv_via_sftp(payload: str, *, filename: str) -> None:
-    """Transmit a generated expense export to the configured NetSuite SFTP host."""
+def iter_pending_upload_csv(
+    *,
+    report_ids: Optional[Sequence[int]] = None,
+    chunk_rows: int = DEFAULT_CSV_STREAM_CHUNK_ROWS,
+    status: str = "Pending Upload",
+) -> Iterator[str]:
+    """Yield the NetSuite CSV for ``Pending Upload`` reports in small chunks.
+
+    Unlike :func:`format_pending_reports_csv`, report and line objects are
+    never materialized. Approved lines are selected as plain column tuples
+    and fetched with ``yield_per`` (which enables ``stream_results`` on
+    server-side cursor capable drivers), so memory stays bounded by
+    ``chunk_rows`` regardless of the backlog size.
+
+    Inputs:
+        report_ids: Optional subset of ``Pending Upload`` report identifiers
+            to export, used when dispatching in batches. ``None`` exports the
+            whole backlog.
+        chunk_rows: Number of CSV rows buffered before each yield.
+        status: Report status to export. Dispatchers pass ``"Uploading"`` for
+            the reports they have claimed.
+
+    Outputs:
+        An iterator of CSV text fragments. The first fragment contains the
+        header row; concatenating every fragment produces the same document
+        as :func:`format_pending_reports_csv`.
+
+    External dependencies:
+        * Executes a streaming query through :data:`app.models.db.session`.
+    """
+
+    batch_size = max(1, int(chunk_rows))
+    employee = aliased(User)
+    supervisor = aliased(User)
+    statement = (
+        select(
+            ExpenseReport.id,
+            employee.email,
+            supervisor.email,
+            ExpenseLine.date,
+            ExpenseLine.expense_type,
+            ExpenseLine.gl_account,
+            ExpenseLine.vendor,
+            ExpenseLine.description,
+            ExpenseLine.amount,
+            ExpenseLine.receipt_url,
+        )
+        .join(ExpenseLine, ExpenseLine.expense_report_id == ExpenseReport.id)
+        .outerjoin(employee, employee.id == ExpenseReport.employee_id)
+        .outerjoin(supervisor, supervisor.id == ExpenseReport.supervisor_id)
+        .where(
+            ExpenseReport.status == status,
+            ExpenseLine.review_status == "Approved",
+        )
+        .order_by(ExpenseReport.id.asc(), ExpenseLine.id.asc())
+        .execution_options(yield_per=batch_size)
+    )
+    if report_ids is not None:
+        statement = statement.where(ExpenseReport.id.in_(list(report_ids)))
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(NETSUITE_CSV_HEADER)
+    buffered = 0
+
+    for (
+        report_id,
+        employee_email,
+        supervisor_email,
+        line_date,
+        expense_type,
+        gl_account,
+        vendor,
+        description,
+        amount,
+        receipt_url,
+    ) in db.session.execute(statement):
+        writer.writerow(
+            [
+                report_id,
+                employee_email or "",
+                supervisor_email or "",
+                line_date.isoformat(),
+                expense_type,
+                gl_account,
+                vendor,
+                description or "",
+                f"{amount:.2f}",
+                receipt_url or "",
+            ]
+        )
+        buffered += 1
+        if buffered >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            buffered = 0
+
+    remainder = buffer.getvalue()
+    if remainder:
+        yield remainder
+
+
+@contextmanager
+def open_netsuite_sftp() -> Iterator[paramiko.SFTPClient]:
+    """Open one authenticated SFTP session to the configured NetSuite host.
+
+    Outputs:
+        Yields a :class:`paramiko.SFTPClient`. The underlying transport is
+        closed when the context exits, so callers can reuse one session for
+        several file transfers.
+
+    External dependencies:
+        * Reads ``NETSUITE_SFTP_*`` values from :attr:`flask.Flask.config`.
+        * Uses :class:`paramiko.Transport` for the network connection.
+        * Raises :class:`ValueError` when credentials are incomplete.
+    """
 
     host = (current_app.config.get("NETSUITE_SFTP_HOST") or "").strip()
     username = (current_app.config.get("NETSUITE_SFTP_USERNAME") or "").strip()
     password = (current_app.config.get("NETSUITE_SFTP_PASSWORD") or "").strip()
-    remote_dir = (current_app.config.get("NETSUITE_SFTP_DIRECTORY") or "/").strip()
     port = int(current_app.config.get("NETSUITE_SFTP_PORT", 22))
 
     if not host or not username or not password:
@@ -294,9 +747,13 @@ def dispatch_csv_via_sftp(payload: str, *, filename: str) -> None:
     transport = paramiko.Transport((host, port))
     try:
         transport.connect(username=username, password=password)
-        client = paramiko.SFTPClient.from_transport(transport)
-        remote_path = f"{remote_dir.rstrip('/')}/{filename}"
-        with client.file(remote_path, "w") as remote_file:
-            remote_file.write(payload)
+        yield paramiko.SFTPClient.from_transport(transport)
     finally:
         transport.close()
+
+
+def netsuite_remote_path(filename: str) -> str:
+    """Return ``filename`` joined to the configured NetSuite SFTP directory."""
+
+    remote_dir = (current_app.config.get("NETSUITE_SFTP_DIRECTORY") or "/").strip()
+    return f"{remote_dir.rstrip('/')}/{filename}"
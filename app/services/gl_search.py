@@ -0,0 +1,183 @@
+"""In-memory search index over GL account options for typeahead lookups.
+
+The expense form used to download every GL account and filter in the
+browser. :class:`GLAccountIndex` instead answers short queries on the server:
+
+* account codes and label words are kept in sorted lists, so prefix matches
+  are two :func:`bisect.bisect_left` calls;
+* every option is also broken into character trigrams so queries of three or
+  more characters match anywhere in the code or label.
+
+The index is rebuilt only when :func:`app.services.expense_workflow.load_gl_accounts`
+returns a different tuple, which happens when the reference data changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from bisect import bisect_left
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.services.reference_data import GLAccountOption
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+
+_WORD_PATTERN = re.compile(r"[0-9a-z]+")
+
+# Lower rank sorts first.
+RANK_EXACT_CODE = 0
+RANK_CODE_PREFIX = 1
+RANK_WORD_PREFIX = 2
+RANK_SUBSTRING = 3
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[start : start + 3] for start in range(len(text) - 2)}
+
+
+def _prefix_matches(entries: Sequence[Tuple[str, int]], prefix: str) -> Set[int]:
+    """Return option positions whose key in sorted ``entries`` starts with ``prefix``."""
+
+    matches: Set[int] = set()
+    position = bisect_left(entries, (prefix, -1))
+    while position < len(entries) and entries[position][0].startswith(prefix):
+        matches.add(entries[position][1])
+        position += 1
+    return matches
+
+
+class GLAccountIndex:
+    """Prefix and trigram index over a fixed tuple of GL account options.
+
+    Inputs:
+        options: GL account options in workbook order. Options without an
+            account code are ignored.
+
+    Outputs:
+        An immutable index whose :meth:`search` returns ranked matches and
+        whose ``version`` changes whenever the indexed options change.
+
+    External dependencies:
+        None.
+    """
+
+    def __init__(self, options: Iterable[GLAccountOption]) -> None:
+        self.options: Tuple[GLAccountOption, ...] = tuple(
+            option for option in options if option.account
+        )
+        fingerprint = hashlib.sha1()
+        for option in self.options:
+            fingerprint.update(f"{option.account}\x1f{option.label}\x1e".encode())
+        self.version = fingerprint.hexdigest()[:16]
+
+        self._codes = sorted(
+            (option.account.lower(), position)
+            for position, option in enumerate(self.options)
+        )
+        self._words = sorted(
+            (word, position)
+            for position, option in enumerate(self.options)
+            for word in set(_WORD_PATTERN.findall(option.label.lower()))
+        )
+        self._haystacks = [
+            f"{option.account} {option.label}".lower() for option in self.options
+        ]
+        postings: Dict[str, Set[int]] = {}
+        for position, haystack in enumerate(self._haystacks):
+            for trigram in _trigrams(haystack):
+                postings.setdefault(trigram, set()).add(position)
+        self._trigram_postings: Dict[str, FrozenSet[int]] = {
+            trigram: frozenset(positions) for trigram, positions in postings.items()
+        }
+
+    def _substring_matches(self, query: str) -> Set[int]:
+        """Return positions whose code or label contains ``query``."""
+
+        candidates: Optional[Set[int]] = None
+        for trigram in _trigrams(query):
+            posting = self._trigram_postings.get(trigram)
+            if not posting:
+                return set()
+            candidates = set(posting) if candidates is None else candidates & posting
+            if not candidates:
+                return set()
+        return {
+            position
+            for position in candidates or ()
+            if query in self._haystacks[position]
+        }
+
+    def search(
+        self, query: str, *, limit: int = DEFAULT_SEARCH_LIMIT
+    ) -> List[GLAccountOption]:
+        """Return up to ``limit`` options matching ``query``, best first.
+
+        Ranking: exact account code, then code prefix, then options where
+        every query word prefixes a code or label word, then (for queries of
+        three or more characters) substring matches. Ties keep workbook
+        order. An empty query returns the first ``limit`` options.
+        """
+
+        normalized = " ".join(query.lower().split())
+        if not normalized:
+            return list(self.options[:limit])
+
+        ranks: Dict[int, int] = {}
+
+        def _offer(positions: Iterable[int], rank: int) -> None:
+            for position in positions:
+                if rank < ranks.get(position, RANK_SUBSTRING + 1):
+                    ranks[position] = rank
+
+        code_prefix = _prefix_matches(self._codes, normalized)
+        _offer(
+            (
+                position
+                for position in code_prefix
+                if self.options[position].account.lower() == normalized
+            ),
+            RANK_EXACT_CODE,
+        )
+        _offer(code_prefix, RANK_CODE_PREFIX)
+
+        word_matches: Optional[Set[int]] = None
+        for token in normalized.split():
+            token_matches = _prefix_matches(self._codes, token) | _prefix_matches(
+                self._words, token
+            )
+            word_matches = (
+                token_matches if word_matches is None else word_matches & token_matches
+            )
+            if not word_matches:
+                break
+        _offer(word_matches or (), RANK_WORD_PREFIX)
+
+        if len(normalized) >= 3:
+            _offer(self._substring_matches(normalized), RANK_SUBSTRING)
+
+        ordered = sorted(ranks, key=lambda position: (ranks[position], position))
+        return [self.options[position] for position in ordered[:limit]]
+
+
+_index: Optional[GLAccountIndex] = None
+_index_source: Optional[Tuple[GLAccountOption, ...]] = None
+_index_lock = threading.Lock()
+
+
+def get_gl_account_index(options: Tuple[GLAccountOption, ...]) -> GLAccountIndex:
+    """Return the process-wide index for ``options``, rebuilding it on change.
+
+    :func:`app.services.expense_workflow.load_gl_accounts` hands back the same
+    tuple until the reference data changes, so the identity check keeps the
+    hot path free of rebuilds.
+    """
+
+    global _index, _index_source
+    with _index_lock:
+        if _index is None or _index_source is not options:
+            _index = GLAccountIndex(options)
+            _index_source = options
+        return _index
@@ -0,0 +1,102 @@
+"""Precomputed JSON bodies and conditional responses for reference data.
+
+Reference-data endpoints return the same payload until an administrator
+publishes a new workbook. :func:`precomputed_json` serializes each payload
+once per reference version, and :func:`conditional_json_response` serves the
+cached bytes with a strong ``ETag`` so browsers that already hold the body
+receive ``304 Not Modified`` without it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Tuple
+
+from flask import Response, current_app, request
+
+REFERENCE_CACHE_MAX_AGE = 60
+MAX_PRECOMPUTED_BODIES = 32
+
+
+@dataclass(frozen=True)
+class PrecomputedJSON:
+    """Serialized JSON payload paired with its strong entity tag."""
+
+    body: bytes
+    etag: str
+
+
+_bodies: "OrderedDict[Tuple[str, str], PrecomputedJSON]" = OrderedDict()
+_bodies_lock = threading.Lock()
+
+
+def clear_precomputed_json() -> None:
+    """Drop every cached body; used by tests and after configuration changes."""
+
+    with _bodies_lock:
+        _bodies.clear()
+
+
+def precomputed_json(
+    name: str, version: str, build: Callable[[], Any]
+) -> PrecomputedJSON:
+    """Return the serialized payload ``name`` for reference ``version``.
+
+    Inputs:
+        name: Stable identifier of the endpoint payload.
+        version: Reference data version, such as the snapshot digest.
+        build: Callable returning the JSON-serializable payload; only called
+            when ``(name, version)`` has not been serialized yet.
+
+    Outputs:
+        :class:`PrecomputedJSON` whose ``etag`` is derived from ``name`` and
+        ``version``. The most recent :data:`MAX_PRECOMPUTED_BODIES` bodies are
+        kept per process.
+
+    External dependencies:
+        * Serializes through :attr:`flask.Flask.json` so output matches
+          :func:`flask.jsonify`.
+    """
+
+    key = (name, version)
+    with _bodies_lock:
+        cached = _bodies.get(key)
+        if cached is not None:
+            _bodies.move_to_end(key)
+            return cached
+
+    body = f"{current_app.json.dumps(build())}\n".encode()
+    etag = hashlib.sha256(f"{name}:{version}".encode()).hexdigest()[:32]
+    payload = PrecomputedJSON(body=body, etag=etag)
+    with _bodies_lock:
+        _bodies[key] = payload
+        while len(_bodies) > MAX_PRECOMPUTED_BODIES:
+            _bodies.popitem(last=False)
+    return payload
+
+
+def conditional_response(
+    response: Response, etag: str, *, max_age: int = REFERENCE_CACHE_MAX_AGE
+) -> Response:
+    """Attach ``etag`` and private caching headers, honouring ``If-None-Match``.
+
+    Reference endpoints sit behind login, so responses are marked ``private``
+    to keep shared proxies from serving one user's copy to another.
+    """
+
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
+
+
+def conditional_json_response(
+    payload: PrecomputedJSON, *, max_age: int = REFERENCE_CACHE_MAX_AGE
+) -> Response:
+    """Return ``payload`` as JSON, or an empty ``304`` when the client has it."""
+
+    response = Response(payload.body, mimetype="application/json")
+    return conditional_response(response, payload.etag, max_age=max_age)
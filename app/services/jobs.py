@@ -0,0 +1,324 @@
+"""Background job queue that keeps slow work off the request path.
+
+Handlers are registered by name with :func:`register_job` and enqueued with
+:func:`enqueue_job`, which persists a :class:`app.models.BackgroundJob` row and
+hands its id to the configured executor:
+
+* ``"thread"`` (default) runs jobs on a small in-process thread pool, which
+  needs no broker and suits single-container deployments.
+* ``"celery"`` publishes to the broker at ``CELERY_BROKER_URL``; workers are
+  started with ``celery -A app.celery_worker worker``.
+* ``"inline"`` runs the job before :func:`enqueue_job` returns and is intended
+  for tests and one-off scripts.
+
+A queued or running job that shows no sign of life for
+``BACKGROUND_JOB_STALE_MINUTES`` (its worker died or the broker lost it) is
+treated as abandoned: it no longer blocks :func:`enqueue_job`, which marks it
+``Failed`` and queues a replacement.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from flask import Flask, current_app
+from sqlalchemy import and_, func, or_, update
+
+from app.models import BackgroundJob, User, db
+
+DEFAULT_JOB_EXECUTOR = "thread"
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_JOB_STALE_MINUTES = 30
+ACTIVE_JOB_STATUSES = ("Queued", "Running")
+
+ProgressCallback = Callable[[int, int], None]
+JobHandler = Callable[[BackgroundJob, ProgressCallback], str]
+
+_JOB_HANDLERS: Dict[str, JobHandler] = {}
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_celery_app = None
+
+
+def register_job(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register the decorated function as the handler for ``kind`` jobs.
+
+    Inputs:
+        kind: Unique job name stored on :attr:`app.models.BackgroundJob.kind`.
+
+    Outputs:
+        A decorator returning the handler unchanged. Handlers receive the job
+        row and a ``progress(current, total)`` callback and return a short
+        result message.
+
+    External dependencies:
+        None.
+    """
+
+    def _decorator(handler: JobHandler) -> JobHandler:
+        _JOB_HANDLERS[kind] = handler
+        return handler
+
+    return _decorator
+
+
+def _thread_executor() -> ThreadPoolExecutor:
+    """Return the process-wide thread pool, creating it on first use."""
+
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(
+                current_app.config.get("BACKGROUND_JOB_WORKERS", DEFAULT_JOB_WORKERS)
+            )
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, workers),
+                thread_name_prefix="background-job",
+            )
+        return _executor
+
+
+def _run_in_app_context(app: Flask, job_id: str) -> None:
+    """Execute ``job_id`` inside ``app``'s context on a worker thread."""
+
+    with app.app_context():
+        try:
+            run_job(job_id)
+        finally:
+            db.session.remove()
+
+
+def get_celery(app: Optional[Flask] = None):
+    """Return the lazily configured Celery application.
+
+    Inputs:
+        app: Flask application whose ``CELERY_BROKER_URL`` and
+            ``CELERY_RESULT_BACKEND`` configure Celery. Defaults to
+            :data:`flask.current_app`.
+
+    Outputs:
+        A :class:`celery.Celery` instance with the ``run_background_job`` task
+        registered. Tasks run inside ``app``'s context.
+
+    External dependencies:
+        * Imports :mod:`celery` lazily so deployments without a broker never
+          pay its import cost.
+    """
+
+    global _celery_app
+    if _celery_app is not None:
+        return _celery_app
+
+    from celery import Celery  # Imported lazily to keep startup fast.
+
+    flask_app = app or current_app._get_current_object()
+    celery_app = Celery(
+        flask_app.import_name,
+        broker=flask_app.config.get("CELERY_BROKER_URL"),
+        backend=flask_app.config.get("CELERY_RESULT_BACKEND") or None,
+    )
+
+    @celery_app.task(name="app.run_background_job")
+    def _run_background_job(job_id: str) -> None:
+        _run_in_app_context(flask_app, job_id)
+
+    _celery_app = celery_app
+    return celery_app
+
+
+def _submit(job_id: str) -> None:
+    """Hand ``job_id`` to the executor selected by ``BACKGROUND_JOB_EXECUTOR``."""
+
+    executor = (
+        str(current_app.config.get("BACKGROUND_JOB_EXECUTOR") or DEFAULT_JOB_EXECUTOR)
+        .strip()
+        .lower()
+    )
+    if executor == "inline":
+        run_job(job_id)
+        return
+    if executor == "celery":
+        get_celery().send_task("app.run_background_job", args=[job_id])
+        return
+
+    app = current_app._get_current_object()
+    _thread_executor().submit(_run_in_app_context, app, job_id)
+
+
+def _stale_minutes() -> int:
+    return max(
+        1,
+        int(
+            current_app.config.get(
+                "BACKGROUND_JOB_STALE_MINUTES", DEFAULT_JOB_STALE_MINUTES
+            )
+        ),
+    )
+
+
+def _abandoned(now: datetime):
+    """Return a filter for active jobs with no sign of life since the cutoff."""
+
+    cutoff = now - timedelta(minutes=_stale_minutes())
+    return or_(
+        and_(BackgroundJob.status == "Queued", BackgroundJob.created_at < cutoff),
+        and_(
+            BackgroundJob.status == "Running",
+            func.coalesce(BackgroundJob.heartbeat_at, BackgroundJob.started_at)
+            < cutoff,
+        ),
+    )
+
+
+def active_job(kind: str) -> Optional[BackgroundJob]:
+    """Return the oldest queued or running job of ``kind``, if any.
+
+    Jobs that have gone quiet for ``BACKGROUND_JOB_STALE_MINUTES`` are
+    abandoned and not returned.
+    """
+
+    return (
+        BackgroundJob.query.filter(
+            BackgroundJob.kind == kind,
+            BackgroundJob.status.in_(ACTIVE_JOB_STATUSES),
+            ~_abandoned(datetime.utcnow()),
+        )
+        .order_by(BackgroundJob.created_at.asc())
+        .first()
+    )
+
+
+def latest_job(kind: str) -> Optional[BackgroundJob]:
+    """Return the most recently created job of ``kind``, if any."""
+
+    return (
+        BackgroundJob.query.filter(BackgroundJob.kind == kind)
+        .order_by(BackgroundJob.created_at.desc())
+        .first()
+    )
+
+
+def enqueue_job(kind: str, *, user: Optional[User] = None) -> BackgroundJob:
+    """Persist a ``Queued`` job and hand it to the configured executor.
+
+    Inputs:
+        kind: Name of a handler registered with :func:`register_job`.
+        user: Optional :class:`app.models.User` who requested the job.
+
+    Outputs:
+        The new :class:`app.models.BackgroundJob`. When a job of the same kind
+        is already queued or running, that job is returned instead so repeated
+        clicks do not stack duplicate work. Abandoned jobs of the kind are
+        marked ``Failed`` first and do not block the new one.
+
+    External dependencies:
+        * Commits through :data:`app.models.db.session`.
+        * Raises :class:`KeyError` for unregistered ``kind`` values.
+    """
+
+    if kind not in _JOB_HANDLERS:
+        raise KeyError(f"No background job handler registered for '{kind}'.")
+
+    now = datetime.utcnow()
+    db.session.execute(
+        update(BackgroundJob)
+        .where(
+            BackgroundJob.kind == kind,
+            BackgroundJob.status.in_(ACTIVE_JOB_STATUSES),
+            _abandoned(now),
+        )
+        .values(
+            status="Failed",
+            finished_at=now,
+            message=f"Abandoned after {_stale_minutes()} minutes without progress.",
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    existing = active_job(kind)
+    if existing is not None:
+        return existing
+
+    job = BackgroundJob(kind=kind, created_by_id=user.id if user else None)
+    db.session.add(job)
+    db.session.commit()
+    job_id = job.id
+
+    _submit(job_id)
+    return db.session.get(BackgroundJob, job_id)
+
+
+def run_job(job_id: str) -> None:
+    """Run the handler for ``job_id`` and record its outcome.
+
+    Inputs:
+        job_id: Identifier of a :class:`app.models.BackgroundJob` row.
+
+    Outputs:
+        None. Moves the job through ``Running`` to ``Succeeded`` or
+        ``Failed`` and stores the handler's message or the error text. The
+        ``Queued`` to ``Running`` step is a conditional update, so a job
+        delivered twice (or already abandoned) runs at most once.
+
+    External dependencies:
+        * Commits through :data:`app.models.db.session`.
+        * Logs failures via :attr:`flask.Flask.logger`.
+    """
+
+    now = datetime.utcnow()
+    claimed = db.session.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.id == job_id, BackgroundJob.status == "Queued")
+        .values(status="Running", started_at=now, heartbeat_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if claimed.rowcount != 1:
+        return
+
+    job = db.session.get(BackgroundJob, job_id)
+    db.session.refresh(job)
+    handler = _JOB_HANDLERS.get(job.kind)
+
+    def _progress(current: int, total: int) -> None:
+        job.progress_current = int(current)
+        job.progress_total = int(total)
+        job.heartbeat_at = datetime.utcnow()
+        db.session.commit()
+
+    try:
+        if handler is None:
+            raise KeyError(f"No background job handler registered for '{job.kind}'.")
+        message = handler(job, _progress)
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.exception("Background job %s (%s) failed", job_id, job.kind)
+        job.status = "Failed"
+        job.message = str(exc) or exc.__class__.__name__
+    else:
+        job.status = "Succeeded"
+        job.message = message
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def serialize_job(job: BackgroundJob) -> Dict[str, object]:
+    """Return a JSON-ready status payload for ``job``."""
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": {
+            "current": job.progress_current,
+            "total": job.progress_total,
+        },
+        "message": job.message,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
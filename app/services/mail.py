@@ -1,17 +1,39 @@
 from __future__ import annotations
 
-"""Utility helpers for outbound email policies and rate limiting."""
+"""Utility helpers for outbound email policies and rate limiting.
+
+Rate limits are enforced from per-minute :class:`app.models.EmailRateCounter`
+buckets rather than by counting :class:`app.models.EmailDispatchLog` rows, so
+every limit is checked with one indexed query no matter how large the
+dispatch log grows.
+"""
 
 import random
 import smtplib
 import time
 from datetime import datetime, timedelta
 from email.message import EmailMessage
-from typing import Optional, Tuple, Type
+from typing import Dict, List, Optional, Tuple
 
 from flask import current_app
-
-from app.models import EmailDispatchLog, User, db
+from sqlalchemy import and_, case, false, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.models import EmailDispatchLog, EmailRateCounter, User, db
+from app.services.smtp_pool import SMTPSettings, get_smtp_pool
+
+RATE_COUNTER_SCOPE_USER = "user"
+RATE_COUNTER_SCOPE_RECIPIENT = "recipient"
+RATE_COUNTER_SCOPE_FEATURE = "feature"
+# Longest look-back of any limit; older counters and log rows are never read.
+MAIL_RATE_LIMIT_MAX_WINDOW = timedelta(days=1)
+# SMTP failures worth retrying; anything else is treated as permanent.
+TRANSIENT_SMTP_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPResponseException,
+    smtplib.SMTPConnectError,
+)
 
 
 class MailRateLimitError(RuntimeError):
@@ -31,6 +53,110 @@ def _normalize_recipient(recipient: str) -> str:
     return recipient.strip().lower()
 
 
+def _bucket_start(moment: datetime) -> datetime:
+    """Return the start of the per-minute counter bucket holding ``moment``."""
+
+    return moment.replace(second=0, microsecond=0)
+
+
+def _rate_limit_usage(
+    feature_key: str, user: Optional[User], recipient_key: str, now: datetime
+) -> Tuple[int, int, int, int]:
+    """Return sends inside each rate-limit window in one query.
+
+    Windows start at the bucket containing ``now - window``, so a send may be
+    counted for up to one extra minute; limits therefore err on the strict
+    side.
+
+    Returns:
+        ``(user_hour, user_day, recipient_day, feature_hour)`` send counts for
+        ``feature_key``.
+    """
+
+    counter = EmailRateCounter
+    hour_start = _bucket_start(now - timedelta(hours=1))
+    day_start = _bucket_start(now - MAIL_RATE_LIMIT_MAX_WINDOW)
+
+    if user is not None:
+        is_user = and_(
+            counter.scope == RATE_COUNTER_SCOPE_USER,
+            counter.subject == str(user.id),
+        )
+    else:
+        is_user = false()
+    is_recipient = and_(
+        counter.scope == RATE_COUNTER_SCOPE_RECIPIENT,
+        counter.subject == recipient_key,
+    )
+    is_feature = and_(
+        counter.scope == RATE_COUNTER_SCOPE_FEATURE, counter.subject == ""
+    )
+    in_hour = counter.bucket_start >= hour_start
+
+    def _total(condition):
+        return func.coalesce(func.sum(case((condition, counter.count), else_=0)), 0)
+
+    row = db.session.execute(
+        select(
+            _total(and_(is_user, in_hour)),
+            _total(is_user),
+            _total(is_recipient),
+            _total(and_(is_feature, in_hour)),
+        ).where(
+            counter.feature == feature_key,
+            counter.bucket_start >= day_start,
+            or_(is_user, is_recipient, is_feature),
+        )
+    ).one()
+    return tuple(int(value or 0) for value in row)
+
+
+def _increment_rate_counters(
+    feature_key: str, user: Optional[User], recipient_key: str, now: datetime
+) -> None:
+    """Add one send to each counter bucket for the current minute.
+
+    PostgreSQL and SQLite use a single ``INSERT ... ON CONFLICT DO UPDATE``;
+    other databases fall back to update-then-insert per counter.
+    """
+
+    bucket = _bucket_start(now)
+    rows: List[Dict[str, object]] = [
+        {"scope": RATE_COUNTER_SCOPE_FEATURE, "subject": ""},
+        {"scope": RATE_COUNTER_SCOPE_RECIPIENT, "subject": recipient_key},
+    ]
+    if user is not None:
+        rows.append({"scope": RATE_COUNTER_SCOPE_USER, "subject": str(user.id)})
+    for row in rows:
+        row.update(feature=feature_key, bucket_start=bucket, count=1)
+
+    counter = EmailRateCounter
+    dialect = db.session.get_bind().dialect.name
+    upsert = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}.get(dialect)
+    if upsert is not None:
+        statement = upsert(counter).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["scope", "feature", "subject", "bucket_start"],
+            set_={"count": counter.__table__.c.count + 1},
+        )
+        db.session.execute(statement)
+        return
+
+    for row in rows:
+        updated = (
+            db.session.query(counter)
+            .filter(
+                counter.scope == row["scope"],
+                counter.feature == feature_key,
+                counter.subject == row["subject"],
+                counter.bucket_start == bucket,
+            )
+            .update({counter.count: counter.count + 1}, synchronize_session=False)
+        )
+        if not updated:
+            db.session.add(counter(**row))
+
+
 def validate_sender_domain(sender: str) -> None:
     """Ensure ``sender`` belongs to the configured Office 365 domain.
 
@@ -99,13 +225,14 @@ def enforce_mail_rate_limit(feature: str, user: Optional[User], recipient: str)
     Raises:
         MailRateLimitError: If per-user, per-feature, or per-recipient caps are
             exceeded.
+
+    External dependencies:
+        * Sums :class:`app.models.EmailRateCounter` buckets for all four
+          windows in a single query.
     """
 
     feature_key = _normalize_feature(feature)
     recipient_key = _normalize_recipient(recipient)
-    now = datetime.utcnow()
-    hour_ago = now - timedelta(hours=1)
-    day_ago = now - timedelta(days=1)
 
     per_user_hour = int(current_app.config.get("MAIL_RATE_LIMIT_PER_USER_PER_HOUR", 0))
     per_user_day = int(current_app.config.get("MAIL_RATE_LIMIT_PER_USER_PER_DAY", 0))
@@ -115,57 +242,42 @@ def enforce_mail_rate_limit(feature: str, user: Optional[User], recipient: str)
     per_recipient_day = int(
         current_app.config.get("MAIL_RATE_LIMIT_PER_RECIPIENT_PER_DAY", 0)
     )
+    if max(per_user_hour, per_user_day, per_feature_hour, per_recipient_day) <= 0:
+        return
 
-    if user and per_user_hour > 0:
-        count = EmailDispatchLog.query.filter(
-            EmailDispatchLog.feature == feature_key,
-            EmailDispatchLog.user_id == user.id,
-            EmailDispatchLog.created_at >= hour_ago,
-        ).count()
-        if count >= per_user_hour:
-            raise MailRateLimitError(
-                "Hourly email limit reached for your account. "
-                "Please wait before sending another message."
-            )
+    user_hour, user_day, recipient_day, feature_hour = _rate_limit_usage(
+        feature_key, user, recipient_key, datetime.utcnow()
+    )
 
-    if user and per_user_day > 0:
-        count = EmailDispatchLog.query.filter(
-            EmailDispatchLog.feature == feature_key,
-            EmailDispatchLog.user_id == user.id,
-            EmailDispatchLog.created_at >= day_ago,
-        ).count()
-        if count >= per_user_day:
-            raise MailRateLimitError(
-                "Daily email limit reached for your account. "
-                "Please try again tomorrow."
-            )
+    if user and per_user_hour > 0 and user_hour >= per_user_hour:
+        raise MailRateLimitError(
+            "Hourly email limit reached for your account. "
+            "Please wait before sending another message."
+        )
 
-    if per_recipient_day > 0:
-        count = EmailDispatchLog.query.filter(
-            EmailDispatchLog.feature == feature_key,
-            EmailDispatchLog.recipient == recipient_key,
-            EmailDispatchLog.created_at >= day_ago,
-        ).count()
-        if count >= per_recipient_day:
-            raise MailRateLimitError(
-                "Too many emails have been sent to this recipient today. "
-                "Please try again tomorrow."
-            )
+    if user and per_user_day > 0 and user_day >= per_user_day:
+        raise MailRateLimitError(
+            "Daily email limit reached for your account. Please try again tomorrow."
+        )
 
-    if per_feature_hour > 0:
-        count = EmailDispatchLog.query.filter(
-            EmailDispatchLog.feature == feature_key,
-            EmailDispatchLog.created_at >= hour_ago,
-        ).count()
-        if count >= per_feature_hour:
-            raise MailRateLimitError(
-                "Email delivery is temporarily paused due to high volume. "
-                "Please retry in a few minutes."
-            )
+    if per_recipient_day > 0 and recipient_day >= per_recipient_day:
+        raise MailRateLimitError(
+            "Too many emails have been sent to this recipient today. "
+            "Please try again tomorrow."
+        )
 
+    if per_feature_hour > 0 and feature_hour >= per_feature_hour:
+        raise MailRateLimitError(
+            "Email delivery is temporarily paused due to high volume. "
+            "Please retry in a few minutes."
+        )
 
-def log_email_dispatch(feature: str, user: Optional[User], recipient: str) -> None:
-    """Persist a log entry after a successful send.
+
+def record_mail_quota(feature: str, user: Optional[User], recipient: str) -> None:
+    """Count one send against the rate limits without writing the audit log.
+
+    Used when a message is accepted into the outbox so later enqueues see it
+    immediately. The caller commits.
 
     Args:
         feature: Same label supplied to :func:`enforce_mail_rate_limit`.
@@ -173,76 +285,75 @@ def log_email_dispatch(feature: str, user: Optional[User], recipient: str) -> No
         recipient: Target email address.
     """
 
+    _increment_rate_counters(
+        _normalize_feature(feature),
+        user,
+        _normalize_recipient(recipient),
+        datetime.utcnow(),
+    )
+
+
+def log_email_dispatch(
+    feature: str,
+    user: Optional[User],
+    recipient: str,
+    *,
+    count_towards_limits: bool = True,
+) -> None:
+    """Persist a log entry and bump the rate counters after a successful send.
+
+    Args:
+        feature: Same label supplied to :func:`enforce_mail_rate_limit`.
+        user: Optional :class:`app.models.User` associated with the action.
+        recipient: Target email address.
+        count_towards_limits: ``False`` when the send was already counted by
+            :func:`record_mail_quota` at enqueue time.
+    """
+
+    feature_key = _normalize_feature(feature)
+    recipient_key = _normalize_recipient(recipient)
     entry = EmailDispatchLog(
-        feature=_normalize_feature(feature),
-        recipient=_normalize_recipient(recipient),
+        feature=feature_key,
+        recipient=recipient_key,
         user_id=user.id if user else None,
     )
     db.session.add(entry)
+    if count_towards_limits:
+        _increment_rate_counters(feature_key, user, recipient_key, datetime.utcnow())
     db.session.commit()
 
 
-__all__ = [
-    "MailRateLimitError",
-    "enforce_mail_rate_limit",
-    "log_email_dispatch",
-    "send_email",
-    "user_has_mail_privileges",
-    "validate_sender_domain",
-]
+def default_mail_sender() -> str:
+    """Return ``MAIL_DEFAULT_SENDER`` after :func:`validate_sender_domain`.
 
+    Raises:
+        ValueError: If the sender is outside ``MAIL_ALLOWED_SENDER_DOMAIN``.
+    """
 
-def send_email(
-    to: str,
-    subject: str,
-    body: str,
-    *,
-    feature: str = "general",
-    user: Optional[User] = None,
-) -> None:
-    """Send an email using SMTP after enforcing safety policies.
+    sender = current_app.config.get("MAIL_DEFAULT_SENDER", "quote@freightservices.net")
+    validate_sender_domain(sender)
+    return sender
 
-    Args:
-        to: Recipient email address.
-        subject: Message subject line.
-        body: Plain-text message body.
-        feature: Short label identifying the caller (for example,
-            ``"password_reset"``). Used by
-            :func:`services.mail.enforce_mail_rate_limit` to track usage.
-        user: Authenticated :class:`~app.models.User` requesting the send, if
-            available. Enables per-user throttles.
 
-    Raises:
-        MailRateLimitError: When rate limits configured in
-            :mod:`services.mail` are exceeded.
-        ValueError: If ``MAIL_DEFAULT_SENDER`` is configured for a domain
-            outside ``MAIL_ALLOWED_SENDER_DOMAIN``.
-        smtplib.SMTPException: If the underlying SMTP call fails.
-        smtplib.SMTPServerDisconnected: When a transient SMTP disconnect
-            persists after retries.
-        smtplib.SMTPResponseException: When a transient SMTP response error
-            persists after retries.
-        smtplib.SMTPConnectError: When a transient SMTP connection error
-            persists after retries.
-
-    External dependencies:
-        * Applies :func:`services.mail.enforce_mail_rate_limit` and
-          :func:`services.mail.log_email_dispatch` around SMTP activity.
-        * Reads runtime overrides with :func:`services.settings.load_mail_settings`.
-        * Retries transient SMTP failures with backoff using
-          :func:`time.sleep` and jitter from :func:`random.uniform`.
-    """
+def build_email_message(to: str, subject: str, body: str, sender: str) -> EmailMessage:
+    """Return a plain-text :class:`email.message.EmailMessage`."""
 
     msg = EmailMessage()
     msg["Subject"] = subject
-    default_sender = current_app.config.get(
-        "MAIL_DEFAULT_SENDER", "quote@freightservices.net"
-    )
-    validate_sender_domain(default_sender)
-    msg["From"] = default_sender
+    msg["From"] = sender
     msg["To"] = to
     msg.set_content(body)
-    enforce_mail_rate_limit(feature, user, to)
+    return msg
+
+
+def smtp_settings_from_config() -> SMTPSettings:
+    """Return the SMTP server and credentials to send through.
+
+    External dependencies:
+        * Reads runtime overrides with :func:`services.settings.load_mail_settings`
+          and falls back to ``MAIL_*`` values in
+          :data:`flask.current_app.config`.
+    """
 
     overrides = None
     try:
@@ -291,43 +402,83 @@ def send_email(
         smtp_cls = smtplib.SMTP
         default_port = 587 if use_tls else 25
 
-    def _deliver_message(
-        smtp_type: Type[smtplib.SMTP],
-        host: str,
-        host_port: Optional[int],
-        fallback_port: int,
-        enable_tls: bool,
-        enable_ssl: bool,
-        smtp_user: Optional[str],
-        smtp_password: Optional[str],
-    ) -> None:
-        """Connect and send the email over SMTP.
+    return SMTPSettings(
+        smtp_class=smtp_cls,
+        host=server,
+        port=port or default_port,
+        use_tls=bool(use_tls and not use_ssl),
+        username=username,
+        password=password,
+    )
 
-        Args:
-            smtp_type: SMTP class to instantiate (``smtplib.SMTP`` or
-                ``smtplib.SMTP_SSL``).
-            host: Mail server hostname.
-            host_port: Explicit server port, if configured.
-            fallback_port: Port to use when ``host_port`` is ``None``.
-            enable_tls: Whether to start TLS after connecting.
-            enable_ssl: Whether the connection is already wrapped in SSL.
-            smtp_user: Optional username to authenticate with the server.
-            smtp_password: Optional password to authenticate with the server.
 
-        Returns:
-            ``None`` after the message is sent successfully.
+__all__ = [
+    "MailRateLimitError",
+    "TRANSIENT_SMTP_ERRORS",
+    "build_email_message",
+    "default_mail_sender",
+    "enforce_mail_rate_limit",
+    "log_email_dispatch",
+    "record_mail_quota",
+    "send_email",
+    "smtp_settings_from_config",
+    "user_has_mail_privileges",
+    "validate_sender_domain",
+]
 
-        External dependencies:
-            * Uses :class:`smtplib.SMTP` or :class:`smtplib.SMTP_SSL` to
-              connect to the mail server.
-        """
 
-        with smtp_type(host, host_port or fallback_port) as smtp:
-            if enable_tls and not enable_ssl:
-                smtp.starttls()
-            if smtp_user and smtp_password:
-                smtp.login(smtp_user, smtp_password)
-            smtp.send_message(msg)
+def send_email(
+    to: str,
+    subject: str,
+    body: str,
+    *,
+    feature: str = "general",
+    user: Optional[User] = None,
+) -> None:
+    """Send an email using SMTP after enforcing safety policies.
+
+    The caller waits for SMTP, including retry backoff. Request handlers
+    should use :func:`services.mail_outbox.queue_email` instead.
+
+    Args:
+        to: Recipient email address.
+        subject: Message subject line.
+        body: Plain-text message body.
+        feature: Short label identifying the caller (for example,
+            ``"password_reset"``). Used by
+            :func:`services.mail.enforce_mail_rate_limit` to track usage.
+        user: Authenticated :class:`~app.models.User` requesting the send, if
+            available. Enables per-user throttles.
+
+    Raises:
+        MailRateLimitError: When rate limits configured in
+            :mod:`services.mail` are exceeded.
+        ValueError: If ``MAIL_DEFAULT_SENDER`` is configured for a domain
+            outside ``MAIL_ALLOWED_SENDER_DOMAIN``.
+        smtplib.SMTPException: If the underlying SMTP call fails.
+        smtplib.SMTPServerDisconnected: When a transient SMTP disconnect
+            persists after retries.
+        smtplib.SMTPResponseException: When a transient SMTP response error
+            persists after retries.
+        smtplib.SMTPConnectError: When a transient SMTP connection error
+            persists after retries.
+
+    External dependencies:
+        * Applies :func:`services.mail.enforce_mail_rate_limit` and
+          :func:`services.mail.log_email_dispatch` around SMTP activity.
+        * Reads runtime overrides with :func:`services.settings.load_mail_settings`.
+        * Sends over a pooled session from
+          :func:`services.smtp_pool.get_smtp_pool`, reusing authenticated
+          connections across calls.
+        * Retries transient SMTP failures with backoff using
+          :func:`time.sleep` and jitter from :func:`random.uniform`.
+    """
+
+    msg = build_email_message(to, subject, body, default_mail_sender())
+    enforce_mail_rate_limit(feature, user, to)
+
+    smtp_settings = smtp_settings_from_config()
+    pool = get_smtp_pool()
 
     def _retry_delay_seconds(attempt: int, base_delays: Tuple[float, ...]) -> float:
         """Return a jittered delay for a retry attempt.
@@ -348,27 +499,13 @@ def send_email(
         return base_delay + jitter
 
     retry_delays = (0.5, 1.0, 2.0)
-    transient_errors = (
-        smtplib.SMTPServerDisconnected,
-        smtplib.SMTPResponseException,
-        smtplib.SMTPConnectError,
-    )
     max_attempts = len(retry_delays) + 1
 
     for attempt in range(max_attempts):
         try:
-            _deliver_message(
-                smtp_cls,
-                server,
-                port,
-                default_port,
-                use_tls,
-                use_ssl,
-                username,
-                password,
-            )
+            pool.send_message(smtp_settings, msg)
             break
-        except transient_errors as exc:
+        except TRANSIENT_SMTP_ERRORS as exc:
             if attempt >= max_attempts - 1:
                 raise
             delay = _retry_delay_seconds(attempt, retry_delays)
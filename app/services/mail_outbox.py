@@ -0,0 +1,477 @@
+"""Persistent outbox that takes SMTP delivery off the request path.
+
+:func:`send_email` makes its caller wait for the relay, including the retry
+backoff sleeps, so a slow SMTP server inflated every page that sent mail.
+Request handlers call :func:`queue_email` instead:
+
+* Sender and rate-limit checks run at enqueue time, so callers still get
+  :class:`app.services.mail.MailRateLimitError` immediately and a burst of
+  queued messages cannot outrun the limits before the worker catches up.
+* The message is stored as an :class:`app.models.OutboundEmail` row and the
+  :data:`MAIL_OUTBOX_JOB` background job is enqueued to drain the outbox.
+
+:func:`drain_outbox` claims ``MAIL_OUTBOX_BATCH_SIZE`` rows at a time
+(``FOR UPDATE SKIP LOCKED`` on PostgreSQL, compare-and-set everywhere) and
+sends each batch over one pooled SMTP session. Transient failures are
+rescheduled with backoff instead of sleeping; after
+``MAIL_OUTBOX_MAX_ATTEMPTS`` the row is marked ``"Failed"``. Delivery is
+at-least-once: a worker that dies mid-batch leaves rows ``"Sending"`` until
+``MAIL_OUTBOX_CLAIM_TIMEOUT_MINUTES`` passes and another worker resends them.
+Run ``flask --app app.flask_app drain-mail-outbox`` from cron as a safety net.
+"""
+
+from __future__ import annotations
+
+import smtplib
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import click
+from flask import Flask, current_app
+from sqlalchemy import and_, func, or_, select, update
+
+from app.models import OutboundEmail, User, db
+from app.services.jobs import ProgressCallback, enqueue_job, register_job
+from app.services.mail import (
+    TRANSIENT_SMTP_ERRORS,
+    build_email_message,
+    default_mail_sender,
+    enforce_mail_rate_limit,
+    log_email_dispatch,
+    record_mail_quota,
+    smtp_settings_from_config,
+)
+from app.services.smtp_pool import SMTPConnectionPool, SMTPSettings, get_smtp_pool
+
+MAIL_OUTBOX_JOB = "mail_outbox"
+OUTBOX_STATUSES = ("Queued", "Sending", "Sent", "Failed")
+DEFAULT_OUTBOX_BATCH_SIZE = 50
+DEFAULT_OUTBOX_MAX_ATTEMPTS = 5
+DEFAULT_OUTBOX_CLAIM_TIMEOUT_MINUTES = 15
+OUTBOX_RETRY_DELAYS = (
+    timedelta(minutes=1),
+    timedelta(minutes=5),
+    timedelta(minutes=15),
+    timedelta(hours=1),
+)
+# Failures that mean the relay itself is unreachable; the rest of the batch is
+# released untouched instead of timing out once per message.
+_RELAY_DOWN_ERRORS = (smtplib.SMTPConnectError, smtplib.SMTPServerDisconnected)
+
+
+@dataclass
+class OutboxSummary:
+    """Outcome of one :func:`drain_outbox` run.
+
+    Attributes:
+        batches: Number of batches claimed.
+        sent: Messages delivered.
+        retried: Messages rescheduled after a transient failure.
+        failed: Messages marked ``"Failed"``.
+        released: Claimed messages returned to the queue unsent because the
+            relay was unreachable.
+    """
+
+    batches: int = 0
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    released: int = 0
+
+    def describe(self) -> str:
+        """Return a one-line summary for job messages and logs."""
+
+        return (
+            f"Sent {self.sent} email(s) in {self.batches} batch(es); "
+            f"{self.retried} rescheduled, {self.failed} failed, "
+            f"{self.released} released."
+        )
+
+
+def _config_int(key: str, default: int) -> int:
+    return max(1, int(current_app.config.get(key, default)))
+
+
+def _supports_skip_locked() -> bool:
+    """Return whether the bound database supports ``SKIP LOCKED``."""
+
+    return db.session.get_bind().dialect.name == "postgresql"
+
+
+def _claimable(now: datetime):
+    """Return a filter for outbox rows a worker may claim at ``now``."""
+
+    stale = now - timedelta(
+        minutes=_config_int(
+            "MAIL_OUTBOX_CLAIM_TIMEOUT_MINUTES", DEFAULT_OUTBOX_CLAIM_TIMEOUT_MINUTES
+        )
+    )
+    return or_(
+        and_(
+            OutboundEmail.status == "Queued",
+            OutboundEmail.next_attempt_at <= now,
+        ),
+        and_(
+            OutboundEmail.status == "Sending",
+            or_(OutboundEmail.claimed_at.is_(None), OutboundEmail.claimed_at < stale),
+        ),
+    )
+
+
+def queue_email(
+    to: str,
+    subject: str,
+    body: str,
+    *,
+    feature: str = "general",
+    user: Optional[User] = None,
+    dispatch: bool = True,
+) -> OutboundEmail:
+    """Validate and persist an outbound email for background delivery.
+
+    Inputs:
+        to: Recipient email address.
+        subject: Message subject line.
+        body: Plain-text message body.
+        feature: Short label identifying the caller, as for
+            :func:`app.services.mail.send_email`.
+        user: Authenticated :class:`app.models.User` requesting the send.
+        dispatch: When ``False`` the row is only stored; callers queuing
+            several messages can enqueue the worker once afterwards.
+
+    Outputs:
+        The committed :class:`app.models.OutboundEmail` row.
+
+    Raises:
+        MailRateLimitError: When the send would exceed the mail rate limits.
+        ValueError: If ``MAIL_DEFAULT_SENDER`` is outside the allowed domain.
+
+    External dependencies:
+        * Calls :func:`app.services.mail.enforce_mail_rate_limit` and
+          :func:`app.services.mail.record_mail_quota`.
+        * Enqueues :data:`MAIL_OUTBOX_JOB` via
+          :func:`app.services.jobs.enqueue_job`.
+    """
+
+    default_mail_sender()
+    enforce_mail_rate_limit(feature, user, to)
+    email = OutboundEmail(
+        feature=(feature or "general").strip().lower() or "general",
+        recipient=to.strip(),
+        subject=subject,
+        body=body,
+        user_id=user.id if user else None,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.session.add(email)
+    record_mail_quota(feature, user, to)
+    db.session.commit()
+    if dispatch:
+        start_outbox_worker()
+    return email
+
+
+def start_outbox_worker() -> None:
+    """Enqueue :data:`MAIL_OUTBOX_JOB` unless one is already queued or running.
+
+    Failures are logged rather than raised: the messages stay queued for the
+    next worker run or the ``drain-mail-outbox`` command.
+    """
+
+    try:
+        enqueue_job(MAIL_OUTBOX_JOB)
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Unable to start the mail outbox worker")
+
+
+def claim_outbox_batch(
+    batch_size: int, *, now: Optional[datetime] = None
+) -> List[OutboundEmail]:
+    """Atomically claim up to ``batch_size`` deliverable outbox rows.
+
+    Inputs:
+        batch_size: Maximum rows to claim.
+        now: Current UTC time; defaults to :meth:`datetime.utcnow`.
+
+    Outputs:
+        The claimed rows, oldest first, now ``"Sending"`` under a fresh
+        claim token. Rows another worker claimed first are skipped.
+
+    External dependencies:
+        * Locks candidates with ``FOR UPDATE SKIP LOCKED`` on PostgreSQL and
+          commits the claim through :data:`app.models.db.session`.
+    """
+
+    now = now or datetime.utcnow()
+    candidates = (
+        select(OutboundEmail.id)
+        .where(_claimable(now))
+        .order_by(OutboundEmail.id)
+        .limit(batch_size)
+    )
+    if _supports_skip_locked():
+        candidates = candidates.with_for_update(skip_locked=True)
+    ids = db.session.scalars(candidates).all()
+    if not ids:
+        db.session.commit()
+        return []
+
+    token = str(uuid.uuid4())
+    db.session.execute(
+        update(OutboundEmail)
+        .where(OutboundEmail.id.in_(ids), _claimable(now))
+        .values(status="Sending", claim_token=token, claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return (
+        OutboundEmail.query.filter_by(claim_token=token)
+        .order_by(OutboundEmail.id)
+        .all()
+    )
+
+
+def _classify_failure(exc: Exception) -> Tuple[bool, bool]:
+    """Return ``(transient, relay_down)`` for a delivery failure.
+
+    Socket errors and dropped or refused connections mean the relay is down.
+    SMTP replies in the 5xx range are permanent even for the error classes
+    :func:`app.services.mail.send_email` retries. Anything that is not a
+    transport error (bad headers, unencodable addresses) would fail the same
+    way on every retry, so it is permanent.
+    """
+
+    if not isinstance(exc, OSError):
+        return False, False
+    if not isinstance(exc, smtplib.SMTPException):
+        return True, True
+    transient = isinstance(exc, TRANSIENT_SMTP_ERRORS)
+    if isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500:
+        transient = False
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        transient = all(code < 500 for code, _ in exc.recipients.values())
+    return transient, isinstance(exc, _RELAY_DOWN_ERRORS)
+
+
+def _reply_text(reply: object) -> str:
+    if isinstance(reply, bytes):
+        return reply.decode("utf-8", "replace")
+    return str(reply)
+
+
+def _describe_failure(exc: Exception) -> str:
+    """Return a readable, bounded error message for the admin outbox view."""
+
+    if isinstance(exc, smtplib.SMTPResponseException):
+        detail = f"{exc.smtp_code} {_reply_text(exc.smtp_error)}"
+    elif isinstance(exc, smtplib.SMTPRecipientsRefused):
+        detail = "; ".join(
+            f"{recipient}: {code} {_reply_text(reply)}"
+            for recipient, (code, reply) in exc.recipients.items()
+        )
+    else:
+        detail = str(exc)
+    return f"{exc.__class__.__name__}: {detail}"[:1000]
+
+
+def _record_failure(
+    email: OutboundEmail, exc: Exception, *, transient: bool, now: datetime
+) -> bool:
+    """Reschedule or fail ``email`` after ``exc``; return ``True`` if retried."""
+
+    max_attempts = _config_int("MAIL_OUTBOX_MAX_ATTEMPTS", DEFAULT_OUTBOX_MAX_ATTEMPTS)
+    email.last_error = _describe_failure(exc)
+    email.claim_token = None
+    if transient and email.attempts < max_attempts:
+        delay = OUTBOX_RETRY_DELAYS[
+            min(email.attempts - 1, len(OUTBOX_RETRY_DELAYS) - 1)
+        ]
+        email.status = "Queued"
+        email.next_attempt_at = now + delay
+        return True
+    email.status = "Failed"
+    return False
+
+
+def _deliver_batch(
+    emails: List[OutboundEmail],
+    sender: str,
+    settings: SMTPSettings,
+    pool: SMTPConnectionPool,
+    summary: OutboxSummary,
+) -> bool:
+    """Send claimed ``emails`` over one pooled session.
+
+    Returns ``False`` when the relay became unreachable; the unsent rest of
+    the batch is then released without spending an attempt.
+    """
+
+    for index, email in enumerate(emails):
+        now = datetime.utcnow()
+        email.attempts += 1
+        try:
+            message = build_email_message(
+                email.recipient, email.subject, email.body, sender
+            )
+            pool.send_message(settings, message)
+        except Exception as exc:
+            transient, relay_down = _classify_failure(exc)
+            if _record_failure(email, exc, transient=transient, now=now):
+                summary.retried += 1
+            else:
+                summary.failed += 1
+            if relay_down:
+                for pending in emails[index + 1 :]:
+                    pending.status = "Queued"
+                    pending.claim_token = None
+                    summary.released += 1
+                db.session.commit()
+                current_app.logger.warning(
+                    "SMTP relay unavailable (%s); released %s queued email(s).",
+                    exc.__class__.__name__,
+                    len(emails) - index - 1,
+                )
+                return False
+        else:
+            email.status = "Sent"
+            email.sent_at = now
+            email.claim_token = None
+            email.last_error = None
+            summary.sent += 1
+            log_email_dispatch(
+                email.feature,
+                email.user,
+                email.recipient,
+                count_towards_limits=False,
+            )
+        db.session.commit()
+    return True
+
+
+def drain_outbox(
+    *,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> OutboxSummary:
+    """Deliver queued outbox rows in batches until none are due.
+
+    Inputs:
+        batch_size: Rows claimed per batch; defaults to
+            ``MAIL_OUTBOX_BATCH_SIZE``.
+        max_batches: Optional cap on batches processed in this run.
+        progress: Optional callback receiving ``(processed, processed +
+            still due)`` after each batch.
+
+    Outputs:
+        An :class:`OutboxSummary`. The run stops early when the relay is
+        unreachable so a down server is not hammered in a tight loop.
+
+    External dependencies:
+        * Sends through :func:`app.services.smtp_pool.get_smtp_pool` using
+          :func:`app.services.mail.smtp_settings_from_config`.
+        * Logs deliveries with :func:`app.services.mail.log_email_dispatch`.
+    """
+
+    batch_size = batch_size or _config_int(
+        "MAIL_OUTBOX_BATCH_SIZE", DEFAULT_OUTBOX_BATCH_SIZE
+    )
+    sender = default_mail_sender()
+    settings = smtp_settings_from_config()
+    pool = get_smtp_pool()
+    summary = OutboxSummary()
+
+    while max_batches is None or summary.batches < max_batches:
+        emails = claim_outbox_batch(batch_size)
+        if not emails:
+            break
+        summary.batches += 1
+        reachable = _deliver_batch(emails, sender, settings, pool, summary)
+        if progress is not None:
+            processed = summary.sent + summary.retried + summary.failed
+            due = db.session.scalar(
+                select(func.count(OutboundEmail.id)).where(
+                    _claimable(datetime.utcnow())
+                )
+            )
+            progress(processed, processed + (due or 0))
+        if not reachable:
+            break
+
+    current_app.logger.info("Mail outbox drained: %s", summary.describe())
+    return summary
+
+
+@register_job(MAIL_OUTBOX_JOB)
+def run_mail_outbox_job(job, progress: ProgressCallback) -> str:
+    """Background job handler wrapping :func:`drain_outbox`.
+
+    Inputs:
+        job: The :class:`app.models.BackgroundJob` being executed.
+        progress: Callback that records ``(processed, total)``.
+
+    Outputs:
+        :meth:`OutboxSummary.describe` for the run.
+
+    External dependencies:
+        * Calls :func:`drain_outbox`.
+    """
+
+    return drain_outbox(progress=progress).describe()
+
+
+def outbox_status_counts() -> Dict[str, int]:
+    """Return the number of outbox rows in each status, including zeros."""
+
+    counts = dict.fromkeys(OUTBOX_STATUSES, 0)
+    rows: List[Tuple[str, int]] = db.session.execute(
+        select(OutboundEmail.status, func.count(OutboundEmail.id)).group_by(
+            OutboundEmail.status
+        )
+    ).all()
+    counts.update({status: count for status, count in rows})
+    return counts
+
+
+def requeue_outbound_email(email: OutboundEmail) -> None:
+    """Return a ``"Failed"`` row to the queue with a fresh attempt budget.
+
+    Raises:
+        ValueError: If ``email`` is not ``"Failed"``.
+    """
+
+    if email.status != "Failed":
+        raise ValueError("Only failed emails can be retried.")
+    email.status = "Queued"
+    email.attempts = 0
+    email.next_attempt_at = datetime.utcnow()
+    db.session.commit()
+
+
+def register_mail_outbox_commands(app: Flask) -> None:
+    """Add the ``drain-mail-outbox`` command to ``app``'s Flask CLI.
+
+    Inputs:
+        app: Application whose :attr:`flask.Flask.cli` receives the command.
+
+    Outputs:
+        None.
+
+    External dependencies:
+        * Uses :mod:`click` for option parsing.
+    """
+
+    @app.cli.command("drain-mail-outbox")
+    @click.option(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Emails claimed per batch (default MAIL_OUTBOX_BATCH_SIZE).",
+    )
+    def drain_mail_outbox_command(batch_size: Optional[int]) -> None:
+        """Deliver queued outbound emails."""
+
+        click.echo(drain_outbox(batch_size=batch_size).describe())
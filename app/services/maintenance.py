@@ -0,0 +1,313 @@
+"""Retention and rollup maintenance for append-only audit tables.
+
+``email_dispatch_log``, ``email_rate_counters`` and ``password_reset_tokens``
+gain a row for every email or reset request and were never pruned.
+:func:`run_data_retention` keeps each table to the window its readers
+actually use:
+
+* Dispatch log days older than ``EMAIL_DISPATCH_LOG_RETENTION_DAYS`` (never
+  less than the longest mail rate-limit window) are rolled up into
+  :class:`app.models.EmailDispatchDailyRollup` and then deleted.
+* Rate counter buckets older than the longest rate-limit window are deleted.
+* Reset tokens are deleted once expired and outside the reset rate-limit
+  window used by the database fallback in :mod:`app.services.auth_utils`.
+
+Deletes run in bounded batches, each committed on its own, so the job never
+holds long locks. Run it from cron or Cloud Scheduler with
+``flask --app app.flask_app prune-data`` or enqueue the
+:data:`DATA_RETENTION_JOB` background job.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as day_start, timedelta
+from typing import Dict, List, Optional
+
+import click
+from flask import Flask, current_app
+from sqlalchemy import delete, func, select
+
+from app.models import (
+    EmailDispatchDailyRollup,
+    EmailDispatchLog,
+    EmailRateCounter,
+    PasswordResetToken,
+    db,
+)
+from app.services.auth_utils import reset_token_retention_window
+from app.services.jobs import ProgressCallback, register_job
+from app.services.mail import MAIL_RATE_LIMIT_MAX_WINDOW
+
+DATA_RETENTION_JOB = "data_retention"
+DEFAULT_EMAIL_LOG_RETENTION_DAYS = 30
+DEFAULT_RETENTION_BATCH_SIZE = 1000
+
+
+@dataclass
+class RetentionSummary:
+    """Outcome of one :func:`run_data_retention` run.
+
+    Attributes:
+        days_rolled_up: Dispatch log days written to the rollup table.
+        deleted: Rows deleted per table name.
+        remaining: Rows left per table name after pruning.
+        duration_seconds: Wall-clock time the run took.
+    """
+
+    days_rolled_up: int = 0
+    deleted: Dict[str, int] = field(default_factory=dict)
+    remaining: Dict[str, int] = field(default_factory=dict)
+    duration_seconds: float = 0.0
+
+    def describe(self) -> str:
+        """Return a one-line summary for job messages and logs."""
+
+        deleted = ", ".join(
+            f"{table}={count}" for table, count in sorted(self.deleted.items())
+        )
+        remaining = ", ".join(
+            f"{table}={count}" for table, count in sorted(self.remaining.items())
+        )
+        return (
+            f"Rolled up {self.days_rolled_up} day(s); deleted {deleted}; "
+            f"remaining {remaining}; took {self.duration_seconds:.2f}s."
+        )
+
+
+def _retention_batch_size() -> int:
+    return max(
+        1,
+        int(
+            current_app.config.get(
+                "DATA_RETENTION_BATCH_SIZE", DEFAULT_RETENTION_BATCH_SIZE
+            )
+        ),
+    )
+
+
+def email_log_retention_cutoff(now: datetime) -> datetime:
+    """Return the midnight before which dispatch log rows may be pruned.
+
+    Inputs:
+        now: Current UTC time.
+
+    Outputs:
+        A day-aligned cutoff, so every rolled-up day is complete. The
+        retention never drops below :data:`MAIL_RATE_LIMIT_MAX_WINDOW`.
+
+    External dependencies:
+        * Reads ``EMAIL_DISPATCH_LOG_RETENTION_DAYS`` from
+          :data:`flask.current_app.config`.
+    """
+
+    days = int(
+        current_app.config.get(
+            "EMAIL_DISPATCH_LOG_RETENTION_DAYS", DEFAULT_EMAIL_LOG_RETENTION_DAYS
+        )
+    )
+    window = max(timedelta(days=days), MAIL_RATE_LIMIT_MAX_WINDOW)
+    return datetime.combine((now - window).date(), day_start.min)
+
+
+def _as_date(value: object) -> date:
+    """Return ``value`` from ``func.date`` as a :class:`datetime.date`."""
+
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def rollup_email_dispatch_log(cutoff: datetime) -> int:
+    """Write daily totals for dispatch log days before ``cutoff``.
+
+    Inputs:
+        cutoff: Day-aligned bound from :func:`email_log_retention_cutoff`.
+
+    Outputs:
+        Number of days rolled up. Days that already have rollup rows are
+        skipped, so a run interrupted mid-delete does not count them twice.
+
+    External dependencies:
+        * Aggregates :class:`app.models.EmailDispatchLog` and inserts
+          :class:`app.models.EmailDispatchDailyRollup` rows through
+          :data:`app.models.db.session`, committing once.
+    """
+
+    log = EmailDispatchLog
+    log_day = func.date(log.created_at)
+    rolled_days = {
+        _as_date(value)
+        for value in db.session.scalars(select(EmailDispatchDailyRollup.day).distinct())
+    }
+    totals = db.session.execute(
+        select(
+            log_day,
+            log.feature,
+            func.count(log.id),
+            func.count(func.distinct(log.recipient)),
+            func.count(func.distinct(log.user_id)),
+        )
+        .where(log.created_at < cutoff)
+        .group_by(log_day, log.feature)
+    )
+
+    new_days = set()
+    rows: List[EmailDispatchDailyRollup] = []
+    for day_value, feature, sent, recipients, users in totals:
+        day = _as_date(day_value)
+        if day in rolled_days:
+            continue
+        new_days.add(day)
+        rows.append(
+            EmailDispatchDailyRollup(
+                day=day,
+                feature=feature,
+                sent_count=sent,
+                recipient_count=recipients,
+                user_count=users,
+            )
+        )
+    db.session.add_all(rows)
+    db.session.commit()
+    return len(new_days)
+
+
+def _delete_in_batches(model, *criteria, batch_size: int) -> int:
+    """Delete ``model`` rows matching ``criteria`` ``batch_size`` at a time."""
+
+    deleted = 0
+    while True:
+        ids = db.session.scalars(
+            select(model.id).where(*criteria).order_by(model.id).limit(batch_size)
+        ).all()
+        if not ids:
+            return deleted
+        db.session.execute(delete(model).where(model.id.in_(ids)))
+        db.session.commit()
+        deleted += len(ids)
+
+
+def _row_count(model) -> int:
+    return db.session.scalar(select(func.count()).select_from(model)) or 0
+
+
+def run_data_retention(
+    *,
+    now: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> RetentionSummary:
+    """Roll up and prune the dispatch log, rate counters and reset tokens.
+
+    Inputs:
+        now: Current UTC time; defaults to :meth:`datetime.utcnow`.
+        batch_size: Rows deleted per transaction; defaults to
+            ``DATA_RETENTION_BATCH_SIZE``.
+        progress: Optional callback receiving ``(steps_done, steps_total)``.
+
+    Outputs:
+        A :class:`RetentionSummary` with deleted and remaining row counts and
+        the run duration, which is also logged.
+
+    External dependencies:
+        * Calls :func:`rollup_email_dispatch_log` and deletes through
+          :data:`app.models.db.session`.
+        * Reads the reset token window from
+          :func:`app.services.auth_utils.reset_token_retention_window`.
+    """
+
+    started = time.monotonic()
+    now = now or datetime.utcnow()
+    batch_size = batch_size or _retention_batch_size()
+    summary = RetentionSummary()
+    steps = 4
+
+    log_cutoff = email_log_retention_cutoff(now)
+    summary.days_rolled_up = rollup_email_dispatch_log(log_cutoff)
+    if progress is not None:
+        progress(1, steps)
+
+    summary.deleted[EmailDispatchLog.__tablename__] = _delete_in_batches(
+        EmailDispatchLog,
+        EmailDispatchLog.created_at < log_cutoff,
+        batch_size=batch_size,
+    )
+    if progress is not None:
+        progress(2, steps)
+
+    counter_cutoff = now - MAIL_RATE_LIMIT_MAX_WINDOW - timedelta(minutes=1)
+    summary.deleted[EmailRateCounter.__tablename__] = _delete_in_batches(
+        EmailRateCounter,
+        EmailRateCounter.bucket_start < counter_cutoff,
+        batch_size=batch_size,
+    )
+    if progress is not None:
+        progress(3, steps)
+
+    token_cutoff = now - reset_token_retention_window()
+    summary.deleted[PasswordResetToken.__tablename__] = _delete_in_batches(
+        PasswordResetToken,
+        PasswordResetToken.created_at < token_cutoff,
+        PasswordResetToken.expires_at < now,
+        batch_size=batch_size,
+    )
+    if progress is not None:
+        progress(4, steps)
+
+    for model in (
+        EmailDispatchLog,
+        EmailRateCounter,
+        PasswordResetToken,
+        EmailDispatchDailyRollup,
+    ):
+        summary.remaining[model.__tablename__] = _row_count(model)
+    summary.duration_seconds = time.monotonic() - started
+    current_app.logger.info("Data retention finished: %s", summary.describe())
+    return summary
+
+
+@register_job(DATA_RETENTION_JOB)
+def run_data_retention_job(job, progress: ProgressCallback) -> str:
+    """Background job handler wrapping :func:`run_data_retention`.
+
+    Inputs:
+        job: The :class:`app.models.BackgroundJob` being executed. Its
+            ``started_at``/``finished_at`` record the job duration.
+        progress: Callback that records ``(steps_done, steps_total)``.
+
+    Outputs:
+        :meth:`RetentionSummary.describe` for the run.
+
+    External dependencies:
+        * Calls :func:`run_data_retention`.
+    """
+
+    return run_data_retention(progress=progress).describe()
+
+
+def register_maintenance_commands(app: Flask) -> None:
+    """Add the ``prune-data`` command to ``app``'s Flask CLI.
+
+    Inputs:
+        app: Application whose :attr:`flask.Flask.cli` receives the command.
+
+    Outputs:
+        None.
+
+    External dependencies:
+        * Uses :mod:`click` for option parsing.
+    """
+
+    @app.cli.command("prune-data")
+    @click.option(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Rows deleted per transaction (default DATA_RETENTION_BATCH_SIZE).",
+    )
+    def prune_data_command(batch_size: Optional[int]) -> None:
+        """Roll up and prune email logs, rate counters and reset tokens."""
+
+        click.echo(run_data_retention(batch_size=batch_size).describe())
@@ -0,0 +1,549 @@
+"""Batched, resumable NetSuite SFTP dispatch for ``Pending Upload`` reports.
+
+Dispatchers claim one batch at a time before sending it: the batch and its
+reports move to ``Uploading`` in a short transaction, so two admins or two
+workers dispatching at once split the backlog instead of sending the same
+reports twice. PostgreSQL claims rows with ``FOR UPDATE SKIP LOCKED``; other
+databases fall back to a compare-and-set ``UPDATE`` guarded on the status.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, func, or_, select, tuple_
+
+from app.models import ExpenseLine, ExpenseReport, NetSuiteDispatchBatch, db
+from app.services.expense_workflow import (
+    iter_pending_upload_csv,
+    netsuite_remote_path,
+    open_netsuite_sftp,
+)
+from app.services.jobs import register_job
+
+NETSUITE_DISPATCH_JOB = "netsuite_dispatch"
+
+DEFAULT_MAX_REPORTS_PER_BATCH = 200
+DEFAULT_MAX_LINES_PER_BATCH = 2000
+# A dispatcher that crashes mid-upload leaves its batch ``Uploading``; after
+# this long another dispatcher may take the batch over.
+DEFAULT_CLAIM_TIMEOUT_MINUTES = 30
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class NetSuiteDispatchError(RuntimeError):
+    """Raised when a dispatch batch fails to reach NetSuite.
+
+    Inputs:
+        message: Operator-facing description of the failed batch.
+        summary: :class:`DispatchSummary` for the batches sent before the
+            failure so callers can report partial progress.
+
+    Outputs:
+        A domain-specific exception consumed by route handlers and jobs.
+
+    External dependencies:
+        None.
+    """
+
+    def __init__(self, message: str, summary: "DispatchSummary") -> None:
+        super().__init__(message)
+        self.summary = summary
+
+
+@dataclass(frozen=True)
+class DispatchSummary:
+    """Outcome of one :func:`dispatch_pending_reports` run."""
+
+    batches_sent: int
+    reports_completed: int
+    batches_remaining: int
+    batches_skipped: int = 0
+
+
+def _batch_limits() -> Tuple[int, int]:
+    """Return the configured ``(max_reports, max_lines)`` per batch."""
+
+    max_reports = int(
+        current_app.config.get(
+            "NETSUITE_DISPATCH_MAX_REPORTS_PER_BATCH", DEFAULT_MAX_REPORTS_PER_BATCH
+        )
+    )
+    max_lines = int(
+        current_app.config.get(
+            "NETSUITE_DISPATCH_MAX_LINES_PER_BATCH", DEFAULT_MAX_LINES_PER_BATCH
+        )
+    )
+    return max(1, max_reports), max(1, max_lines)
+
+
+def _claim_timeout() -> timedelta:
+    """Return how long a batch claim is honoured before it is abandoned."""
+
+    minutes = int(
+        current_app.config.get(
+            "NETSUITE_DISPATCH_CLAIM_TIMEOUT_MINUTES", DEFAULT_CLAIM_TIMEOUT_MINUTES
+        )
+    )
+    return timedelta(minutes=max(1, minutes))
+
+
+def _supports_skip_locked() -> bool:
+    """Return whether the bound database supports ``SKIP LOCKED``."""
+
+    return db.session.get_bind().dialect.name == "postgresql"
+
+
+def _claimable_batches(now: datetime):
+    """Return a filter for batches a dispatcher may claim at ``now``."""
+
+    return or_(
+        NetSuiteDispatchBatch.status.in_(("Pending", "Failed")),
+        and_(
+            NetSuiteDispatchBatch.status == "Uploading",
+            or_(
+                NetSuiteDispatchBatch.claimed_at.is_(None),
+                NetSuiteDispatchBatch.claimed_at < now - _claim_timeout(),
+            ),
+        ),
+    )
+
+
+def _chunk_reports(
+    reports: Sequence[Tuple[int, int]],
+    *,
+    max_reports: int,
+    max_lines: int,
+) -> List[List[int]]:
+    """Group ``(report_id, line_count)`` pairs into size-bounded batches.
+
+    Inputs:
+        reports: Report identifiers paired with their cached line counts.
+        max_reports: Upper bound on reports per batch.
+        max_lines: Upper bound on CSV rows per batch. A single report larger
+            than the bound still travels alone in its own batch.
+
+    Outputs:
+        Lists of report identifiers, one list per batch, in input order.
+
+    External dependencies:
+        None.
+    """
+
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_lines = 0
+    for report_id, line_count in reports:
+        lines = int(line_count or 0)
+        if current and (
+            len(current) >= max_reports or current_lines + lines > max_lines
+        ):
+            batches.append(current)
+            current, current_lines = [], 0
+        current.append(report_id)
+        current_lines += lines
+    if current:
+        batches.append(current)
+    return batches
+
+
+def plan_dispatch_batches() -> List[NetSuiteDispatchBatch]:
+    """Record manifest rows for unassigned reports and return open batches.
+
+    ``Pending Upload`` reports without a batch are grouped by
+    :func:`_chunk_reports` and attached to new ``Pending`` manifest rows. The
+    plan is committed before any network I/O so an interrupted dispatch
+    resumes the same batches with the same file names. Reports are assigned
+    with a guarded ``UPDATE``, so concurrent planners never put one report in
+    two batches.
+
+    Outputs:
+        Every claimable batch ordered by id: ``Pending`` or ``Failed``
+        batches, including ones left over from earlier runs, and
+        ``Uploading`` batches whose claim has expired.
+
+    External dependencies:
+        * Reads and writes :class:`app.models.ExpenseReport` and
+          :class:`app.models.NetSuiteDispatchBatch` via
+          :data:`app.models.db.session`.
+    """
+
+    max_reports, max_lines = _batch_limits()
+    unassigned_query = (
+        db.session.query(ExpenseReport.id, ExpenseReport.line_count)
+        .filter(
+            ExpenseReport.status == "Pending Upload",
+            ExpenseReport.netsuite_batch_id.is_(None),
+        )
+        .order_by(ExpenseReport.id.asc())
+    )
+    if _supports_skip_locked():
+        # Concurrent planners each take the reports the other has not locked.
+        unassigned_query = unassigned_query.with_for_update(
+            skip_locked=True, of=ExpenseReport
+        )
+    unassigned = unassigned_query.all()
+
+    stamp = date.today().isoformat()
+    for report_ids in _chunk_reports(
+        unassigned, max_reports=max_reports, max_lines=max_lines
+    ):
+        batch = NetSuiteDispatchBatch(
+            filename=f"pending-{stamp}-{report_ids[0]}.csv",
+            report_count=len(report_ids),
+        )
+        db.session.add(batch)
+        db.session.flush()
+        batch.filename = f"netsuite-expenses-{stamp}-{batch.id:06d}.csv"
+        # Bulk updates bypass the ORM's version check, so bump version_id by
+        # hand and only claim reports nobody moved since they were read.
+        assigned = (
+            db.session.query(ExpenseReport)
+            .filter(
+                ExpenseReport.id.in_(report_ids),
+                ExpenseReport.status == "Pending Upload",
+                ExpenseReport.netsuite_batch_id.is_(None),
+            )
+            .update(
+                {
+                    ExpenseReport.netsuite_batch_id: batch.id,
+                    ExpenseReport.version_id: ExpenseReport.version_id + 1,
+                },
+                synchronize_session=False,
+            )
+        )
+        if not assigned:
+            db.session.delete(batch)
+        else:
+            batch.report_count = assigned
+    db.session.commit()
+
+    return (
+        NetSuiteDispatchBatch.query.filter(_claimable_batches(datetime.utcnow()))
+        .order_by(NetSuiteDispatchBatch.id.asc())
+        .all()
+    )
+
+
+def claim_dispatch_batch(batch_id: int) -> Optional[NetSuiteDispatchBatch]:
+    """Claim ``batch_id`` and move its reports to ``Uploading``.
+
+    Inputs:
+        batch_id: Identifier of a batch returned by :func:`plan_dispatch_batches`.
+
+    Outputs:
+        The claimed :class:`app.models.NetSuiteDispatchBatch`, or ``None`` when
+        another dispatcher holds or has already sent it. The claim is
+        committed before returning so it is visible to other dispatchers
+        while the file is in flight.
+
+    External dependencies:
+        * Locks rows with ``FOR UPDATE SKIP LOCKED`` on PostgreSQL; elsewhere
+          relies on a compare-and-set ``UPDATE`` of the batch status.
+        * Commits through :data:`app.models.db.session`.
+    """
+
+    now = datetime.utcnow()
+    claimable = _claimable_batches(now)
+    if _supports_skip_locked():
+        locked = db.session.execute(
+            select(NetSuiteDispatchBatch.id)
+            .where(NetSuiteDispatchBatch.id == batch_id, claimable)
+            .with_for_update(skip_locked=True)
+        ).scalar()
+        if locked is None:
+            db.session.rollback()
+            return None
+
+    claimed = (
+        db.session.query(NetSuiteDispatchBatch)
+        .filter(NetSuiteDispatchBatch.id == batch_id, claimable)
+        .update(
+            {
+                NetSuiteDispatchBatch.status: "Uploading",
+                NetSuiteDispatchBatch.claimed_at: now,
+            },
+            synchronize_session=False,
+        )
+    )
+    if claimed != 1:
+        db.session.rollback()
+        return None
+    db.session.query(ExpenseReport).filter(
+        ExpenseReport.netsuite_batch_id == batch_id,
+        ExpenseReport.status == "Pending Upload",
+    ).update(
+        {
+            ExpenseReport.status: "Uploading",
+            ExpenseReport.version_id: ExpenseReport.version_id + 1,
+        },
+        synchronize_session=False,
+    )
+    db.session.commit()
+    return db.session.get(NetSuiteDispatchBatch, batch_id)
+
+
+def _release_batch_reports(batch_id: int) -> None:
+    """Return the ``Uploading`` reports of a failed batch to the backlog."""
+
+    db.session.query(ExpenseReport).filter(
+        ExpenseReport.netsuite_batch_id == batch_id,
+        ExpenseReport.status == "Uploading",
+    ).update(
+        {
+            ExpenseReport.status: "Pending Upload",
+            ExpenseReport.version_id: ExpenseReport.version_id + 1,
+        },
+        synchronize_session=False,
+    )
+
+
+def _detach_held_back_reports(batch_id: int) -> None:
+    """Drop ``batch_id`` from reports that left the batch for review.
+
+    Reports a reviewer moved out of the batch, and reports still
+    ``Uploading`` because they changed while the file was in flight, go back
+    to the unassigned backlog so :func:`plan_dispatch_batches` puts them in a
+    fresh batch once they are ``Pending Upload`` again.
+    """
+
+    db.session.query(ExpenseReport).filter(
+        ExpenseReport.netsuite_batch_id == batch_id,
+        ExpenseReport.status.not_in(("Pending Upload", "Uploading", "Completed")),
+    ).update({ExpenseReport.netsuite_batch_id: None}, synchronize_session=False)
+
+
+def _batch_report_versions(batch: NetSuiteDispatchBatch) -> List[Tuple[int, int]]:
+    """Return ``(id, version_id)`` of the reports claimed for ``batch``."""
+
+    return [
+        (report_id, version_id)
+        for report_id, version_id in db.session.query(
+            ExpenseReport.id, ExpenseReport.version_id
+        )
+        .filter(
+            ExpenseReport.netsuite_batch_id == batch.id,
+            ExpenseReport.status == "Uploading",
+        )
+        .order_by(ExpenseReport.id.asc())
+    ]
+
+
+def _send_batch(client, batch: NetSuiteDispatchBatch, report_ids: List[int]) -> None:
+    """Stream one batch CSV to the SFTP session and record its manifest data.
+
+    The file is written to ``<filename>.part`` and renamed once complete, so
+    NetSuite never picks up a truncated upload.
+
+    Inputs:
+        client: Open :class:`paramiko.SFTPClient` shared across batches.
+        batch: Manifest row being sent.
+        report_ids: Reports to include in the file.
+
+    Outputs:
+        None. Updates ``checksum``, ``byte_size``, and ``line_count`` on
+        ``batch``.
+
+    External dependencies:
+        * Streams rows from
+          :func:`app.services.expense_workflow.iter_pending_upload_csv`.
+    """
+
+    remote_path = netsuite_remote_path(batch.filename)
+    partial_path = f"{remote_path}.part"
+    digest = hashlib.sha256()
+    byte_size = 0
+
+    with client.file(partial_path, "w") as remote_file:
+        for chunk in iter_pending_upload_csv(report_ids=report_ids, status="Uploading"):
+            encoded = chunk.encode("utf-8")
+            remote_file.write(encoded)
+            digest.update(encoded)
+            byte_size += len(encoded)
+
+    try:
+        client.remove(remote_path)
+    except IOError:
+        pass
+    client.rename(partial_path, remote_path)
+
+    batch.checksum = digest.hexdigest()
+    batch.byte_size = byte_size
+    batch.line_count = (
+        db.session.query(func.count(ExpenseLine.id))
+        .filter(
+            ExpenseLine.expense_report_id.in_(report_ids),
+            ExpenseLine.review_status == "Approved",
+        )
+        .scalar()
+        or 0
+    )
+
+
+def dispatch_pending_reports(
+    *,
+    progress: Optional[ProgressCallback] = None,
+) -> DispatchSummary:
+    """Send the ``Pending Upload`` backlog to NetSuite in resumable batches.
+
+    Batches are planned by :func:`plan_dispatch_batches`, claimed one at a
+    time by :func:`claim_dispatch_batch`, and streamed over a single SFTP
+    session. Batches another dispatcher has claimed are skipped. Each batch
+    commits on its own: its reports move to ``Completed`` and the manifest row
+    to ``Sent`` only after the remote file is in place. A failure returns the
+    batch's reports to ``Pending Upload``, marks the batch ``Failed`` and
+    stops, so a retry resumes with that batch and skips everything already
+    sent.
+
+    Inputs:
+        progress: Optional callback receiving ``(batches_done, batches_total)``
+            after each batch is sent or skipped.
+
+    Outputs:
+        A :class:`DispatchSummary` describing the run.
+
+    External dependencies:
+        * Calls :func:`app.services.expense_workflow.open_netsuite_sftp`.
+        * Commits through :data:`app.models.db.session` once per batch.
+        * Raises :class:`NetSuiteDispatchError` when a batch fails and
+          :class:`ValueError` when SFTP credentials are missing.
+    """
+
+    batches = plan_dispatch_batches()
+    total = len(batches)
+    sent = 0
+    completed = 0
+    skipped = 0
+    if not batches:
+        return DispatchSummary(batches_sent=0, reports_completed=0, batches_remaining=0)
+
+    with open_netsuite_sftp() as client:
+        for planned in batches:
+            batch = claim_dispatch_batch(planned.id)
+            if batch is None:
+                skipped += 1
+                if progress is not None:
+                    progress(sent + skipped, total)
+                continue
+            report_versions = _batch_report_versions(batch)
+            report_ids = [report_id for report_id, _version in report_versions]
+            try:
+                if report_ids:
+                    _send_batch(client, batch, report_ids)
+            except Exception as exc:
+                db.session.rollback()
+                _release_batch_reports(batch.id)
+                _detach_held_back_reports(batch.id)
+                batch.status = "Failed"
+                batch.claimed_at = None
+                batch.attempts = (batch.attempts or 0) + 1
+                batch.error = str(exc) or exc.__class__.__name__
+                db.session.commit()
+                current_app.logger.warning(
+                    "NetSuite dispatch batch %s failed: %s", batch.filename, exc
+                )
+                summary = DispatchSummary(
+                    batches_sent=sent,
+                    reports_completed=completed,
+                    batches_remaining=total - sent - skipped,
+                    batches_skipped=skipped,
+                )
+                raise NetSuiteDispatchError(
+                    f"Dispatch stopped at batch {batch.filename}: {batch.error}",
+                    summary,
+                ) from exc
+
+            completed_now = 0
+            if report_versions:
+                completed_now = (
+                    db.session.query(ExpenseReport)
+                    .filter(
+                        tuple_(ExpenseReport.id, ExpenseReport.version_id).in_(
+                            report_versions
+                        ),
+                        ExpenseReport.status == "Uploading",
+                    )
+                    .update(
+                        {
+                            ExpenseReport.status: "Completed",
+                            ExpenseReport.version_id: ExpenseReport.version_id + 1,
+                        },
+                        synchronize_session=False,
+                    )
+                )
+            batch.status = "Sent"
+            batch.attempts = (batch.attempts or 0) + 1
+            batch.error = None
+            if completed_now != len(report_ids):
+                # A reviewer changed some reports while the file was in
+                # flight; they were sent but keep their new state for review
+                # and leave the batch so they are sent again once approved.
+                db.session.query(ExpenseReport).filter(
+                    ExpenseReport.netsuite_batch_id == batch.id,
+                    ExpenseReport.status == "Uploading",
+                ).update(
+                    {
+                        ExpenseReport.status: "Pending Upload",
+                        ExpenseReport.netsuite_batch_id: None,
+                        ExpenseReport.version_id: ExpenseReport.version_id + 1,
+                    },
+                    synchronize_session=False,
+                )
+                _detach_held_back_reports(batch.id)
+                batch.error = (
+                    f"{len(report_ids) - completed_now} report(s) changed during "
+                    "dispatch and were left for review."
+                )
+                current_app.logger.warning(
+                    "NetSuite dispatch batch %s: %s", batch.filename, batch.error
+                )
+            batch.report_count = len(report_ids)
+            batch.sent_at = datetime.utcnow()
+            db.session.commit()
+
+            sent += 1
+            completed += completed_now
+            if progress is not None:
+                progress(sent + skipped, total)
+
+    return DispatchSummary(
+        batches_sent=sent,
+        reports_completed=completed,
+        batches_remaining=0,
+        batches_skipped=skipped,
+    )
+
+
+@register_job(NETSUITE_DISPATCH_JOB)
+def run_dispatch_job(job, progress: ProgressCallback) -> str:
+    """Background job handler wrapping :func:`dispatch_pending_reports`.
+
+    Inputs:
+        job: The :class:`app.models.BackgroundJob` being executed.
+        progress: Callback that records ``(batches_done, batches_total)``.
+
+    Outputs:
+        A result message stored on the job row. Failures propagate so
+        :func:`app.services.jobs.run_job` marks the job ``Failed``.
+
+    External dependencies:
+        * Calls :func:`dispatch_pending_reports`.
+    """
+
+    summary = dispatch_pending_reports(progress=progress)
+    if not summary.batches_sent:
+        if summary.batches_skipped:
+            return (
+                f"{summary.batches_skipped} batch(es) are already being sent by "
+                "another dispatcher."
+            )
+        return "No reports are waiting for upload."
+    return (
+        f"Dispatched {summary.reports_completed} reports to NetSuite in "
+        f"{summary.batches_sent} batch(es) and marked completed."
+    )
@@ -0,0 +1,213 @@
+"""Thumbnail and preview generation for stored receipt images.
+
+Receipts are usually full-resolution phone photos. After a report is saved,
+:func:`enqueue_receipt_derivatives` queues a background job that renders a
+small thumbnail and a screen-sized preview for each new image and stores them
+beside the original through the configured receipt backend. Review pages show
+the thumbnail and link to the preview, so supervisors no longer download
+several megabytes per line.
+
+Pillow is imported lazily. Where it is not installed the job leaves receipts
+``Pending`` and pages keep linking to the originals.
+"""
+
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from flask import current_app
+
+from app.models import ReceiptBlob, User, db
+from app.services.jobs import enqueue_job, register_job
+from app.services.receipts import ReceiptBackend, get_receipt_backend
+
+RECEIPT_DERIVATIVES_JOB = "receipt_derivatives"
+
+DEFAULT_THUMBNAIL_SIZE = 320
+DEFAULT_PREVIEW_SIZE = 1280
+THUMBNAIL_QUALITY = 70
+PREVIEW_QUALITY = 80
+DERIVATIVE_BATCH_SIZE = 50
+
+
+@dataclass(frozen=True)
+class DerivativeSpec:
+    """Rendition rendered for each receipt image."""
+
+    suffix: str
+    max_size: int
+    quality: int
+
+
+def _load_pillow():
+    """Return ``(Image, ImageOps)`` from Pillow, or ``None`` when unavailable."""
+
+    try:
+        from PIL import Image, ImageOps  # Optional dependency.
+    except ImportError:
+        return None
+    return Image, ImageOps
+
+
+def derivative_specs() -> Tuple[DerivativeSpec, DerivativeSpec]:
+    """Return the configured ``(thumbnail, preview)`` rendition sizes."""
+
+    config = current_app.config
+    return (
+        DerivativeSpec(
+            suffix="thumb",
+            max_size=int(
+                config.get("EXPENSE_RECEIPT_THUMBNAIL_SIZE", DEFAULT_THUMBNAIL_SIZE)
+            ),
+            quality=THUMBNAIL_QUALITY,
+        ),
+        DerivativeSpec(
+            suffix="preview",
+            max_size=int(
+                config.get("EXPENSE_RECEIPT_PREVIEW_SIZE", DEFAULT_PREVIEW_SIZE)
+            ),
+            quality=PREVIEW_QUALITY,
+        ),
+    )
+
+
+def derivative_key(storage_key: str, suffix: str) -> str:
+    """Return the key of a rendition stored beside ``storage_key``."""
+
+    stem, _dot, _extension = storage_key.rpartition(".")
+    return f"{stem or storage_key}.{suffix}.jpg"
+
+
+def _render(image, spec: DerivativeSpec, image_module) -> bytes:
+    """Return ``image`` shrunk to fit ``spec`` and encoded as JPEG."""
+
+    rendition = image.copy()
+    rendition.thumbnail((spec.max_size, spec.max_size), image_module.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    rendition.save(
+        buffer, format="JPEG", quality=spec.quality, optimize=True, progressive=True
+    )
+    return buffer.getvalue()
+
+
+def generate_receipt_derivatives(blob: ReceiptBlob, backend: ReceiptBackend) -> str:
+    """Render and store the thumbnail and preview for one receipt.
+
+    Inputs:
+        blob: The :class:`app.models.ReceiptBlob` to process.
+        backend: Receipt backend holding the original and receiving the
+            renditions.
+
+    Outputs:
+        The new ``derivative_status``: ``"Ready"`` when both renditions were
+        stored or ``"Skipped"`` for content that is not an image. Updates
+        ``blob`` in place; the caller commits.
+
+    External dependencies:
+        * Uses Pillow; raises :class:`RuntimeError` when it is missing.
+        * Reads and writes receipts through ``backend``.
+    """
+
+    pillow = _load_pillow()
+    if pillow is None:
+        raise RuntimeError("Pillow is required to render receipt previews.")
+    image_module, image_ops = pillow
+
+    if not (blob.content_type or "").startswith("image/"):
+        blob.derivative_status = "Skipped"
+        return blob.derivative_status
+
+    specs = derivative_specs()
+    with backend.open_reader(blob.storage_key) as original:
+        try:
+            image = image_module.open(original)
+        except image_module.UnidentifiedImageError:
+            blob.derivative_status = "Skipped"
+            return blob.derivative_status
+        # JPEG decoders can downscale while decoding, which avoids
+        # materialising a full-resolution bitmap for large photos.
+        largest = max(spec.max_size for spec in specs)
+        image.draft("RGB", (largest, largest))
+        image = image_ops.exif_transpose(image).convert("RGB")
+
+    urls = {}
+    for spec in specs:
+        key = derivative_key(blob.storage_key, spec.suffix)
+        urls[spec.suffix] = backend.store(
+            key, io.BytesIO(_render(image, spec, image_module)), "image/jpeg"
+        )
+
+    blob.thumbnail_url = urls["thumb"]
+    blob.preview_url = urls["preview"]
+    blob.derivative_status = "Ready"
+    return blob.derivative_status
+
+
+def enqueue_receipt_derivatives(*, user: Optional[User] = None) -> None:
+    """Queue the derivative job when receipt storage and Pillow are available.
+
+    A job that is already queued or running picks up new receipts before it
+    finishes, so repeated calls do not stack duplicate work.
+    """
+
+    if get_receipt_backend() is None or _load_pillow() is None:
+        return
+    enqueue_job(RECEIPT_DERIVATIVES_JOB, user=user)
+
+
+@register_job(RECEIPT_DERIVATIVES_JOB)
+def run_receipt_derivatives_job(job, progress) -> str:
+    """Background job handler that processes every ``Pending`` receipt.
+
+    Inputs:
+        job: The :class:`app.models.BackgroundJob` being executed.
+        progress: Callback that records ``(receipts_done, receipts_total)``.
+
+    Outputs:
+        A result message stored on the job row. A receipt that cannot be
+        rendered is marked ``Failed`` and the job carries on with the rest.
+
+    External dependencies:
+        * Calls :func:`generate_receipt_derivatives` and commits once per
+          receipt through :data:`app.models.db.session`.
+    """
+
+    backend = get_receipt_backend()
+    if backend is None:
+        return "Receipt storage is not configured."
+    if _load_pillow() is None:
+        return "Pillow is not installed; receipt previews were not generated."
+
+    pending = ReceiptBlob.query.filter(ReceiptBlob.derivative_status == "Pending")
+    total = pending.count()
+    done = 0
+    failed = 0
+    while True:
+        batch = (
+            pending.order_by(ReceiptBlob.created_at.asc())
+            .limit(DERIVATIVE_BATCH_SIZE)
+            .all()
+        )
+        if not batch:
+            break
+        for blob in batch:
+            try:
+                generate_receipt_derivatives(blob, backend)
+            except Exception as exc:
+                db.session.rollback()
+                current_app.logger.warning(
+                    "Could not render previews for receipt %s: %s",
+                    blob.storage_key,
+                    exc,
+                )
+                blob.derivative_status = "Failed"
+                failed += 1
+            db.session.commit()
+            done += 1
+            progress(done, max(total, done))
+
+    if failed:
+        return f"Rendered previews for {done - failed} receipt(s); {failed} failed."
+    return f"Rendered previews for {done} receipt(s)."
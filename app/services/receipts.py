@@ -0,0 +1,624 @@
+"""Receipt storage backends and the concurrent receipt upload pipeline.
+
+Receipts are written through :class:`ReceiptBackend`, whose streaming
+:meth:`ReceiptBackend.open_writer` lets uploads flow from the request to
+storage in chunks. Three backends are provided:
+
+* :class:`GCSReceiptBackend` for production Cloud Storage buckets.
+* :class:`LocalReceiptBackend` for on-prem deployments without GCS.
+* :class:`InMemoryReceiptBackend` for tests and offline load testing.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+
+from app.models import ExpenseLine, ReceiptBlob, db
+
+DEFAULT_UPLOAD_WORKERS = 4
+DEFAULT_LOCAL_RECEIPT_URL = "/expenses/receipts"
+CONTENT_RECEIPT_PREFIX = "expense-receipts/sha256"
+RECEIPT_COPY_CHUNK_SIZE = 256 * 1024
+# Resumable upload chunks must be a multiple of 256 KiB.
+GCS_UPLOAD_CHUNK_SIZE = 4 * 256 * 1024
+
+
+class ReceiptUploadError(RuntimeError):
+    """Raised when one or more receipts in a report fail to upload.
+
+    Inputs:
+        message: Operator-facing description of the failure.
+
+    Outputs:
+        A domain-specific exception raised after any receipts that did upload
+        have been removed again.
+
+    External dependencies:
+        None.
+    """
+
+
+@dataclass(frozen=True)
+class PendingReceipt:
+    """Receipt file waiting to be stored for one expense line."""
+
+    line_index: int
+    file_storage: FileStorage
+
+
+@dataclass(frozen=True)
+class StoredReceipt:
+    """Receipt URL and content digest assigned to one expense line.
+
+    ``is_new`` is ``True`` when this upload stored the file for the first time.
+    """
+
+    url: str
+    digest: str
+    is_new: bool = False
+
+
+@lru_cache(maxsize=1)
+def _storage_client():
+    """Return the process-wide Google Cloud Storage client.
+
+    ``storage.Client()`` performs credential discovery and builds an HTTP
+    session, so it is created once per worker process and shared by every
+    upload thread.
+    """
+
+    from google.cloud import storage  # Imported lazily to keep startup fast.
+
+    return storage.Client()
+
+
+def copy_receipt_stream(
+    source: BinaryIO,
+    target: BinaryIO,
+    chunk_size: int = RECEIPT_COPY_CHUNK_SIZE,
+) -> int:
+    """Copy ``source`` into ``target`` in fixed-size chunks.
+
+    Inputs:
+        source: Readable binary stream, typically ``FileStorage.stream``.
+        target: Writable stream returned by :meth:`ReceiptBackend.open_writer`.
+        chunk_size: Bytes read per iteration.
+
+    Outputs:
+        Number of bytes copied. At most ``chunk_size`` bytes are held in
+        memory at a time regardless of the receipt size.
+
+    External dependencies:
+        None.
+    """
+
+    copied = 0
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return copied
+        target.write(chunk)
+        copied += len(chunk)
+
+
+class ReceiptBackend:
+    """Interface shared by the receipt storage backends.
+
+    Backends implement :meth:`open_writer`, :meth:`open_reader`,
+    :meth:`url_for`, and :meth:`delete`; :meth:`store` is built on the
+    streaming writer so callers never buffer a whole receipt.
+
+    ``served_by_app`` is ``True`` when receipt URLs point at
+    :func:`app.expenses.receipt_file` rather than an external host.
+    """
+
+    name = ""
+    served_by_app = False
+
+    def open_writer(self, key: str, content_type: str) -> ContextManager[BinaryIO]:
+        """Return a context manager yielding a writable stream for ``key``.
+
+        The object only becomes visible once the context exits cleanly; an
+        exception inside the block discards the partial write.
+        """
+
+        raise NotImplementedError
+
+    def open_reader(self, key: str) -> BinaryIO:
+        """Return a readable stream for ``key``.
+
+        Raises :class:`FileNotFoundError` when the receipt does not exist.
+        """
+
+        raise NotImplementedError
+
+    def url_for(self, key: str) -> str:
+        """Return the URL stored on :attr:`app.models.ExpenseLine.receipt_url`."""
+
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Remove ``key``, ignoring receipts that do not exist."""
+
+        raise NotImplementedError
+
+    def store(self, key: str, stream: BinaryIO, content_type: str) -> str:
+        """Stream ``stream`` to ``key`` and return the receipt URL."""
+
+        with self.open_writer(key, content_type) as writer:
+            copy_receipt_stream(stream, writer)
+        return self.url_for(key)
+
+
+class GCSReceiptBackend(ReceiptBackend):
+    """Store receipts as public objects in a Google Cloud Storage bucket.
+
+    Writes use a resumable upload session that sends ``chunk_size`` bytes per
+    request, so large PDFs are never held in memory in full.
+    """
+
+    name = "gcs"
+
+    def __init__(
+        self, bucket_name: str, chunk_size: int = GCS_UPLOAD_CHUNK_SIZE
+    ) -> None:
+        self.bucket_name = bucket_name
+        self.chunk_size = chunk_size
+
+    def _blob(self, key: str):
+        return _storage_client().bucket(self.bucket_name).blob(key)
+
+    @contextmanager
+    def open_writer(self, key: str, content_type: str) -> Iterator[BinaryIO]:
+        blob = self._blob(key)
+        writer = blob.open("wb", chunk_size=self.chunk_size, content_type=content_type)
+        # An exception skips ``close()``, abandoning the resumable session so
+        # no partial object is ever finalized in the bucket.
+        yield writer
+        writer.close()
+        blob.make_public()
+
+    def open_reader(self, key: str) -> BinaryIO:
+        from google.api_core.exceptions import NotFound
+
+        blob = self._blob(key)
+        try:
+            blob.reload()
+        except NotFound as exc:
+            raise FileNotFoundError(key) from exc
+        return blob.open("rb")
+
+    def url_for(self, key: str) -> str:
+        return self._blob(key).public_url
+
+    def delete(self, key: str) -> None:
+        from google.api_core.exceptions import NotFound
+
+        try:
+            self._blob(key).delete()
+        except NotFound:
+            pass
+
+
+class LocalReceiptBackend(ReceiptBackend):
+    """Store receipts on the local filesystem under ``root``.
+
+    URLs are built from ``base_url`` and served by
+    :func:`app.expenses.receipt_file`.
+    """
+
+    name = "local"
+    served_by_app = True
+
+    def __init__(self, root: Path, base_url: str = DEFAULT_LOCAL_RECEIPT_URL) -> None:
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def path_for(self, key: str) -> Path:
+        """Return the on-disk path for ``key``, refusing escapes from ``root``."""
+
+        root = self.root.resolve()
+        candidate = (root / key).resolve()
+        if root != candidate and root not in candidate.parents:
+            raise ValueError("Receipt key resolves outside the storage root.")
+        return candidate
+
+    @contextmanager
+    def open_writer(self, key: str, content_type: str) -> Iterator[BinaryIO]:
+        target = self.path_for(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(f"{target.name}.{uuid.uuid4().hex}.part")
+        try:
+            with partial.open("wb") as handle:
+                yield handle
+            os.replace(partial, target)
+        finally:
+            partial.unlink(missing_ok=True)
+
+    def open_reader(self, key: str) -> BinaryIO:
+        return self.path_for(key).open("rb")
+
+    def url_for(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def delete(self, key: str) -> None:
+        self.path_for(key).unlink(missing_ok=True)
+
+
+class InMemoryReceiptBackend(ReceiptBackend):
+    """Keep receipts in process memory.
+
+    Intended for tests, benchmarks, and offline load tests of the submission
+    path; receipts disappear when the process exits. URLs are served by
+    :func:`app.expenses.receipt_file` like the local backend.
+    """
+
+    name = "memory"
+    served_by_app = True
+
+    def __init__(self, base_url: str = DEFAULT_LOCAL_RECEIPT_URL) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.objects: Dict[str, Tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def open_writer(self, key: str, content_type: str) -> Iterator[BinaryIO]:
+        buffer = io.BytesIO()
+        yield buffer
+        with self._lock:
+            self.objects[key] = (buffer.getvalue(), content_type)
+
+    def open_reader(self, key: str) -> BinaryIO:
+        with self._lock:
+            stored = self.objects.get(key)
+        if stored is None:
+            raise FileNotFoundError(key)
+        return io.BytesIO(stored[0])
+
+    def url_for(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self.objects.pop(key, None)
+
+
+@lru_cache(maxsize=1)
+def _memory_backend(base_url: str) -> InMemoryReceiptBackend:
+    """Return the process-wide in-memory backend so receipts outlive a request."""
+
+    return InMemoryReceiptBackend(base_url)
+
+
+def get_receipt_backend() -> Optional[ReceiptBackend]:
+    """Return the receipt backend selected by application configuration.
+
+    ``EXPENSE_RECEIPT_STORAGE`` names the backend explicitly (``gcs``,
+    ``local``, or ``memory``). When it is blank the backend is inferred:
+    ``EXPENSE_RECEIPT_BUCKET`` selects GCS and ``EXPENSE_RECEIPT_LOCAL_DIR``
+    selects the local filesystem.
+
+    Outputs:
+        A :class:`ReceiptBackend`, or ``None`` when receipt storage is not
+        configured.
+
+    External dependencies:
+        * Reads :attr:`flask.Flask.config`.
+        * Raises :class:`ValueError` for unknown backend names or when the
+          selected backend is missing its bucket or directory.
+    """
+
+    config = current_app.config
+    storage = (config.get("EXPENSE_RECEIPT_STORAGE") or "").strip().lower()
+    bucket_name = (config.get("EXPENSE_RECEIPT_BUCKET") or "").strip()
+    local_dir = (config.get("EXPENSE_RECEIPT_LOCAL_DIR") or "").strip()
+    base_url = config.get("EXPENSE_RECEIPT_LOCAL_URL") or DEFAULT_LOCAL_RECEIPT_URL
+
+    if not storage:
+        if bucket_name:
+            storage = "gcs"
+        elif local_dir:
+            storage = "local"
+        else:
+            return None
+
+    if storage == "gcs":
+        if not bucket_name:
+            raise ValueError("EXPENSE_RECEIPT_BUCKET is required for GCS storage.")
+        return GCSReceiptBackend(bucket_name)
+    if storage == "local":
+        if not local_dir:
+            raise ValueError(
+                "EXPENSE_RECEIPT_LOCAL_DIR is required for local receipt storage."
+            )
+        return LocalReceiptBackend(Path(local_dir), base_url)
+    if storage == "memory":
+        return _memory_backend(base_url)
+    raise ValueError(f"Unknown receipt storage backend '{storage}'.")
+
+
+def hash_receipt_stream(
+    stream: BinaryIO, chunk_size: int = RECEIPT_COPY_CHUNK_SIZE
+) -> Tuple[str, int]:
+    """Return the SHA-256 hex digest and byte size of ``stream``.
+
+    The stream is read in chunks and rewound to its starting position, so it
+    can be uploaded afterwards.
+    """
+
+    start = stream.tell()
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    stream.seek(start)
+    return digest.hexdigest(), size
+
+
+def content_receipt_key(digest: str, filename: str) -> str:
+    """Return the content-addressed object key for a receipt digest."""
+
+    extension = Path(secure_filename(filename)).suffix.lower()
+    return f"{CONTENT_RECEIPT_PREFIX}/{digest[:2]}/{digest}{extension}"
+
+
+def receipt_report_ids(key: str) -> List[int]:
+    """Return ids of the reports whose lines reference the receipt at ``key``.
+
+    Inputs:
+        key: Object key of a stored receipt, either content-addressed
+            (``expense-receipts/sha256/<xx>/<digest>.<ext>``) or the older
+            per-report layout (``expense-receipts/<report_id>/<file>``).
+
+    Outputs:
+        Report identifiers used to authorize access to the receipt. Empty for
+        keys in neither layout.
+
+    External dependencies:
+        * Queries :class:`app.models.ExpenseLine` for content-addressed keys.
+    """
+
+    parts = key.split("/")
+    if len(parts) == 3 and parts[0] == "expense-receipts" and parts[1].isdigit():
+        return [int(parts[1])]
+
+    prefix = f"{CONTENT_RECEIPT_PREFIX}/"
+    if not key.startswith(prefix) or len(parts) != 4:
+        return []
+    # Renditions such as ``<digest>.thumb.jpg`` share the original's digest.
+    digest = parts[-1].split(".", 1)[0]
+    if len(digest) != 64 or not all(char in "0123456789abcdef" for char in digest):
+        return []
+    return [
+        report_id
+        for (report_id,) in db.session.query(ExpenseLine.expense_report_id)
+        .filter(ExpenseLine.receipt_digest == digest)
+        .distinct()
+    ]
+
+
+def find_duplicate_receipts(report_id: int) -> Dict[int, List[int]]:
+    """Return other reports that reuse a receipt attached to ``report_id``.
+
+    Inputs:
+        report_id: Identifier of the :class:`app.models.ExpenseReport` under
+            review.
+
+    Outputs:
+        Mapping of line id to the sorted ids of other reports whose lines
+        carry the same receipt digest. Lines without duplicates are omitted.
+
+    External dependencies:
+        * Runs one self-join over the indexed
+          :attr:`app.models.ExpenseLine.receipt_digest` column.
+    """
+
+    other = aliased(ExpenseLine)
+    rows = (
+        db.session.query(ExpenseLine.id, other.expense_report_id)
+        .join(other, other.receipt_digest == ExpenseLine.receipt_digest)
+        .filter(
+            ExpenseLine.expense_report_id == report_id,
+            ExpenseLine.receipt_digest.isnot(None),
+            other.expense_report_id != report_id,
+        )
+        .distinct()
+        .all()
+    )
+    duplicates: Dict[int, List[int]] = {}
+    for line_id, other_report_id in rows:
+        duplicates.setdefault(line_id, []).append(other_report_id)
+    return {line_id: sorted(ids) for line_id, ids in duplicates.items()}
+
+
+def _record_blob(
+    digest: str, key: str, url: str, content_type: str, byte_size: int
+) -> ReceiptBlob:
+    """Add a :class:`app.models.ReceiptBlob` row, tolerating concurrent inserts."""
+
+    blob = ReceiptBlob(
+        digest=digest,
+        storage_key=key,
+        url=url,
+        content_type=content_type,
+        byte_size=byte_size,
+    )
+    try:
+        with db.session.begin_nested():
+            db.session.add(blob)
+    except IntegrityError:
+        # A concurrent submission stored the same content under the same key
+        # first; reuse its row.
+        blob = db.session.get(ReceiptBlob, digest)
+    return blob
+
+
+def upload_report_receipts(
+    receipts: Sequence[PendingReceipt],
+    *,
+    report_id: int,
+    backend: Optional[ReceiptBackend] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[int, StoredReceipt]:
+    """Store every receipt of one report, uploading each distinct file once.
+
+    Each receipt is hashed while it is still in the request's spooled upload.
+    Digests already present in :class:`app.models.ReceiptBlob`, and repeats
+    within the same report, are reused without touching storage. The
+    remaining files upload concurrently on a bounded thread pool sharing one
+    storage client. If any upload fails, files this call uploaded are deleted
+    before the error is raised, so a failed submission leaves no orphaned
+    objects.
+
+    Inputs:
+        receipts: Receipts to store. Entries without a filename are skipped.
+        report_id: Identifier of the owning :class:`app.models.ExpenseReport`.
+        backend: Receipt backend; defaults to :func:`get_receipt_backend`.
+        max_workers: Thread pool size; defaults to
+            ``EXPENSE_RECEIPT_UPLOAD_WORKERS``.
+
+    Outputs:
+        Mapping of line index to the :class:`StoredReceipt` for that line.
+        Empty when no backend is configured.
+
+    External dependencies:
+        * Calls ``backend.store``/``backend.delete`` from worker threads.
+        * Reads and adds :class:`app.models.ReceiptBlob` rows through
+          :data:`app.models.db.session`; the caller commits.
+        * Raises :class:`ReceiptUploadError` when an upload fails.
+    """
+
+    pending = [
+        receipt
+        for receipt in receipts
+        if receipt.file_storage and receipt.file_storage.filename
+    ]
+    if not pending:
+        return {}
+    backend = backend if backend is not None else get_receipt_backend()
+    if backend is None:
+        current_app.logger.warning(
+            "Receipt storage is not configured; discarding %s receipt(s) for "
+            "report %s",
+            len(pending),
+            report_id,
+        )
+        return {}
+
+    line_digests: Dict[int, str] = {}
+    first_by_digest: Dict[str, Tuple[PendingReceipt, int]] = {}
+    for receipt in pending:
+        digest, byte_size = hash_receipt_stream(receipt.file_storage.stream)
+        line_digests[receipt.line_index] = digest
+        first_by_digest.setdefault(digest, (receipt, byte_size))
+
+    blobs = {
+        blob.digest: blob
+        for blob in ReceiptBlob.query.filter(
+            ReceiptBlob.digest.in_(list(first_by_digest))
+        )
+    }
+    missing = [digest for digest in first_by_digest if digest not in blobs]
+    keys = {
+        digest: content_receipt_key(
+            digest, first_by_digest[digest][0].file_storage.filename
+        )
+        for digest in missing
+    }
+
+    def _content_type(digest: str) -> str:
+        file_storage = first_by_digest[digest][0].file_storage
+        return file_storage.content_type or "application/octet-stream"
+
+    def _upload(digest: str) -> str:
+        return backend.store(
+            keys[digest],
+            first_by_digest[digest][0].file_storage.stream,
+            _content_type(digest),
+        )
+
+    urls: Dict[str, str] = {}
+    failures: List[BaseException] = []
+    if missing:
+        workers = max_workers or int(
+            current_app.config.get(
+                "EXPENSE_RECEIPT_UPLOAD_WORKERS", DEFAULT_UPLOAD_WORKERS
+            )
+        )
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(workers, len(missing))),
+            thread_name_prefix="receipt-upload",
+        ) as executor:
+            futures = {executor.submit(_upload, digest): digest for digest in missing}
+            for future in as_completed(futures):
+                digest = futures[future]
+                try:
+                    urls[digest] = future.result()
+                except Exception as exc:
+                    failures.append(exc)
+
+    if failures:
+        # Keep objects another submission recorded while this one was uploading.
+        claimed = {
+            digest
+            for (digest,) in db.session.query(ReceiptBlob.digest).filter(
+                ReceiptBlob.digest.in_(list(urls))
+            )
+        }
+        for digest in urls:
+            if digest in claimed:
+                continue
+            try:
+                backend.delete(keys[digest])
+            except Exception:  # pragma: no cover - best-effort cleanup
+                current_app.logger.warning(
+                    "Could not remove receipt %s after failed upload", keys[digest]
+                )
+        raise ReceiptUploadError(
+            f"{len(failures)} receipt(s) failed to upload: {failures[0]}"
+        ) from failures[0]
+
+    for digest, url in urls.items():
+        blobs[digest] = _record_blob(
+            digest,
+            keys[digest],
+            url,
+            _content_type(digest),
+            first_by_digest[digest][1],
+        )
+
+    return {
+        line_index: StoredReceipt(
+            url=blobs[digest].url, digest=digest, is_new=digest in urls
+        )
+        for line_index, digest in line_digests.items()
+    }
@@ -0,0 +1,463 @@
+"""Compiled snapshots of the expense reference workbook.
+
+``expense_report_template.xlsx`` supplies the GL account and expense type
+choices. Parsing it with openpyxl is slow, so the workbook is compiled once
+into a small JSON snapshot named after the workbook's SHA-256 digest and
+stored in ``EXPENSE_REFERENCE_CACHE_DIR`` (shared by every worker on the
+host). Each process keeps the loaded snapshot in memory and revalidates it
+with a single ``os.stat`` call, so editing the workbook takes effect on the
+next request without a restart.
+
+Administrators can also upload a replacement workbook, which
+:func:`publish_reference_workbook` stores as an
+:class:`app.models.ExpenseReferenceVersion`. The newest upload takes
+precedence over the bundled file; each worker notices it through a periodic
+``SELECT max(id)`` version check instead of a redeploy.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+from xml.etree.ElementTree import ParseError
+
+import openpyxl
+from flask import current_app
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from werkzeug.datastructures import FileStorage
+
+from app.models import ExpenseReferenceVersion, User, db
+
+SNAPSHOT_FORMAT_VERSION = 1
+DEFAULT_VERSION_CHECK_SECONDS = 15
+MAX_REFERENCE_WORKBOOK_BYTES = 10 * 1024 * 1024
+REFERENCE_SHEETS = ("GL Accounts", "Data List")
+
+
+class ExpenseReferenceDataError(RuntimeError):
+    """Raised when the runtime expense reference workbook cannot be consumed.
+
+    Inputs:
+        message: Operator-facing guidance that explains why workbook access
+            failed and how to remediate the runtime deployment.
+
+    Outputs:
+        A domain-specific exception consumed by route handlers to avoid
+        unhandled 500 errors for workbook-related failures.
+
+    External dependencies:
+        None.
+    """
+
+
+@dataclass(frozen=True)
+class GLAccountOption:
+    """Searchable GL account option sourced from the reference workbook."""
+
+    account: str
+    label: str
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    """Reference values compiled from one version of the workbook.
+
+    Attributes:
+        digest: SHA-256 hex digest of the workbook the snapshot came from.
+        gl_accounts: Options from the ``GL Accounts`` sheet, or ``None`` when
+            the sheet is missing.
+        expense_types: Values from the ``Data List`` sheet, or ``None`` when
+            the sheet is missing.
+    """
+
+    digest: str
+    gl_accounts: Optional[Tuple[GLAccountOption, ...]]
+    expense_types: Optional[Tuple[str, ...]]
+
+    def to_json(self) -> Dict[str, object]:
+        """Return the JSON document persisted for this snapshot."""
+
+        return {
+            "format": SNAPSHOT_FORMAT_VERSION,
+            "digest": self.digest,
+            "gl_accounts": (
+                None
+                if self.gl_accounts is None
+                else [[option.account, option.label] for option in self.gl_accounts]
+            ),
+            "expense_types": (
+                None if self.expense_types is None else list(self.expense_types)
+            ),
+        }
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, object]) -> "ReferenceSnapshot":
+        """Rebuild a snapshot from :meth:`to_json` output."""
+
+        if payload.get("format") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError("Unsupported reference snapshot format.")
+        gl_accounts = payload.get("gl_accounts")
+        expense_types = payload.get("expense_types")
+        return cls(
+            digest=str(payload["digest"]),
+            gl_accounts=(
+                None
+                if gl_accounts is None
+                else tuple(
+                    GLAccountOption(account=str(account), label=str(label))
+                    for account, label in gl_accounts
+                )
+            ),
+            expense_types=(
+                None
+                if expense_types is None
+                else tuple(str(value) for value in expense_types)
+            ),
+        )
+
+
+_memory_cache: Dict[Path, Tuple[Tuple[int, int], ReferenceSnapshot]] = {}
+_memory_lock = threading.Lock()
+# Uploaded version cached by this process: ``(checked_at, version_id, snapshot)``.
+_published: Tuple[Optional[float], Optional[int], Optional[ReferenceSnapshot]] = (
+    None,
+    None,
+    None,
+)
+
+
+def clear_reference_cache() -> None:
+    """Drop the in-process caches; the next read revalidates everything."""
+
+    global _published
+    with _memory_lock:
+        _memory_cache.clear()
+        _published = (None, None, None)
+
+
+def _missing_workbook_error(
+    workbook_path: Union[Path, BinaryIO],
+) -> ExpenseReferenceDataError:
+    if not isinstance(workbook_path, Path):
+        workbook_path = getattr(workbook_path, "name", "uploaded workbook")
+    return ExpenseReferenceDataError(
+        "Expense reference workbook could not be loaded. "
+        f"Expected file: '{workbook_path}'. "
+        f"Required sheets: {', '.join(REFERENCE_SHEETS)}. "
+        "Ensure the workbook exists and is a valid .xlsx file on the "
+        "application host."
+    )
+
+
+def missing_sheet_error(workbook_path: Path) -> ExpenseReferenceDataError:
+    """Return the error raised when a required worksheet is absent."""
+
+    return ExpenseReferenceDataError(
+        "Expense reference workbook is missing required sheet data. "
+        f"Expected file: '{workbook_path}'. "
+        f"Required sheets: {', '.join(REFERENCE_SHEETS)}. "
+        "Verify the deployed workbook matches the template structure."
+    )
+
+
+def compile_reference_workbook(
+    workbook_path: Union[Path, BinaryIO], digest: str
+) -> ReferenceSnapshot:
+    """Parse a reference workbook into a :class:`ReferenceSnapshot`.
+
+    Inputs:
+        workbook_path: Location of ``expense_report_template.xlsx``, or a
+            binary stream holding an uploaded workbook.
+        digest: SHA-256 digest of the file, recorded on the snapshot.
+
+    Outputs:
+        The compiled snapshot. Sheets that are absent are stored as ``None``
+        so each loader can report its own missing sheet.
+
+    External dependencies:
+        * Calls :func:`openpyxl.load_workbook` in read-only mode.
+        * Raises :class:`ExpenseReferenceDataError` when the file cannot be
+          opened as a workbook.
+    """
+
+    try:
+        workbook = openpyxl.load_workbook(workbook_path, read_only=True, data_only=True)
+    except (
+        FileNotFoundError,
+        openpyxl.utils.exceptions.InvalidFileException,
+        OSError,
+        KeyError,
+        ParseError,
+        zipfile.BadZipFile,
+    ) as exc:
+        raise _missing_workbook_error(workbook_path) from exc
+
+    try:
+        gl_accounts = None
+        if "GL Accounts" in workbook.sheetnames:
+            options = []
+            for row in workbook["GL Accounts"].iter_rows(min_row=2, values_only=True):
+                account = str(row[0] or "").strip() if row else ""
+                label = str(row[1] or "").strip() if len(row) > 1 else ""
+                if not account:
+                    continue
+                display = f"{account} - {label}" if label else account
+                options.append(GLAccountOption(account=account, label=display))
+            gl_accounts = tuple(options)
+
+        expense_types = None
+        if "Data List" in workbook.sheetnames:
+            expense_types = tuple(
+                candidate
+                for candidate in (
+                    str(row[0] or "").strip() if row else ""
+                    for row in workbook["Data List"].iter_rows(
+                        min_row=2, values_only=True
+                    )
+                )
+                if candidate
+            )
+    finally:
+        workbook.close()
+
+    return ReferenceSnapshot(
+        digest=digest, gl_accounts=gl_accounts, expense_types=expense_types
+    )
+
+
+def _snapshot_dir() -> Path:
+    """Return the directory holding compiled snapshots."""
+
+    configured = (current_app.config.get("EXPENSE_REFERENCE_CACHE_DIR") or "").strip()
+    if configured:
+        return Path(configured)
+    return Path(tempfile.gettempdir()) / "expense-reference-cache"
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_snapshot(path: Path) -> Optional[ReferenceSnapshot]:
+    """Return the snapshot stored at ``path``, or ``None`` if unusable."""
+
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            return ReferenceSnapshot.from_json(json.load(handle))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        current_app.logger.warning("Ignoring unreadable snapshot %s: %s", path, exc)
+        return None
+
+
+def _write_snapshot(path: Path, snapshot: ReferenceSnapshot) -> None:
+    """Atomically persist ``snapshot``; failures only cost a future re-parse."""
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handle, partial = tempfile.mkstemp(
+            dir=path.parent, prefix=path.name, suffix=".part"
+        )
+        with os.fdopen(handle, "w", encoding="utf-8") as output:
+            json.dump(snapshot.to_json(), output, separators=(",", ":"))
+        os.replace(partial, path)
+    except OSError as exc:
+        current_app.logger.warning(
+            "Could not persist reference snapshot %s: %s", path, exc
+        )
+
+
+def load_reference_snapshot(workbook_path: Path) -> ReferenceSnapshot:
+    """Return the reference snapshot for the workbook at ``workbook_path``.
+
+    The in-process copy is reused while the file's ``(mtime_ns, size)`` is
+    unchanged. Otherwise the workbook is hashed and the on-disk snapshot for
+    that digest is loaded, compiling and storing it first when no worker has
+    done so yet.
+
+    Inputs:
+        workbook_path: Location of ``expense_report_template.xlsx``.
+
+    Outputs:
+        The current :class:`ReferenceSnapshot`.
+
+    External dependencies:
+        * Reads and writes JSON files in ``EXPENSE_REFERENCE_CACHE_DIR``.
+        * Calls :func:`compile_reference_workbook` on a snapshot miss.
+        * Raises :class:`ExpenseReferenceDataError` when the workbook is
+          missing or unreadable.
+    """
+
+    path = Path(workbook_path)
+    try:
+        stat = path.stat()
+    except OSError as exc:
+        with _memory_lock:
+            _memory_cache.pop(path, None)
+        raise _missing_workbook_error(path) from exc
+
+    stat_key = (stat.st_mtime_ns, stat.st_size)
+    with _memory_lock:
+        cached = _memory_cache.get(path)
+    if cached is not None and cached[0] == stat_key:
+        return cached[1]
+
+    try:
+        digest = _file_digest(path)
+    except OSError as exc:
+        raise _missing_workbook_error(path) from exc
+
+    snapshot_path = _snapshot_dir() / f"expense-reference-{digest}.json"
+    snapshot = _read_snapshot(snapshot_path)
+    if snapshot is None or snapshot.digest != digest:
+        snapshot = compile_reference_workbook(path, digest)
+        _write_snapshot(snapshot_path, snapshot)
+
+    with _memory_lock:
+        _memory_cache[path] = (stat_key, snapshot)
+    return snapshot
+
+
+def _latest_version_id() -> Optional[int]:
+    """Return the id of the newest uploaded version, or ``None``.
+
+    Runs on its own connection so the check never disturbs the request's
+    session, and treats a missing table (migrations not yet applied) as "no
+    uploads".
+    """
+
+    try:
+        with db.engine.connect() as connection:
+            return connection.execute(
+                select(func.max(ExpenseReferenceVersion.id))
+            ).scalar()
+    except (OperationalError, ProgrammingError) as exc:
+        current_app.logger.debug("Reference version check failed: %s", exc)
+        return None
+
+
+def _published_snapshot() -> Optional[ReferenceSnapshot]:
+    """Return the active uploaded snapshot, checking for new versions at most
+    every ``EXPENSE_REFERENCE_VERSION_CHECK_SECONDS``."""
+
+    global _published
+    interval = float(
+        current_app.config.get(
+            "EXPENSE_REFERENCE_VERSION_CHECK_SECONDS", DEFAULT_VERSION_CHECK_SECONDS
+        )
+    )
+    now = time.monotonic()
+    with _memory_lock:
+        checked_at, cached_id, cached_snapshot = _published
+    if checked_at is not None and now - checked_at < interval:
+        return cached_snapshot
+
+    version_id = _latest_version_id()
+    snapshot = cached_snapshot if version_id == cached_id else None
+    if version_id is not None and snapshot is None:
+        version = db.session.get(ExpenseReferenceVersion, version_id)
+        snapshot = ReferenceSnapshot.from_json(json.loads(version.payload))
+
+    with _memory_lock:
+        _published = (now, version_id, snapshot)
+    return snapshot
+
+
+def load_current_reference_snapshot(workbook_path: Path) -> ReferenceSnapshot:
+    """Return the active reference data for expense forms.
+
+    Inputs:
+        workbook_path: Bundled workbook used when no version was uploaded.
+
+    Outputs:
+        The newest :class:`app.models.ExpenseReferenceVersion` snapshot, or
+        :func:`load_reference_snapshot` for ``workbook_path`` when none exist.
+
+    External dependencies:
+        * Runs ``SELECT max(id)`` on ``expense_reference_versions`` at most
+          once per ``EXPENSE_REFERENCE_VERSION_CHECK_SECONDS`` per process.
+    """
+
+    snapshot = _published_snapshot()
+    if snapshot is not None:
+        return snapshot
+    return load_reference_snapshot(workbook_path)
+
+
+def publish_reference_workbook(
+    file_storage: FileStorage, *, user: Optional[User] = None
+) -> ExpenseReferenceVersion:
+    """Validate an uploaded workbook and make it the active reference data.
+
+    Inputs:
+        file_storage: Uploaded ``.xlsx`` file.
+        user: Administrator publishing the workbook.
+
+    Outputs:
+        The committed :class:`app.models.ExpenseReferenceVersion`. Every
+        worker switches to it on its next version check.
+
+    External dependencies:
+        * Parses the upload with :func:`compile_reference_workbook`.
+        * Commits through :data:`app.models.db.session`.
+        * Raises :class:`ExpenseReferenceDataError` when the file is not a
+          workbook, lacks the required sheets, or has no values in them.
+    """
+
+    global _published
+    content = file_storage.stream.read(MAX_REFERENCE_WORKBOOK_BYTES + 1)
+    if len(content) > MAX_REFERENCE_WORKBOOK_BYTES:
+        raise ExpenseReferenceDataError("Reference workbook is larger than 10 MB.")
+
+    digest = hashlib.sha256(content).hexdigest()
+    stream = io.BytesIO(content)
+    try:
+        snapshot = compile_reference_workbook(stream, digest)
+    except ExpenseReferenceDataError as exc:
+        raise ExpenseReferenceDataError(
+            "Uploaded file is not a valid .xlsx workbook."
+        ) from exc
+
+    missing = [
+        sheet
+        for sheet, values in (
+            ("GL Accounts", snapshot.gl_accounts),
+            ("Data List", snapshot.expense_types),
+        )
+        if not values
+    ]
+    if missing:
+        raise ExpenseReferenceDataError(
+            "Reference workbook must contain values in the "
+            f"{', '.join(missing)} sheet(s)."
+        )
+
+    version = ExpenseReferenceVersion(
+        digest=digest,
+        filename=file_storage.filename,
+        payload=json.dumps(snapshot.to_json(), separators=(",", ":")),
+        gl_account_count=len(snapshot.gl_accounts),
+        expense_type_count=len(snapshot.expense_types),
+        uploaded_by_id=user.id if user is not None else None,
+    )
+    db.session.add(version)
+    db.session.commit()
+
+    with _memory_lock:
+        _published = (time.monotonic(), version.id, snapshot)
+    return version
@@ -0,0 +1,236 @@
+"""Pooled, persistent SMTP connections for :func:`services.mail.send_email`.
+
+Opening an SMTP session costs a TCP connect, a TLS handshake and an AUTH
+round trip. Bursts such as approval notifications or password-reset waves
+used to pay that for every message. :class:`SMTPConnectionPool` keeps
+authenticated sessions open between sends, keyed by server and credentials:
+
+* Idle sessions older than ``idle_timeout`` are closed instead of reused.
+* Sessions idle for more than ``noop_after`` are checked with ``NOOP``.
+* A reused session the server has already dropped is replaced by a fresh
+  connection once before the error reaches the caller's retry/backoff loop.
+"""
+
+from __future__ import annotations
+
+import atexit
+import smtplib
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from flask import current_app
+
+DEFAULT_SMTP_POOL_SIZE = 4
+DEFAULT_SMTP_POOL_IDLE_TIMEOUT = 60.0
+DEFAULT_SMTP_POOL_NOOP_AFTER = 5.0
+DEFAULT_SMTP_TIMEOUT = 30.0
+
+
+@dataclass(frozen=True)
+class SMTPSettings:
+    """Connection parameters that identify one pool of SMTP sessions.
+
+    Attributes:
+        smtp_class: :class:`smtplib.SMTP` or :class:`smtplib.SMTP_SSL`.
+        host: Mail server hostname.
+        port: Mail server port.
+        use_tls: Whether to run ``STARTTLS`` after connecting.
+        username: Optional login name.
+        password: Optional login password; excluded from ``repr``.
+    """
+
+    smtp_class: Type[smtplib.SMTP]
+    host: str
+    port: int
+    use_tls: bool = False
+    username: Optional[str] = None
+    password: Optional[str] = field(default=None, repr=False)
+
+
+def _close(smtp: smtplib.SMTP) -> None:
+    """Close ``smtp`` politely, ignoring sessions that are already gone."""
+
+    try:
+        smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        try:
+            smtp.close()
+        except OSError:
+            pass
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of authenticated SMTP sessions.
+
+    Inputs:
+        max_idle: Idle sessions kept per :class:`SMTPSettings`; ``0``
+            disables reuse so every send connects and quits.
+        idle_timeout: Seconds after which an idle session is discarded.
+        noop_after: Seconds of idleness after which a session is probed with
+            ``NOOP`` before reuse.
+        timeout: Socket timeout passed to the SMTP class.
+        clock: Monotonic time source, replaceable in tests.
+
+    Outputs:
+        Sessions are borrowed exclusively for one send and returned to the
+        idle list afterwards; failed sessions are closed, never returned.
+
+    External dependencies:
+        * Connects with :mod:`smtplib`.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_idle: int = DEFAULT_SMTP_POOL_SIZE,
+        idle_timeout: float = DEFAULT_SMTP_POOL_IDLE_TIMEOUT,
+        noop_after: float = DEFAULT_SMTP_POOL_NOOP_AFTER,
+        timeout: float = DEFAULT_SMTP_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_idle = max(0, int(max_idle))
+        self.idle_timeout = float(idle_timeout)
+        self.noop_after = float(noop_after)
+        self.timeout = float(timeout)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._idle: Dict[SMTPSettings, List[Tuple[smtplib.SMTP, float]]] = {}
+
+    def _connect(self, settings: SMTPSettings) -> smtplib.SMTP:
+        smtp = settings.smtp_class(settings.host, settings.port, timeout=self.timeout)
+        try:
+            if settings.use_tls and not isinstance(smtp, smtplib.SMTP_SSL):
+                smtp.starttls()
+            if settings.username and settings.password:
+                smtp.login(settings.username, settings.password)
+        except BaseException:
+            _close(smtp)
+            raise
+        return smtp
+
+    @staticmethod
+    def _healthy(smtp: smtplib.SMTP) -> bool:
+        try:
+            status, _message = smtp.noop()
+        except (smtplib.SMTPException, OSError):
+            return False
+        return status == 250
+
+    def _checkout(self, settings: SMTPSettings) -> Tuple[smtplib.SMTP, bool]:
+        """Return ``(session, reused)`` for ``settings``."""
+
+        while True:
+            with self._lock:
+                idle = self._idle.get(settings)
+                entry = idle.pop() if idle else None
+            if entry is None:
+                return self._connect(settings), False
+            smtp, last_used = entry
+            age = self._clock() - last_used
+            if age > self.idle_timeout:
+                _close(smtp)
+                continue
+            if age > self.noop_after and not self._healthy(smtp):
+                _close(smtp)
+                continue
+            return smtp, True
+
+    def _checkin(self, settings: SMTPSettings, smtp: smtplib.SMTP) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(settings, [])
+            if len(idle) < self.max_idle:
+                idle.append((smtp, self._clock()))
+                return
+        _close(smtp)
+
+    def send_message(self, settings: SMTPSettings, message) -> None:
+        """Send ``message`` over a pooled session for ``settings``.
+
+        Inputs:
+            settings: Server and credentials to send through.
+            message: :class:`email.message.EmailMessage` to deliver.
+
+        Outputs:
+            None. If a reused session turns out to be disconnected, one fresh
+            connection is tried before the error propagates; every other
+            failure closes the session and is raised for the caller's
+            retry/backoff logic.
+
+        External dependencies:
+            * Calls :meth:`smtplib.SMTP.send_message`.
+        """
+
+        smtp, reused = self._checkout(settings)
+        try:
+            try:
+                smtp.send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                _close(smtp)
+                if not reused:
+                    raise
+                smtp = self._connect(settings)
+                smtp.send_message(message)
+        except BaseException:
+            _close(smtp)
+            raise
+        self._checkin(settings, smtp)
+
+    def idle_count(self, settings: Optional[SMTPSettings] = None) -> int:
+        """Return idle sessions for ``settings``, or across every server."""
+
+        with self._lock:
+            if settings is not None:
+                return len(self._idle.get(settings, ()))
+            return sum(len(idle) for idle in self._idle.values())
+
+    def close_all(self) -> None:
+        """Quit every idle session."""
+
+        with self._lock:
+            sessions = [smtp for idle in self._idle.values() for smtp, _ in idle]
+            self._idle.clear()
+        for smtp in sessions:
+            _close(smtp)
+
+
+_pool: Optional[SMTPConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Return the process-wide pool, creating it from app config once.
+
+    External dependencies:
+        * Reads ``MAIL_SMTP_POOL_SIZE``, ``MAIL_SMTP_POOL_IDLE_TIMEOUT``,
+          ``MAIL_SMTP_POOL_NOOP_AFTER`` and ``MAIL_SMTP_TIMEOUT`` from
+          :data:`flask.current_app.config`.
+    """
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            config = current_app.config
+            _pool = SMTPConnectionPool(
+                max_idle=config.get("MAIL_SMTP_POOL_SIZE", DEFAULT_SMTP_POOL_SIZE),
+                idle_timeout=config.get(
+                    "MAIL_SMTP_POOL_IDLE_TIMEOUT", DEFAULT_SMTP_POOL_IDLE_TIMEOUT
+                ),
+                noop_after=config.get(
+                    "MAIL_SMTP_POOL_NOOP_AFTER", DEFAULT_SMTP_POOL_NOOP_AFTER
+                ),
+                timeout=config.get("MAIL_SMTP_TIMEOUT", DEFAULT_SMTP_TIMEOUT),
+            )
+            atexit.register(_pool.close_all)
+        return _pool
+
+
+def reset_smtp_pool() -> None:
+    """Close and forget the process-wide pool so config is re-read."""
+
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close_all()
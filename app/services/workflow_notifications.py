@@ -0,0 +1,406 @@
+"""Expense workflow notification emails, sent immediately or as digests.
+
+Supervisors are told when a report is submitted for their review, and
+employees when a review returns their report to ``Draft``. Workflow code
+records a :class:`app.models.WorkflowNotification` in the same transaction
+as the change (:func:`record_report_submitted`,
+:func:`record_report_returned`) and passes the recorded rows to
+:func:`notify_workflow_recipients` after committing. Delivery goes through the mail outbox in
+:mod:`app.services.mail_outbox`, so rate limits still apply and no request
+waits on SMTP.
+
+``WORKFLOW_NOTIFICATION_MODE`` selects how pending rows become email:
+
+* ``"immediate"`` (default) queues one email per event right away. Only the
+  events the request just recorded are sent inline; anything left pending
+  (for example by rate limits) waits for the scheduled command.
+* ``"digest"`` collapses a recipient's events into one email once their
+  oldest pending event is ``WORKFLOW_DIGEST_INTERVAL_MINUTES`` old, which
+  keeps month-end volume and rate-limit usage to one message per recipient
+  per interval. Digests are sent by the :data:`WORKFLOW_NOTIFICATIONS_JOB`
+  job, started when a new event finds an overdue digest; schedule
+  ``flask --app app.flask_app send-workflow-notifications`` to flush quiet
+  periods.
+* ``"off"`` records and sends nothing.
+
+Events rejected by the mail rate limits stay pending for the next run.
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import List, Optional, Sequence, Tuple
+
+import click
+from flask import Flask, current_app, has_request_context, url_for
+from sqlalchemy import and_, func, or_, select, update
+
+from app.models import ExpenseReport, User, WorkflowNotification, db
+from app.services.jobs import ProgressCallback, enqueue_job, register_job
+from app.services.mail import MailRateLimitError
+from app.services.mail_outbox import queue_email, start_outbox_worker
+
+WORKFLOW_NOTIFICATIONS_JOB = "workflow_notifications"
+WORKFLOW_NOTIFICATION_FEATURE = "workflow_notification"
+EVENT_REPORT_SUBMITTED = "report_submitted"
+EVENT_REPORT_RETURNED = "report_returned"
+NOTIFICATION_MODES = ("immediate", "digest", "off")
+DEFAULT_NOTIFICATION_MODE = "immediate"
+DEFAULT_DIGEST_INTERVAL_MINUTES = 60
+# Claims older than this belong to a sender run that died mid-way.
+NOTIFICATION_CLAIM_TIMEOUT = timedelta(minutes=15)
+
+_EVENT_SUBJECTS = {
+    EVENT_REPORT_SUBMITTED: "Expense report submitted for your review",
+    EVENT_REPORT_RETURNED: "Your expense report was returned to draft",
+}
+
+
+@dataclass
+class NotificationSummary:
+    """Outcome of one :func:`send_workflow_notifications` run.
+
+    Attributes:
+        emails: Emails queued in the outbox.
+        events: Notifications delivered by those emails.
+        deferred: Notifications left pending because of mail rate limits.
+    """
+
+    emails: int = 0
+    events: int = 0
+    deferred: int = 0
+
+    def describe(self) -> str:
+        """Return a one-line summary for job messages and logs."""
+
+        return (
+            f"Queued {self.emails} notification email(s) covering "
+            f"{self.events} event(s); {self.deferred} deferred."
+        )
+
+
+def notification_mode() -> str:
+    """Return the configured mode, falling back to ``"immediate"``."""
+
+    mode = (
+        str(
+            current_app.config.get(
+                "WORKFLOW_NOTIFICATION_MODE", DEFAULT_NOTIFICATION_MODE
+            )
+            or ""
+        )
+        .strip()
+        .lower()
+    )
+    return mode if mode in NOTIFICATION_MODES else DEFAULT_NOTIFICATION_MODE
+
+
+def _digest_interval() -> timedelta:
+    minutes = int(
+        current_app.config.get(
+            "WORKFLOW_DIGEST_INTERVAL_MINUTES", DEFAULT_DIGEST_INTERVAL_MINUTES
+        )
+    )
+    return timedelta(minutes=max(0, minutes))
+
+
+def _display_name(user: Optional[User]) -> str:
+    if user is None:
+        return "An employee"
+    name = " ".join(part for part in (user.first_name, user.last_name) if part)
+    return name or user.name or user.email
+
+
+def _external_url(endpoint: str, **values) -> Optional[str]:
+    """Return an absolute link, or ``None`` when no host is known."""
+
+    if not has_request_context() and not current_app.config.get("SERVER_NAME"):
+        return None
+    return url_for(endpoint, _external=True, **values)
+
+
+def _record(
+    recipient_id: Optional[int], report: ExpenseReport, event: str, summary: str
+) -> Optional[WorkflowNotification]:
+    if recipient_id is None or notification_mode() == "off":
+        return None
+    notification = WorkflowNotification(
+        recipient_id=recipient_id,
+        report_id=report.id,
+        event=event,
+        summary=summary,
+    )
+    db.session.add(notification)
+    return notification
+
+
+def record_report_submitted(report: ExpenseReport) -> Optional[WorkflowNotification]:
+    """Add a notification for the supervisor of a newly submitted report.
+
+    Inputs:
+        report: Flushed :class:`app.models.ExpenseReport`; ignored unless its
+            status is ``"Pending Review"``.
+
+    Outputs:
+        The pending :class:`app.models.WorkflowNotification`, or ``None``.
+        The caller commits it together with the report.
+
+    External dependencies:
+        * Builds a review link with :func:`flask.url_for` when a request or
+          ``SERVER_NAME`` is available.
+    """
+
+    if report.status != "Pending Review":
+        return None
+    employee = report.employee or db.session.get(User, report.employee_id)
+    summary = (
+        f"{_display_name(employee)} submitted the "
+        f"{report.report_month:%B %Y} expense report "
+        f"({report.line_count or 0} line(s), "
+        f"{report.total_amount or 0:.2f} total)."
+    )
+    link = _external_url("expenses.review_report", report_id=report.id)
+    if link:
+        summary += f" Review it: {link}"
+    return _record(report.supervisor_id, report, EVENT_REPORT_SUBMITTED, summary)
+
+
+def record_report_returned(report: ExpenseReport) -> Optional[WorkflowNotification]:
+    """Add a notification for the employee whose report went back to draft.
+
+    Inputs:
+        report: Reviewed :class:`app.models.ExpenseReport`; ignored unless its
+            status is ``"Draft"``.
+
+    Outputs:
+        The pending :class:`app.models.WorkflowNotification`, or ``None``.
+        The caller commits it together with the review.
+
+    External dependencies:
+        * Builds a link with :func:`flask.url_for` when a request or
+          ``SERVER_NAME`` is available.
+    """
+
+    if report.status != "Draft":
+        return None
+    summary = (
+        f"Your {report.report_month:%B %Y} expense report was returned to "
+        f"draft: {report.rejection_comment or 'see the reviewer comments.'}"
+    )
+    link = _external_url("expenses.my_reports")
+    if link:
+        summary += f" View it: {link}"
+    return _record(report.employee_id, report, EVENT_REPORT_RETURNED, summary)
+
+
+def _pending(now: datetime):
+    """Return a filter for undelivered notifications nobody holds at ``now``."""
+
+    return and_(
+        WorkflowNotification.sent_at.is_(None),
+        or_(
+            WorkflowNotification.claim_token.is_(None),
+            WorkflowNotification.claimed_at < now - NOTIFICATION_CLAIM_TIMEOUT,
+        ),
+    )
+
+
+def _digest_due(now: datetime) -> bool:
+    oldest = db.session.scalar(
+        select(func.min(WorkflowNotification.created_at)).where(_pending(now))
+    )
+    return oldest is not None and oldest <= now - _digest_interval()
+
+
+def _compose(
+    recipient: User, notifications: Sequence[WorkflowNotification], digest: bool
+) -> List[Tuple[str, str, List[WorkflowNotification]]]:
+    """Return ``(subject, body, notifications)`` for each email to queue."""
+
+    greeting = f"Hello {_display_name(recipient)},\n\n"
+    if digest:
+        lines = "\n".join(f"- {item.summary}" for item in notifications)
+        subject = f"Expense report updates: {len(notifications)} new"
+        body = f"{greeting}Here are your expense report updates:\n\n{lines}\n"
+        return [(subject, body, list(notifications))]
+    return [
+        (
+            _EVENT_SUBJECTS.get(item.event, "Expense report update"),
+            f"{greeting}{item.summary}\n",
+            [item],
+        )
+        for item in notifications
+    ]
+
+
+def send_workflow_notifications(
+    *,
+    digest: bool,
+    now: Optional[datetime] = None,
+    notification_ids: Optional[Sequence[int]] = None,
+) -> NotificationSummary:
+    """Queue email for pending workflow notifications.
+
+    Inputs:
+        digest: When ``True`` each recipient gets one email for all pending
+            events, and only once their oldest event has waited
+            ``WORKFLOW_DIGEST_INTERVAL_MINUTES``; otherwise one email per
+            event is queued for every pending row.
+        now: Current UTC time; defaults to :meth:`datetime.utcnow`.
+        notification_ids: Optional ids limiting the run to those pending
+            rows instead of every pending notification.
+
+    Outputs:
+        A :class:`NotificationSummary`. Rows are claimed with a token first,
+        so concurrent runs never queue the same event twice.
+
+    External dependencies:
+        * Calls :func:`app.services.mail_outbox.queue_email` and starts the
+          outbox worker once with
+          :func:`app.services.mail_outbox.start_outbox_worker`.
+    """
+
+    now = now or datetime.utcnow()
+    criteria = _pending(now)
+    if notification_ids is not None:
+        criteria = and_(criteria, WorkflowNotification.id.in_(notification_ids))
+    if digest:
+        due_recipients = (
+            select(WorkflowNotification.recipient_id)
+            .where(criteria)
+            .group_by(WorkflowNotification.recipient_id)
+            .having(
+                func.min(WorkflowNotification.created_at) <= now - _digest_interval()
+            )
+        )
+        criteria = and_(criteria, WorkflowNotification.recipient_id.in_(due_recipients))
+
+    token = str(uuid.uuid4())
+    db.session.execute(
+        update(WorkflowNotification)
+        .where(criteria)
+        .values(claim_token=token, claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    claimed = (
+        WorkflowNotification.query.filter_by(claim_token=token)
+        .order_by(WorkflowNotification.recipient_id, WorkflowNotification.id)
+        .all()
+    )
+
+    summary = NotificationSummary()
+    for _recipient_id, group in groupby(claimed, key=lambda item: item.recipient_id):
+        notifications = list(group)
+        recipient = notifications[0].recipient
+        for subject, body, covered in _compose(recipient, notifications, digest):
+            try:
+                email = queue_email(
+                    recipient.email,
+                    subject,
+                    body,
+                    feature=WORKFLOW_NOTIFICATION_FEATURE,
+                    dispatch=False,
+                )
+            except MailRateLimitError as exc:
+                for item in covered:
+                    item.claim_token = None
+                    item.claimed_at = None
+                summary.deferred += len(covered)
+                current_app.logger.info(
+                    "Deferred %s workflow notification(s) for user %s: %s",
+                    len(covered),
+                    recipient.id,
+                    exc,
+                )
+            else:
+                for item in covered:
+                    item.sent_at = now
+                    item.outbound_email_id = email.id
+                    item.claim_token = None
+                summary.emails += 1
+                summary.events += len(covered)
+            db.session.commit()
+
+    if summary.emails:
+        start_outbox_worker()
+    return summary
+
+
+def notify_workflow_recipients(
+    *notifications: Optional[WorkflowNotification],
+) -> None:
+    """Deliver notifications after a workflow change has been committed.
+
+    Inputs:
+        notifications: Rows returned by :func:`record_report_submitted` or
+            :func:`record_report_returned` for this change; ``None`` entries
+            are ignored.
+
+    Immediate mode queues emails for ``notifications`` only, so a request
+    never pays for other pending rows; digest mode starts
+    :data:`WORKFLOW_NOTIFICATIONS_JOB` only when a digest is overdue.
+    Failures are logged and never interrupt the workflow request.
+
+    External dependencies:
+        * Calls :func:`send_workflow_notifications` or
+          :func:`app.services.jobs.enqueue_job`.
+    """
+
+    mode = notification_mode()
+    if mode == "off":
+        return
+    try:
+        if mode == "immediate":
+            ids = [item.id for item in notifications if item is not None]
+            if ids:
+                send_workflow_notifications(digest=False, notification_ids=ids)
+        elif _digest_due(datetime.utcnow()):
+            enqueue_job(WORKFLOW_NOTIFICATIONS_JOB)
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Unable to send workflow notifications")
+
+
+@register_job(WORKFLOW_NOTIFICATIONS_JOB)
+def run_workflow_notifications_job(job, progress: ProgressCallback) -> str:
+    """Background job handler wrapping :func:`send_workflow_notifications`.
+
+    Inputs:
+        job: The :class:`app.models.BackgroundJob` being executed.
+        progress: Unused; the run is a single step.
+
+    Outputs:
+        :meth:`NotificationSummary.describe` for the run.
+
+    External dependencies:
+        * Calls :func:`send_workflow_notifications` in the configured mode.
+    """
+
+    mode = notification_mode()
+    if mode == "off":
+        return "Workflow notifications are disabled."
+    return send_workflow_notifications(digest=mode == "digest").describe()
+
+
+def register_workflow_notification_commands(app: Flask) -> None:
+    """Add the ``send-workflow-notifications`` command to ``app``'s Flask CLI.
+
+    Inputs:
+        app: Application whose :attr:`flask.Flask.cli` receives the command.
+
+    Outputs:
+        None.
+
+    External dependencies:
+        * Uses :mod:`click` for output.
+    """
+
+    @app.cli.command("send-workflow-notifications")
+    def send_workflow_notifications_command() -> None:
+        """Queue pending expense workflow notifications and due digests."""
+
+        click.echo(run_workflow_notifications_job(None, lambda *_: None))
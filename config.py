@@ -687,6 +687,21 @@ class Config:
         MAIL_DEFAULT_SENDER
     )
     MAIL_PRIVILEGED_DOMAIN = os.getenv("MAIL_PRIVILEGED_DOMAIN", "freightservices.net")
+    MAIL_SMTP_POOL_SIZE = _get_int_from_env("MAIL_SMTP_POOL_SIZE", 4)
+    MAIL_SMTP_POOL_IDLE_TIMEOUT = _get_int_from_env("MAIL_SMTP_POOL_IDLE_TIMEOUT", 60)
+    MAIL_SMTP_POOL_NOOP_AFTER = _get_int_from_env("MAIL_SMTP_POOL_NOOP_AFTER", 5)
+    MAIL_SMTP_TIMEOUT = _get_int_from_env("MAIL_SMTP_TIMEOUT", 30)
+    MAIL_OUTBOX_BATCH_SIZE = _get_int_from_env("MAIL_OUTBOX_BATCH_SIZE", 50)
+    MAIL_OUTBOX_MAX_ATTEMPTS = _get_int_from_env("MAIL_OUTBOX_MAX_ATTEMPTS", 5)
+    MAIL_OUTBOX_CLAIM_TIMEOUT_MINUTES = _get_int_from_env(
+        "MAIL_OUTBOX_CLAIM_TIMEOUT_MINUTES", 15
+    )
+    WORKFLOW_NOTIFICATION_MODE = (
+        os.getenv("WORKFLOW_NOTIFICATION_MODE", "immediate").strip().lower()
+    )
+    WORKFLOW_DIGEST_INTERVAL_MINUTES = _get_int_from_env(
+        "WORKFLOW_DIGEST_INTERVAL_MINUTES", 60
+    )
     MAIL_RATE_LIMIT_PER_USER_PER_HOUR = int(
         os.getenv("MAIL_RATE_LIMIT_PER_USER_PER_HOUR", 10)
     )
@@ -737,7 +752,24 @@ class Config:
     )
     OIDC_ALLOWED_DOMAIN = _resolve_oidc_allowed_domain()
     OIDC_END_SESSION_ENDPOINT = os.getenv("OIDC_END_SESSION_ENDPOINT")
+    EXPENSE_RECEIPT_STORAGE = os.getenv("EXPENSE_RECEIPT_STORAGE", "").strip().lower()
     EXPENSE_RECEIPT_BUCKET = os.getenv("EXPENSE_RECEIPT_BUCKET", "").strip()
+    EXPENSE_RECEIPT_LOCAL_DIR = os.getenv("EXPENSE_RECEIPT_LOCAL_DIR", "").strip()
+    EXPENSE_RECEIPT_UPLOAD_WORKERS = _get_int_from_env(
+        "EXPENSE_RECEIPT_UPLOAD_WORKERS", 4
+    )
+    EXPENSE_RECEIPT_THUMBNAIL_SIZE = _get_int_from_env(
+        "EXPENSE_RECEIPT_THUMBNAIL_SIZE", 320
+    )
+    EXPENSE_RECEIPT_PREVIEW_SIZE = _get_int_from_env(
+        "EXPENSE_RECEIPT_PREVIEW_SIZE", 1280
+    )
+    EXPENSE_IMPORT_MAX_LINES = _get_int_from_env("EXPENSE_IMPORT_MAX_LINES", 5000)
+    EXPENSE_REFERENCE_CACHE_DIR = os.getenv("EXPENSE_REFERENCE_CACHE_DIR", "").strip()
+    EXPENSE_REFERENCE_VERSION_CHECK_SECONDS = _get_int_from_env(
+        "EXPENSE_REFERENCE_VERSION_CHECK_SECONDS", 15
+    )
+    EXPENSE_DASHBOARD_PAGE_SIZE = _get_int_from_env("EXPENSE_DASHBOARD_PAGE_SIZE", 50)
     NETSUITE_SFTP_HOST = os.getenv("NETSUITE_SFTP_HOST", "").strip()
     NETSUITE_SFTP_PORT = _get_int_from_env("NETSUITE_SFTP_PORT", 22)
     NETSUITE_SFTP_USERNAME = os.getenv("NETSUITE_SFTP_USERNAME", "").strip()
@@ -752,5 +784,23 @@ class Config:
         "NETSUITE_SFTP_PRIVATE_KEY_PASSPHRASE_SECRET",
     )
     NETSUITE_SFTP_DIRECTORY = os.getenv("NETSUITE_SFTP_DIRECTORY", "/").strip()
+    BACKGROUND_JOB_EXECUTOR = os.getenv("BACKGROUND_JOB_EXECUTOR", "thread").strip()
+    BACKGROUND_JOB_WORKERS = _get_int_from_env("BACKGROUND_JOB_WORKERS", 2)
+    BACKGROUND_JOB_STALE_MINUTES = _get_int_from_env("BACKGROUND_JOB_STALE_MINUTES", 30)
+    CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "").strip()
+    CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "").strip()
+    NETSUITE_DISPATCH_MAX_REPORTS_PER_BATCH = _get_int_from_env(
+        "NETSUITE_DISPATCH_MAX_REPORTS_PER_BATCH", 200
+    )
+    NETSUITE_DISPATCH_MAX_LINES_PER_BATCH = _get_int_from_env(
+        "NETSUITE_DISPATCH_MAX_LINES_PER_BATCH", 2000
+    )
+    NETSUITE_DISPATCH_CLAIM_TIMEOUT_MINUTES = _get_int_from_env(
+        "NETSUITE_DISPATCH_CLAIM_TIMEOUT_MINUTES", 30
+    )
+    EMAIL_DISPATCH_LOG_RETENTION_DAYS = _get_int_from_env(
+        "EMAIL_DISPATCH_LOG_RETENTION_DAYS", 30
+    )
+    DATA_RETENTION_BATCH_SIZE = _get_int_from_env("DATA_RETENTION_BATCH_SIZE", 1000)
 
     CONFIG_ERRORS = list(_CONFIG_ERRORS)
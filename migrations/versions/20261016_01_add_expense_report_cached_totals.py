@@ -0,0 +1,84 @@
+"""Add cached line totals to expense reports.
+
+Revision ID: 20261016_01
+Revises: 20260310_01
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_01"
+down_revision = "20260310_01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add cached total columns, backfill them, and index status/amount."""
+
+    op.add_column(
+        "expense_reports",
+        sa.Column("line_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "expense_reports",
+        sa.Column(
+            "total_amount",
+            sa.Numeric(12, 2),
+            nullable=False,
+            server_default="0",
+        ),
+    )
+    op.add_column(
+        "expense_reports",
+        sa.Column(
+            "approved_amount",
+            sa.Numeric(12, 2),
+            nullable=False,
+            server_default="0",
+        ),
+    )
+
+    op.execute(
+        sa.text(
+            """
+            UPDATE expense_reports SET
+                line_count = (
+                    SELECT COUNT(*) FROM expense_lines
+                    WHERE expense_lines.expense_report_id = expense_reports.id
+                ),
+                total_amount = (
+                    SELECT COALESCE(SUM(expense_lines.amount), 0)
+                    FROM expense_lines
+                    WHERE expense_lines.expense_report_id = expense_reports.id
+                ),
+                approved_amount = (
+                    SELECT COALESCE(SUM(expense_lines.amount), 0)
+                    FROM expense_lines
+                    WHERE expense_lines.expense_report_id = expense_reports.id
+                      AND expense_lines.review_status = 'Approved'
+                )
+            """
+        )
+    )
+
+    op.create_index(
+        "ix_expense_reports_status_total_amount",
+        "expense_reports",
+        ["status", "total_amount"],
+    )
+
+
+def downgrade() -> None:
+    """Drop the cached total columns and their index."""
+
+    op.drop_index(
+        "ix_expense_reports_status_total_amount", table_name="expense_reports"
+    )
+    op.drop_column("expense_reports", "approved_amount")
+    op.drop_column("expense_reports", "total_amount")
+    op.drop_column("expense_reports", "line_count")
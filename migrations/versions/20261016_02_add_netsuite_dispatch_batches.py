@@ -0,0 +1,84 @@
+"""Add NetSuite dispatch batch manifests.
+
+Revision ID: 20261016_02
+Revises: 20261016_01
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_02"
+down_revision = "20261016_01"
+branch_labels = None
+depends_on = None
+
+DISPATCH_STATUS_ENUM = sa.Enum(
+    "Pending",
+    "Sent",
+    "Failed",
+    name="netsuite_dispatch_status",
+)
+
+
+def upgrade() -> None:
+    """Create the manifest table and link expense reports to batches."""
+
+    op.create_table(
+        "netsuite_dispatch_batches",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("filename", sa.String(length=255), nullable=False, unique=True),
+        sa.Column(
+            "status",
+            DISPATCH_STATUS_ENUM,
+            nullable=False,
+            server_default="Pending",
+        ),
+        sa.Column("report_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("line_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("byte_size", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("checksum", sa.String(length=64), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_netsuite_dispatch_batches_status",
+        "netsuite_dispatch_batches",
+        ["status"],
+    )
+
+    with op.batch_alter_table("expense_reports") as batch_op:
+        batch_op.add_column(sa.Column("netsuite_batch_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_expense_reports_netsuite_batch_id",
+            "netsuite_dispatch_batches",
+            ["netsuite_batch_id"],
+            ["id"],
+        )
+        batch_op.create_index(
+            "ix_expense_reports_netsuite_batch_id", ["netsuite_batch_id"]
+        )
+
+
+def downgrade() -> None:
+    """Drop the report batch link and the manifest table."""
+
+    with op.batch_alter_table("expense_reports") as batch_op:
+        batch_op.drop_index("ix_expense_reports_netsuite_batch_id")
+        batch_op.drop_constraint(
+            "fk_expense_reports_netsuite_batch_id", type_="foreignkey"
+        )
+        batch_op.drop_column("netsuite_batch_id")
+
+    op.drop_index(
+        "ix_netsuite_dispatch_batches_status",
+        table_name="netsuite_dispatch_batches",
+    )
+    op.drop_table("netsuite_dispatch_batches")
+    DISPATCH_STATUS_ENUM.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,64 @@
+"""Add the background job queue table.
+
+Revision ID: 20261016_03
+Revises: 20261016_02
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_03"
+down_revision = "20261016_02"
+branch_labels = None
+depends_on = None
+
+JOB_STATUS_ENUM = sa.Enum(
+    "Queued",
+    "Running",
+    "Succeeded",
+    "Failed",
+    name="background_job_status",
+)
+
+
+def upgrade() -> None:
+    """Create ``background_jobs`` with lookup indexes on kind and status."""
+
+    op.create_table(
+        "background_jobs",
+        sa.Column("id", sa.String(length=36), primary_key=True),
+        sa.Column("kind", sa.String(length=64), nullable=False),
+        sa.Column(
+            "status",
+            JOB_STATUS_ENUM,
+            nullable=False,
+            server_default="Queued",
+        ),
+        sa.Column("progress_current", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("progress_total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("message", sa.Text(), nullable=True),
+        sa.Column(
+            "created_by_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id"),
+            nullable=True,
+        ),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_background_jobs_kind", "background_jobs", ["kind"])
+    op.create_index("ix_background_jobs_status", "background_jobs", ["status"])
+
+
+def downgrade() -> None:
+    """Drop ``background_jobs`` and its status enum."""
+
+    op.drop_index("ix_background_jobs_status", table_name="background_jobs")
+    op.drop_index("ix_background_jobs_kind", table_name="background_jobs")
+    op.drop_table("background_jobs")
+    JOB_STATUS_ENUM.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,54 @@
+"""Add content-addressed receipt blobs.
+
+Revision ID: 20261016_04
+Revises: 20261016_03
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_04"
+down_revision = "20261016_03"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create ``receipt_blobs`` and link expense lines to them by digest."""
+
+    op.create_table(
+        "receipt_blobs",
+        sa.Column("digest", sa.String(length=64), primary_key=True),
+        sa.Column("storage_key", sa.String(length=512), nullable=False),
+        sa.Column("url", sa.String(length=1024), nullable=False),
+        sa.Column("content_type", sa.String(length=255), nullable=True),
+        sa.Column("byte_size", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+
+    with op.batch_alter_table("expense_lines") as batch_op:
+        batch_op.add_column(
+            sa.Column("receipt_digest", sa.String(length=64), nullable=True)
+        )
+        batch_op.create_foreign_key(
+            "fk_expense_lines_receipt_digest",
+            "receipt_blobs",
+            ["receipt_digest"],
+            ["digest"],
+        )
+        batch_op.create_index("ix_expense_lines_receipt_digest", ["receipt_digest"])
+
+
+def downgrade() -> None:
+    """Drop the line digest link and the blob table."""
+
+    with op.batch_alter_table("expense_lines") as batch_op:
+        batch_op.drop_index("ix_expense_lines_receipt_digest")
+        batch_op.drop_constraint("fk_expense_lines_receipt_digest", type_="foreignkey")
+        batch_op.drop_column("receipt_digest")
+
+    op.drop_table("receipt_blobs")
@@ -0,0 +1,60 @@
+"""Add receipt thumbnail and preview columns.
+
+Revision ID: 20261016_05
+Revises: 20261016_04
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_05"
+down_revision = "20261016_04"
+branch_labels = None
+depends_on = None
+
+DERIVATIVE_STATUS_ENUM = sa.Enum(
+    "Pending",
+    "Ready",
+    "Skipped",
+    "Failed",
+    name="receipt_derivative_status",
+)
+
+
+def upgrade() -> None:
+    """Add derivative URLs and the status column the generator job polls."""
+
+    DERIVATIVE_STATUS_ENUM.create(op.get_bind(), checkfirst=True)
+    with op.batch_alter_table("receipt_blobs") as batch_op:
+        batch_op.add_column(
+            sa.Column("thumbnail_url", sa.String(length=1024), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column("preview_url", sa.String(length=1024), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column(
+                "derivative_status",
+                DERIVATIVE_STATUS_ENUM,
+                nullable=False,
+                server_default="Pending",
+            )
+        )
+        batch_op.create_index(
+            "ix_receipt_blobs_derivative_status", ["derivative_status"]
+        )
+
+
+def downgrade() -> None:
+    """Drop the derivative columns and their status enum."""
+
+    with op.batch_alter_table("receipt_blobs") as batch_op:
+        batch_op.drop_index("ix_receipt_blobs_derivative_status")
+        batch_op.drop_column("derivative_status")
+        batch_op.drop_column("preview_url")
+        batch_op.drop_column("thumbnail_url")
+    DERIVATIVE_STATUS_ENUM.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,46 @@
+"""Add uploaded expense reference workbook versions.
+
+Revision ID: 20261016_06
+Revises: 20261016_05
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_06"
+down_revision = "20261016_05"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create ``expense_reference_versions``."""
+
+    op.create_table(
+        "expense_reference_versions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("digest", sa.String(length=64), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=True),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("gl_account_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "expense_type_count", sa.Integer(), nullable=False, server_default="0"
+        ),
+        sa.Column(
+            "uploaded_by_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id"),
+            nullable=True,
+        ),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Drop ``expense_reference_versions``."""
+
+    op.drop_table("expense_reference_versions")
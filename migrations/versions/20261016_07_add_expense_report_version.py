@@ -0,0 +1,33 @@
+"""Add an optimistic-lock version counter to expense reports.
+
+Revision ID: 20261016_07
+Revises: 20261016_06
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_07"
+down_revision = "20261016_06"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add ``expense_reports.version_id`` starting every report at ``1``."""
+
+    with op.batch_alter_table("expense_reports") as batch_op:
+        batch_op.add_column(
+            sa.Column("version_id", sa.Integer(), nullable=False, server_default="1")
+        )
+
+
+def downgrade() -> None:
+    """Drop ``expense_reports.version_id``."""
+
+    with op.batch_alter_table("expense_reports") as batch_op:
+        batch_op.drop_column("version_id")
@@ -0,0 +1,53 @@
+"""Add the ``Uploading`` dispatch claim state.
+
+Revision ID: 20261016_08
+Revises: 20261016_07
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_08"
+down_revision = "20261016_07"
+branch_labels = None
+depends_on = None
+
+UPLOADING_ENUMS = ("expense_report_status", "netsuite_dispatch_status")
+
+
+def upgrade() -> None:
+    """Allow ``Uploading`` statuses and record when batches are claimed."""
+
+    if op.get_bind().dialect.name == "postgresql":
+        # ALTER TYPE ... ADD VALUE cannot run inside a transaction block.
+        with op.get_context().autocommit_block():
+            for enum_name in UPLOADING_ENUMS:
+                op.execute(
+                    f"ALTER TYPE {enum_name} ADD VALUE IF NOT EXISTS 'Uploading'"
+                )
+
+    with op.batch_alter_table("netsuite_dispatch_batches") as batch_op:
+        batch_op.add_column(sa.Column("claimed_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Release in-flight claims and drop ``claimed_at``.
+
+    PostgreSQL cannot drop enum values, so ``Uploading`` stays in the types
+    but is no longer used.
+    """
+
+    op.execute(
+        "UPDATE expense_reports SET status = 'Pending Upload' "
+        "WHERE status = 'Uploading'"
+    )
+    op.execute(
+        "UPDATE netsuite_dispatch_batches SET status = 'Failed' "
+        "WHERE status = 'Uploading'"
+    )
+    with op.batch_alter_table("netsuite_dispatch_batches") as batch_op:
+        batch_op.drop_column("claimed_at")
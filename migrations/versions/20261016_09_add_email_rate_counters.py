@@ -0,0 +1,116 @@
+"""Add per-minute email rate counters and dispatch log indexes.
+
+Revision ID: 20261016_09
+Revises: 20261016_08
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_09"
+down_revision = "20261016_08"
+branch_labels = None
+depends_on = None
+
+
+def _backfill_counters(counters: sa.Table) -> None:
+    """Seed counters from the last day of ``email_dispatch_log``.
+
+    Limits look back at most 24 hours, so older log rows are not needed.
+    """
+
+    log = sa.table(
+        "email_dispatch_log",
+        sa.column("user_id", sa.Integer),
+        sa.column("feature", sa.String),
+        sa.column("recipient", sa.String),
+        sa.column("created_at", sa.DateTime),
+    )
+    since = datetime.utcnow() - timedelta(days=1)
+    rows = op.get_bind().execute(
+        sa.select(
+            log.c.user_id, log.c.feature, log.c.recipient, log.c.created_at
+        ).where(log.c.created_at >= since)
+    )
+    buckets: Counter = Counter()
+    for user_id, feature, recipient, created_at in rows:
+        bucket = created_at.replace(second=0, microsecond=0)
+        buckets[("feature", feature, "", bucket)] += 1
+        buckets[("recipient", feature, recipient, bucket)] += 1
+        if user_id is not None:
+            buckets[("user", feature, str(user_id), bucket)] += 1
+    if buckets:
+        op.bulk_insert(
+            counters,
+            [
+                {
+                    "scope": scope,
+                    "feature": feature,
+                    "subject": subject,
+                    "bucket_start": bucket,
+                    "count": count,
+                }
+                for (scope, feature, subject, bucket), count in buckets.items()
+            ],
+        )
+
+
+def upgrade() -> None:
+    """Create ``email_rate_counters`` and index the dispatch log lookups."""
+
+    counters = op.create_table(
+        "email_rate_counters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("scope", sa.String(length=20), nullable=False),
+        sa.Column("feature", sa.String(length=50), nullable=False),
+        sa.Column("subject", sa.String(length=255), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint(
+            "scope",
+            "feature",
+            "subject",
+            "bucket_start",
+            name="uq_email_rate_counters_bucket",
+        ),
+    )
+    op.create_index(
+        "ix_email_rate_counters_bucket_start",
+        "email_rate_counters",
+        ["bucket_start"],
+    )
+    op.create_index(
+        "ix_email_dispatch_log_feature_user_created",
+        "email_dispatch_log",
+        ["feature", "user_id", "created_at"],
+    )
+    op.create_index(
+        "ix_email_dispatch_log_feature_recipient_created",
+        "email_dispatch_log",
+        ["feature", "recipient", "created_at"],
+    )
+    _backfill_counters(counters)
+
+
+def downgrade() -> None:
+    """Drop the counters table and the dispatch log indexes."""
+
+    op.drop_index(
+        "ix_email_dispatch_log_feature_recipient_created",
+        table_name="email_dispatch_log",
+    )
+    op.drop_index(
+        "ix_email_dispatch_log_feature_user_created",
+        table_name="email_dispatch_log",
+    )
+    op.drop_index(
+        "ix_email_rate_counters_bucket_start", table_name="email_rate_counters"
+    )
+    op.drop_table("email_rate_counters")
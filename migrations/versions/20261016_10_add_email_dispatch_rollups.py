@@ -0,0 +1,53 @@
+"""Add daily email dispatch rollups and retention indexes.
+
+Revision ID: 20261016_10
+Revises: 20261016_09
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_10"
+down_revision = "20261016_09"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create ``email_dispatch_daily_rollups`` and index prune cutoffs."""
+
+    op.create_table(
+        "email_dispatch_daily_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("feature", sa.String(length=50), nullable=False),
+        sa.Column("sent_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("recipient_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("user_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint(
+            "day", "feature", name="uq_email_dispatch_daily_rollups_day_feature"
+        ),
+    )
+    op.create_index(
+        "ix_email_dispatch_log_created_at", "email_dispatch_log", ["created_at"]
+    )
+    op.create_index(
+        "ix_password_reset_tokens_created_at",
+        "password_reset_tokens",
+        ["created_at"],
+    )
+
+
+def downgrade() -> None:
+    """Drop the rollup table and the retention indexes."""
+
+    op.drop_index(
+        "ix_password_reset_tokens_created_at", table_name="password_reset_tokens"
+    )
+    op.drop_index("ix_email_dispatch_log_created_at", table_name="email_dispatch_log")
+    op.drop_table("email_dispatch_daily_rollups")
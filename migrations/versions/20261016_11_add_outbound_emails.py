@@ -0,0 +1,71 @@
+"""Add the persistent outbound email queue.
+
+Revision ID: 20261016_11
+Revises: 20261016_10
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_11"
+down_revision = "20261016_10"
+branch_labels = None
+depends_on = None
+
+OUTBOUND_STATUS_ENUM = sa.Enum(
+    "Queued",
+    "Sending",
+    "Sent",
+    "Failed",
+    name="outbound_email_status",
+)
+
+
+def upgrade() -> None:
+    """Create ``outbound_emails`` with indexes for the worker's claims."""
+
+    op.create_table(
+        "outbound_emails",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("feature", sa.String(length=50), nullable=False),
+        sa.Column("recipient", sa.String(length=255), nullable=False),
+        sa.Column("subject", sa.String(length=255), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column(
+            "status",
+            OUTBOUND_STATUS_ENUM,
+            nullable=False,
+            server_default="Queued",
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("claim_token", sa.String(length=36), nullable=True),
+        sa.Column("claimed_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "ix_outbound_emails_status_next_attempt",
+        "outbound_emails",
+        ["status", "next_attempt_at"],
+    )
+    op.create_index(
+        "ix_outbound_emails_claim_token", "outbound_emails", ["claim_token"]
+    )
+
+
+def downgrade() -> None:
+    """Drop the outbound email queue."""
+
+    op.drop_index("ix_outbound_emails_claim_token", table_name="outbound_emails")
+    op.drop_index(
+        "ix_outbound_emails_status_next_attempt", table_name="outbound_emails"
+    )
+    op.drop_table("outbound_emails")
+    OUTBOUND_STATUS_ENUM.drop(op.get_bind(), checkfirst=True)
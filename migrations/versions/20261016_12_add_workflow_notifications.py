@@ -0,0 +1,61 @@
+"""Add pending expense workflow notifications.
+
+Revision ID: 20261016_12
+Revises: 20261016_11
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_12"
+down_revision = "20261016_11"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create ``workflow_notifications`` indexed for pending-row scans."""
+
+    op.create_table(
+        "workflow_notifications",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "recipient_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False
+        ),
+        sa.Column(
+            "report_id",
+            sa.Integer(),
+            sa.ForeignKey("expense_reports.id"),
+            nullable=True,
+        ),
+        sa.Column("event", sa.String(length=50), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.Column("claim_token", sa.String(length=36), nullable=True),
+        sa.Column("claimed_at", sa.DateTime(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "outbound_email_id",
+            sa.Integer(),
+            sa.ForeignKey("outbound_emails.id"),
+            nullable=True,
+        ),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_workflow_notifications_pending",
+        "workflow_notifications",
+        ["sent_at", "recipient_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    """Drop the workflow notification table."""
+
+    op.drop_index(
+        "ix_workflow_notifications_pending", table_name="workflow_notifications"
+    )
+    op.drop_table("workflow_notifications")
@@ -0,0 +1,31 @@
+"""Add a heartbeat timestamp to background jobs.
+
+Revision ID: 20261016_13
+Revises: 20261016_12
+Create Date: 2026-10-16
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261016_13"
+down_revision = "20261016_12"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add ``background_jobs.heartbeat_at``."""
+
+    with op.batch_alter_table("background_jobs") as batch_op:
+        batch_op.add_column(sa.Column("heartbeat_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Drop ``background_jobs.heartbeat_at``."""
+
+    with op.batch_alter_table("background_jobs") as batch_op:
+        batch_op.drop_column("heartbeat_at")
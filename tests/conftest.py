@@ -1,6 +1,154 @@
 from pathlib import Path
+from types import SimpleNamespace
 import sys
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+class TestConfig:
+    """Minimal Flask configuration backed by an in-memory SQLite database.
+
+    Inputs:
+        None. Flask reads class attributes when ``app.create_app`` calls
+        ``Flask.config.from_object``.
+
+    Outputs:
+        Configuration values that keep tests isolated with an in-memory SQLite
+        database and disable startup checks that depend on external services.
+
+    External dependencies:
+        Used by :func:`app.create_app` through the :func:`make_app` fixture.
+    """
+
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    STARTUP_DB_CHECKS = False
+
+
+@pytest.fixture()
+def app_config():
+    """Return configuration overrides applied on top of :class:`TestConfig`.
+
+    Inputs:
+        None. Test modules override this fixture to set the keys they need.
+
+    Outputs:
+        Dictionary of Flask configuration keys and values; empty by default.
+
+    External dependencies:
+        None.
+    """
+
+    return {}
+
+
+@pytest.fixture()
+def make_app(app_config):
+    """Return a factory building apps with tables created and context pushed.
+
+    Inputs:
+        app_config: Module-level overrides from the :func:`app_config` fixture.
+
+    Outputs:
+        Callable accepting further keyword overrides and returning a
+        :class:`flask.Flask` app whose application context stays pushed until
+        the test finishes. The ``_setup_failed`` guard is removed so requests
+        reach the routes under test.
+
+    External dependencies:
+        * Calls :func:`app.create_app`.
+        * Creates tables with :meth:`app.models.db.create_all`.
+    """
+
+    from app import create_app
+    from app.models import db
+
+    contexts = []
+
+    def _build(**overrides):
+        config = type("TestConfig", (TestConfig,), {**app_config, **overrides})
+        app = create_app(config)
+        context = app.app_context()
+        context.push()
+        contexts.append(context)
+        db.create_all()
+        app.before_request_funcs[None] = [
+            func
+            for func in app.before_request_funcs.get(None, [])
+            if getattr(func, "__name__", "") != "_setup_failed"
+        ]
+        return app
+
+    yield _build
+    for context in reversed(contexts):
+        context.pop()
+
+
+@pytest.fixture()
+def flask_app(make_app):
+    """Return an app built from :class:`TestConfig` and :func:`app_config`.
+
+    Inputs:
+        make_app: Factory fixture from this module.
+
+    Outputs:
+        The :class:`flask.Flask` app; its application context is active for
+        the duration of the test.
+
+    External dependencies:
+        None beyond :func:`make_app`.
+    """
+
+    return make_app()
+
+
+@pytest.fixture()
+def seeded_users(flask_app):
+    """Seed an approved employee, supervisor and super administrator.
+
+    Inputs:
+        flask_app: Application fixture whose database receives the users.
+
+    Outputs:
+        :class:`types.SimpleNamespace` with ``employee``, ``supervisor`` and
+        ``admin`` :class:`app.models.User` rows
+        (``employee@example.com``, ``supervisor@example.com`` and
+        ``admin@example.com``).
+
+    External dependencies:
+        Writes rows through :data:`app.models.db.session`.
+    """
+
+    from app.models import User, db
+
+    users = SimpleNamespace(
+        employee=User(
+            email="employee@example.com",
+            password_hash="x",
+            role="employee",
+            employee_approved=True,
+        ),
+        supervisor=User(
+            email="supervisor@example.com",
+            password_hash="x",
+            role="supervisor",
+            employee_approved=True,
+        ),
+        admin=User(
+            email="admin@example.com",
+            password_hash="x",
+            role="super_admin",
+            employee_approved=True,
+            is_admin=True,
+        ),
+    )
+    db.session.add_all([users.employee, users.supervisor, users.admin])
+    db.session.commit()
+    return users
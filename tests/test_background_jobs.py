@@ -0,0 +1,246 @@
+"""Tests for the background job queue and the queued NetSuite dispatch."""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import BackgroundJob, db
+import app.services.jobs as jobs
+import app.services.netsuite_dispatch as netsuite_dispatch
+
+
+@pytest.fixture()
+def app_config():
+    """Run background jobs inline so tests observe their final state.
+
+    Inputs:
+        None.
+
+    Outputs:
+        Overrides for the shared ``TestConfig`` in ``tests/conftest.py``.
+
+    External dependencies:
+        None.
+    """
+
+    return {"BACKGROUND_JOB_EXECUTOR": "inline"}
+
+
+@pytest.fixture()
+def job_app(flask_app, seeded_users):
+    """Return the shared app and the seeded super administrator's id.
+
+    Inputs:
+        flask_app: Shared application fixture.
+        seeded_users: Users seeded by ``tests/conftest.py``.
+
+    Outputs:
+        ``(app, admin_id)``.
+
+    External dependencies:
+        None.
+    """
+
+    return flask_app, seeded_users.admin.id
+
+
+def test_inline_job_records_progress_and_result(job_app) -> None:
+    """Ensure handlers run, report progress, and store their message.
+
+    Inputs:
+        job_app: Shared app and seeded super administrator id.
+
+    Outputs:
+        None. Asserts the job succeeds with ``3/3`` progress, its handler message
+        and start and finish timestamps.
+
+    External dependencies:
+        Calls :func:`app.services.jobs.register_job` and
+        :func:`app.services.jobs.enqueue_job` with the inline executor.
+    """
+
+    @jobs.register_job("test_counting")
+    def _counting(job, progress):
+        for step in range(1, 4):
+            progress(step, 3)
+        return "counted"
+
+    job = jobs.enqueue_job("test_counting")
+
+    assert job.status == "Succeeded"
+    assert (job.progress_current, job.progress_total) == (3, 3)
+    assert job.message == "counted"
+    assert job.started_at is not None and job.finished_at is not None
+
+
+def test_failed_job_records_error(job_app) -> None:
+    """Ensure exceptions mark the job failed with the error text.
+
+    Inputs:
+        job_app: Shared app and seeded super administrator id.
+
+    Outputs:
+        None. Asserts the job is ``Failed`` with the exception text as message.
+
+    External dependencies:
+        Calls :func:`app.services.jobs.enqueue_job` with the inline executor.
+    """
+
+    @jobs.register_job("test_failing")
+    def _failing(job, progress):
+        raise RuntimeError("remote host unreachable")
+
+    job = jobs.enqueue_job("test_failing")
+
+    assert job.status == "Failed"
+    assert job.message == "remote host unreachable"
+
+
+def test_abandoned_job_is_replaced(job_app) -> None:
+    """Ensure a running job that stopped reporting no longer blocks its kind.
+
+    Inputs:
+        job_app: Shared app and seeded super administrator id.
+
+    Outputs:
+        None. Asserts a ``Running`` job without a recent heartbeat is marked
+        ``Failed`` and a fresh job of the same kind runs.
+
+    External dependencies:
+        Calls :func:`app.services.jobs.active_job` and
+        :func:`app.services.jobs.enqueue_job`.
+    """
+
+    @jobs.register_job("test_replaced")
+    def _replaced(job, progress):
+        return "fresh run"
+
+    stale_start = datetime.utcnow() - timedelta(hours=2)
+    stale = BackgroundJob(
+        kind="test_replaced",
+        status="Running",
+        created_at=stale_start,
+        started_at=stale_start,
+        heartbeat_at=stale_start,
+    )
+    db.session.add(stale)
+    db.session.commit()
+    assert jobs.active_job("test_replaced") is None
+
+    job = jobs.enqueue_job("test_replaced")
+
+    assert job.id != stale.id
+    assert job.message == "fresh run"
+    db.session.refresh(stale)
+    assert stale.status == "Failed"
+    assert stale.message.startswith("Abandoned after 30 minutes")
+
+
+def test_run_job_skips_jobs_already_claimed(job_app) -> None:
+    """Ensure a second delivery of the same job does not run the handler.
+
+    Inputs:
+        job_app: Shared app and seeded super administrator id.
+
+    Outputs:
+        None. Asserts the handler ran exactly once.
+
+    External dependencies:
+        Calls :func:`app.services.jobs.run_job` on an already finished job.
+    """
+
+    calls = []
+
+    @jobs.register_job("test_claimed")
+    def _claimed(job, progress):
+        calls.append(job.id)
+        return "ran"
+
+    job = jobs.enqueue_job("test_claimed")
+    jobs.run_job(job.id)
+
+    assert calls == [job.id]
+    assert job.status == "Succeeded"
+
+
+def test_threaded_executor_runs_job_off_request_thread(job_app) -> None:
+    """Ensure the thread executor completes jobs without blocking enqueue.
+
+    Inputs:
+        job_app: Shared app and seeded super administrator id.
+
+    Outputs:
+        None. Asserts the job reaches ``Succeeded`` within five seconds.
+
+    External dependencies:
+        Switches ``BACKGROUND_JOB_EXECUTOR`` to ``thread`` and polls
+        :class:`app.models.BackgroundJob`.
+    """
+
+    app, _admin_id = job_app
+    app.config["BACKGROUND_JOB_EXECUTOR"] = "thread"
+
+    @jobs.register_job("test_threaded")
+    def _threaded(job, progress):
+        return "done in background"
+
+    job_id = jobs.enqueue_job("test_threaded").id
+
+    deadline = time.monotonic() + 5
+    status = None
+    while time.monotonic() < deadline:
+        db.session.expire_all()
+        status = db.session.get(BackgroundJob, job_id).status
+        if status in ("Succeeded", "Failed"):
+            break
+        time.sleep(0.05)
+    assert status == "Succeeded"
+
+
+def test_dispatch_route_queues_job_and_exposes_status(job_app, monkeypatch) -> None:
+    """Ensure the dispatch POST enqueues a job readable from the status API.
+
+    Inputs:
+        job_app: Shared app and seeded super administrator id.
+        monkeypatch: Replaces the NetSuite dispatch with a fixed summary.
+
+    Outputs:
+        None. Asserts the dispatch POST redirects, the status endpoint returns
+        the finished job (or 404 for unknown ids) and the dashboard wires its
+        polling script to that endpoint.
+
+    External dependencies:
+        * Patches
+          :func:`app.services.netsuite_dispatch.dispatch_pending_reports`.
+        * Requests ``/expenses/dispatch``, ``/expenses/jobs/<id>`` and
+          ``/expenses/supervisor``.
+    """
+
+    app, admin_id = job_app
+    monkeypatch.setattr(
+        netsuite_dispatch,
+        "dispatch_pending_reports",
+        lambda progress=None: netsuite_dispatch.DispatchSummary(
+            batches_sent=1, reports_completed=4, batches_remaining=0
+        ),
+    )
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(admin_id)
+        session["_fresh"] = True
+
+    response = client.post("/expenses/dispatch")
+    assert response.status_code == 302
+
+    job = BackgroundJob.query.filter_by(kind="netsuite_dispatch").one()
+    status = client.get(f"/expenses/jobs/{job.id}")
+    assert status.status_code == 200
+    assert status.json["status"] == "Succeeded"
+    assert "Dispatched 4 reports" in status.json["message"]
+    assert client.get("/expenses/jobs/missing").status_code == 404
+
+    dashboard = client.get("/expenses/supervisor").get_data(as_text=True)
+    assert f'data-status-url="/expenses/jobs/{job.id}"' in dashboard
+    assert "statusElement.dataset.statusUrl" in dashboard
@@ -0,0 +1,243 @@
+"""Tests for set-based bulk review of expense report lines."""
+
+import re
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.models import ExpenseLine, ExpenseReport, db
+from app.services.expense_workflow import apply_bulk_review_action
+
+
+@pytest.fixture()
+def review_app(flask_app, seeded_users):
+    """Return ``(app, supervisor_id, report_id)`` for a 300-line report.
+
+    Inputs:
+        flask_app: Shared application fixture.
+        seeded_users: Users seeded by ``tests/conftest.py``.
+
+    Outputs:
+        The app, the reviewing supervisor's id and the Pending Review report.
+
+    External dependencies:
+        Writes rows through :data:`app.models.db.session`.
+    """
+
+    employee, supervisor = seeded_users.employee, seeded_users.supervisor
+    report = ExpenseReport(
+        employee_id=employee.id,
+        supervisor_id=supervisor.id,
+        report_month=date(2026, 9, 1),
+        status="Pending Review",
+    )
+    report.lines = [
+        ExpenseLine(
+            date=date(2026, 9, 1 + index % 28),
+            expense_type="Travel",
+            gl_account="6100",
+            vendor="Vendor",
+            amount=Decimal("2.00"),
+        )
+        for index in range(300)
+    ]
+    db.session.add(report)
+    db.session.commit()
+    return flask_app, supervisor.id, report.id
+
+
+def _status_counts(report_id):
+    rows = (
+        db.session.query(ExpenseLine.review_status, db.func.count())
+        .filter(ExpenseLine.expense_report_id == report_id)
+        .group_by(ExpenseLine.review_status)
+        .all()
+    )
+    return dict(rows)
+
+
+def test_approve_all_updates_every_line_and_totals(review_app) -> None:
+    """Ensure one bulk approval queues the report for upload.
+
+    Inputs:
+        review_app: App, supervisor id and a 300-line Pending Review report.
+
+    Outputs:
+        None. Asserts every line is approved, the report moves to
+        ``Pending Upload`` and its cached totals match.
+
+    External dependencies:
+        Calls :func:`app.services.expense_workflow.apply_bulk_review_action`.
+    """
+
+    _app, _supervisor_id, report_id = review_app
+    report = db.session.get(ExpenseReport, report_id)
+
+    message, category = apply_bulk_review_action(report, action="approve_all")
+    db.session.commit()
+
+    assert category == "success"
+    assert "queued for NetSuite upload" in message
+    assert _status_counts(report_id) == {"Approved": 300}
+    assert (report.status, report.line_count) == ("Pending Upload", 300)
+    assert report.approved_amount == report.total_amount == Decimal("600.00")
+
+
+def test_bulk_actions_validate_comment_and_line_ownership(review_app) -> None:
+    """Ensure rejections need a comment and only this report's lines.
+
+    Inputs:
+        review_app: App, supervisor id and a 300-line Pending Review report.
+
+    Outputs:
+        None. Asserts :class:`ValueError` for a rejection without a comment,
+        foreign line ids and unknown actions, with no line changed.
+
+    External dependencies:
+        Calls :func:`app.services.expense_workflow.apply_bulk_review_action`.
+    """
+
+    _app, _supervisor_id, report_id = review_app
+    report = db.session.get(ExpenseReport, report_id)
+
+    with pytest.raises(ValueError, match="rejection comment"):
+        apply_bulk_review_action(report, action="reject_all")
+    with pytest.raises(ValueError, match="do not belong"):
+        apply_bulk_review_action(
+            report, action="approve_except", line_ids=[1, 9999], comment="No"
+        )
+    with pytest.raises(ValueError, match="valid bulk review action"):
+        apply_bulk_review_action(report, action="shrug")
+    assert _status_counts(report_id) == {"Pending": 300}
+
+
+def test_review_route_approves_all_except_selected_lines(review_app) -> None:
+    """Ensure the review form's bulk button rejects only the checked lines.
+
+    Inputs:
+        review_app: App, supervisor id and a 300-line Pending Review report.
+
+    Outputs:
+        None. Asserts only the selected lines are rejected with the bulk
+        comment and the report returns to ``Draft``.
+
+    External dependencies:
+        Posts to ``/expenses/supervisor/report/<id>``.
+    """
+
+    app, supervisor_id, report_id = review_app
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(supervisor_id)
+        session["_fresh"] = True
+
+    response = client.post(
+        f"/expenses/supervisor/report/{report_id}",
+        data={
+            "bulk_action": "approve_except",
+            "selected_line": ["3", "4"],
+            "bulk_comment": "Duplicate mileage claim",
+        },
+    )
+
+    assert response.status_code == 302
+    assert _status_counts(report_id) == {"Approved": 298, "Rejected": 2}
+    rejected = ExpenseLine.query.filter_by(review_status="Rejected").all()
+    assert {line.review_comment for line in rejected} == {"Duplicate mileage claim"}
+    report = db.session.get(ExpenseReport, report_id)
+    assert report.status == "Draft"
+    assert report.approved_amount == Decimal("596.00")
+
+
+def test_review_route_refuses_reports_not_pending_review(review_app) -> None:
+    """Ensure a report that already left review cannot be reviewed again.
+
+    Inputs:
+        review_app: App, supervisor id and a 300-line Pending Review report.
+
+    Outputs:
+        None. Asserts the POST redirects to the dashboard and leaves the report
+        and its lines unchanged.
+
+    External dependencies:
+        Posts to ``/expenses/supervisor/report/<id>``.
+    """
+
+    app, supervisor_id, report_id = review_app
+    report = db.session.get(ExpenseReport, report_id)
+    report.status = "Pending Upload"
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(supervisor_id)
+        session["_fresh"] = True
+
+    response = client.post(
+        f"/expenses/supervisor/report/{report_id}",
+        data={"bulk_action": "reject_all", "bulk_comment": "Too late"},
+    )
+
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith("/expenses/supervisor")
+    assert _status_counts(report_id) == {"Pending": 300}
+    db.session.refresh(report)
+    assert report.status == "Pending Upload"
+
+
+@pytest.mark.parametrize("admin_route", [False, True])
+def test_bulk_review_routes_do_not_load_lines(
+    review_app, seeded_users, admin_route
+) -> None:
+    """Ensure bulk review issues a fixed set of queries and loads no lines.
+
+    Inputs:
+        review_app: App, supervisor id and a 300-line Pending Review report.
+        seeded_users: Users seeded by ``tests/conftest.py``.
+        admin_route: Whether to use the admin review route instead of the
+            supervisor one.
+
+    Outputs:
+        None. Asserts every line is approved with at most six SQL statements
+        and none joining ``expense_lines``.
+
+    External dependencies:
+        * Posts to ``/expenses/supervisor/report/<id>`` or
+          ``/admin/reports/<id>/review``.
+        * Records SQL with a ``before_cursor_execute`` listener on
+          :attr:`app.models.db.engine`.
+    """
+
+    app, supervisor_id, report_id = review_app
+    user_id = supervisor_id
+    url = f"/expenses/supervisor/report/{report_id}"
+    data = {"bulk_action": "approve_all"}
+    client = app.test_client()
+    if admin_route:
+        user_id = seeded_users.admin.id
+        url = f"/admin/reports/{report_id}/review"
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+        session["_fresh"] = True
+    if admin_route:
+        html = client.get(url).get_data(as_text=True)
+        data["csrf_token"] = re.search(
+            r'name="csrf_token" value="([^"]+)"', html
+        ).group(1)
+
+    statements = []
+
+    def _record(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _record)
+    try:
+        response = client.post(url, data=data)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _record)
+
+    assert response.status_code == 302
+    assert _status_counts(report_id) == {"Approved": 300}
+    assert not [text for text in statements if "JOIN expense_lines" in text]
+    assert len(statements) <= 6
@@ -0,0 +1,137 @@
+"""Tests for the email log and reset token retention job."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import create_app
+from app.models import (
+    EmailDispatchDailyRollup,
+    EmailDispatchLog,
+    EmailRateCounter,
+    PasswordResetToken,
+    User,
+    db,
+)
+from app.services.maintenance import run_data_retention
+
+NOW = datetime(2026, 10, 16, 12, 0)
+
+
+class TestConfig:
+    """Minimal Flask configuration backed by an in-memory SQLite database."""
+
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    STARTUP_DB_CHECKS = False
+    EMAIL_DISPATCH_LOG_RETENTION_DAYS = 7
+    AUTH_RESET_TOKEN_RATE_LIMIT = "1 per 2 hours"
+
+
+@pytest.fixture()
+def retention_app():
+    """Yield an app with old and recent mail logs, counters and tokens."""
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(email="sender@example.com", password_hash="x", role="employee")
+        db.session.add(user)
+        db.session.flush()
+        old_day = datetime(2026, 9, 1, 9, 30)
+        for index in range(5):
+            db.session.add(
+                EmailDispatchLog(
+                    feature="quote",
+                    recipient=f"r{index % 2}@example.com",
+                    user_id=user.id,
+                    created_at=old_day + timedelta(minutes=index),
+                )
+            )
+        db.session.add(
+            EmailDispatchLog(
+                feature="quote", recipient="new@example.com", created_at=NOW
+            )
+        )
+        for age in (timedelta(days=3), timedelta(minutes=5)):
+            db.session.add(
+                EmailRateCounter(
+                    scope="feature",
+                    feature="quote",
+                    subject="",
+                    bucket_start=NOW - age,
+                    count=1,
+                )
+            )
+        for token, age in (("old", timedelta(hours=3)), ("new", timedelta(hours=1))):
+            db.session.add(
+                PasswordResetToken(
+                    user_id=user.id,
+                    token=token,
+                    created_at=NOW - age,
+                    expires_at=NOW - age + timedelta(hours=1),
+                )
+            )
+        db.session.commit()
+        yield app
+
+
+def test_retention_rolls_up_then_prunes_in_batches(retention_app) -> None:
+    """Ensure old rows are summarized, deleted, and counted."""
+
+    summary = run_data_retention(now=NOW, batch_size=2)
+
+    assert summary.days_rolled_up == 1
+    assert summary.deleted == {
+        "email_dispatch_log": 5,
+        "email_rate_counters": 1,
+        "password_reset_tokens": 1,
+    }
+    assert summary.remaining["email_dispatch_log"] == 1
+    assert summary.remaining["email_dispatch_daily_rollups"] == 1
+    assert summary.duration_seconds >= 0
+    rollup = EmailDispatchDailyRollup.query.one()
+    assert (rollup.day, rollup.feature) == (date(2026, 9, 1), "quote")
+    assert (rollup.sent_count, rollup.recipient_count, rollup.user_count) == (5, 2, 1)
+    assert [token.token for token in PasswordResetToken.query] == ["new"]
+
+
+def test_rerun_does_not_double_count_rolled_up_days(retention_app) -> None:
+    """Ensure days that already have rollups are not counted twice."""
+
+    run_data_retention(now=NOW)
+    db.session.add(
+        EmailDispatchLog(
+            feature="quote",
+            recipient="late@example.com",
+            created_at=datetime(2026, 9, 1, 23, 0),
+        )
+    )
+    db.session.commit()
+
+    summary = run_data_retention(now=NOW)
+
+    assert summary.days_rolled_up == 0
+    assert summary.deleted["email_dispatch_log"] == 1
+    assert EmailDispatchDailyRollup.query.one().sent_count == 5
+
+
+def test_prune_data_cli_reports_counts(retention_app) -> None:
+    """Ensure the CLI command runs the job and prints its summary."""
+
+    result = retention_app.test_cli_runner().invoke(
+        args=["prune-data", "--batch-size", "10"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Rolled up" in result.output
+    assert "remaining email_dispatch_daily_rollups=" in result.output
+    assert (
+        EmailDispatchLog.query.filter(
+            EmailDispatchLog.created_at < datetime(2026, 10, 1)
+        ).count()
+        == 0
+    )
@@ -0,0 +1,185 @@
+"""Tests for exporting expense reports in the workbook template layout."""
+
+import io
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+import openpyxl
+import pytest
+from sqlalchemy import event
+
+from app.models import ExpenseLine, ExpenseReport, User, db
+from app.services.expense_export import (
+    TEMPLATE_COLUMNS,
+    TEMPLATE_FIRST_LINE_ROW,
+    TEMPLATE_HEADER_ROW,
+)
+
+
+@pytest.fixture()
+def export_app(flask_app, seeded_users):
+    """Return ``(app, users)`` with reports for December 2023 seeded.
+
+    Inputs:
+        flask_app: Shared application fixture.
+        seeded_users: Users seeded by ``tests/conftest.py``; the employee
+            becomes Pat Lee (``pat@example.com``) and an unrelated employee
+            is added.
+
+    Outputs:
+        The app and a mapping of ``employee``, ``outsider`` and ``admin`` ids.
+        Reports 1-3 are Pending Review, Completed and Draft.
+
+    External dependencies:
+        Writes rows through :data:`app.models.db.session`.
+    """
+
+    employee, supervisor = seeded_users.employee, seeded_users.supervisor
+    employee.email = "pat@example.com"
+    employee.first_name, employee.last_name = "Pat", "Lee"
+    outsider = User(
+        email="other@example.com",
+        password_hash="x",
+        role="employee",
+        employee_approved=True,
+    )
+    db.session.add(outsider)
+    db.session.flush()
+
+    for index, status in enumerate(("Pending Review", "Completed", "Draft")):
+        report = ExpenseReport(
+            employee_id=employee.id,
+            supervisor_id=supervisor.id,
+            report_month=date(2023, 12, 1),
+            status=status,
+            notes="Vegas trip",
+        )
+        report.lines = [
+            ExpenseLine(
+                date=date(2023, 12, 4),
+                expense_type="Travel - GA",
+                gl_account="64190",
+                vendor="Uber",
+                description="Airport",
+                amount=Decimal("20.64") + index,
+                review_status="Approved",
+            ),
+            ExpenseLine(
+                date=date(2023, 12, 5),
+                expense_type="Meals & Entertainment - GA",
+                gl_account="64180",
+                vendor="Diner",
+                amount=Decimal("12.50"),
+                review_status="Rejected",
+            ),
+        ]
+        db.session.add(report)
+    db.session.commit()
+    return flask_app, {
+        "employee": employee.id,
+        "outsider": outsider.id,
+        "admin": seeded_users.admin.id,
+    }
+
+
+def _client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+        session["_fresh"] = True
+    return client
+
+
+def test_report_export_matches_template_layout(export_app) -> None:
+    """Ensure the workbook uses the template header and line rows."""
+
+    app, users = export_app
+    response = _client(app, users["employee"]).get("/expenses/report/1/export.xlsx")
+
+    assert response.status_code == 200
+    assert (
+        "expense-report-1-2023-12-pat.xlsx" in response.headers["Content-Disposition"]
+    )
+
+    sheet = openpyxl.load_workbook(io.BytesIO(response.data))["Blank Expense Report"]
+    header = [cell.value for cell in sheet[TEMPLATE_HEADER_ROW]][:8]
+    first_line = [cell.value for cell in sheet[TEMPLATE_FIRST_LINE_ROW]][:8]
+    assert tuple(header) == TEMPLATE_COLUMNS
+    assert sheet["C9"].value == "Pat Lee"
+    assert first_line[1:7] == ["Travel - GA", 64190, "Airport", "Uber", 20.64, "Y"]
+    assert sheet.cell(row=TEMPLATE_FIRST_LINE_ROW + 1, column=7).value == "N"
+    assert sheet.cell(row=TEMPLATE_FIRST_LINE_ROW + 4, column=6).value == (
+        '=SUMIF(G18:G19,"Y",F18:F19)'
+    )
+
+
+def test_report_export_is_limited_to_report_participants(export_app) -> None:
+    """Ensure unrelated employees cannot download another user's report."""
+
+    app, users = export_app
+
+    response = _client(app, users["outsider"]).get("/expenses/report/1/export.xlsx")
+
+    assert response.status_code == 404
+
+
+def test_monthly_zip_streams_one_workbook_per_submitted_report(export_app) -> None:
+    """Ensure the zip holds every non-draft report for the month."""
+
+    app, users = export_app
+    client = _client(app, users["admin"])
+
+    response = client.get("/expenses/export/monthly.zip?month=2023-12")
+    invalid = client.get("/expenses/export/monthly.zip?month=december")
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+    assert archive.namelist() == [
+        "2023-12/expense-report-1-2023-12-pat.xlsx",
+        "2023-12/expense-report-2-2023-12-pat.xlsx",
+    ]
+    assert archive.testzip() is None
+    workbook = openpyxl.load_workbook(io.BytesIO(archive.read(archive.namelist()[1])))
+    assert workbook["Blank Expense Report"]["F9"].value == 2
+    assert invalid.status_code == 302
+
+
+def test_exports_do_not_join_load_report_lines(export_app) -> None:
+    """Ensure report headers are loaded without the mapper's joined lines."""
+
+    app, users = export_app
+    client = _client(app, users["admin"])
+    statements = []
+
+    def _record(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _record)
+    try:
+        single = client.get("/expenses/report/1/export.xlsx")
+        monthly = client.get("/expenses/export/monthly.zip?month=2023-12")
+        monthly.get_data()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _record)
+
+    assert (single.status_code, monthly.status_code) == (200, 200)
+    assert not [text for text in statements if "JOIN expense_lines" in text]
+
+
+def test_report_export_writes_employee_text_as_strings(export_app) -> None:
+    """Ensure formula-like employee text is not exported as a live formula."""
+
+    app, users = export_app
+    with app.app_context():
+        line = ExpenseLine.query.filter_by(expense_report_id=1, vendor="Uber").one()
+        line.vendor = '=HYPERLINK("http://evil","x")'
+        db.session.commit()
+
+    response = _client(app, users["employee"]).get("/expenses/report/1/export.xlsx")
+
+    sheet = openpyxl.load_workbook(io.BytesIO(response.data))["Blank Expense Report"]
+    vendor = sheet.cell(row=TEMPLATE_FIRST_LINE_ROW, column=5)
+    assert vendor.value == '=HYPERLINK("http://evil","x")'
+    assert vendor.data_type == "s"
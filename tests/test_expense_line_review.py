@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from decimal import Decimal
 from typing import List, Optional
 
 import pytest
 
-from app.services.expense_workflow import apply_line_item_review_actions
+from app.services.expense_workflow import (
+    apply_line_item_review_actions,
+    parse_line_review_form,
+)
 
 
 @dataclass
@@ -16,6 +20,7 @@ class DummyLine:
         id: Unique identifier for the line item under review.
         review_status: Current review state for the line item.
         review_comment: Optional reviewer notes tied to the line.
+        amount: Line amount used when refreshing cached report totals.
 
     Outputs:
         A lightweight container for line review attributes used in tests.
@@ -27,6 +32,7 @@ class DummyLine:
     id: int
     review_status: str = "Pending"
     review_comment: Optional[str] = None
+    amount: Decimal = Decimal("0")
 
 
 @dataclass
@@ -120,3 +126,60 @@ def test_apply_line_item_review_actions_marks_rejected_lines() -> None:
     assert report.lines[0].review_status == "Approved"
     assert report.lines[1].review_status == "Rejected"
     assert report.lines[1].review_comment == "Missing receipt"
+
+
+def test_apply_line_item_review_actions_refreshes_cached_totals() -> None:
+    """Reviewing lines should refresh the report's cached totals.
+
+    Inputs:
+        None. Constructs a minimal in-memory report with priced line items.
+
+    Outputs:
+        None. Asserts the cached count, total, and approved amount.
+
+    External dependencies:
+        Calls :func:`app.services.expense_workflow.apply_line_item_review_actions`.
+    """
+
+    report = DummyReport(
+        lines=[
+            DummyLine(id=1, amount=Decimal("10.00")),
+            DummyLine(id=2, amount=Decimal("2.50")),
+        ]
+    )
+    decisions = {1: ("approve", ""), 2: ("reject", "Personal expense")}
+
+    apply_line_item_review_actions(report, decisions=decisions)
+
+    assert report.line_count == 2
+    assert report.total_amount == Decimal("12.50")
+    assert report.approved_amount == Decimal("10.00")
+
+
+def test_parse_line_review_form_collects_actions_and_comments() -> None:
+    """Per-line fields should be gathered in one pass over the form.
+
+    Inputs:
+        None. Uses a plain mapping in place of ``request.form``.
+
+    Outputs:
+        None. Asserts decisions are keyed by line id and unrelated fields are
+        ignored.
+
+    External dependencies:
+        Calls :func:`app.services.expense_workflow.parse_line_review_form`.
+    """
+
+    form = {
+        "csrf_token": "token",
+        "line_7_action": "approve",
+        "line_9_comment": "Personal",
+        "line_9_action": "reject",
+        "line_x_action": "approve",
+        "bulk_comment": "",
+    }
+
+    assert parse_line_review_form(form) == {
+        7: ("approve", ""),
+        9: ("reject", "Personal"),
+    }
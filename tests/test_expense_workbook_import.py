@@ -0,0 +1,236 @@
+"""Tests for importing expense lines from the employee expense workbook."""
+
+import io
+import zipfile
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+from app.models import ExpenseLine, ExpenseReport, db
+import app.expenses as expenses_module
+from app.services.expense_import import import_expense_workbook
+from app.services.reference_data import GLAccountOption
+
+TYPE_ACCOUNTS = {
+    "Maintenance & Repairs": "51020",
+    "Office Supplies": "62090",
+    "Meals & Entertainment - GA": "64180",
+    "Travel - GA": "64190",
+}
+
+
+def _workbook_bytes(rows) -> bytes:
+    """Return a template-shaped workbook whose Account column uses VLOOKUP."""
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Blank Expense Report"
+    sheet.append(["Expense report"])
+    sheet.append([])
+    sheet.append(
+        [
+            "Date",
+            "Type",
+            "Account",
+            "Description/HWB",
+            "Company/Names (Meals & Entertainment)",
+            "Amount",
+            "Reimburse",
+            "Receipt",
+        ]
+    )
+    for row_number, (line_date, expense_type, amount) in enumerate(rows, start=4):
+        sheet.append(
+            [
+                line_date,
+                expense_type,
+                f"=VLOOKUP(B{row_number},'Data List'!$A$2:$B$16,2,FALSE)",
+                "Client visit",
+                "Diner",
+                amount,
+                None,
+                None,
+            ]
+        )
+    sheet.append([None, None, None, None, "Due to Employee", 0])
+    sheet.append(["Approved:"])
+    data_list = workbook.create_sheet("Data List")
+    data_list.append(["type", "account"])
+    for expense_type, account in TYPE_ACCOUNTS.items():
+        data_list.append([expense_type, int(account)])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture()
+def import_client(monkeypatch, flask_app, seeded_users):
+    """Return ``(client, supervisor_id)`` for an approved employee.
+
+    Inputs:
+        monkeypatch: Replaces the GL account and expense type loaders.
+        flask_app: Shared application fixture.
+        seeded_users: Users seeded by ``tests/conftest.py``.
+
+    Outputs:
+        A client logged in as the employee and the supervisor id.
+
+    External dependencies:
+        * Patches :func:`app.expenses.load_gl_accounts` and
+          :func:`app.expenses.load_expense_types`.
+    """
+
+    monkeypatch.setattr(
+        expenses_module,
+        "load_gl_accounts",
+        lambda: tuple(
+            GLAccountOption(account, account) for account in TYPE_ACCOUNTS.values()
+        ),
+    )
+    monkeypatch.setattr(
+        expenses_module, "load_expense_types", lambda: tuple(TYPE_ACCOUNTS)
+    )
+    client = flask_app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(seeded_users.employee.id)
+        session["_fresh"] = True
+    return client, seeded_users.supervisor.id
+
+
+def _post(client, supervisor_id, payload: bytes):
+    return client.post(
+        "/expenses/import",
+        data={
+            "supervisor_id": str(supervisor_id),
+            "report_month": "2023-12",
+            "submit_action": "save_draft",
+            "workbook": (io.BytesIO(payload), "expenses.xlsx"),
+        },
+        content_type="multipart/form-data",
+    )
+
+
+def _corrupt_workbook_bytes() -> bytes:
+    """Return a workbook archive whose ``xl/workbook.xml`` is not valid XML."""
+
+    source = zipfile.ZipFile(io.BytesIO(_workbook_bytes([])))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name in source.namelist():
+            payload = source.read(name)
+            archive.writestr(name, b"<broken" if name == "xl/workbook.xml" else payload)
+    return buffer.getvalue()
+
+
+def test_bundled_template_example_imports(import_client) -> None:
+    """Ensure the sample rows in the shipped template import with totals."""
+
+    client, supervisor_id = import_client
+    template = Path(__file__).resolve().parents[1] / "expense_report_template.xlsx"
+
+    response = _post(client, supervisor_id, template.read_bytes())
+
+    assert response.status_code == 302
+    report = ExpenseReport.query.one()
+    lines = ExpenseLine.query.order_by(ExpenseLine.id.asc()).all()
+    assert report.line_count == len(lines) == 17
+    assert report.total_amount == sum(line.amount for line in lines)
+    assert (lines[0].date, lines[0].gl_account) == (date(2023, 7, 14), "64190")
+    assert lines[1].amount == Decimal("23.12")
+    assert lines[8].receipt_url is None
+    assert "(Receipt: https://drive.google.com/" in lines[8].description
+
+
+def test_large_workbook_is_inserted_in_batches(import_client) -> None:
+    """Ensure thousands of rows import with accounts from the Data List."""
+
+    _client, supervisor_id = import_client
+    rows = [
+        (date(2023, 12, 1 + index % 28), "Travel - GA", 1.5) for index in range(2100)
+    ]
+    report = ExpenseReport(
+        employee_id=1, supervisor_id=supervisor_id, report_month=date(2023, 12, 1)
+    )
+    db.session.add(report)
+    db.session.flush()
+
+    result = import_expense_workbook(
+        io.BytesIO(_workbook_bytes(rows)),
+        report,
+        valid_gl_accounts=set(TYPE_ACCOUNTS.values()),
+        expense_types=tuple(TYPE_ACCOUNTS),
+        batch_size=500,
+    )
+
+    assert result.errors == []
+    assert (result.line_count, result.total_amount) == (2100, Decimal("3150.00"))
+    assert ExpenseLine.query.filter_by(gl_account="64190").count() == 2100
+
+
+def test_report_total_is_capped_to_the_total_column(import_client) -> None:
+    """Ensure a sum too large for ``total_amount`` is a row error.
+
+    Inputs:
+        import_client: Logged-in employee client fixture with a supervisor.
+
+    Outputs:
+        None. Asserts the row that pushes the total to 10,000,000,000 is
+        reported and no lines are written.
+
+    External dependencies:
+        * Calls :func:`app.services.expense_import.import_expense_workbook`.
+    """
+
+    _client, supervisor_id = import_client
+    rows = [(date(2023, 12, 1), "Travel - GA", 99999999.99)] * 101
+    report = ExpenseReport(
+        employee_id=1, supervisor_id=supervisor_id, report_month=date(2023, 12, 1)
+    )
+    db.session.add(report)
+    db.session.flush()
+
+    result = import_expense_workbook(
+        io.BytesIO(_workbook_bytes(rows)),
+        report,
+        valid_gl_accounts=set(TYPE_ACCOUNTS.values()),
+        expense_types=tuple(TYPE_ACCOUNTS),
+    )
+
+    assert result.errors == ["Row 104: report total must be less than 10,000,000,000."]
+    assert ExpenseLine.query.count() == 0
+
+
+def test_invalid_rows_are_all_reported_and_nothing_is_saved(import_client) -> None:
+    """Ensure row errors roll back the whole import."""
+
+    client, supervisor_id = import_client
+    payload = _workbook_bytes(
+        [
+            (date(2023, 12, 1), "Travel - GA", 10),
+            ("someday", "Travel - GA", 5),
+            (date(2023, 12, 3), "Gym", "lots"),
+            (date(2023, 12, 4), "Travel - GA", "1e30"),
+            (date(2023, 12, 5), "Travel - GA", 123456789),
+        ]
+    )
+
+    response = _post(client, supervisor_id, payload)
+    not_a_workbook = _post(client, supervisor_id, b"plain text")
+    corrupt = _post(client, supervisor_id, _corrupt_workbook_bytes())
+
+    assert response.status_code == 400
+    body = response.get_data(as_text=True)
+    assert "Row 5: invalid date." in body
+    assert "Row 6: expense type &#39;Gym&#39; is not on the approved list." in body
+    assert "Row 6: amount must be numeric." in body
+    assert "Row 7: amount must be less than 100,000,000." in body
+    assert "Row 8: amount must be less than 100,000,000." in body
+    assert not_a_workbook.status_code == 400
+    assert "not a valid .xlsx workbook" in not_a_workbook.get_data(as_text=True)
+    assert corrupt.status_code == 400
+    assert "not a valid .xlsx workbook" in corrupt.get_data(as_text=True)
+    assert ExpenseReport.query.count() == 0
+    assert ExpenseLine.query.count() == 0
@@ -8,6 +8,7 @@ import openpyxl
 from app import create_app
 from app.models import User, db
 import app.services.expense_workflow as expense_workflow
+from app.services.reference_data import clear_reference_cache
 
 
 class TestConfig:
@@ -127,8 +128,7 @@ def _run_with_runtime_workbook_path(
     """
 
     expense_workflow._workbook_path.cache_clear()
-    expense_workflow.load_gl_accounts.cache_clear()
-    expense_workflow.load_expense_types.cache_clear()
+    clear_reference_cache()
 
     original_workbook_path_loader = expense_workflow._workbook_path
     expense_workflow._workbook_path = workbook_path_factory
@@ -137,8 +137,7 @@ def _run_with_runtime_workbook_path(
         callback()
     finally:
         expense_workflow._workbook_path = original_workbook_path_loader
-        expense_workflow.load_gl_accounts.cache_clear()
-        expense_workflow.load_expense_types.cache_clear()
+        clear_reference_cache()
 
 
 def test_expense_endpoints_load_template_from_runtime_location(tmp_path) -> None:
@@ -230,3 +229,55 @@ def test_expense_routes_handle_missing_runtime_workbook(tmp_path) -> None:
         lambda: missing_workbook_path,
         _exercise_routes,
     )
+
+
+def test_gl_accounts_endpoint_revalidates_with_etag(tmp_path) -> None:
+    """Ensure repeat GL account requests are answered with ``304``.
+
+    Inputs:
+        tmp_path: Pytest-provided temporary directory used as the simulated
+            runtime root.
+
+    Outputs:
+        None. Asserts the endpoint returns a strong ``ETag``, answers a
+        matching ``If-None-Match`` without a body, and issues a new tag once
+        the workbook changes.
+
+    External dependencies:
+        * Calls :func:`app.create_app`.
+        * Writes workbooks with :mod:`openpyxl`.
+    """
+
+    runtime_root = tmp_path / "app"
+    workbook_path = runtime_root / "expense_report_template.xlsx"
+    _build_runtime_workbook(workbook_path)
+
+    app = create_app(TestConfig)
+    employee_id, _supervisor_id = _seed_employee_and_supervisor(app)
+
+    def _exercise_routes() -> None:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["_user_id"] = str(employee_id)
+            session["_fresh"] = True
+
+        first = client.get("/expenses/gl-accounts")
+        etag = first.headers["ETag"]
+        repeat = client.get("/expenses/gl-accounts", headers={"If-None-Match": etag})
+
+        assert not etag.startswith("W/")
+        assert "private" in first.headers["Cache-Control"]
+        assert repeat.status_code == 304
+        assert repeat.data == b""
+
+        workbook = openpyxl.load_workbook(workbook_path)
+        workbook["GL Accounts"].append(["6200", "Meals Expense"])
+        workbook.save(workbook_path)
+
+        changed = client.get("/expenses/gl-accounts", headers={"If-None-Match": etag})
+
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert len(changed.json["accounts"]) == 2
+
+    _run_with_runtime_workbook_path(lambda: workbook_path, _exercise_routes)
@@ -0,0 +1,154 @@
+"""Tests for the GL account typeahead index and search endpoint."""
+
+import pytest
+
+import app.expenses as expenses_module
+from app.services.gl_search import GLAccountIndex, get_gl_account_index
+from app.services.reference_data import GLAccountOption
+
+
+OPTIONS = (
+    GLAccountOption("6100", "6100 - Travel Airfare"),
+    GLAccountOption("6110", "6110 - Travel Lodging"),
+    GLAccountOption("6200", "6200 - Meals and Entertainment"),
+    GLAccountOption("7610", "7610 - Office Supplies"),
+    GLAccountOption("61", "61 - Travel Summary"),
+)
+
+
+def test_index_ranks_code_then_word_then_substring() -> None:
+    """Ensure exact and prefix code hits outrank label and substring hits.
+
+    Inputs:
+        None. Builds an index over :data:`OPTIONS`.
+
+    Outputs:
+        None. Asserts code matches rank before label-word and substring
+        matches, and that an empty query returns the first ``limit`` options.
+
+    External dependencies:
+        Uses :class:`app.services.gl_search.GLAccountIndex`.
+    """
+
+    index = GLAccountIndex(OPTIONS)
+
+    assert [option.account for option in index.search("61")] == [
+        "61",
+        "6100",
+        "6110",
+    ]
+    assert [option.account for option in index.search("610")] == ["6100", "7610"]
+    assert [option.account for option in index.search("travel lod")] == ["6110"]
+    assert [option.account for option in index.search("upplies")] == ["7610"]
+    assert index.search("zzz") == []
+    assert [option.account for option in index.search("", limit=2)] == [
+        "6100",
+        "6110",
+    ]
+
+
+def test_index_is_reused_until_options_change() -> None:
+    """Ensure the shared index is rebuilt only for a different options tuple.
+
+    Inputs:
+        None.
+
+    Outputs:
+        None. Asserts the same options return the cached index and changed
+        options build a new index with a new ``version``.
+
+    External dependencies:
+        Calls :func:`app.services.gl_search.get_gl_account_index`.
+    """
+
+    first = get_gl_account_index(OPTIONS)
+    assert get_gl_account_index(OPTIONS) is first
+
+    changed = OPTIONS + (GLAccountOption("8100", "8100 - Fuel"),)
+    rebuilt = get_gl_account_index(changed)
+    assert rebuilt is not first
+    assert rebuilt.version != first.version
+
+
+@pytest.fixture()
+def employee_client(monkeypatch, flask_app, seeded_users):
+    """Return a logged-in approved employee client with patched GL accounts.
+
+    Inputs:
+        monkeypatch: Replaces the GL account loader with :data:`OPTIONS`.
+        flask_app: Shared application fixture.
+        seeded_users: Users seeded by ``tests/conftest.py``.
+
+    Outputs:
+        A :class:`flask.testing.FlaskClient` logged in as the employee.
+
+    External dependencies:
+        * Patches :func:`app.expenses.load_gl_accounts`.
+    """
+
+    monkeypatch.setattr(expenses_module, "load_gl_accounts", lambda: OPTIONS)
+    client = flask_app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(seeded_users.employee.id)
+        session["_fresh"] = True
+    return client
+
+
+def test_search_endpoint_returns_ranked_matches(employee_client) -> None:
+    """Ensure the endpoint returns limited, ranked JSON matches.
+
+    Inputs:
+        employee_client: Logged-in employee client with patched GL accounts.
+
+    Outputs:
+        None. Asserts the JSON body honours ``limit`` and ranking and that the
+        response is privately cacheable for 60 seconds.
+
+    External dependencies:
+        Requests ``/expenses/gl-accounts/search``.
+    """
+
+    response = employee_client.get("/expenses/gl-accounts/search?q=61&limit=2")
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "query": "61",
+        "accounts": [
+            {"account": "61", "label": "61 - Travel Summary"},
+            {"account": "6100", "label": "6100 - Travel Airfare"},
+        ],
+    }
+    assert "private" in response.headers["Cache-Control"]
+    assert "max-age=60" in response.headers["Cache-Control"]
+
+
+def test_search_endpoint_answers_repeat_lookups_with_not_modified(
+    employee_client,
+) -> None:
+    """Ensure a matching ``If-None-Match`` header yields ``304``.
+
+    Inputs:
+        employee_client: Logged-in employee client with patched GL accounts.
+
+    Outputs:
+        None. Asserts a repeated query with its ETag returns an empty ``304``
+        while a different query returns ``200`` with a different ETag.
+
+    External dependencies:
+        Requests ``/expenses/gl-accounts/search``.
+    """
+
+    first = employee_client.get("/expenses/gl-accounts/search?q=travel")
+    etag = first.headers["ETag"]
+
+    repeat = employee_client.get(
+        "/expenses/gl-accounts/search?q=travel", headers={"If-None-Match": etag}
+    )
+    other = employee_client.get(
+        "/expenses/gl-accounts/search?q=meals", headers={"If-None-Match": etag}
+    )
+
+    assert repeat.status_code == 304
+    assert repeat.data == b""
+    assert other.status_code == 200
+    assert other.headers["ETag"] != etag
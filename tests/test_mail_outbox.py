@@ -0,0 +1,232 @@
+"""Tests for the persistent outbound mail queue and its batch worker."""
+
+import re
+import socket
+import socketserver
+import threading
+from datetime import datetime
+
+import pytest
+
+from app.models import EmailDispatchLog, EmailRateCounter, OutboundEmail, db
+from app.services.mail import MailRateLimitError
+from app.services.mail_outbox import drain_outbox, queue_email
+from app.services.smtp_pool import reset_smtp_pool
+
+
+@pytest.fixture()
+def app_config():
+    """Send through a local plain-text relay with a low recipient limit.
+
+    Inputs:
+        None.
+
+    Outputs:
+        Overrides for the shared ``TestConfig`` in ``tests/conftest.py``.
+
+    External dependencies:
+        None.
+    """
+
+    return {
+        "BACKGROUND_JOB_EXECUTOR": "inline",
+        "MAIL_DEFAULT_SENDER": "quote@freightservices.net",
+        "MAIL_ALLOWED_SENDER_DOMAIN": "freightservices.net",
+        "MAIL_USE_TLS": False,
+        "MAIL_USE_SSL": False,
+        "MAIL_USERNAME": None,
+        "MAIL_PASSWORD": None,
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_RATE_LIMIT_PER_RECIPIENT_PER_DAY": 2,
+    }
+
+
+class _StandInHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue that rejects recipients starting with ``bad``."""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self._reply("220 stand-in ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith("RCPT") and "<BAD" in command:
+                self._reply("550 No such user")
+            elif command.startswith(("EHLO", "HELO", "NOOP", "MAIL", "RCPT", "RSET")):
+                self._reply("250 OK")
+            elif command.startswith("DATA"):
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                with server.lock:
+                    server.messages += 1
+                self._reply("250 OK")
+            elif command.startswith("QUIT"):
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _StandInServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+
+
+@pytest.fixture()
+def smtp_server():
+    """Yield a running stand-in SMTP server on an ephemeral port."""
+
+    server = _StandInServer()
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _closed_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture()
+def outbox_app(flask_app, seeded_users):
+    """Return a factory pointing the shared app at a given SMTP port.
+
+    Inputs:
+        flask_app: Shared application fixture.
+        seeded_users: Users seeded by ``tests/conftest.py``.
+
+    Outputs:
+        Yields a callable taking a port and returning ``(app, admin)``. The
+        SMTP connection pool is reset before and after the test.
+
+    External dependencies:
+        * Calls :func:`app.services.smtp_pool.reset_smtp_pool`.
+    """
+
+    def _build(port: int):
+        flask_app.config["MAIL_PORT"] = port
+        return flask_app, seeded_users.admin
+
+    reset_smtp_pool()
+    yield _build
+    reset_smtp_pool()
+
+
+def test_queue_enforces_limits_without_touching_smtp(outbox_app) -> None:
+    """Ensure enqueueing counts quota immediately and defers delivery."""
+
+    _app, user = outbox_app(_closed_port())
+
+    for _ in range(2):
+        queue_email("a@example.com", "Hi", "Body", user=user, dispatch=False)
+    with pytest.raises(MailRateLimitError):
+        queue_email("a@example.com", "Hi", "Body", user=user, dispatch=False)
+
+    assert [email.status for email in OutboundEmail.query] == ["Queued", "Queued"]
+    assert EmailDispatchLog.query.count() == 0
+    assert EmailRateCounter.query.filter_by(scope="recipient").one().count == 2
+
+
+def test_worker_drains_batches_over_one_connection(outbox_app, smtp_server) -> None:
+    """Ensure every batch reuses one session and sends are logged once."""
+
+    _app, user = outbox_app(smtp_server.server_address[1])
+    for index in range(5):
+        queue_email(f"user{index}@example.com", "Hi", "Body", dispatch=False)
+    queue_email("bad@example.com", "Hi", "Body", user=user, dispatch=False)
+
+    summary = drain_outbox(batch_size=2)
+
+    assert (summary.batches, summary.sent, summary.failed) == (3, 5, 1)
+    assert smtp_server.messages == 5
+    assert smtp_server.connections == 1
+    rejected = OutboundEmail.query.filter_by(status="Failed").one()
+    assert rejected.recipient == "bad@example.com"
+    assert "550" in rejected.last_error
+    assert EmailDispatchLog.query.count() == 5
+    feature_counter = EmailRateCounter.query.filter_by(scope="feature").one()
+    assert feature_counter.count == 6
+
+
+def test_malformed_message_fails_without_stalling_batch(
+    outbox_app, smtp_server
+) -> None:
+    """Ensure a non-transport error fails its row and the batch continues."""
+
+    _app, _user = outbox_app(smtp_server.server_address[1])
+    queue_email("a@example.com", "Hi\nBcc: x@example.com", "Body", dispatch=False)
+    queue_email("b@example.com", "Hi", "Body", dispatch=False)
+
+    summary = drain_outbox(batch_size=10)
+
+    assert (summary.sent, summary.failed, summary.retried) == (1, 1, 0)
+    broken = OutboundEmail.query.filter_by(recipient="a@example.com").one()
+    assert (broken.status, broken.attempts) == ("Failed", 1)
+    assert broken.claim_token is None
+    assert broken.last_error.startswith("ValueError")
+    assert smtp_server.messages == 1
+
+
+def test_unreachable_relay_reschedules_and_releases(outbox_app) -> None:
+    """Ensure a down relay costs one attempt, not one timeout per message."""
+
+    _app, _user = outbox_app(_closed_port())
+    for index in range(3):
+        queue_email(f"user{index}@example.com", "Hi", "Body", dispatch=False)
+
+    summary = drain_outbox(batch_size=10)
+
+    assert (summary.retried, summary.released) == (1, 2)
+    first, *rest = OutboundEmail.query.order_by(OutboundEmail.id).all()
+    assert (first.status, first.attempts) == ("Queued", 1)
+    assert first.next_attempt_at > datetime.utcnow()
+    assert [(email.status, email.attempts) for email in rest] == [("Queued", 0)] * 2
+    assert drain_outbox(batch_size=10).retried == 1
+
+
+def test_admin_outbox_page_lists_status_and_requeues(outbox_app, smtp_server) -> None:
+    """Ensure admins see delivery status and can retry failed messages."""
+
+    app, user = outbox_app(smtp_server.server_address[1])
+    queue_email("bad@example.com", "Rejected", "Body", dispatch=False)
+    queue_email("good@example.com", "Delivered", "Body")
+    failed = OutboundEmail.query.filter_by(recipient="bad@example.com").one()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user.id)
+        session["_fresh"] = True
+
+    page = client.get("/admin/mail-outbox?status=Failed")
+
+    assert page.status_code == 200
+    html = page.get_data(as_text=True)
+    assert "Rejected" in html and "Delivered" not in html
+    assert "550 No such user" in html
+
+    token = re.search(r'name="csrf_token" value="([^"]+)"', html).group(1)
+    response = client.post(
+        f"/admin/mail-outbox/{failed.id}/retry", data={"csrf_token": token}
+    )
+
+    assert response.status_code == 302
+    db.session.refresh(failed)
+    assert (failed.status, failed.attempts) == ("Failed", 1)
@@ -0,0 +1,119 @@
+"""Tests for bucketed outbound mail rate limiting."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.models import EmailRateCounter, User, db
+from app.services.mail import (
+    MailRateLimitError,
+    enforce_mail_rate_limit,
+    log_email_dispatch,
+)
+
+
+class TestConfig:
+    """Minimal Flask configuration backed by an in-memory SQLite database."""
+
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    STARTUP_DB_CHECKS = False
+    MAIL_RATE_LIMIT_PER_USER_PER_HOUR = 3
+    MAIL_RATE_LIMIT_PER_USER_PER_DAY = 5
+    MAIL_RATE_LIMIT_PER_FEATURE_PER_HOUR = 100
+    MAIL_RATE_LIMIT_PER_RECIPIENT_PER_DAY = 4
+
+
+@pytest.fixture()
+def mail_app():
+    """Yield ``(app, user)`` with the rate limits from :class:`TestConfig`."""
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(email="sender@example.com", password_hash="x", role="employee")
+        db.session.add(user)
+        db.session.commit()
+        yield app, user
+
+
+def test_sends_in_one_minute_share_counter_buckets(mail_app) -> None:
+    """Ensure repeated sends upsert one bucket per scope."""
+
+    _app, user = mail_app
+
+    for _ in range(2):
+        log_email_dispatch("Password_Reset", user, "Someone@Example.com ")
+
+    counters = {
+        (counter.scope, counter.subject): counter.count
+        for counter in EmailRateCounter.query.filter_by(feature="password_reset")
+    }
+    assert counters == {
+        ("feature", ""): 2,
+        ("recipient", "someone@example.com"): 2,
+        ("user", str(user.id)): 2,
+    }
+
+
+def test_limits_are_checked_in_a_single_query(mail_app) -> None:
+    """Ensure all four windows are evaluated with one round trip."""
+
+    _app, user = mail_app
+    for _ in range(3):
+        log_email_dispatch("quote", user, "a@example.com")
+    db.session.refresh(user)
+    statements = []
+
+    def _record(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _record)
+    try:
+        with pytest.raises(MailRateLimitError, match="Hourly email limit"):
+            enforce_mail_rate_limit("quote", user, "b@example.com")
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _record)
+
+    assert len(statements) == 1
+    enforce_mail_rate_limit("other", user, "b@example.com")
+
+
+def test_windows_slide_over_older_buckets(mail_app) -> None:
+    """Ensure hourly limits ignore old buckets that daily limits still count."""
+
+    _app, user = mail_app
+    two_hours_ago = (datetime.utcnow() - timedelta(hours=2)).replace(
+        second=0, microsecond=0
+    )
+    db.session.add_all(
+        [
+            EmailRateCounter(
+                scope="user",
+                feature="quote",
+                subject=str(user.id),
+                bucket_start=two_hours_ago,
+                count=4,
+            ),
+            EmailRateCounter(
+                scope="recipient",
+                feature="quote",
+                subject="a@example.com",
+                bucket_start=two_hours_ago - timedelta(days=2),
+                count=40,
+            ),
+        ]
+    )
+    db.session.commit()
+
+    enforce_mail_rate_limit("quote", user, "a@example.com")
+    log_email_dispatch("quote", user, "a@example.com")
+
+    with pytest.raises(MailRateLimitError, match="Daily email limit"):
+        enforce_mail_rate_limit("quote", user, "b@example.com")
+    enforce_mail_rate_limit("quote", None, "a@example.com")
@@ -0,0 +1,276 @@
+"""Tests for batched, resumable NetSuite SFTP dispatch."""
+
+import hashlib
+import io
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app import create_app
+from app.models import ExpenseLine, ExpenseReport, NetSuiteDispatchBatch, User, db
+import app.services.netsuite_dispatch as netsuite_dispatch
+
+
+class TestConfig:
+    """Minimal Flask configuration backed by an in-memory SQLite database."""
+
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    STARTUP_DB_CHECKS = False
+    NETSUITE_SFTP_DIRECTORY = "/inbound"
+    NETSUITE_DISPATCH_MAX_REPORTS_PER_BATCH = 2
+    NETSUITE_DISPATCH_MAX_LINES_PER_BATCH = 100
+
+
+class FakeSFTPClient:
+    """In-memory stand-in for :class:`paramiko.SFTPClient`.
+
+    Inputs:
+        fail_on_write: Optional 1-based file write number that should raise
+            :class:`IOError` to simulate a dropped connection.
+
+    Outputs:
+        ``files`` maps remote paths to written bytes; ``sessions`` counts how
+        many times the fake session was opened.
+
+    External dependencies:
+        None.
+    """
+
+    def __init__(self, fail_on_write=None):
+        self.files = {}
+        self.sessions = 0
+        self.writes = 0
+        self.fail_on_write = fail_on_write
+
+    @contextmanager
+    def file(self, path, mode):
+        self.writes += 1
+        if self.fail_on_write == self.writes:
+            raise IOError("connection reset")
+        buffer = io.BytesIO()
+        yield buffer
+        self.files[path] = buffer.getvalue()
+
+    def remove(self, path):
+        if path not in self.files:
+            raise IOError("missing")
+        del self.files[path]
+
+    def rename(self, source, target):
+        self.files[target] = self.files.pop(source)
+
+
+@pytest.fixture()
+def dispatch_app(monkeypatch):
+    """Yield an app with five pending-upload reports and a fake SFTP session."""
+
+    app = create_app(TestConfig)
+    client = FakeSFTPClient()
+
+    @contextmanager
+    def _fake_session():
+        client.sessions += 1
+        yield client
+
+    monkeypatch.setattr(netsuite_dispatch, "open_netsuite_sftp", _fake_session)
+
+    with app.app_context():
+        db.create_all()
+        employee = User(email="e@example.com", password_hash="x", role="employee")
+        supervisor = User(email="s@example.com", password_hash="x", role="supervisor")
+        db.session.add_all([employee, supervisor])
+        db.session.flush()
+        for _ in range(5):
+            report = ExpenseReport(
+                employee_id=employee.id,
+                supervisor_id=supervisor.id,
+                report_month=date(2026, 5, 1),
+                status="Pending Upload",
+                line_count=1,
+            )
+            report.lines = [
+                ExpenseLine(
+                    date=date(2026, 5, 2),
+                    expense_type="Meals",
+                    gl_account="6100",
+                    vendor="Cafe",
+                    amount=Decimal("9.99"),
+                    review_status="Approved",
+                )
+            ]
+            db.session.add(report)
+        db.session.commit()
+        yield app, client
+
+
+def test_dispatch_sends_bounded_batches_over_one_session(dispatch_app) -> None:
+    """Ensure reports are split into batches and sent over a single session."""
+
+    _app, client = dispatch_app
+    summary = netsuite_dispatch.dispatch_pending_reports()
+
+    assert summary.batches_sent == 3
+    assert summary.reports_completed == 5
+    assert client.sessions == 1
+    assert ExpenseReport.query.filter_by(status="Completed").count() == 5
+
+    batches = NetSuiteDispatchBatch.query.order_by(NetSuiteDispatchBatch.id).all()
+    assert [batch.report_count for batch in batches] == [2, 2, 1]
+    for batch in batches:
+        payload = client.files[f"/inbound/{batch.filename}"]
+        assert batch.status == "Sent"
+        assert batch.checksum == hashlib.sha256(payload).hexdigest()
+        assert batch.byte_size == len(payload)
+        assert batch.line_count == batch.report_count
+    assert not [path for path in client.files if path.endswith(".part")]
+
+
+def test_dispatch_resumes_after_failed_batch(dispatch_app) -> None:
+    """Ensure a failed batch is recorded and a retry sends only what is left."""
+
+    _app, client = dispatch_app
+    client.fail_on_write = 2
+
+    with pytest.raises(netsuite_dispatch.NetSuiteDispatchError) as excinfo:
+        netsuite_dispatch.dispatch_pending_reports()
+
+    assert excinfo.value.summary.reports_completed == 2
+    statuses = [
+        batch.status
+        for batch in NetSuiteDispatchBatch.query.order_by(NetSuiteDispatchBatch.id)
+    ]
+    assert statuses == ["Sent", "Failed", "Pending"]
+    assert ExpenseReport.query.filter_by(status="Completed").count() == 2
+
+    client.fail_on_write = None
+    summary = netsuite_dispatch.dispatch_pending_reports()
+
+    assert summary.batches_sent == 2
+    assert summary.reports_completed == 3
+    assert NetSuiteDispatchBatch.query.count() == 3
+    assert ExpenseReport.query.filter_by(status="Completed").count() == 5
+    failed_then_sent = db.session.get(NetSuiteDispatchBatch, 2)
+    assert failed_then_sent.attempts == 2
+    assert failed_then_sent.error is None
+
+
+def test_dispatch_leaves_reports_changed_mid_batch(dispatch_app, monkeypatch) -> None:
+    """Ensure a report edited while its batch is in flight is not completed."""
+
+    send_batch = netsuite_dispatch._send_batch
+
+    def _send_while_reviewer_edits(client, batch, report_ids):
+        send_batch(client, batch, report_ids)
+        if batch.id == 1:
+            report = db.session.get(ExpenseReport, report_ids[0])
+            report.status = "Pending Review"
+            db.session.flush()
+
+    monkeypatch.setattr(netsuite_dispatch, "_send_batch", _send_while_reviewer_edits)
+
+    summary = netsuite_dispatch.dispatch_pending_reports()
+
+    assert summary.reports_completed == 4
+    assert db.session.get(ExpenseReport, 1).status == "Pending Review"
+    first_batch = db.session.get(NetSuiteDispatchBatch, 1)
+    assert first_batch.status == "Sent"
+    assert "1 report(s) changed during dispatch" in first_batch.error
+
+
+def test_report_held_back_mid_batch_is_sent_after_approval(
+    dispatch_app, monkeypatch
+) -> None:
+    """Ensure an edited report leaves its sent batch and goes out in a new one."""
+
+    _app, client = dispatch_app
+    send_batch = netsuite_dispatch._send_batch
+
+    def _send_while_reviewer_edits(client, batch, report_ids):
+        send_batch(client, batch, report_ids)
+        if batch.id == 1:
+            report = db.session.get(ExpenseReport, report_ids[0])
+            report.status = "Pending Review"
+            db.session.flush()
+
+    monkeypatch.setattr(netsuite_dispatch, "_send_batch", _send_while_reviewer_edits)
+    netsuite_dispatch.dispatch_pending_reports()
+
+    held_back = db.session.get(ExpenseReport, 1)
+    assert held_back.netsuite_batch_id is None
+    held_back.status = "Pending Upload"
+    db.session.commit()
+
+    summary = netsuite_dispatch.dispatch_pending_reports()
+
+    assert (summary.batches_sent, summary.reports_completed) == (1, 1)
+    db.session.refresh(held_back)
+    assert held_back.status == "Completed"
+    assert held_back.netsuite_batch_id == 4
+    assert f"/inbound/{held_back.netsuite_batch.filename}" in client.files
+
+
+def test_parallel_dispatchers_split_batches(dispatch_app, monkeypatch) -> None:
+    """Ensure a batch claimed by another dispatcher is skipped, not resent."""
+
+    _app, client = dispatch_app
+    plan = netsuite_dispatch.plan_dispatch_batches
+    claims = []
+
+    def _plan_then_lose_race():
+        batches = plan()
+        # A second dispatcher claims batch 2 after this one planned it.
+        claims.append(netsuite_dispatch.claim_dispatch_batch(2))
+        return batches
+
+    monkeypatch.setattr(
+        netsuite_dispatch, "plan_dispatch_batches", _plan_then_lose_race
+    )
+
+    summary = netsuite_dispatch.dispatch_pending_reports()
+
+    other_claim = claims[0]
+    assert other_claim is not None
+    assert netsuite_dispatch.claim_dispatch_batch(2) is None
+    assert (summary.batches_sent, summary.batches_skipped) == (2, 1)
+    assert f"/inbound/{other_claim.filename}" not in client.files
+    statuses = {
+        report.id: report.status
+        for report in ExpenseReport.query.order_by(ExpenseReport.id)
+    }
+    assert statuses == {
+        1: "Completed",
+        2: "Completed",
+        3: "Uploading",
+        4: "Uploading",
+        5: "Completed",
+    }
+
+
+def test_failed_and_abandoned_claims_return_to_backlog(dispatch_app) -> None:
+    """Ensure failures release reports and stale claims can be taken over."""
+
+    app, client = dispatch_app
+    client.fail_on_write = 1
+
+    with pytest.raises(netsuite_dispatch.NetSuiteDispatchError):
+        netsuite_dispatch.dispatch_pending_reports()
+
+    assert ExpenseReport.query.filter_by(status="Pending Upload").count() == 5
+    assert db.session.get(NetSuiteDispatchBatch, 1).claimed_at is None
+
+    abandoned = netsuite_dispatch.claim_dispatch_batch(2)
+    abandoned.claimed_at = datetime(2026, 1, 1)
+    db.session.commit()
+    client.fail_on_write = None
+    app.config["NETSUITE_DISPATCH_CLAIM_TIMEOUT_MINUTES"] = 5
+
+    summary = netsuite_dispatch.dispatch_pending_reports()
+
+    assert (summary.batches_sent, summary.batches_skipped) == (3, 0)
+    assert ExpenseReport.query.filter_by(status="Completed").count() == 5
@@ -0,0 +1,223 @@
+"""Tests for validate-first expense report submission."""
+
+import io
+
+import pytest
+
+from app.models import ExpenseLine, ExpenseReport
+import app.expenses as expenses_module
+from app.services.reference_data import GLAccountOption
+
+
+@pytest.fixture()
+def app_config(tmp_path):
+    """Store receipts on the local filesystem under ``tmp_path``.
+
+    Inputs:
+        tmp_path: Pytest-provided directory for stored receipts.
+
+    Outputs:
+        Overrides for the shared ``TestConfig`` in ``tests/conftest.py``.
+
+    External dependencies:
+        None.
+    """
+
+    return {
+        "EXPENSE_RECEIPT_STORAGE": "local",
+        "EXPENSE_RECEIPT_LOCAL_DIR": str(tmp_path / "receipts"),
+    }
+
+
+@pytest.fixture()
+def submission(tmp_path, monkeypatch, flask_app, seeded_users):
+    """Return ``(client, supervisor_id, receipt_dir)`` for an approved employee.
+
+    Inputs:
+        tmp_path: Directory configured for stored receipts.
+        monkeypatch: Replaces reference data and receipt derivative hooks.
+        flask_app: Shared application fixture.
+        seeded_users: Users seeded by ``tests/conftest.py``.
+
+    Outputs:
+        A client logged in as the employee, the supervisor id and the local
+        receipt directory.
+
+    External dependencies:
+        * Patches loaders and :func:`app.expenses.enqueue_receipt_derivatives`.
+    """
+
+    monkeypatch.setattr(
+        expenses_module,
+        "load_gl_accounts",
+        lambda: (GLAccountOption("6100", "6100 - Travel"),),
+    )
+    monkeypatch.setattr(expenses_module, "load_expense_types", lambda: ("Meals",))
+    monkeypatch.setattr(
+        expenses_module, "enqueue_receipt_derivatives", lambda **_kwargs: None
+    )
+
+    client = flask_app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(seeded_users.employee.id)
+        session["_fresh"] = True
+    return client, seeded_users.supervisor.id, tmp_path / "receipts"
+
+
+def _form(supervisor_id, lines, receipts=None):
+    data = {
+        "supervisor_id": str(supervisor_id),
+        "report_month": "2026-09",
+        "submit_action": "submit_review",
+        "line_date": [line[0] for line in lines],
+        "expense_type": ["Meals"] * len(lines),
+        "gl_account": [line[1] for line in lines],
+        "vendor": ["Diner"] * len(lines),
+        "description": [""] * len(lines),
+        "amount": [line[2] for line in lines],
+    }
+    for index, payload in (receipts or {}).items():
+        data[f"receipt_{index}"] = (io.BytesIO(payload), f"receipt-{index}.pdf")
+    return data
+
+
+def test_every_invalid_line_is_reported_before_any_write(submission) -> None:
+    """Ensure all line errors are flashed and nothing is stored."""
+
+    client, supervisor_id, receipt_dir = submission
+
+    response = client.post(
+        "/expenses/new",
+        data=_form(
+            supervisor_id,
+            [
+                ("2026-09-01", "6100", "10.00"),
+                ("not-a-date", "6100", "5"),
+                ("2026-09-03", "9999", "abc"),
+            ],
+            receipts={0: b"%PDF-1.4 first"},
+        ),
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        messages = [message for _category, message in session["_flashes"]]
+    assert messages == [
+        "Line 2: invalid date.",
+        "Line 3: amount must be numeric.",
+        "Line 3: select a GL account from the approved list.",
+    ]
+    assert ExpenseReport.query.count() == 0
+    assert not receipt_dir.exists() or not any(receipt_dir.rglob("*.pdf"))
+
+
+def test_blank_and_non_finite_amounts_are_rejected(submission) -> None:
+    """Ensure blank, NaN and infinite amounts are errors, not zero or stored."""
+
+    client, supervisor_id, _receipt_dir = submission
+
+    response = client.post(
+        "/expenses/new",
+        data=_form(
+            supervisor_id,
+            [
+                ("2026-09-01", "6100", ""),
+                ("2026-09-02", "6100", "NaN"),
+                ("2026-09-03", "6100", "Infinity"),
+            ],
+        ),
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        messages = [message for _category, message in session["_flashes"]]
+    assert messages == [f"Line {index}: amount must be numeric." for index in (1, 2, 3)]
+    assert ExpenseReport.query.count() == 0
+
+
+def test_amounts_too_large_for_a_line_are_rejected(submission) -> None:
+    """Ensure out-of-range amounts are line errors before receipts are stored."""
+
+    client, supervisor_id, receipt_dir = submission
+
+    response = client.post(
+        "/expenses/new",
+        data=_form(
+            supervisor_id,
+            [
+                ("2026-09-01", "6100", "1e30"),
+                ("2026-09-02", "6100", "99999999.995"),
+            ],
+            receipts={0: b"%PDF-1.4 first"},
+        ),
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        messages = [message for _category, message in session["_flashes"]]
+    assert messages == [
+        f"Line {index}: amount must be less than 100,000,000." for index in (1, 2)
+    ]
+    assert ExpenseReport.query.count() == 0
+    assert not receipt_dir.exists() or not any(receipt_dir.rglob("*.pdf"))
+
+
+def test_valid_report_bulk_inserts_lines_with_totals(submission) -> None:
+    """Ensure a valid submission stores every line, receipt and total."""
+
+    client, supervisor_id, receipt_dir = submission
+
+    response = client.post(
+        "/expenses/new",
+        data=_form(
+            supervisor_id,
+            [
+                ("2026-09-01", "6100", "10.25"),
+                ("", "", ""),
+                ("2026-09-02", "6100", "4.75"),
+            ],
+            receipts={2: b"%PDF-1.4 second"},
+        ),
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 302
+    report = ExpenseReport.query.one()
+    assert (report.line_count, report.total_amount) == (2, 15)
+    assert report.status == "Pending Review"
+    lines = ExpenseLine.query.order_by(ExpenseLine.date.asc()).all()
+    assert [line.review_status for line in lines] == ["Pending", "Pending"]
+    assert lines[0].receipt_url is None
+    assert lines[1].receipt_digest is not None
+    assert len(list(receipt_dir.rglob("*.pdf"))) == 1
+
+
+def test_receipts_without_storage_warn_the_employee(submission) -> None:
+    """Ensure receipts dropped for lack of storage are reported to the user."""
+
+    client, supervisor_id, _receipt_dir = submission
+    client.application.config["EXPENSE_RECEIPT_STORAGE"] = ""
+    client.application.config["EXPENSE_RECEIPT_LOCAL_DIR"] = ""
+
+    response = client.post(
+        "/expenses/new",
+        data=_form(
+            supervisor_id,
+            [("2026-09-01", "6100", "10.25")],
+            receipts={0: b"%PDF-1.4 only"},
+        ),
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        flashes = session["_flashes"]
+    assert (
+        "warning",
+        "Receipts were not saved because receipt storage is not configured. "
+        "Contact an administrator.",
+    ) in flashes
+    assert ExpenseLine.query.one().receipt_url is None
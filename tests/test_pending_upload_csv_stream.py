@@ -0,0 +1,80 @@
+"""Tests for the streaming NetSuite CSV export."""
+
+from datetime import date
+from decimal import Decimal
+
+from app import create_app
+from app.models import ExpenseLine, ExpenseReport, User, db
+from app.services.expense_workflow import (
+    format_pending_reports_csv,
+    iter_pending_upload_csv,
+)
+
+
+class TestConfig:
+    """Minimal Flask configuration backed by an in-memory SQLite database."""
+
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    STARTUP_DB_CHECKS = False
+
+
+def test_iter_pending_upload_csv_matches_in_memory_export() -> None:
+    """Ensure streamed chunks concatenate to the in-memory CSV document.
+
+    Inputs:
+        None. Seeds pending-upload reports with approved and rejected lines
+        plus a draft report that must be excluded.
+
+    Outputs:
+        None. Asserts chunking and byte-for-byte equality with
+        :func:`format_pending_reports_csv`.
+
+    External dependencies:
+        Calls :func:`app.create_app` and the CSV helpers in
+        :mod:`app.services.expense_workflow`.
+    """
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        employee = User(email="e@example.com", password_hash="x", role="employee")
+        supervisor = User(email="s@example.com", password_hash="x", role="supervisor")
+        db.session.add_all([employee, supervisor])
+        db.session.flush()
+
+        for status in ("Pending Upload", "Pending Upload", "Draft"):
+            report = ExpenseReport(
+                employee_id=employee.id,
+                supervisor_id=supervisor.id,
+                report_month=date(2026, 4, 1),
+                status=status,
+            )
+            report.lines = [
+                ExpenseLine(
+                    date=date(2026, 4, day),
+                    expense_type="Meals",
+                    gl_account="6100",
+                    vendor="Cafe, Inc.",
+                    amount=Decimal("4.10") * day,
+                    review_status="Rejected" if day == 2 else "Approved",
+                )
+                for day in (1, 2, 3)
+            ]
+            db.session.add(report)
+        db.session.commit()
+
+        pending = (
+            ExpenseReport.query.filter_by(status="Pending Upload")
+            .order_by(ExpenseReport.id.asc())
+            .all()
+        )
+        expected = format_pending_reports_csv(pending)
+        chunks = list(iter_pending_upload_csv(chunk_rows=1))
+
+        assert len(chunks) == 4
+        assert "".join(chunks) == expected
+        assert expected.count("\n") == 5
@@ -0,0 +1,157 @@
+"""Tests for receipt thumbnail and preview generation."""
+
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app.models import ExpenseLine, ExpenseReport, ReceiptBlob, db
+from app.services.receipt_derivatives import (
+    derivative_key,
+    enqueue_receipt_derivatives,
+)
+from app.services.receipts import (
+    PendingReceipt,
+    get_receipt_backend,
+    upload_report_receipts,
+)
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture()
+def app_config():
+    """Run jobs inline and keep receipts in the in-memory storage backend.
+
+    Inputs:
+        None.
+
+    Outputs:
+        Overrides for the shared ``TestConfig`` in ``tests/conftest.py``.
+
+    External dependencies:
+        None.
+    """
+
+    return {
+        "BACKGROUND_JOB_EXECUTOR": "inline",
+        "EXPENSE_RECEIPT_STORAGE": "memory",
+    }
+
+
+def _photo(width: int, height: int) -> bytes:
+    """Return a JPEG photo of the given dimensions."""
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _pending(index: int, payload: bytes, filename: str, content_type: str):
+    return PendingReceipt(
+        line_index=index,
+        file_storage=FileStorage(
+            stream=io.BytesIO(payload), filename=filename, content_type=content_type
+        ),
+    )
+
+
+@pytest.fixture()
+def review_app(flask_app, seeded_users):
+    """Return the app with a supervisor and a report whose receipts are stored.
+
+    Inputs:
+        flask_app: Shared application fixture.
+        seeded_users: Users seeded by ``tests/conftest.py``.
+
+    Outputs:
+        ``(app, report_id, supervisor_id)``.
+
+    External dependencies:
+        * Stores receipts with
+          :func:`app.services.receipts.upload_report_receipts`.
+    """
+
+    employee, supervisor = seeded_users.employee, seeded_users.supervisor
+    report = ExpenseReport(
+        employee_id=employee.id,
+        supervisor_id=supervisor.id,
+        report_month=date(2026, 5, 1),
+        status="Pending Review",
+    )
+    db.session.add(report)
+    db.session.flush()
+
+    stored = upload_report_receipts(
+        [
+            _pending(0, _photo(3000, 2000), "photo.jpg", "image/jpeg"),
+            _pending(1, b"%PDF-1.4 invoice", "invoice.pdf", "application/pdf"),
+            _pending(2, b"not really a jpeg", "broken.jpg", "image/jpeg"),
+        ],
+        report_id=report.id,
+    )
+    for index in sorted(stored):
+        report.lines.append(
+            ExpenseLine(
+                date=date(2026, 5, 2),
+                expense_type="Meals",
+                gl_account="6100",
+                vendor="Cafe",
+                amount=Decimal("12.00"),
+                receipt_url=stored[index].url,
+                receipt_digest=stored[index].digest,
+            )
+        )
+    db.session.commit()
+    return flask_app, report.id, supervisor.id
+
+
+def test_derivative_job_renders_thumbnail_and_preview(review_app) -> None:
+    """Ensure images get small renditions and other files are skipped."""
+
+    enqueue_receipt_derivatives()
+
+    backend = get_receipt_backend()
+    photo, pdf, broken = (
+        line.receipt_blob for line in ExpenseLine.query.order_by(ExpenseLine.id.asc())
+    )
+    assert photo.derivative_status == "Ready"
+    assert pdf.derivative_status == "Skipped"
+    assert broken.derivative_status == "Skipped"
+    assert pdf.thumbnail_url is None
+
+    thumbnail_key = derivative_key(photo.storage_key, "thumb")
+    assert photo.thumbnail_url.endswith(thumbnail_key)
+    thumbnail = Image.open(backend.open_reader(thumbnail_key))
+    preview = Image.open(
+        backend.open_reader(derivative_key(photo.storage_key, "preview"))
+    )
+    assert thumbnail.size == (320, 213)
+    assert preview.size == (1280, 853)
+    assert ReceiptBlob.query.filter_by(derivative_status="Pending").count() == 0
+
+
+def test_review_page_shows_thumbnails(review_app) -> None:
+    """Ensure supervisors see thumbnails linking to the preview."""
+
+    app, report_id, supervisor_id = review_app
+    enqueue_receipt_derivatives()
+    photo = ReceiptBlob.query.filter_by(derivative_status="Ready").one()
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(supervisor_id)
+        session["_fresh"] = True
+
+    page = client.get(f"/expenses/supervisor/report/{report_id}")
+    assert page.status_code == 200
+    html = page.get_data(as_text=True)
+    assert f'src="{photo.thumbnail_url}"' in html
+    assert f'href="{photo.preview_url}"' in html
+    assert html.count(">View</a>") == 2
+
+    thumbnail = client.get(photo.thumbnail_url)
+    assert thumbnail.status_code == 200
+    assert thumbnail.mimetype == "image/jpeg"
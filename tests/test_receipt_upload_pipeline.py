@@ -0,0 +1,255 @@
+"""Tests for receipt storage backends and the receipt upload pipeline."""
+
+import hashlib
+import io
+import threading
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from flask import current_app
+from werkzeug.datastructures import FileStorage
+
+from app import create_app
+from app.models import ExpenseLine, ExpenseReport, ReceiptBlob, User, db
+from app.services.receipts import (
+    RECEIPT_COPY_CHUNK_SIZE,
+    InMemoryReceiptBackend,
+    LocalReceiptBackend,
+    PendingReceipt,
+    ReceiptUploadError,
+    find_duplicate_receipts,
+    get_receipt_backend,
+    receipt_report_ids,
+    upload_report_receipts,
+)
+
+
+def _receipt(index: int, payload: bytes) -> PendingReceipt:
+    """Return a pending receipt wrapping an in-memory upload."""
+
+    return PendingReceipt(
+        line_index=index,
+        file_storage=FileStorage(
+            stream=io.BytesIO(payload),
+            filename=f"receipt {index}.JPG",
+            content_type="image/jpeg",
+        ),
+    )
+
+
+class FlakyBackend(LocalReceiptBackend):
+    """Local backend that fails for one digest and records worker threads."""
+
+    def __init__(self, root, failing_digest: str) -> None:
+        super().__init__(root)
+        self.failing_digest = failing_digest
+        self.threads = set()
+
+    def store(self, key, stream, content_type):
+        self.threads.add(threading.current_thread().name)
+        if self.failing_digest in key:
+            raise OSError("disk full")
+        return super().store(key, stream, content_type)
+
+
+class CountingBackend(InMemoryReceiptBackend):
+    """In-memory backend that counts how many files were written."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.stores = 0
+
+    def store(self, key, stream, content_type):
+        self.stores += 1
+        return super().store(key, stream, content_type)
+
+
+class TestConfig:
+    """Minimal Flask configuration backed by an in-memory SQLite database."""
+
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    STARTUP_DB_CHECKS = False
+    EXPENSE_RECEIPT_UPLOAD_WORKERS = 3
+
+
+@pytest.fixture()
+def app_context(tmp_path):
+    """Push an app context with tables created and local receipt storage."""
+
+    app = create_app(TestConfig)
+    app.config["EXPENSE_RECEIPT_LOCAL_DIR"] = str(tmp_path)
+    with app.app_context():
+        db.create_all()
+        yield tmp_path
+
+
+def _sha256(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+def test_upload_report_receipts_stores_every_file(app_context) -> None:
+    """Ensure each receipt lands on disk and maps back to its line index."""
+
+    receipts = [_receipt(index, f"image-{index}".encode()) for index in range(6)]
+
+    stored = upload_report_receipts(receipts, report_id=7)
+
+    assert sorted(stored) == list(range(6))
+    for index, receipt in stored.items():
+        payload = f"image-{index}".encode()
+        assert receipt.digest == _sha256(payload)
+        assert receipt.url.startswith("/expenses/receipts/expense-receipts/sha256/")
+        assert receipt.url.endswith(f"{receipt.digest}.jpg")
+        key = receipt.url.split("/expenses/receipts/", 1)[1]
+        assert (app_context / key).read_bytes() == payload
+    assert ReceiptBlob.query.count() == 6
+
+
+def test_upload_report_receipts_rolls_back_on_failure(app_context) -> None:
+    """Ensure a failed upload removes the receipts that already succeeded."""
+
+    backend = FlakyBackend(app_context, failing_digest=_sha256(b"data-3"))
+    receipts = [_receipt(index, f"data-{index}".encode()) for index in range(5)]
+
+    with pytest.raises(ReceiptUploadError, match="disk full"):
+        upload_report_receipts(receipts, report_id=9, backend=backend)
+
+    assert not [path for path in app_context.rglob("*") if path.is_file()]
+    assert all(name.startswith("receipt-upload") for name in backend.threads)
+    assert ReceiptBlob.query.count() == 0
+
+
+def test_identical_receipts_are_stored_once_and_flagged(app_context) -> None:
+    """Ensure repeated files reuse one blob and show up as duplicates."""
+
+    backend = CountingBackend()
+    employee = User(email="e@example.com", password_hash="x", role="employee")
+    db.session.add(employee)
+    db.session.flush()
+
+    report_ids = []
+    for receipts in (
+        [_receipt(0, b"taxi"), _receipt(1, b"taxi"), _receipt(2, b"hotel")],
+        [_receipt(0, b"taxi")],
+    ):
+        report = ExpenseReport(
+            employee_id=employee.id,
+            supervisor_id=employee.id,
+            report_month=date(2026, 5, 1),
+        )
+        db.session.add(report)
+        db.session.flush()
+        stored = upload_report_receipts(receipts, report_id=report.id, backend=backend)
+        for index, receipt in stored.items():
+            report.lines.append(
+                ExpenseLine(
+                    date=date(2026, 5, 2),
+                    expense_type="Travel",
+                    gl_account="6100",
+                    vendor="Cab",
+                    amount=Decimal("10.00"),
+                    receipt_url=receipt.url,
+                    receipt_digest=receipt.digest,
+                )
+            )
+        db.session.commit()
+        report_ids.append(report.id)
+
+    assert backend.stores == 2
+    assert ReceiptBlob.query.count() == 2
+    assert len({line.receipt_url for line in ExpenseLine.query}) == 2
+
+    duplicates = find_duplicate_receipts(report_ids[1])
+    assert list(duplicates.values()) == [[report_ids[0]]]
+    first_report = find_duplicate_receipts(report_ids[0])
+    assert sorted(first_report.values()) == [[report_ids[1]], [report_ids[1]]]
+
+    taxi_key = ExpenseLine.query.first().receipt_url.split("/expenses/receipts/")[1]
+    assert sorted(receipt_report_ids(taxi_key)) == report_ids
+
+
+def test_local_backend_rejects_paths_outside_root(app_context) -> None:
+    """Ensure crafted keys cannot escape the receipt storage root."""
+
+    backend = get_receipt_backend()
+
+    assert isinstance(backend, LocalReceiptBackend)
+    with pytest.raises(ValueError):
+        backend.path_for("../outside.txt")
+
+
+class OneShotStream(io.BytesIO):
+    """Byte stream that records the largest single read request."""
+
+    def __init__(self, payload: bytes) -> None:
+        super().__init__(payload)
+        self.largest_read = 0
+
+    def read(self, size=-1):
+        requested = size if size is not None and size >= 0 else len(self.getvalue())
+        self.largest_read = max(self.largest_read, requested)
+        return super().read(size)
+
+
+def test_local_backend_streams_in_chunks_and_publishes_atomically(tmp_path) -> None:
+    """Ensure writes are chunked and partial files never appear at the key."""
+
+    backend = LocalReceiptBackend(tmp_path)
+    payload = b"%PDF" + b"x" * (3 * RECEIPT_COPY_CHUNK_SIZE)
+    stream = OneShotStream(payload)
+
+    url = backend.store("expense-receipts/1/0-a.pdf", stream, "application/pdf")
+
+    assert url == "/expenses/receipts/expense-receipts/1/0-a.pdf"
+    assert stream.largest_read == RECEIPT_COPY_CHUNK_SIZE
+    assert backend.open_reader("expense-receipts/1/0-a.pdf").read() == payload
+
+    with pytest.raises(RuntimeError):
+        with backend.open_writer(
+            "expense-receipts/1/1-b.pdf", "application/pdf"
+        ) as out:
+            out.write(b"partial")
+            raise RuntimeError("client disconnected")
+    assert [path.name for path in (tmp_path / "expense-receipts/1").iterdir()] == [
+        "0-a.pdf"
+    ]
+
+
+def test_memory_backend_round_trip() -> None:
+    """Ensure the in-memory backend stores, reads, and deletes receipts."""
+
+    backend = InMemoryReceiptBackend()
+
+    url = backend.store("expense-receipts/2/0-c.png", io.BytesIO(b"png"), "image/png")
+
+    assert url == "/expenses/receipts/expense-receipts/2/0-c.png"
+    assert backend.open_reader("expense-receipts/2/0-c.png").read() == b"png"
+    backend.delete("expense-receipts/2/0-c.png")
+    with pytest.raises(FileNotFoundError):
+        backend.open_reader("expense-receipts/2/0-c.png")
+
+
+def test_backend_selection_honours_explicit_setting(app_context) -> None:
+    """Ensure EXPENSE_RECEIPT_STORAGE picks the backend and validates config."""
+
+    config = current_app.config
+    config["EXPENSE_RECEIPT_STORAGE"] = "memory"
+    assert isinstance(get_receipt_backend(), InMemoryReceiptBackend)
+    assert get_receipt_backend() is get_receipt_backend()
+
+    config["EXPENSE_RECEIPT_STORAGE"] = "gcs"
+    with pytest.raises(ValueError, match="EXPENSE_RECEIPT_BUCKET"):
+        get_receipt_backend()
+
+    config["EXPENSE_RECEIPT_STORAGE"] = "ftp"
+    with pytest.raises(ValueError, match="Unknown receipt storage"):
+        get_receipt_backend()
+
+    config["EXPENSE_RECEIPT_STORAGE"] = ""
+    config["EXPENSE_RECEIPT_LOCAL_DIR"] = ""
+    assert get_receipt_backend() is None
@@ -0,0 +1,98 @@
+"""Tests for compiled expense reference workbook snapshots."""
+
+import os
+from pathlib import Path
+
+import openpyxl
+import pytest
+from flask import Flask
+
+import app.services.reference_data as reference_data
+from app.services.reference_data import (
+    ExpenseReferenceDataError,
+    clear_reference_cache,
+    load_reference_snapshot,
+)
+
+
+def _write_workbook(path: Path, accounts, expense_types=None) -> None:
+    """Write a reference workbook; omit ``Data List`` when types are ``None``."""
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "GL Accounts"
+    sheet.append(["Account", "Label"])
+    for row in accounts:
+        sheet.append(list(row))
+    if expense_types is not None:
+        data_list = workbook.create_sheet("Data List")
+        data_list.append(["Expense Type"])
+        for value in expense_types:
+            data_list.append([value])
+    workbook.save(path)
+    workbook.close()
+
+
+@pytest.fixture()
+def snapshot_env(tmp_path):
+    """Push an app context whose snapshots live under ``tmp_path``."""
+
+    app = Flask(__name__)
+    app.config["EXPENSE_REFERENCE_CACHE_DIR"] = str(tmp_path / "cache")
+    clear_reference_cache()
+    with app.app_context():
+        yield tmp_path
+    clear_reference_cache()
+
+
+def test_snapshot_is_compiled_once_and_shared(snapshot_env, monkeypatch) -> None:
+    """Ensure later processes load the JSON snapshot instead of the workbook."""
+
+    workbook_path = snapshot_env / "template.xlsx"
+    _write_workbook(workbook_path, [("6100", "Travel")], ["Meals"])
+
+    first = load_reference_snapshot(workbook_path)
+    assert [option.label for option in first.gl_accounts] == ["6100 - Travel"]
+    assert first.expense_types == ("Meals",)
+    assert len(list((snapshot_env / "cache").glob("*.json"))) == 1
+
+    clear_reference_cache()
+    monkeypatch.setattr(
+        reference_data,
+        "compile_reference_workbook",
+        lambda *args: pytest.fail("workbook should not be parsed again"),
+    )
+    assert load_reference_snapshot(workbook_path) == first
+
+
+def test_snapshot_refreshes_when_workbook_changes(snapshot_env) -> None:
+    """Ensure edits to the workbook are picked up without clearing caches."""
+
+    workbook_path = snapshot_env / "template.xlsx"
+    _write_workbook(workbook_path, [("6100", "Travel")], ["Meals"])
+    assert load_reference_snapshot(workbook_path) is load_reference_snapshot(
+        workbook_path
+    )
+
+    _write_workbook(workbook_path, [("6100", "Travel"), ("6200", "")], ["Meals"])
+    stat = workbook_path.stat()
+    os.utime(workbook_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    refreshed = load_reference_snapshot(workbook_path)
+    assert [option.label for option in refreshed.gl_accounts] == [
+        "6100 - Travel",
+        "6200",
+    ]
+
+
+def test_missing_workbook_and_sheet_are_reported(snapshot_env) -> None:
+    """Ensure missing files raise and missing sheets are recorded as ``None``."""
+
+    with pytest.raises(ExpenseReferenceDataError, match="could not be loaded"):
+        load_reference_snapshot(snapshot_env / "missing.xlsx")
+
+    workbook_path = snapshot_env / "template.xlsx"
+    _write_workbook(workbook_path, [("6100", "Travel")])
+    snapshot = load_reference_snapshot(workbook_path)
+    assert snapshot.expense_types is None
+    assert snapshot.gl_accounts[0].account == "6100"
@@ -0,0 +1,203 @@
+"""Tests for publishing expense reference workbooks from the admin UI."""
+
+import io
+import json
+import zipfile
+
+import openpyxl
+import pytest
+from itsdangerous import URLSafeTimedSerializer
+
+from app.models import ExpenseReferenceVersion, db
+import app.services.expense_workflow as expense_workflow
+import app.services.reference_data as reference_data
+
+
+@pytest.fixture()
+def app_config(tmp_path):
+    """Cache snapshots under ``tmp_path`` and delay the version check.
+
+    Inputs:
+        tmp_path: Pytest-provided directory for the snapshot cache.
+
+    Outputs:
+        Overrides for the shared ``TestConfig`` in ``tests/conftest.py``.
+
+    External dependencies:
+        None.
+    """
+
+    return {
+        "EXPENSE_REFERENCE_CACHE_DIR": str(tmp_path / "cache"),
+        "EXPENSE_REFERENCE_VERSION_CHECK_SECONDS": 60,
+    }
+
+
+def _workbook_bytes(accounts, expense_types=None) -> bytes:
+    """Return an ``.xlsx`` payload; omit ``Data List`` when types are ``None``."""
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "GL Accounts"
+    sheet.append(["Account", "Label"])
+    for row in accounts:
+        sheet.append(list(row))
+    if expense_types is not None:
+        data_list = workbook.create_sheet("Data List")
+        data_list.append(["Expense Type"])
+        for value in expense_types:
+            data_list.append([value])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture()
+def admin_client(tmp_path, monkeypatch, flask_app, seeded_users):
+    """Yield a logged-in super admin client with a bundled test workbook.
+
+    Inputs:
+        tmp_path: Directory holding the bundled workbook.
+        monkeypatch: Points the workbook loader at the bundled test file.
+        flask_app: Shared application fixture.
+        seeded_users: Users seeded by ``tests/conftest.py``.
+
+    Outputs:
+        Yields a :class:`flask.testing.FlaskClient` sending a signed CSRF
+        token with every request.
+
+    External dependencies:
+        * Clears :func:`app.services.reference_data.clear_reference_cache`
+          before and after the test.
+    """
+
+    bundled = tmp_path / "expense_report_template.xlsx"
+    bundled.write_bytes(_workbook_bytes([("6100", "Travel")], ["Meals"]))
+    monkeypatch.setattr(expense_workflow, "_workbook_path", lambda: bundled)
+    reference_data.clear_reference_cache()
+
+    # Admin POSTs always enforce CSRF, so sign a token the way Flask-WTF does.
+    client = flask_app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(seeded_users.admin.id)
+        session["_fresh"] = True
+        session["csrf_token"] = "raw-test-token"
+    token = URLSafeTimedSerializer(
+        flask_app.config["SECRET_KEY"], salt="wtf-csrf-token"
+    ).dumps("raw-test-token")
+    client.environ_base["HTTP_X_CSRFTOKEN"] = token
+    yield client
+    reference_data.clear_reference_cache()
+
+
+def test_uploaded_workbook_replaces_bundled_values(admin_client) -> None:
+    """Ensure a valid upload is stored and served without re-parsing."""
+
+    assert [option.account for option in expense_workflow.load_gl_accounts()] == [
+        "6100"
+    ]
+
+    response = admin_client.post(
+        "/admin/reference-workbook",
+        data={
+            "file": (
+                io.BytesIO(
+                    _workbook_bytes([("7200", "Lodging"), ("7300", "")], ["Hotel"])
+                ),
+                "reference.xlsx",
+            )
+        },
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 302
+    version = ExpenseReferenceVersion.query.one()
+    assert (version.gl_account_count, version.expense_type_count) == (2, 1)
+    assert [option.label for option in expense_workflow.load_gl_accounts()] == [
+        "7200 - Lodging",
+        "7300",
+    ]
+    assert expense_workflow.load_expense_types() == ("Hotel",)
+
+    page = admin_client.get("/admin/reference-workbook")
+    assert page.status_code == 200
+    assert b"reference.xlsx" in page.data
+
+
+def test_invalid_workbook_is_rejected(admin_client) -> None:
+    """Ensure uploads without required sheet values are not published."""
+
+    missing_sheet = admin_client.post(
+        "/admin/reference-workbook",
+        data={"file": (io.BytesIO(_workbook_bytes([("7200", "x")])), "ref.xlsx")},
+        content_type="multipart/form-data",
+    )
+    not_a_workbook = admin_client.post(
+        "/admin/reference-workbook",
+        data={"file": (io.BytesIO(b"plain text"), "ref.xlsx")},
+        content_type="multipart/form-data",
+    )
+
+    assert missing_sheet.status_code == 400
+    assert b"Data List sheet" in missing_sheet.data
+    assert not_a_workbook.status_code == 400
+    assert b"not a valid .xlsx workbook" in not_a_workbook.data
+    assert ExpenseReferenceVersion.query.count() == 0
+
+
+def test_zip_that_is_not_a_workbook_is_rejected(admin_client) -> None:
+    """Ensure a renamed zip archive is reported as a form error.
+
+    Inputs:
+        admin_client: Logged-in super admin client fixture.
+
+    Outputs:
+        None. Asserts the upload page re-renders with HTTP 400.
+
+    External dependencies:
+        * Posts to ``/admin/reference-workbook``.
+    """
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as bundle:
+        bundle.writestr("notes.txt", "not a workbook")
+
+    response = admin_client.post(
+        "/admin/reference-workbook",
+        data={"file": (io.BytesIO(archive.getvalue()), "ref.xlsx")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 400
+    assert b"not a valid .xlsx workbook" in response.data
+    assert ExpenseReferenceVersion.query.count() == 0
+
+
+def test_workers_pick_up_new_versions_after_check_interval(
+    admin_client, monkeypatch
+) -> None:
+    """Ensure other workers' uploads apply once the version check is due."""
+
+    clock = [1000.0]
+    monkeypatch.setattr(reference_data.time, "monotonic", lambda: clock[0])
+    assert expense_workflow.load_expense_types() == ("Meals",)
+
+    snapshot = reference_data.ReferenceSnapshot(
+        digest="0" * 64,
+        gl_accounts=(reference_data.GLAccountOption("8100", "8100 - Fuel"),),
+        expense_types=("Fuel",),
+    )
+    db.session.add(
+        ExpenseReferenceVersion(
+            digest=snapshot.digest,
+            payload=json.dumps(snapshot.to_json()),
+            gl_account_count=1,
+            expense_type_count=1,
+        )
+    )
+    db.session.commit()
+
+    clock[0] += 30
+    assert expense_workflow.load_expense_types() == ("Meals",)
+    clock[0] += 31
+    assert expense_workflow.load_expense_types() == ("Fuel",)
@@ -0,0 +1,90 @@
+"""Tests for SQL-aggregated expense report summaries."""
+
+from datetime import date
+from decimal import Decimal
+
+from app import create_app
+from app.models import ExpenseLine, ExpenseReport, User, db
+from app.services.expense_workflow import summarize_reports
+
+
+class TestConfig:
+    """Minimal Flask configuration backed by an in-memory SQLite database."""
+
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    STARTUP_DB_CHECKS = False
+
+
+def _line(amount: str, review_status: str) -> ExpenseLine:
+    """Return an unsaved expense line with the given amount and review state."""
+
+    return ExpenseLine(
+        date=date(2026, 2, 3),
+        expense_type="Meals",
+        gl_account="6100",
+        vendor="Cafe",
+        amount=Decimal(amount),
+        review_status=review_status,
+    )
+
+
+def test_summarize_reports_returns_grouped_totals() -> None:
+    """Ensure counts, totals, and review aggregates come back per report.
+
+    Inputs:
+        None. Seeds one reviewed report and one report without lines.
+
+    Outputs:
+        None. Asserts each :class:`ReportSummary` field.
+
+    External dependencies:
+        Calls :func:`app.create_app` and
+        :func:`app.services.expense_workflow.summarize_reports`.
+    """
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        employee = User(email="e@example.com", password_hash="x", role="employee")
+        supervisor = User(email="s@example.com", password_hash="x", role="supervisor")
+        db.session.add_all([employee, supervisor])
+        db.session.flush()
+
+        reviewed = ExpenseReport(
+            employee_id=employee.id,
+            supervisor_id=supervisor.id,
+            report_month=date(2026, 2, 1),
+            status="Draft",
+        )
+        reviewed.lines = [
+            _line("12.50", "Approved"),
+            _line("7.25", "Approved"),
+            _line("40.00", "Rejected"),
+        ]
+        empty = ExpenseReport(
+            employee_id=employee.id,
+            supervisor_id=supervisor.id,
+            report_month=date(2026, 3, 1),
+        )
+        db.session.add_all([reviewed, empty])
+        db.session.commit()
+
+        summaries = summarize_reports(
+            ExpenseReport.employee_id == employee.id,
+            order_by=(ExpenseReport.id.asc(),),
+            eager=(ExpenseReport.supervisor,),
+        )
+
+        assert [summary.report.id for summary in summaries] == [reviewed.id, empty.id]
+        first, second = summaries
+        assert first.line_count == 3
+        assert first.total_amount == Decimal("59.75")
+        assert first.approved_total == Decimal("19.75")
+        assert first.rejected_count == 1
+        assert second.line_count == 0
+        assert second.total_amount == Decimal("0.00")
+        assert second.rejected_count == 0
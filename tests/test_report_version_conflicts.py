@@ -0,0 +1,124 @@
+"""Tests for optimistic locking of concurrent expense report reviews."""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import update
+
+from app.models import ExpenseLine, ExpenseReport, db
+from app.services.expense_workflow import (
+    ReportConflictError,
+    apply_bulk_review_action,
+    commit_report_review,
+)
+
+
+@pytest.fixture()
+def review_app(flask_app, seeded_users):
+    """Return ``(app, supervisor_id, report_id)`` for a two-line report.
+
+    Inputs:
+        flask_app: Shared application fixture.
+        seeded_users: Users seeded by ``tests/conftest.py``.
+
+    Outputs:
+        The app, the reviewing supervisor's id and the Pending Review report.
+
+    External dependencies:
+        Writes rows through :data:`app.models.db.session`.
+    """
+
+    employee, supervisor = seeded_users.employee, seeded_users.supervisor
+    report = ExpenseReport(
+        employee_id=employee.id,
+        supervisor_id=supervisor.id,
+        report_month=date(2026, 9, 1),
+        status="Pending Review",
+    )
+    report.lines = [
+        ExpenseLine(
+            date=date(2026, 9, 1),
+            expense_type="Travel",
+            gl_account="6100",
+            vendor="Vendor",
+            amount=Decimal("2.00"),
+        )
+        for _ in range(2)
+    ]
+    db.session.add(report)
+    db.session.commit()
+    return flask_app, supervisor.id, report.id
+
+
+def _review_client(app, supervisor_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(supervisor_id)
+        session["_fresh"] = True
+    return client
+
+
+def test_review_form_renders_version_and_accepts_current_one(review_app) -> None:
+    """Ensure a review against the current version commits and bumps it."""
+
+    app, supervisor_id, report_id = review_app
+    client = _review_client(app, supervisor_id)
+
+    page = client.get(f"/expenses/supervisor/report/{report_id}")
+    response = client.post(
+        f"/expenses/supervisor/report/{report_id}",
+        data={"bulk_action": "approve_all", "report_version": "1"},
+    )
+
+    assert 'name="report_version" value="1"' in page.get_data(as_text=True)
+    assert response.status_code == 302
+    report = db.session.get(ExpenseReport, report_id)
+    assert (report.status, report.version_id) == ("Pending Upload", 2)
+
+
+def test_stale_review_form_is_rejected_without_changes(review_app) -> None:
+    """Ensure a second reviewer's stale form is bounced back for a retry."""
+
+    app, supervisor_id, report_id = review_app
+    db.session.execute(
+        update(ExpenseReport)
+        .where(ExpenseReport.id == report_id)
+        .values(version_id=ExpenseReport.version_id + 1)
+    )
+    db.session.commit()
+    client = _review_client(app, supervisor_id)
+
+    response = client.post(
+        f"/expenses/supervisor/report/{report_id}",
+        data={"bulk_action": "approve_all", "report_version": "1"},
+    )
+
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith(
+        f"/expenses/supervisor/report/{report_id}"
+    )
+    with client.session_transaction() as session:
+        messages = [message for _category, message in session["_flashes"]]
+    assert "changed by another reviewer" in messages[0]
+    assert ExpenseLine.query.filter_by(review_status="Pending").count() == 2
+
+
+def test_concurrent_commit_raises_conflict_and_rolls_back(review_app) -> None:
+    """Ensure a commit racing another writer raises a retryable conflict."""
+
+    _app, _supervisor_id, report_id = review_app
+    report = db.session.get(ExpenseReport, report_id)
+    apply_bulk_review_action(report, action="approve_all")
+    # Another reviewer commits first.
+    with db.engine.begin() as connection:
+        connection.execute(
+            update(ExpenseReport.__table__)
+            .where(ExpenseReport.__table__.c.id == report_id)
+            .values(version_id=5)
+        )
+
+    with pytest.raises(ReportConflictError):
+        commit_report_review(report)
+
+    assert db.session.get(ExpenseReport, report_id).status == "Pending Review"
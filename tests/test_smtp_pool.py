@@ -0,0 +1,254 @@
+"""Tests for pooled SMTP sessions against a local stand-in server."""
+
+import smtplib
+import socketserver
+import threading
+from email.message import EmailMessage
+
+import pytest
+
+from app import create_app
+from app.models import EmailDispatchLog, db
+from app.services.mail import send_email
+from app.services.smtp_pool import (
+    SMTPConnectionPool,
+    SMTPSettings,
+    reset_smtp_pool,
+)
+
+
+class TestConfig:
+    """Minimal Flask configuration backed by an in-memory SQLite database."""
+
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    STARTUP_DB_CHECKS = False
+    MAIL_DEFAULT_SENDER = "quote@freightservices.net"
+    MAIL_ALLOWED_SENDER_DOMAIN = "freightservices.net"
+    MAIL_USE_TLS = False
+    MAIL_USE_SSL = False
+    MAIL_USERNAME = None
+    MAIL_PASSWORD = None
+
+
+class _StandInHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue: enough for :mod:`smtplib` to send messages."""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self) -> None:
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self._reply("220 stand-in ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self._reply("250 stand-in")
+            elif command.startswith("NOOP"):
+                with server.lock:
+                    server.noops += 1
+                self._reply("250 OK")
+            elif command.startswith(("MAIL", "RCPT", "RSET")):
+                self._reply("250 OK")
+            elif command.startswith("DATA"):
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b".\r\n", b""):
+                        break
+                    body.append(data_line)
+                with server.lock:
+                    server.messages.append(b"".join(body))
+                self._reply("250 OK")
+                if server.drop_after_message:
+                    return
+            elif command.startswith("QUIT"):
+                with server.lock:
+                    server.quits += 1
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _StandInServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.noops = 0
+        self.quits = 0
+        self.messages = []
+        self.drop_after_message = False
+
+
+@pytest.fixture()
+def smtp_server():
+    """Yield a running stand-in SMTP server on an ephemeral port.
+
+    Inputs:
+        None.
+
+    Outputs:
+        Yields a :class:`_StandInServer` counting connections, NOOPs, QUITs and
+        messages; it is shut down after the test.
+
+    External dependencies:
+        Binds a loopback TCP socket on an ephemeral port.
+    """
+
+    server = _StandInServer()
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _message(index: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "quote@freightservices.net"
+    message["To"] = f"user{index}@example.com"
+    message["Subject"] = f"Message {index}"
+    message.set_content("Hello")
+    return message
+
+
+def _settings(server) -> SMTPSettings:
+    return SMTPSettings(smtplib.SMTP, *server.server_address)
+
+
+def test_burst_reuses_one_connection(smtp_server) -> None:
+    """Ensure consecutive sends share a single SMTP session.
+
+    Inputs:
+        smtp_server: Running stand-in SMTP server fixture.
+
+    Outputs:
+        None. Asserts five messages arrive over one connection that is closed
+        with a single QUIT.
+
+    External dependencies:
+        Uses :class:`app.services.smtp_pool.SMTPConnectionPool`.
+    """
+
+    pool = SMTPConnectionPool()
+    for index in range(5):
+        pool.send_message(_settings(smtp_server), _message(index))
+    pool.close_all()
+
+    assert len(smtp_server.messages) == 5
+    assert smtp_server.connections == 1
+    assert smtp_server.quits == 1
+
+
+def test_dropped_session_reconnects_transparently(smtp_server) -> None:
+    """Ensure a session closed by the server is replaced before raising.
+
+    Inputs:
+        smtp_server: Running stand-in SMTP server fixture.
+
+    Outputs:
+        None. Asserts both messages are delivered, using a second connection
+        after the server hangs up.
+
+    External dependencies:
+        Uses :class:`app.services.smtp_pool.SMTPConnectionPool`.
+    """
+
+    smtp_server.drop_after_message = True
+    pool = SMTPConnectionPool(noop_after=3600)
+
+    pool.send_message(_settings(smtp_server), _message(1))
+    pool.send_message(_settings(smtp_server), _message(2))
+
+    assert len(smtp_server.messages) == 2
+    assert smtp_server.connections == 2
+
+
+def test_idle_sessions_are_probed_and_expired(smtp_server) -> None:
+    """Ensure NOOP health checks and idle timeouts gate reuse.
+
+    Inputs:
+        smtp_server: Running stand-in SMTP server fixture.
+
+    Outputs:
+        None. Asserts a session idle past ``noop_after`` is probed with NOOP and
+        reused, and one idle past ``idle_timeout`` is replaced.
+
+    External dependencies:
+        Uses :class:`app.services.smtp_pool.SMTPConnectionPool` with a fake
+        clock.
+    """
+
+    clock = _Clock()
+    pool = SMTPConnectionPool(idle_timeout=60, noop_after=5, clock=clock)
+    settings = _settings(smtp_server)
+
+    pool.send_message(settings, _message(1))
+    clock.now = 10
+    pool.send_message(settings, _message(2))
+    assert (smtp_server.connections, smtp_server.noops) == (1, 1)
+
+    clock.now = 100
+    pool.send_message(settings, _message(3))
+
+    assert smtp_server.connections == 2
+    assert pool.idle_count(settings) == 1
+    pool.close_all()
+
+
+def test_send_email_uses_the_shared_pool(smtp_server, monkeypatch) -> None:
+    """Ensure ``send_email`` bursts reuse one authenticated session.
+
+    Inputs:
+        smtp_server: Running stand-in SMTP server fixture.
+        monkeypatch: Points ``MAIL_SERVER`` and ``MAIL_PORT`` at the server.
+
+    Outputs:
+        None. Asserts three sends are logged and delivered over one connection.
+
+    External dependencies:
+        * Calls :func:`app.services.mail.send_email`.
+        * Resets the shared pool with
+          :func:`app.services.smtp_pool.reset_smtp_pool`.
+    """
+
+    host, port = smtp_server.server_address
+    monkeypatch.setattr(TestConfig, "MAIL_SERVER", host, raising=False)
+    monkeypatch.setattr(TestConfig, "MAIL_PORT", port, raising=False)
+    app = create_app(TestConfig)
+    reset_smtp_pool()
+    with app.app_context():
+        db.create_all()
+        try:
+            for index in range(3):
+                send_email(f"user{index}@example.com", "Approved", "Done")
+        finally:
+            reset_smtp_pool()
+
+        assert EmailDispatchLog.query.count() == 3
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.connections == 1
@@ -0,0 +1,166 @@
+"""Tests for the keyset-paginated supervisor review queue."""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import create_app
+from app.models import ExpenseLine, ExpenseReport, User, db
+from app.services.expense_workflow import (
+    decode_report_cursor,
+    encode_report_cursor,
+    paginate_supervisor_queue,
+)
+
+
+class TestConfig:
+    """Minimal Flask configuration backed by an in-memory SQLite database."""
+
+    TESTING = True
+    SECRET_KEY = "test-secret"
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    STARTUP_DB_CHECKS = False
+
+
+@pytest.fixture()
+def app_with_queue():
+    """Yield an app whose supervisor owns five pending reports.
+
+    Inputs:
+        None.
+
+    Outputs:
+        Tuple of ``(app, supervisor_id)``. Every report shares the same
+        ``created_at`` except the last so tie-breaking on ``id`` is exercised.
+
+    External dependencies:
+        Calls :func:`app.create_app` and writes rows through
+        :mod:`app.models.db`.
+    """
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        employee = User(email="e@example.com", password_hash="x", role="employee")
+        supervisor = User(
+            email="s@example.com",
+            password_hash="x",
+            role="supervisor",
+            employee_approved=True,
+        )
+        db.session.add_all([employee, supervisor])
+        db.session.flush()
+
+        base = datetime(2026, 1, 1, 9, 0, 0)
+        for index in range(5):
+            created_at = base if index < 4 else base + timedelta(hours=1)
+            report = ExpenseReport(
+                employee_id=employee.id,
+                supervisor_id=supervisor.id,
+                report_month=date(2026, 1, 1),
+                status="Pending Review",
+                created_at=created_at,
+            )
+            report.lines = [
+                ExpenseLine(
+                    date=date(2026, 1, 2),
+                    expense_type="Meals",
+                    gl_account="6100",
+                    vendor="Cafe",
+                    amount=Decimal("10.25"),
+                )
+                for _ in range(index + 1)
+            ]
+            db.session.add(report)
+        db.session.add(
+            ExpenseReport(
+                employee_id=employee.id,
+                supervisor_id=supervisor.id,
+                report_month=date(2026, 1, 1),
+                status="Draft",
+                created_at=base,
+            )
+        )
+        db.session.commit()
+        yield app, supervisor.id
+
+
+def test_paginate_supervisor_queue_walks_pages_with_cursor(app_with_queue) -> None:
+    """Ensure keyset pages cover every pending report exactly once in order.
+
+    Inputs:
+        app_with_queue: Fixture app and supervisor with five pending reports.
+
+    Outputs:
+        None. Asserts three pages of two rows return every report once, in
+        ascending id order, and that the last page has no ``next_cursor``.
+
+    External dependencies:
+        Calls :func:`app.services.expense_workflow.paginate_supervisor_queue`.
+    """
+
+    app, supervisor_id = app_with_queue
+    with app.app_context():
+        first = paginate_supervisor_queue(supervisor_id, limit=2)
+        second = paginate_supervisor_queue(
+            supervisor_id, after=first.next_cursor, limit=2
+        )
+        third = paginate_supervisor_queue(
+            supervisor_id, after=second.next_cursor, limit=2
+        )
+
+        seen = [row.report.id for page in (first, second, third) for row in page.rows]
+        assert seen == sorted(seen)
+        assert len(seen) == len(set(seen)) == 5
+        assert third.next_cursor is None
+
+
+def test_paginate_supervisor_queue_aggregates_lines_in_sql(app_with_queue) -> None:
+    """Ensure line counts and totals are returned without loading lines.
+
+    Inputs:
+        app_with_queue: Fixture app and supervisor with five pending reports.
+
+    Outputs:
+        None. Asserts per-report line counts and totals, that ``lines`` is not
+        loaded and that ``employee`` is eager-loaded.
+
+    External dependencies:
+        Calls :func:`app.services.expense_workflow.paginate_supervisor_queue`.
+    """
+
+    app, supervisor_id = app_with_queue
+    with app.app_context():
+        page = paginate_supervisor_queue(supervisor_id, limit=10)
+
+        assert [row.line_count for row in page.rows] == [1, 2, 3, 4, 5]
+        assert page.rows[2].total_amount == Decimal("30.75")
+        assert "lines" not in page.rows[0].report.__dict__
+        assert "employee" in page.rows[0].report.__dict__
+
+
+def test_report_cursor_round_trip_and_rejects_garbage() -> None:
+    """Ensure cursors decode to their original position and reject bad input.
+
+    Inputs:
+        None.
+
+    Outputs:
+        None. Asserts an encoded cursor decodes to its ``(created_at, id)`` and
+        that malformed input raises :class:`ValueError`.
+
+    External dependencies:
+        Calls :func:`app.services.expense_workflow.encode_report_cursor` and
+        :func:`app.services.expense_workflow.decode_report_cursor`.
+    """
+
+    created_at = datetime(2026, 3, 4, 5, 6, 7, 890)
+    assert decode_report_cursor(encode_report_cursor(created_at, 42)) == (
+        created_at,
+        42,
+    )
+    with pytest.raises(ValueError):
+        decode_report_cursor("not-a-cursor")
@@ -0,0 +1,268 @@
+"""Tests for expense workflow notification emails and digests."""
+
+import socket
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models import (
+    EmailRateCounter,
+    ExpenseLine,
+    ExpenseReport,
+    OutboundEmail,
+    User,
+    WorkflowNotification,
+    db,
+)
+from app.services.workflow_notifications import (
+    notify_workflow_recipients,
+    record_report_submitted,
+    send_workflow_notifications,
+)
+
+
+def _closed_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture()
+def app_config():
+    """Queue mail for an unreachable relay and run jobs inline.
+
+    Inputs:
+        None.
+
+    Outputs:
+        Overrides for the shared ``TestConfig`` in ``tests/conftest.py``.
+
+    External dependencies:
+        None.
+    """
+
+    return {
+        "BACKGROUND_JOB_EXECUTOR": "inline",
+        "MAIL_DEFAULT_SENDER": "quote@freightservices.net",
+        "MAIL_ALLOWED_SENDER_DOMAIN": "freightservices.net",
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_PORT": _closed_port(),
+        "MAIL_USE_TLS": False,
+        "MAIL_USE_SSL": False,
+        "WORKFLOW_NOTIFICATION_MODE": "immediate",
+        "WORKFLOW_DIGEST_INTERVAL_MINUTES": 60,
+    }
+
+
+def _report(employee: User, supervisor: User, status: str) -> ExpenseReport:
+    report = ExpenseReport(
+        employee_id=employee.id,
+        supervisor_id=supervisor.id,
+        report_month=date(2026, 9, 1),
+        status=status,
+        line_count=1,
+        total_amount=Decimal("12.50"),
+    )
+    report.lines = [
+        ExpenseLine(
+            date=date(2026, 9, 1),
+            expense_type="Travel",
+            gl_account="6100",
+            vendor="Vendor",
+            amount=Decimal("12.50"),
+        )
+    ]
+    db.session.add(report)
+    db.session.flush()
+    return report
+
+
+@pytest.fixture()
+def notify_app(make_app):
+    """Return a factory building ``(app, supervisor, employees)`` for a mode.
+
+    Inputs:
+        make_app: Shared application factory fixture.
+
+    Outputs:
+        Callable taking the notification mode and extra config overrides. It
+        seeds supervisor Sam Boss and three named employees.
+
+    External dependencies:
+        Writes rows through :data:`app.models.db.session`.
+    """
+
+    def _build(mode: str, **overrides):
+        app = make_app(WORKFLOW_NOTIFICATION_MODE=mode, **overrides)
+        supervisor = User(
+            email="boss@example.com",
+            password_hash="x",
+            role="supervisor",
+            employee_approved=True,
+            first_name="Sam",
+            last_name="Boss",
+        )
+        employees = [
+            User(
+                email=f"employee{index}@example.com",
+                password_hash="x",
+                role="employee",
+                employee_approved=True,
+                first_name=f"Employee{index}",
+            )
+            for index in range(3)
+        ]
+        db.session.add_all([supervisor, *employees])
+        db.session.commit()
+        return app, supervisor, employees
+
+    return _build
+
+
+def test_review_returning_report_emails_the_employee(notify_app) -> None:
+    """Ensure a rejection queues an immediate email linking to the report list.
+
+    Inputs:
+        notify_app: Factory building the app and seeded users for a mode.
+
+    Outputs:
+        None. Asserts a bulk rejection records one notification for the
+        employee and queues its email with the report month and a link to the
+        report list.
+
+    External dependencies:
+        Posts to ``/expenses/supervisor/report/<id>`` in ``immediate`` mode.
+    """
+
+    app, supervisor, employees = notify_app("immediate")
+    report = _report(employees[0], supervisor, "Pending Review")
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(supervisor.id)
+        session["_fresh"] = True
+
+    response = client.post(
+        f"/expenses/supervisor/report/{report.id}",
+        data={
+            "bulk_action": "reject_all",
+            "bulk_comment": "Missing receipt",
+            "report_version": "1",
+        },
+    )
+
+    assert response.status_code == 302
+    notification = WorkflowNotification.query.one()
+    assert notification.recipient_id == employees[0].id
+    assert notification.sent_at is not None
+    email = db.session.get(OutboundEmail, notification.outbound_email_id)
+    assert email.recipient == "employee0@example.com"
+    assert email.subject == "Your expense report was returned to draft"
+    assert "September 2026" in email.body
+    assert "http://localhost/expenses/mine" in email.body
+
+
+def test_digest_collapses_events_per_recipient(notify_app) -> None:
+    """Ensure many submissions produce one email once the interval passes.
+
+    Inputs:
+        notify_app: Factory building the app and seeded users for a mode.
+
+    Outputs:
+        None. Asserts nothing is queued before the digest interval, then one
+        email summarising the three submissions is queued and counted once
+        against the feature limit.
+
+    External dependencies:
+        Calls
+        :func:`app.services.workflow_notifications.notify_workflow_recipients`
+        and :func:`app.services.workflow_notifications.send_workflow_notifications`.
+    """
+
+    _app, supervisor, employees = notify_app("digest")
+    for employee in employees:
+        record_report_submitted(_report(employee, supervisor, "Pending Review"))
+    record_report_submitted(_report(employees[0], supervisor, "Draft"))
+    db.session.commit()
+
+    notify_workflow_recipients()
+    assert OutboundEmail.query.count() == 0
+    assert send_workflow_notifications(digest=True).emails == 0
+
+    later = datetime.utcnow() + timedelta(minutes=61)
+    summary = send_workflow_notifications(digest=True, now=later)
+
+    assert (summary.emails, summary.events) == (1, 3)
+    email = OutboundEmail.query.one()
+    assert email.recipient == "boss@example.com"
+    assert email.subject == "Expense report updates: 3 new"
+    assert email.body.startswith("Hello Sam Boss,")
+    for index in range(3):
+        assert f"Employee{index} submitted the September 2026" in email.body
+    assert EmailRateCounter.query.filter_by(scope="feature").one().count == 1
+
+
+def test_rate_limited_events_stay_pending(notify_app) -> None:
+    """Ensure events the mail limits reject are retried on the next run.
+
+    Inputs:
+        notify_app: Factory building the app and seeded users for a mode.
+
+    Outputs:
+        None. Asserts the event over the per-recipient limit stays unsent and
+        unclaimed, and is deferred again on the next run.
+
+    External dependencies:
+        Calls
+        :func:`app.services.workflow_notifications.send_workflow_notifications`.
+    """
+
+    _app, supervisor, employees = notify_app(
+        "immediate", MAIL_RATE_LIMIT_PER_RECIPIENT_PER_DAY=1
+    )
+    for employee in employees[:2]:
+        record_report_submitted(_report(employee, supervisor, "Pending Review"))
+    db.session.commit()
+
+    summary = send_workflow_notifications(digest=False)
+
+    assert (summary.emails, summary.deferred) == (1, 1)
+    pending = WorkflowNotification.query.filter(
+        WorkflowNotification.sent_at.is_(None)
+    ).one()
+    assert pending.claim_token is None
+    assert send_workflow_notifications(digest=False).deferred == 1
+
+
+def test_immediate_notify_sends_only_the_recorded_events(notify_app) -> None:
+    """Ensure a workflow request does not flush other pending notifications.
+
+    Inputs:
+        notify_app: Factory building the app and seeded users for a mode.
+
+    Outputs:
+        None. Asserts only the event passed in is sent and the earlier pending
+        event is left for the next full run.
+
+    External dependencies:
+        Calls
+        :func:`app.services.workflow_notifications.notify_workflow_recipients`
+        and :func:`app.services.workflow_notifications.send_workflow_notifications`.
+    """
+
+    _app, supervisor, employees = notify_app("immediate")
+    backlog = record_report_submitted(
+        _report(employees[0], supervisor, "Pending Review")
+    )
+    current = record_report_submitted(
+        _report(employees[1], supervisor, "Pending Review")
+    )
+    db.session.commit()
+
+    notify_workflow_recipients(current, None)
+
+    assert current.sent_at is not None
+    assert backlog.sent_at is None
+    assert OutboundEmail.query.count() == 1
+    assert send_workflow_notifications(digest=False).events == 1